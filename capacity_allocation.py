@@ -0,0 +1,156 @@
+"""
+capacity_allocation.py
+용량 제약 배분 - SKU별 최소/최대 수량 안에서 경로별 KPI 매출을 다시 맞추는 선형계획(scipy, 선택 의존성)
+- 모든 경로를 하나의 희소 선형계획으로 한 번에 풀이 (경로별 KPI 매출 등식 + SKU별 수량 범위)
+- 목적함수: 기존 최종_예측수량 대비 상대 변경량의 구간별 선형 비용 (변경이 클수록 단위 비용이 커져 여러 SKU에 나누어 배분)
+- 범위 때문에 KPI를 맞출 수 없는 경로는 KPI 차이 슬랙 변수에 큰 비용을 주어 가능한 한 가깝게 배분
+"""
+
+import importlib.util
+import time
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+
+CONSTRAINT_COLUMNS = ['최소수량', '최대수량']
+
+# 상대 변경량 구간(기존 수량 대비 비율 상한)과 구간별 단위 비용
+DEVIATION_TIERS = (0.1, 0.25, 0.5, np.inf)
+DEVIATION_COSTS = (1.0, 2.0, 4.0, 8.0)
+
+# KPI 차이(KPI 대비 비율) 단위 비용 - 수량 변경 비용보다 충분히 크게
+KPI_SLACK_COST = 1e4
+
+# KPI 차이 허용 오차 (정수 반올림 이전, KPI 대비 비율)
+KPI_TOLERANCE = 1e-6
+
+def constrained_allocation_available():
+    """scipy 설치 여부 (용량 제약 배분은 scipy.optimize.linprog 사용)"""
+    return importlib.util.find_spec('scipy') is not None
+
+def allocation_bounds(n_items, min_qty=None, max_qty=None):
+    """SKU별 (최소, 최대) 수량 배열 - 비어 있으면 0 / 제한 없음"""
+    lower = np.zeros(n_items) if min_qty is None else np.nan_to_num(np.asarray(min_qty, dtype=float), nan=0.0)
+    upper = np.full(n_items, np.inf) if max_qty is None else np.nan_to_num(np.asarray(max_qty, dtype=float), nan=np.inf)
+    lower = np.maximum(lower, 0)
+    invalid = lower > upper
+    if invalid.any():
+        raise ValueError(f"최소수량이 최대수량보다 큰 제품이 {int(invalid.sum())}개 있습니다.")
+    return lower, upper
+
+def build_allocation_problem(quantity, prices, route_codes, targets, lower, upper):
+    """
+    희소 선형계획 구성 - 변수: [수량 x (N), 구간별 증가량 u (N×T), 구간별 감소량 v (N×T), KPI 슬랙 s+ (R), s- (R)]
+    - x_i - Σ u_ik + Σ v_ik = 기존 수량 q_i
+    - Σ_{i∈r} 판매가_i × x_i / KPI_r + s+_r - s-_r = 1
+    반환값: (c, A_eq, b_eq, bounds)
+    """
+    from scipy import sparse
+
+    n_items, n_routes, n_tiers = len(quantity), len(targets), len(DEVIATION_TIERS)
+    scale = np.maximum(quantity, 1.0)
+    items = np.arange(n_items)
+
+    # 구간별 변경량 상한 (기존 수량 대비 비율 구간 폭)
+    edges = np.concatenate([[0.0], DEVIATION_TIERS])
+    widths = np.diff(edges)[None, :] * scale[:, None]
+    tier_costs = np.asarray(DEVIATION_COSTS)[None, :] / scale[:, None]
+
+    n_dev = n_items * n_tiers
+    deviation_columns = n_items + np.arange(n_dev)
+    deviation_rows = np.repeat(items, n_tiers)
+
+    target_scale = np.where(np.asarray(targets) > 0, targets, 1.0)
+    rows = np.concatenate([
+        items, deviation_rows, deviation_rows,
+        n_items + route_codes,
+        n_items + np.arange(n_routes), n_items + np.arange(n_routes)
+    ])
+    columns = np.concatenate([
+        items, deviation_columns, n_dev + deviation_columns,
+        items,
+        n_items + 2 * n_dev + np.arange(2 * n_routes)
+    ])
+    values = np.concatenate([
+        np.ones(n_items), -np.ones(n_dev), np.ones(n_dev),
+        prices / target_scale[route_codes],
+        np.ones(n_routes), -np.ones(n_routes)
+    ])
+    n_vars = n_items + 2 * n_dev + 2 * n_routes
+    A_eq = sparse.csr_matrix((values, (rows, columns)), shape=(n_items + n_routes, n_vars))
+    b_eq = np.concatenate([quantity, np.where(np.asarray(targets) > 0, 1.0, 0.0)])
+
+    c = np.concatenate([np.zeros(n_items), tier_costs.ravel(), tier_costs.ravel(), np.full(2 * n_routes, KPI_SLACK_COST)])
+    lower_bounds = np.concatenate([lower, np.zeros(2 * n_dev + 2 * n_routes)])
+    upper_bounds = np.concatenate([upper, widths.ravel(), widths.ravel(), np.full(2 * n_routes, np.inf)])
+    return c, A_eq, b_eq, np.column_stack([lower_bounds, upper_bounds])
+
+def reconcile_rounding(solved, prices, route_codes, n_routes, lower, upper):
+    """
+    선형계획 해를 정수로 반올림하고, 반올림으로 생긴 경로별 매출 차이는 범위에 여유가 있는 SKU 중
+    경로 내 매출이 가장 큰 SKU 수량에 반영 (엔진 최종 정합과 같은 방식 - 해당 SKU만 소수 수량이 될 수 있음)
+    """
+    allocated = np.clip(np.round(solved), np.ceil(lower), np.floor(np.minimum(upper, np.finfo(float).max)))
+    residual = np.bincount(route_codes, weights=prices * (solved - allocated), minlength=n_routes)
+
+    # 범위 양쪽에 1개 이상 여유가 있는 SKU 우선
+    free = (allocated - lower >= 1) & (upper - allocated >= 1)
+    revenue = np.where(free, prices * allocated, -1.0)
+    order = np.lexsort((-revenue, route_codes))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = route_codes[order][1:] != route_codes[order][:-1]
+    top = order[first]
+    top = top[prices[top] > 0]
+
+    adjusted = allocated[top] + residual[route_codes[top]] / prices[top]
+    allocated[top] = np.clip(adjusted, lower[top], upper[top])
+    return allocated
+
+def solve_constrained_allocation(forecast, min_qty=None, max_qty=None, quantity_column='최종_예측수량'):
+    """
+    SKU별 최소/최대 수량 안에서 경로별 KPI 매출을 다시 맞춘 수량 (모든 경로를 한 번에 풀이)
+    forecast: 예측 결과 (경로, SKU_ID, 제품명, 판매가, KPI매출, 수량 컬럼)
+    반환값: (SKU별 DataFrame(..., 최소수량, 최대수량, 제약_예측수량, 변경수량),
+             경로별 DataFrame(경로, KPI매출, 기존_예상매출, 제약_예상매출, KPI_차이, KPI_달성))
+    """
+    from scipy.optimize import linprog
+
+    started = time.perf_counter()
+    forecast = forecast.reset_index(drop=True)
+    routes = list(dict.fromkeys(forecast['경로']))
+    route_codes = forecast['경로'].map({route: r for r, route in enumerate(routes)}).to_numpy()
+    targets = forecast.groupby('경로', sort=False)['KPI매출'].first().reindex(routes).to_numpy(dtype=float)
+
+    quantity = forecast[quantity_column].to_numpy(dtype=float)
+    prices = forecast['판매가'].to_numpy(dtype=float)
+    lower, upper = allocation_bounds(len(forecast), min_qty, max_qty)
+
+    c, A_eq, b_eq, bounds = build_allocation_problem(quantity, prices, route_codes, targets, lower, upper)
+    result = linprog(c, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
+    if result.status != 0:
+        raise RuntimeError(f"용량 제약 배분 선형계획 풀이 실패: {result.message}")
+
+    solved = result.x[:len(forecast)]
+    allocated = reconcile_rounding(solved, prices, route_codes, len(routes), lower, upper)
+
+    products = forecast[['경로', 'SKU_ID', '제품명', '판매가', quantity_column]].copy()
+    products['최소수량'] = lower
+    products['최대수량'] = upper
+    products['제약_예측수량'] = allocated
+    products['변경수량'] = allocated - quantity
+
+    slack = result.x[-2 * len(routes):]
+    route_summary = pd.DataFrame({
+        '경로': routes,
+        'KPI매출': targets,
+        '기존_예상매출': np.bincount(route_codes, weights=prices * quantity, minlength=len(routes)),
+        '제약_예상매출': np.bincount(route_codes, weights=prices * allocated, minlength=len(routes))
+    })
+    route_summary['KPI_차이'] = route_summary['제약_예상매출'] - route_summary['KPI매출']
+    route_summary['KPI_달성'] = np.where(slack[:len(routes)] + slack[len(routes):] <= KPI_TOLERANCE, '가능', '범위 부족')
+
+    debug_print(f"용량 제약 배분: 경로 {len(routes)}개 × SKU {len(forecast)}개, 변수 {len(c)}개, "
+                f"{time.perf_counter() - started:.3f}초")
+    return products, route_summary
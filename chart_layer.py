@@ -0,0 +1,69 @@
+"""
+chart_layer.py
+차트 생성 레이어 - 데이터 버전/선택값 기반 Figure 캐시, WebGL 트레이스 전환
+(과거 이력 트레이스는 분석 기간 최대 12개월이므로 포인트를 줄이지 않고 그대로 표시)
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+
+# 프로세스 전체에서 공유하는 Figure 캐시 크기 (LRU)
+FIGURE_CACHE_SIZE = 64
+
+# 트레이스 수가 이 값을 넘으면 WebGL(Scattergl)로 전환
+WEBGL_TRACE_THRESHOLD = 20
+
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+def get_data_version(df):
+    """
+    DataFrame의 데이터 버전 반환
+    load_data에서 기록한 attrs['data_version']이 있으면 그대로 사용하고, 없으면 내용 해시로 계산
+    """
+    version = df.attrs.get('data_version') if hasattr(df, 'attrs') else None
+    if version is not None:
+        return version
+    return str(pd.util.hash_pandas_object(df, index=False).sum())
+
+def make_data_version(*parts):
+    """데이터 버전과 계산 파라미터를 묶어 하나의 버전 문자열 생성"""
+    return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+def get_cached_figure(kind, data_version, selection, builder):
+    """
+    (차트 종류, 데이터 버전, 선택값) 키로 Figure 캐시 조회
+    캐시에 없을 때만 builder()를 호출하여 Figure 생성
+    """
+    key = (kind, data_version, selection)
+
+    with _figure_cache_lock:
+        fig = _figure_cache.get(key)
+        if fig is not None:
+            _figure_cache.move_to_end(key)
+            return fig
+
+    fig = builder()
+
+    with _figure_cache_lock:
+        _figure_cache[key] = fig
+        _figure_cache.move_to_end(key)
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+
+    return fig
+
+def clear_figure_cache():
+    """Figure 캐시 초기화 (새 데이터 버전 배포 시 사용)"""
+    with _figure_cache_lock:
+        _figure_cache.clear()
+
+def scatter_trace(n_traces, **kwargs):
+    """전체 트레이스 수에 따라 Scatter 또는 Scattergl(WebGL) 트레이스 생성"""
+    if n_traces > WEBGL_TRACE_THRESHOLD:
+        return go.Scattergl(**kwargs)
+    return go.Scatter(**kwargs)
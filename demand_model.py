@@ -0,0 +1,188 @@
+"""
+demand_model.py
+글로벌 수요 예측 모델 - 전체 (경로, SKU, 월) 행으로 한 번 학습하는 HistGradientBoosting 회귀
+- 시차/이동 평균/추세 특성은 특성 저장소(feature_store)에서 월별로 조회하고 경로/판매가/KPI 특성을 더해 생성
+- 학습은 예측 대상 월 이전 데이터로만 수행하고, 대상 월의 전체 카탈로그를 한 번의 predict 호출로 예측
+"""
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+from feature_store import SalesFeatureStore, build_sales_cube
+from kpi_store import KPI_FALLBACK_EXACT
+from month_utils import month_ordinal, format_korean_month
+
+# 시차/이동 구간 설정 (개월)
+MODEL_LAGS = (1, 2, 3, 6, 12)
+MODEL_ROLLING_WINDOWS = (3, 6)
+
+# 학습 설정 (재현 가능하도록 난수 고정)
+MODEL_PARAMS = {
+    'loss': 'poisson',
+    'learning_rate': 0.05,
+    'max_iter': 300,
+    'max_leaf_nodes': 15,
+    'min_samples_leaf': 10,
+    'l2_regularization': 1.0,
+    'random_state': 0
+}
+
+# 학습 최소 행 수 - 이보다 적으면 모델을 학습하지 않음 (학습 이력 부족)
+MIN_TRAINING_ROWS = 2 * MODEL_PARAMS['min_samples_leaf']
+
+FEATURE_COLUMNS = (
+    [f'lag_{lag}' for lag in MODEL_LAGS]
+    + [f'rolling_mean_{window}' for window in MODEL_ROLLING_WINDOWS]
+    + ['rolling_std_3', 'trend_ratio', 'months_since_launch', 'month_of_year',
+       'route_code', 'price', 'kpi', 'kpi_quantity', 'route_share_3', 'kpi_share_quantity']
+)
+
+# 특성 저장소에서 조회하는 특성
+STORE_FEATURE_COLUMNS = (
+    [f'lag_{lag}' for lag in MODEL_LAGS]
+    + [f'rolling_mean_{window}' for window in MODEL_ROLLING_WINDOWS]
+    + ['rolling_std_3', 'trend_ratio']
+)
+
+def build_feature_tensor(cube, kpi_store=None, feature_store=None):
+    """
+    큐브 전체의 특성 텐서 생성 - {특성 이름: SKU × 월 배열}
+    모든 특성은 해당 월 이전 데이터(시차)와 해당 월 KPI만 사용 (대상 월 판매량 누출 없음)
+    feature_store: 큐브와 같은 행 순서의 특성 저장소 (없으면 큐브로 생성)
+    """
+    values = cube.values
+    n_skus, n_months = values.shape
+    if feature_store is None:
+        feature_store = SalesFeatureStore.from_cube(cube)
+
+    # 시차/이동 특성: 큐브에서 관측된 마지막 월까지의 판매만 사용하여 월별로 조회
+    observed = np.flatnonzero(~np.isnan(values).all(axis=0)) if n_skus > 0 else np.array([], dtype=int)
+    as_of = int(cube.month_ordinals[observed[-1]]) if len(observed) > 0 else None
+    monthly = [feature_store.features(int(ordinal), as_of) for ordinal in cube.month_ordinals]
+
+    def stack(name):
+        return np.column_stack([month[name] for month in monthly]) if monthly else np.zeros((n_skus, 0))
+
+    features = {name: stack(name) for name in STORE_FEATURE_COLUMNS}
+    recent_sum = stack('rolling_sum_3')
+
+    # 출시 후 경과 월 (첫 판매 월 기준, 판매 기록이 없으면 NaN)
+    sold = np.nan_to_num(values) > 0
+    first_sale = np.where(sold.any(axis=1), np.argmax(sold, axis=1), -1)
+    month_positions = np.arange(n_months)
+    features['months_since_launch'] = np.where(
+        first_sale[:, None] >= 0, month_positions[None, :] - first_sale[:, None], np.nan
+    )
+    features['month_of_year'] = np.broadcast_to(cube.month_ordinals % 12 + 1, (n_skus, n_months)).astype(float)
+    features['route_code'] = np.broadcast_to(cube.route_codes[:, None], (n_skus, n_months)).astype(float)
+    features['price'] = np.broadcast_to(cube.prices[:, None], (n_skus, n_months))
+
+    # 경로 × 월 KPI (해당 월 KPI가 없으면 NaN)
+    n_routes = len(cube.route_names)
+    route_kpi = np.full((n_routes, n_months), np.nan)
+    if kpi_store is not None:
+        for j, ordinal in enumerate(cube.month_ordinals):
+            route_kpi[:, j] = kpi_store.values(cube.route_names, format_korean_month(ordinal), fallback=KPI_FALLBACK_EXACT)
+    route_price = np.full(n_routes, np.nan)
+    for r in range(n_routes):
+        route_prices = cube.prices[cube.route_codes == r]
+        if np.any(~np.isnan(route_prices)):
+            route_price[r] = np.nanmean(route_prices)
+
+    # 경로 내 최근 3개월 판매 비중 (경로별 합계는 행 그룹 합산으로 한 번에 계산)
+    route_recent_sum = np.zeros((n_routes, n_months))
+    np.add.at(route_recent_sum, cube.route_codes, recent_sum)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        features['kpi'] = route_kpi[cube.route_codes]
+        features['kpi_quantity'] = (route_kpi / route_price[:, None])[cube.route_codes]
+        features['route_share_3'] = np.where(
+            route_recent_sum[cube.route_codes] > 0, recent_sum / route_recent_sum[cube.route_codes], np.nan
+        )
+        features['kpi_share_quantity'] = features['route_share_3'] * features['kpi'] / cube.prices[:, None]
+
+    return features
+
+def _design_matrix(features, rows, columns, feature_columns=FEATURE_COLUMNS):
+    """특성 텐서에서 (SKU, 월) 위치 목록의 설계 행렬 생성"""
+    return np.column_stack([features[name][rows, columns] for name in feature_columns])
+
+class GlobalDemandModel:
+    """
+    전체 SKU 공통 HistGradientBoosting 수요 모델 (train_end_ordinal 월까지의 판매로 학습)
+    feature_store: 큐브와 같은 행 순서의 특성 저장소 (대상 월별 모델이 같은 저장소를 공유)
+    """
+
+    def __init__(self, cube, kpi_store, train_end_ordinal, feature_store=None):
+        self.cube = cube.until(train_end_ordinal) if train_end_ordinal is not None else cube
+        self.kpi_store = kpi_store
+        self.feature_store = feature_store if feature_store is not None else SalesFeatureStore.from_cube(cube)
+        self.train_end_ordinal = train_end_ordinal
+        self.estimator = None
+        self.n_training_rows = 0
+        self.feature_columns = list(FEATURE_COLUMNS)
+
+    def fit(self):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        # 학습 종료 월까지 판매 월이 하나도 없으면 학습하지 않음
+        if self.train_end_ordinal is None or len(self.cube.month_ordinals) == 0:
+            return self
+
+        features = build_feature_tensor(self.cube, self.kpi_store, self.feature_store)
+
+        # 학습 행: 출시 다음 월부터 학습 종료 월까지 판매량이 관측된 (SKU, 월)
+        trainable = (features['months_since_launch'] >= 1) & ~np.isnan(self.cube.values)
+        rows, columns = np.nonzero(trainable)
+        self.n_training_rows = len(rows)
+        if self.n_training_rows < MIN_TRAINING_ROWS:
+            debug_print(f"글로벌 수요 모델 학습 생략: 학습 행 {self.n_training_rows}개 (최소 {MIN_TRAINING_ROWS}개)")
+            return self
+
+        # 학습 구간 전체가 결측인 특성은 제외 (예: KPI 이력 시작 이전에 끝나는 학습 구간의 KPI 특성)
+        X = _design_matrix(features, rows, columns)
+        observed = ~np.isnan(X).all(axis=0)
+        self.feature_columns = [name for name, keep in zip(FEATURE_COLUMNS, observed) if keep]
+        X = X[:, observed]
+        y = np.maximum(0, self.cube.values[rows, columns])
+        categorical = [name == 'route_code' for name in self.feature_columns]
+
+        self.estimator = HistGradientBoostingRegressor(categorical_features=categorical, **MODEL_PARAMS)
+        self.estimator.fit(X, y)
+        debug_print(f"글로벌 수요 모델 학습: {self.n_training_rows}행, 학습 종료 월 {format_korean_month(self.train_end_ordinal)}")
+        return self
+
+    def predict(self, month):
+        """
+        대상 월 전체 SKU 예측 (한 번의 predict 호출)
+        반환값: DataFrame(SKU_ID, 경로, ML_예측수량) - 학습 데이터가 없으면 빈 결과
+        """
+        target_ordinal = month_ordinal(month)
+        if self.estimator is None or target_ordinal is None:
+            return pd.DataFrame(columns=['SKU_ID', '경로', 'ML_예측수량'])
+
+        cube = self.cube.extend(target_ordinal)
+        features = build_feature_tensor(cube, self.kpi_store, self.feature_store)
+        column = int(np.searchsorted(cube.month_ordinals, target_ordinal))
+        if column >= len(cube.month_ordinals) or cube.month_ordinals[column] != target_ordinal:
+            return pd.DataFrame(columns=['SKU_ID', '경로', 'ML_예측수량'])
+
+        rows = np.arange(len(cube.sku_ids))
+        predictions = self.estimator.predict(_design_matrix(features, rows, np.full(len(rows), column), self.feature_columns))
+
+        return pd.DataFrame({
+            'SKU_ID': cube.sku_ids,
+            '경로': cube.routes,
+            'ML_예측수량': np.maximum(0, predictions)
+        })
+
+def train_global_demand_model(sales_history, product_info, kpi_store, target_month, feature_store=None):
+    """
+    대상 월 직전 월까지의 데이터로 글로벌 수요 모델 학습 (대상 월 실적은 학습에 사용하지 않음)
+    feature_store: 공유 특성 저장소 (주어지면 판매 큐브도 저장소에서 가져옴)
+    """
+    cube = feature_store.cube() if feature_store is not None else build_sales_cube(sales_history, product_info)
+    target_ordinal = month_ordinal(target_month)
+    train_end = target_ordinal - 1 if target_ordinal is not None else cube.last_observed_ordinal
+    return GlobalDemandModel(cube, kpi_store, train_end, feature_store).fit()
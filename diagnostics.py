@@ -0,0 +1,49 @@
+"""
+diagnostics.py
+진단(디버깅) 모드 관리 모듈
+- 콘솔 디버깅 출력은 진단 모드일 때만 수행 (환경 변수 DEMAND_DIAGNOSTICS=1)
+- 단계별 중간 결과는 생성 함수만 등록해 두고, 진단 화면에서 요청할 때 처음 한 번만 계산
+"""
+
+import os
+
+_diagnostics_enabled = os.environ.get('DEMAND_DIAGNOSTICS', '0') == '1'
+
+def diagnostics_enabled():
+    """진단 모드 여부 반환"""
+    return _diagnostics_enabled
+
+def debug_print(*args, **kwargs):
+    """진단 모드일 때만 콘솔에 출력"""
+    if _diagnostics_enabled:
+        print(*args, **kwargs)
+
+class LazyDiagnostics:
+    """
+    단계별 진단 데이터 지연 계산 저장소
+    register()로 생성 함수만 등록하고, get()으로 처음 요청될 때 계산 후 결과를 재사용
+    """
+
+    def __init__(self):
+        self._builders = {}
+        self._results = {}
+
+    def register(self, name, builder):
+        """진단 항목 생성 함수 등록 (같은 이름으로 다시 등록하면 이전 결과는 폐기)"""
+        self._builders[name] = builder
+        self._results.pop(name, None)
+
+    def get(self, name, default=None):
+        """진단 항목 조회 - 최초 조회 시에만 생성 함수 실행"""
+        if name in self._results:
+            return self._results[name]
+        if name not in self._builders:
+            return default
+
+        result = self._builders[name]()
+        self._results[name] = result
+        return result
+
+    def names(self):
+        """등록된 진단 항목 이름 목록"""
+        return list(self._builders.keys())
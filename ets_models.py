@@ -0,0 +1,215 @@
+"""
+ets_models.py
+지수평활(ETS/Holt-Winters) 모델 백엔드 - (경로, SKU) 시계열별 statsmodels 적합
+- 시계열을 묶음(batch) 단위로 프로세스 풀에 나누어 병렬 적합
+- 적합된 파라미터를 캐시하여 같은 시계열은 재적합 없이 재사용, 새 월이 추가되면 이전 파라미터로 웜스타트
+"""
+
+import hashlib
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from diagnostics import debug_print
+from month_utils import month_ordinal, format_korean_month
+
+# 모델 적합 설정
+ETS_MIN_OBSERVATIONS = 4       # 이보다 짧은 시계열은 평균으로 예측
+ETS_SEASONAL_PERIODS = 12      # 계절 주기 (월)
+ETS_BATCH_SIZE = 32            # 프로세스 풀 작업 하나에 묶는 시계열 수
+ETS_PARALLEL_MIN_SERIES = 64   # 적합할 시계열이 이보다 적으면 현재 프로세스에서 순차 적합
+ETS_WARM_START_TOLERANCE = 1.2 # 웜스타트 적합의 평균 제곱 오차가 이전 적합의 이 배수를 넘으면 처음부터 다시 적합
+
+# 적합 방식
+ETS_METHOD_HOLT = 'Holt(감쇠 추세)'
+ETS_METHOD_HOLT_WINTERS = 'Holt-Winters(감쇠 추세 + 계절성)'
+ETS_METHOD_MEAN = '평균(데이터 부족)'
+
+def build_series_matrix(monthly_matrix, last_month):
+    """
+    (경로, 제품명) × 월 판매량 행렬을 시간순 연속 월 행렬로 변환
+    last_month까지의 월만 사용하며, 판매 기록이 없는 월은 0으로 채움
+    반환값: (N × T 판매량 배열, T개 월 이름 목록)
+    """
+    last_ordinal = month_ordinal(last_month)
+    ordinals = {month: month_ordinal(month) for month in monthly_matrix.columns}
+    ordinals = {
+        month: ordinal for month, ordinal in ordinals.items()
+        if ordinal is not None and (last_ordinal is None or ordinal <= last_ordinal)
+    }
+    if not ordinals:
+        return np.zeros((len(monthly_matrix), 0)), []
+
+    end = last_ordinal if last_ordinal is not None else max(ordinals.values())
+    months = [format_korean_month(ordinal) for ordinal in range(min(ordinals.values()), end + 1)]
+    series = monthly_matrix[list(ordinals)].rename(columns=lambda month: format_korean_month(ordinals[month]))
+    return series.reindex(columns=months, fill_value=0).to_numpy(dtype=float), months
+
+def series_hash(values):
+    """시계열 값의 해시 (같은 시계열이면 적합 결과 재사용)"""
+    return hashlib.md5(np.ascontiguousarray(values, dtype=float).tobytes()).hexdigest()
+
+def fit_ets_series(values, months_ahead, warm_start=None):
+    """
+    시계열 하나에 지수평활 모델 적합 후 months_ahead개월 예측
+    - 첫 판매 이전의 0은 제외 (출시 전 기간)
+    - 2주기 이상이면 Holt-Winters(가법 계절성), 아니면 감쇠 추세 Holt
+    - warm_start(이전 적합 상태)가 주어지면 이전 파라미터에서 최적화 시작
+      (형태가 맞지 않거나 오차가 이전 적합보다 크게 나빠지면 처음부터 적합)
+    반환값: (예측 배열, 적합 상태 {'params', 'mse'} 또는 None, 적합 방식)
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    values = np.asarray(values, dtype=float)
+    nonzero = np.flatnonzero(values)
+    observed = values[nonzero[0]:] if len(nonzero) > 0 else values[:0]
+
+    if len(observed) < ETS_MIN_OBSERVATIONS:
+        level = observed.mean() if len(observed) > 0 else 0.0
+        return np.full(months_ahead, level), None, ETS_METHOD_MEAN
+
+    seasonal = 'add' if len(observed) >= 2 * ETS_SEASONAL_PERIODS else None
+    model = ExponentialSmoothing(
+        observed,
+        trend='add',
+        damped_trend=True,
+        seasonal=seasonal,
+        seasonal_periods=ETS_SEASONAL_PERIODS if seasonal else None,
+        initialization_method='estimated'
+    )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        fitted = None
+        if warm_start is not None:
+            try:
+                fitted = model.fit(start_params=warm_start['params'], use_brute=False)
+            except ValueError:
+                fitted = None
+            if fitted is not None and fitted.sse / len(observed) > warm_start['mse'] * ETS_WARM_START_TOLERANCE:
+                fitted = None
+        if fitted is None:
+            fitted = model.fit()
+
+    params_formatted = fitted.params_formatted
+    params = params_formatted.loc[params_formatted['optimized'], 'param'].to_numpy(dtype=float)
+    forecast = np.maximum(0, np.asarray(fitted.forecast(months_ahead), dtype=float))
+    if not np.all(np.isfinite(forecast)):
+        forecast = np.full(months_ahead, observed.mean())
+
+    state = {'params': params, 'mse': fitted.sse / len(observed)}
+    return forecast, state, ETS_METHOD_HOLT_WINTERS if seasonal else ETS_METHOD_HOLT
+
+def fit_ets_batch(batch):
+    """프로세스 풀 작업 단위: [(시계열, 예측 개월 수, 이전 적합 상태), ...] 묶음 적합"""
+    return [fit_ets_series(values, months_ahead, warm_start) for values, months_ahead, warm_start in batch]
+
+class EtsParameterCache:
+    """
+    (경로, SKU_ID, 제품명)별 최근 적합 결과 캐시 (프로세스 전체 공유)
+    - 같은 시계열 해시 + 같은 예측 개월 수: 적합 없이 예측 재사용
+    - 시계열이 바뀐 경우(새 월 추가 등): 저장된 파라미터로 웜스타트
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class EtsForecastResult:
+    """시계열별 지수평활 예측 결과 (행 순서는 입력 시계열 순서와 동일)"""
+
+    def __init__(self, monthly_forecasts, methods, fit_counts, months):
+        self.monthly_forecasts = monthly_forecasts  # (N, H)
+        self.methods = methods                      # (N,) 적합 방식
+        self.fit_counts = fit_counts                # {'신규 적합', '웜스타트', '재사용'}
+        self.months = months                        # 학습에 사용한 월 목록
+
+def _run_batches(batches, max_workers):
+    """묶음을 프로세스 풀에서 병렬 적합 (풀을 사용할 수 없는 환경이면 순차 적합)"""
+    n_series = sum(len(batch) for batch in batches)
+    if max_workers > 1 and n_series >= ETS_PARALLEL_MIN_SERIES:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(fit_ets_batch, batches))
+        except (OSError, BrokenProcessPool) as e:
+            debug_print(f"프로세스 풀 적합 실패 - 순차 적합으로 전환: {e}")
+    return [fit_ets_batch(batch) for batch in batches]
+
+def fit_ets_forecasts(series, keys, months_ahead=6, cache=None, max_workers=None, months=None):
+    """
+    여러 시계열의 지수평활 예측을 일괄 계산
+    series: (N × T) 판매량 배열, keys: 행별 캐시 키 (경로, SKU_ID, 제품명)
+    cache: EtsParameterCache - 주어지면 재사용/웜스타트에 사용하고 새 적합 결과를 저장
+    max_workers: 프로세스 수 (기본값: CPU 수)
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    n_rows = len(keys)
+    monthly_forecasts = np.zeros((n_rows, months_ahead))
+    methods = np.empty(n_rows, dtype=object)
+    fit_counts = {'신규 적합': 0, '웜스타트': 0, '재사용': 0}
+
+    # 캐시 조회: 재사용할 행과 적합할 행 분리
+    pending_rows = []
+    pending_tasks = []
+    hashes = [series_hash(values) for values in series]
+    for i, key in enumerate(keys):
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None and entry['series_hash'] == hashes[i] and entry['months_ahead'] == months_ahead:
+            monthly_forecasts[i] = entry['forecast']
+            methods[i] = entry['method']
+            fit_counts['재사용'] += 1
+            continue
+
+        warm_start = entry['state'] if entry is not None else None
+        fit_counts['웜스타트' if warm_start is not None else '신규 적합'] += 1
+        pending_rows.append(i)
+        pending_tasks.append((series[i], months_ahead, warm_start))
+
+    # 적합 대상만 묶음 단위로 병렬 적합
+    batches = [pending_tasks[start:start + ETS_BATCH_SIZE] for start in range(0, len(pending_tasks), ETS_BATCH_SIZE)]
+    results = [result for batch_results in _run_batches(batches, max_workers) for result in batch_results]
+
+    for i, (forecast, state, method) in zip(pending_rows, results):
+        monthly_forecasts[i] = forecast
+        methods[i] = method
+        if cache is not None:
+            cache.put(keys[i], {
+                'series_hash': hashes[i],
+                'months_ahead': months_ahead,
+                'forecast': forecast,
+                'state': state,
+                'method': method
+            })
+
+    debug_print(f"ETS 적합 - 신규 {fit_counts['신규 적합']}개, 웜스타트 {fit_counts['웜스타트']}개, 재사용 {fit_counts['재사용']}개")
+    return EtsForecastResult(monthly_forecasts, methods, fit_counts, months)
+
+def fit_ets_from_monthly_matrix(monthly_matrix, sku_ids, last_month, months_ahead=6, cache=None, max_workers=None):
+    """(경로, 제품명) × 월 판매량 행렬에서 last_month까지의 시계열로 지수평활 예측 일괄 계산"""
+    series, months = build_series_matrix(monthly_matrix, last_month)
+    keys = [
+        (route, int(sku_id), product)
+        for (route, product), sku_id in zip(monthly_matrix.index, sku_ids)
+    ]
+    return fit_ets_forecasts(series, keys, months_ahead, cache, max_workers, months)
@@ -0,0 +1,330 @@
+"""
+feature_store.py
+판매 특성 저장소 - (경로, SKU)별 월 단위 시차/이동 합계/이동 평균/추세 특성을 미리 계산해 두는 저장소
+- SKU × 월 판매량과 누적 합계를 보관하여 구간 합계를 두 열의 차이로 계산
+- 새 월이 추가되면 새 열 하나와 다음 월 특성만 계산 (SKU 수에 비례하는 작업)
+- 특성은 해당 월 이전(M-1 이하) 판매만 사용하므로 어느 엔진이든 대상 월 M의 특성을 바로 조회 가능
+  (현재 사용처: 글로벌 ML 수요 모델 demand_model)
+- verify_incremental_features(): append_month()로 추가한 월의 특성이 전체 재생성과 같은지 검증
+"""
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+from sku_index import UNKNOWN_SKU_ID
+from month_utils import month_ordinal, format_korean_month
+
+# 저장하는 시차/이동 구간 (개월) - 4개월은 판매비중/보정계수 계산 구간(M-4 ~ M-1)과 동일
+FEATURE_LAGS = tuple(range(1, 13))
+FEATURE_WINDOWS = (3, 4, 6, 12)
+
+# 초기 월 용량 (가득 차면 두 배로 확장)
+INITIAL_MONTH_CAPACITY = 24
+
+FEATURE_NAMES = (
+    [f'lag_{lag}' for lag in FEATURE_LAGS]
+    + [f'rolling_sum_{window}' for window in FEATURE_WINDOWS]
+    + [f'rolling_mean_{window}' for window in FEATURE_WINDOWS]
+    + ['rolling_std_3', 'trend_ratio']
+)
+
+class SalesCube:
+    """
+    SKU × 월 판매량 큐브 (월은 첫 판매 월부터 연속된 월 서수, 판매 기록이 없는 월은 0)
+    - sku_ids/routes/prices: 행별 SKU_ID, 경로, 판매가 (카탈로그에 없는 SKU는 NaN)
+    - until(): 학습 종료 월 이후를 잘라낸 큐브 (대상 월 실적 누출 방지)
+    - extend(): 데이터 이후 월을 NaN(미관측)으로 추가하여 미래 월의 특성 생성
+    - cumsum: 월 누적 판매량 (앞에 0 열, 선택) - 공유 큐브는 발행된 배열을 그대로 사용하여 특성 저장소가 사본 없이 조회
+    """
+
+    def __init__(self, sku_ids, routes, prices, month_ordinals, values, cumsum=None):
+        self.sku_ids = sku_ids
+        self.routes = routes
+        self.prices = prices
+        self.month_ordinals = month_ordinals
+        self.values = values
+        self.cumsum = cumsum
+        self.route_names = list(dict.fromkeys(routes))
+        self.route_codes = np.array([self.route_names.index(route) for route in routes], dtype=int)
+
+    @property
+    def last_observed_ordinal(self):
+        return int(self.month_ordinals[-1]) if len(self.month_ordinals) > 0 else None
+
+    def until(self, last_ordinal):
+        """last_ordinal까지의 월만 남긴 큐브 반환 (월 서수가 연속이므로 앞부분 뷰 - 메모리 맵도 복사하지 않음)"""
+        n_months = int(np.searchsorted(self.month_ordinals, last_ordinal, side='right'))
+        cumsum = self.cumsum[:, :n_months + 1] if self.cumsum is not None else None
+        return SalesCube(self.sku_ids, self.routes, self.prices, self.month_ordinals[:n_months], self.values[:, :n_months], cumsum)
+
+    def extend(self, last_ordinal):
+        """last_ordinal까지 미관측(NaN) 월을 추가한 큐브 반환"""
+        if len(self.month_ordinals) == 0 or last_ordinal <= self.month_ordinals[-1]:
+            return self
+        extra = np.arange(self.month_ordinals[-1] + 1, last_ordinal + 1)
+        values = np.concatenate([self.values, np.full((len(self.sku_ids), len(extra)), np.nan)], axis=1)
+        return SalesCube(self.sku_ids, self.routes, self.prices, np.concatenate([self.month_ordinals, extra]), values)
+
+def build_sales_cube(sales_history, product_info):
+    """판매 이력과 카탈로그로 SKU × 월 판매량 큐브 생성 (SKU_ID/월 서수 기준 한 번의 groupby)"""
+    sales = sales_history[sales_history['SKU_ID'] != UNKNOWN_SKU_ID]
+    ordinals = sales['월'].map(month_ordinal)
+    sales = sales[ordinals.notna()].assign(월_서수=ordinals[ordinals.notna()].astype(int))
+
+    catalog = product_info.drop_duplicates('SKU_ID').set_index('SKU_ID')
+    sku_routes = pd.concat([catalog['경로'], sales.groupby('SKU_ID')['경로'].first()])
+    sku_routes = sku_routes[~sku_routes.index.duplicated()]
+    sku_ids = np.sort(sku_routes.index.to_numpy())
+
+    if len(sales) == 0:
+        month_ordinals = np.array([], dtype=int)
+    else:
+        month_ordinals = np.arange(sales['월_서수'].min(), sales['월_서수'].max() + 1)
+
+    monthly = sales.groupby(['SKU_ID', '월_서수'])['판매수량'].sum().unstack(fill_value=0)
+    values = monthly.reindex(index=sku_ids, columns=month_ordinals, fill_value=0).to_numpy(dtype=float)
+
+    prices = catalog['판매가'].reindex(sku_ids).to_numpy(dtype=float)
+    return SalesCube(sku_ids, sku_routes.reindex(sku_ids).to_numpy(), prices, month_ordinals, values)
+
+class SalesFeatureStore:
+    """
+    SKU × 월 판매량 기반 특성 저장소
+    - features(month): 대상 월의 특성 {이름: SKU별 배열} (관측 구간 이후 월도 조회 가능, 미관측 시차는 NaN)
+    - features(month, as_of=...): as_of 월까지의 판매만 사용한 특성 (학습 종료 월 이후 실적 누출 방지)
+    - append_month(): 다음 월 판매를 추가하고 그다음 월 특성을 계산
+    - 구간에 관측 월이 없으면 이동 합계는 0, 이동 평균/표준편차는 NaN
+    - cumsum이 주어지면 values/cumsum 배열을 복사 없이 그대로 사용 (공유 큐브의 읽기 전용 메모리 맵),
+      append_month()로 월을 추가할 때 처음 한 번만 쓰기 가능한 배열로 복사
+    """
+
+    def __init__(self, sku_ids, routes, prices, first_ordinal, values, cumsum=None):
+        n_skus, n_months = values.shape
+
+        self.sku_ids = np.asarray(sku_ids)
+        self.routes = np.asarray(routes, dtype=object)
+        self.prices = np.asarray(prices, dtype=float)
+        self.first_ordinal = first_ordinal
+        self.n_months = n_months
+        self._sku_index = {int(sku_id): i for i, sku_id in enumerate(self.sku_ids)}
+
+        # 판매량, 누적 합계 (누적 배열은 앞에 0 열이 있어 cumsum[:, k] = 처음 k개월 합계)
+        if cumsum is not None:
+            self._values = values
+            self._cumsum = cumsum
+        else:
+            capacity = max(INITIAL_MONTH_CAPACITY, n_months)
+            self._values = np.zeros((n_skus, capacity))
+            self._cumsum = np.zeros((n_skus, capacity + 1))
+            self._values[:, :n_months] = values
+            self._cumsum[:, 1:n_months + 1] = np.cumsum(values, axis=1)
+
+        self._materialized = {}
+        for ordinal in range(self.first_ordinal + 1, self.first_ordinal + n_months + 1) if n_months > 0 else []:
+            self.features(ordinal)
+
+    @classmethod
+    def from_cube(cls, cube):
+        """판매 큐브로 저장소 생성 (행 순서는 큐브와 동일, 누적 합계가 있는 큐브는 배열을 복사하지 않음)"""
+        first_ordinal = int(cube.month_ordinals[0]) if len(cube.month_ordinals) > 0 else None
+        if cube.cumsum is not None:
+            return cls(cube.sku_ids, cube.routes, cube.prices, first_ordinal, cube.values, cube.cumsum)
+        return cls(cube.sku_ids, cube.routes, cube.prices, first_ordinal, np.nan_to_num(cube.values))
+
+    @property
+    def last_ordinal(self):
+        """관측된 마지막 월 서수 (판매 데이터가 없으면 None)"""
+        return self.first_ordinal + self.n_months - 1 if self.n_months > 0 else None
+
+    @property
+    def months(self):
+        """관측 월 목록 ('2025년 8월' 형식)"""
+        return [format_korean_month(self.first_ordinal + j) for j in range(self.n_months)]
+
+    @property
+    def values(self):
+        """SKU × 관측 월 판매량 (읽기 전용 뷰)"""
+        view = self._values[:, :self.n_months]
+        view.setflags(write=False)
+        return view
+
+    def cube(self):
+        """저장된 관측 월 판매량의 판매 큐브 (저장소와 같은 행 순서, 판매량/누적 합계는 읽기 전용 뷰)"""
+        month_ordinals = np.arange(self.first_ordinal, self.first_ordinal + self.n_months) if self.n_months > 0 else np.array([], dtype=int)
+        cumsum = self._cumsum[:, :self.n_months + 1]
+        cumsum.setflags(write=False)
+        return SalesCube(self.sku_ids, self.routes, self.prices, month_ordinals, self.values, cumsum)
+
+    def _observed_end(self, as_of):
+        """as_of 월까지 관측된 월 수 (관측 구간 밖이면 0 또는 전체)"""
+        if as_of is None or self.n_months == 0:
+            return self.n_months
+        return int(np.clip(as_of - self.first_ordinal + 1, 0, self.n_months))
+
+    def _compute(self, position, end):
+        """월 위치 position(관측 첫 월 기준)의 특성을 관측 월 [0, end) 범위에서 계산"""
+        n_skus = len(self.sku_ids)
+        features = {}
+
+        for lag in FEATURE_LAGS:
+            source = position - lag
+            features[f'lag_{lag}'] = self._values[:, source].copy() if 0 <= source < end else np.full(n_skus, np.nan)
+
+        windows = {}
+        for window in sorted(set(FEATURE_WINDOWS) | {3, 6}):
+            start = int(np.clip(position - window, 0, end))
+            stop = int(np.clip(position, 0, end))
+            count = stop - start
+            total = self._cumsum[:, stop] - self._cumsum[:, start]
+            windows[window] = (start, stop, count, total)
+
+        for window in FEATURE_WINDOWS:
+            _, _, count, total = windows[window]
+            features[f'rolling_sum_{window}'] = total
+            features[f'rolling_mean_{window}'] = total / count if count > 0 else np.full(n_skus, np.nan)
+
+        # 최근 3개월 표준편차 (최근 월부터 쌓아 직접 계산 - 누적 제곱합 차이는 상수 구간에서도 0이 되지 않음)
+        start, stop, count, _ = windows[3]
+        if count > 0:
+            features['rolling_std_3'] = np.std(self._values[:, start:stop][:, ::-1], axis=1)
+        else:
+            features['rolling_std_3'] = np.full(n_skus, np.nan)
+
+        mean_3 = windows[3][3] / windows[3][2] if windows[3][2] > 0 else np.full(n_skus, np.nan)
+        mean_6 = windows[6][3] / windows[6][2] if windows[6][2] > 0 else np.full(n_skus, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            features['trend_ratio'] = mean_3 / mean_6
+
+        for array in features.values():
+            array.setflags(write=False)
+        return features
+
+    def features(self, month, as_of=None):
+        """
+        대상 월 특성 조회 {특성 이름: SKU별 배열} (월 문자열 또는 월 서수)
+        as_of: 이 월 이후의 판매는 사용하지 않음 (None이면 관측된 전체 판매 사용)
+        """
+        ordinal = month if isinstance(month, (int, np.integer)) else month_ordinal(month)
+        if ordinal is None or self.n_months == 0:
+            return {name: np.full(len(self.sku_ids), np.nan) for name in FEATURE_NAMES}
+
+        # 대상 월 특성은 대상 월 이전 판매만 사용하므로 관측 범위를 대상 월 위치까지로 맞춰 캐시 키로 사용
+        # (월이 추가되어도 이미 계산한 월의 키와 값은 그대로 유효)
+        position = int(ordinal) - self.first_ordinal
+        end = int(np.clip(position, 0, self._observed_end(as_of)))
+        key = (int(ordinal), end)
+        if key not in self._materialized:
+            self._materialized[key] = self._compute(position, end)
+        return self._materialized[key]
+
+    def frame(self, month, as_of=None, names=FEATURE_NAMES):
+        """대상 월 특성 DataFrame (SKU_ID, 경로, 특성 컬럼)"""
+        features = self.features(month, as_of)
+        frame = pd.DataFrame({'SKU_ID': self.sku_ids, '경로': self.routes})
+        for name in names:
+            frame[name] = features[name]
+        return frame
+
+    def _grow(self, n_months, n_skus):
+        """
+        월 용량/SKU 행 확장 (월 용량은 두 배씩 늘려 추가 비용을 분할 상환, 새 SKU 행은 판매 0)
+        읽기 전용 배열(공유 큐브)을 감싼 저장소는 용량이 남아 있어도 쓰기 가능한 배열로 복사
+        """
+        capacity = self._values.shape[1]
+        if n_months > capacity:
+            capacity = max(n_months, capacity * 2, INITIAL_MONTH_CAPACITY)
+        writeable = self._values.flags.writeable and self._cumsum.flags.writeable
+        if capacity == self._values.shape[1] and n_skus == self._values.shape[0] and writeable:
+            return
+
+        old_rows = self._values.shape[0]
+        for name, width in [('_values', capacity), ('_cumsum', capacity + 1)]:
+            old = getattr(self, name)
+            grown = np.zeros((n_skus, width))
+            grown[:old_rows, :old.shape[1]] = old
+            setattr(self, name, grown)
+
+    def append_month(self, month, month_sales):
+        """
+        다음 월 판매 추가 (SKU 수에 비례하는 작업)
+        month_sales: 해당 월 판매 행 (SKU_ID, 경로, 판매수량) - 같은 SKU의 여러 행은 합산
+        마지막 관측 월 다음 월보다 뒤의 월이면 사이 월은 판매 0으로 채움
+        저장소에 없는 SKU는 판매 0 이력의 새 행으로 추가 (새 행이 생기면 미리 계산한 특성은 필요할 때 다시 계산)
+        """
+        ordinal = month_ordinal(month)
+        if ordinal is None:
+            raise ValueError(f"월 형식을 해석할 수 없습니다: {month}")
+        if self.n_months == 0:
+            self.first_ordinal = ordinal
+        elif ordinal <= self.last_ordinal:
+            raise ValueError(f"{month}은(는) 이미 저장된 월입니다 (마지막 월: {format_korean_month(self.last_ordinal)})")
+
+        sales = month_sales[month_sales['SKU_ID'] != UNKNOWN_SKU_ID]
+        totals = sales.groupby('SKU_ID')['판매수량'].sum()
+
+        # 새 SKU 행 추가
+        new_skus = [sku_id for sku_id in totals.index if int(sku_id) not in self._sku_index]
+        if new_skus:
+            new_routes = sales.groupby('SKU_ID')['경로'].first().reindex(new_skus).to_numpy()
+            for sku_id in new_skus:
+                self._sku_index[int(sku_id)] = len(self._sku_index)
+            self.sku_ids = np.concatenate([self.sku_ids, np.asarray(new_skus, dtype=self.sku_ids.dtype)])
+            self.routes = np.concatenate([self.routes, np.asarray(new_routes, dtype=object)])
+            self.prices = np.concatenate([self.prices, np.full(len(new_skus), np.nan)])
+            self._materialized.clear()
+
+        # 판매 기록이 없는 사이 월은 0으로 채우고 누적값 이어붙이기
+        start = self.n_months
+        stop = ordinal - self.first_ordinal + 1
+        self._grow(stop, len(self.sku_ids))
+        column = np.zeros(len(self.sku_ids))
+        column[[self._sku_index[int(sku_id)] for sku_id in totals.index]] = totals.to_numpy(dtype=float)
+        for position in range(start, stop):
+            values = column if position == stop - 1 else 0
+            self._values[:, position] = values
+            self._cumsum[:, position + 1] = self._cumsum[:, position] + values
+        self.n_months = stop
+
+        # 다음 월 특성 미리 계산
+        self.features(ordinal + 1)
+        debug_print(f"특성 저장소 월 추가: {format_korean_month(ordinal)} (SKU {len(self.sku_ids)}개)")
+        return self
+
+def build_sales_feature_store(sales_history, product_info):
+    """판매 이력과 카탈로그로 특성 저장소 생성 (판매 큐브와 같은 행 순서)"""
+    return SalesFeatureStore.from_cube(build_sales_cube(sales_history, product_info))
+
+def verify_incremental_features(cube, n_months=3, months_ahead=1):
+    """
+    증분 갱신 검증 - 마지막 n_months개월을 append_month()로 한 달씩 추가한 저장소와 전체 큐브로 다시 만든 저장소의
+    특성을 모든 관측 월 + 이후 months_ahead개월에서 비교
+    반환값: 특성별 최대 절대 차이 {이름: 차이} (NaN 위치가 다르면 inf, 모두 0이면 증분 갱신 = 전체 재생성)
+    """
+    full = SalesFeatureStore.from_cube(cube)
+    if full.n_months <= n_months:
+        return {name: 0.0 for name in FEATURE_NAMES}
+
+    split_ordinal = full.last_ordinal - n_months
+    incremental = SalesFeatureStore.from_cube(cube.until(split_ordinal))
+    for position in range(full.n_months - n_months, full.n_months):
+        column = full.values[:, position]
+        sold = np.flatnonzero(column)
+        month_sales = pd.DataFrame({'SKU_ID': full.sku_ids[sold], '경로': full.routes[sold], '판매수량': column[sold]})
+        incremental.append_month(format_korean_month(full.first_ordinal + position), month_sales)
+
+    differences = dict.fromkeys(FEATURE_NAMES, 0.0)
+    for ordinal in range(full.first_ordinal + 1, full.last_ordinal + months_ahead + 1):
+        expected, actual = full.features(ordinal), incremental.features(ordinal)
+        for name in FEATURE_NAMES:
+            if not np.array_equal(np.isnan(expected[name]), np.isnan(actual[name])):
+                differences[name] = np.inf
+                continue
+            observed = ~np.isnan(expected[name])
+            if observed.any():
+                differences[name] = max(differences[name], float(np.max(np.abs(expected[name][observed] - actual[name][observed]))))
+
+    mismatched = {name: diff for name, diff in differences.items() if diff > 0}
+    debug_print(f"특성 저장소 증분 갱신 검증: 마지막 {n_months}개월 append_month vs 전체 재생성 - "
+                + (f"불일치 {mismatched}" if mismatched else "모든 특성 일치"))
+    return differences
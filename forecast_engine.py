@@ -0,0 +1,715 @@
+"""
+forecast_engine.py
+KPI 기반 수요 예측 엔진 - 배분/보정/가중치 전략을 교체할 수 있는 단일 예측 경로
+- ForecastData: 카탈로그 × KPI 병합 결과와 과거 판매 데이터를 한 번만 준비하여 전략 간 공유
+- ForecastEngine: 판매비중 배분 → 예상매출/수량 → 보정계수 → 인기도 가중치 → KPI 정합 순서로 예측
+- 같은 ForecastData로 여러 엔진을 실행하여 전략 조합을 비교(A/B)할 수 있음
+"""
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print, diagnostics_enabled
+from sku_index import UNKNOWN_SKU_ID
+from kpi_store import KPI_FALLBACK_EXACT, KPI_FALLBACK_CARRY_FORWARD
+from month_utils import (
+    get_relative_past_months, get_following_months, latest_complete_month, month_ordinal, format_korean_month,
+    to_korean_month
+)
+from sqlite_store import database_sales_windows
+from reference_data import writable
+
+# 예측 결과 기본 컬럼
+FORECAST_COLUMNS = ['월', '경로', 'SKU_ID', '제품명', '판매가', 'KPI매출', '제품별_예상매출', '예측수량',
+                    '보정계수', '보정수량', '인기도_가중치', '최종_예측수량', '판매비중']
+
+# 판매비중/보정계수/인기도 가중치 계산에 사용하는 과거 개월 수 (M-4 ~ M-1)
+HISTORY_MONTHS = 4
+
+# 장기(다중 월) 예측 기간 (개월)
+HORIZON_MONTHS = 12
+MAX_HORIZON_MONTHS = 18
+
+def history_month_for(target_month, last_month):
+    """
+    과거 구간(M-4 ~ M-1)의 기준 월 - 대상 월과 '실적 집계 완료 마지막 월(last_month) 다음 월' 중 이른 월 ('2025년 9월' 형식)
+    실적이 없거나 집계 중인 월은 구간에 넣지 않으므로 그보다 먼 대상 월은 가장 최근 완료 구간 사용
+    """
+    ordinal = month_ordinal(target_month)
+    if ordinal is None:
+        return target_month
+    last_ordinal = month_ordinal(last_month)
+    if last_ordinal is not None:
+        ordinal = min(ordinal, last_ordinal + 1)
+    return format_korean_month(ordinal)
+
+def select_past_sales(df, sales_history, past_months):
+    """예측 대상 경로의 과거 판매 데이터"""
+    return sales_history[
+        sales_history['경로'].isin(df['경로'].unique()) &
+        sales_history['월'].isin(past_months)
+    ]
+
+def calculate_sales_ratio_from_history(df, sales_history, target_month, past_sales=None):
+    """
+    과거 실제 판매 데이터 기반으로 제품별 판매비중 계산
+    제품 매칭: sales_history와 product_info(df)의 SKU_ID 기준
+    
+    SKU별 판매량 groupby 후 경로 합계 대비 비중을 구해 카탈로그에 한 번에 결합
+    - 과거 판매가 없는 경로, 판매량 합계가 0인 경로, 판매 이력이 없는 제품은 경로 내 균등 분배
+    past_sales: ForecastData가 공유하는 과거 판매 데이터 (없으면 여기서 필터링)
+    df에 '판매비중' 컬럼을 추가하므로 공유(읽기 전용) 프레임이 전달되면 복사본에 계산
+    """
+    df = writable(df)
+    
+    # 해당 경로들의 과거 4개월 실제 판매 데이터 (M-4, M-3, M-2, M-1)
+    if past_sales is None:
+        past_sales = select_past_sales(df, sales_history, get_relative_past_months(target_month, 4))
+    
+    # SKU별 판매량 및 경로 합계 대비 비중
+    sku_totals = past_sales.groupby(['경로', 'SKU_ID'])['판매수량'].sum()
+    route_totals = sku_totals.groupby(level='경로').sum()
+    sku_shares = sku_totals.droplevel('경로') / route_totals.reindex(sku_totals.index.get_level_values('경로')).to_numpy()
+    
+    # 카탈로그에 비중 결합
+    matched_shares = df['SKU_ID'].map(sku_shares).to_numpy(dtype=float)
+    
+    # 균등 분배 비중 (경로별 제품 수 기준)
+    equal_shares = 1.0 / df.groupby('경로')['경로'].transform('size').to_numpy()
+    
+    # 판매량 합계가 있는 경로의 매칭된 제품만 실제 비중 사용, 나머지는 균등 분배
+    route_has_sales = (df['경로'].map(route_totals).fillna(0) > 0).to_numpy()
+    df['판매비중'] = np.where(route_has_sales & ~np.isnan(matched_shares), matched_shares, equal_shares)
+    
+    return df
+
+def calculate_adjustment_factors_from_history(df, sales_history, target_month, kpi_store, past_sales=None):
+    """
+    과거 데이터 기반 보정계수 계산 (KPI 목표 달성 보장)
+    1단계: 과거 데이터 기반 기본 보정계수 계산
+    2단계: KPI 목표 맞추기 위한 스케일링 팩터 적용
+    3단계: 개별 제품 보정계수를 1.0 근처로 유지하면서 전체 목표 달성
+    past_sales: ForecastData가 공유하는 과거 판매 데이터 (없으면 여기서 필터링)
+    df에 보정계수 컬럼을 추가하므로 공유(읽기 전용) 프레임이 전달되면 복사본에 계산
+    
+    제품 × 과거 월 표를 (경로, 월) KPI / (SKU_ID, 월) 실적과 병합해 한 번에 계산하고, 경로 합계는 경로 코드별 합산
+    같은 SKU_ID가 여러 행이면 경로 → 행 순서로 마지막 행의 계수를 모든 행에 사용
+    """
+    df = writable(df)
+    
+    # 비교 대상월 대비 상대적으로 과거 4개월 계산 (M-4, M-3, M-2, M-1) - KPI와 판매 실적 모두 같은 월 사용
+    past_months = get_relative_past_months(target_month, 4)
+    
+    # 디버깅을 위한 정보 출력
+    debug_print(f"=== 보정계수 계산 시작 (KPI 목표 달성 보장) ===")
+    debug_print(f"과거 월 (KPI/판매): {past_months}")
+    debug_print(f"총 제품 수: {len(df)}")
+    
+    routes = df['경로'].unique()
+    route_codes = pd.Categorical(df['경로'], categories=routes).codes
+    sku_ids = df['SKU_ID'].to_numpy()
+    
+    # 과거 월별 실제 판매 데이터 (SKU, 월) - 같은 SKU/월에 여러 행(제품명 별칭)이 있으면 첫 행 사용
+    if past_sales is None:
+        past_sales = select_past_sales(df, sales_history, past_months)
+    past_actual = past_sales.drop_duplicates(['SKU_ID', '월'])[['SKU_ID', '월', '판매수량']]
+    
+    # 경로별 과거 월 KPI (KPI 저장소에서 월별로 바로 조회, 없는 월은 NaN)
+    route_kpis = pd.DataFrame(
+        [(route, month, kpi_store.get(route, month, KPI_FALLBACK_EXACT)) for route in routes for month in past_months],
+        columns=['경로', '월', '과거_KPI']
+    ).astype({'경로': object, '월': object, '과거_KPI': float})
+    
+    # 1단계: 기본 보정계수 - 제품 × 과거 월 행에 (경로, 월) KPI와 (SKU_ID, 월) 실적 병합
+    product_months = df[['경로', 'SKU_ID', '판매가', '판매비중']].reset_index(drop=True).merge(
+        pd.DataFrame({'월': pd.Series(past_months, dtype=object)}), how='cross'
+    )
+    product_months = product_months.merge(route_kpis, on=['경로', '월'], how='left')
+    product_months = product_months.merge(past_actual, on=['SKU_ID', '월'], how='left', indicator='실적_여부')
+    
+    kpi_sales = product_months['과거_KPI'].to_numpy(dtype=float)
+    actual_sales = product_months['판매수량'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 해당 월의 예측 수량 (인기도 가중치 없이) 대비 실제 판매량, 범위 제한 (0.3 ~ 3.0)
+        month_predicted_sales = (kpi_sales * product_months['판매비중'].to_numpy(dtype=float)) / product_months['판매가'].to_numpy(dtype=float)
+        month_factors = np.clip(actual_sales / month_predicted_sales, 0.3, 3.0)
+    # KPI가 없는 월, 실적이 없는 월, 예측 수량이 0 이하인 월은 1.0
+    has_factor = ~np.isnan(kpi_sales) & (product_months['실적_여부'] == 'both').to_numpy() & (month_predicted_sales > 0)
+    month_factors = np.where(has_factor, month_factors, 1.0).reshape(len(df), len(past_months))
+    
+    # 월별 기본 보정계수의 평균 (소수 둘째 자리)
+    if past_months:
+        row_base_factors = [round(factor, 2) for factor in (month_factors.sum(axis=1) / len(past_months)).tolist()]
+    else:
+        row_base_factors = [1.0] * len(df)
+    base_by_sku = _last_value_by_sku(sku_ids, route_codes, row_base_factors)
+    base_factors = df['SKU_ID'].map(base_by_sku).fillna(1.0).to_numpy(dtype=float)
+    
+    # 2단계: KPI 목표 맞추기 위한 스케일링 팩터 계산 (기본 보정계수 적용 시 예상 총 매출 대비 목표 KPI)
+    debug_print(f"\n=== 2단계: KPI 목표 맞추기 ===")
+    expected_revenue = (df['예측수량'].to_numpy(dtype=float) * base_factors) * df['판매가'].to_numpy(dtype=float)
+    expected_total_revenue = np.bincount(route_codes, weights=expected_revenue, minlength=len(routes))
+    route_target_kpis = df.drop_duplicates('경로').set_index('경로')['KPI매출'].reindex(routes).to_numpy(dtype=float)
+    
+    scaling_factors = []
+    for route, route_kpi, route_revenue in zip(routes, route_target_kpis, expected_total_revenue):
+        if route_revenue > 0:
+            # 스케일링 팩터 범위 제한 (0.5 ~ 2.0)
+            scaling_factor = max(0.5, min(2.0, route_kpi / route_revenue))
+        else:
+            scaling_factor = 1.0
+        scaling_factors.append(scaling_factor)
+        debug_print(f"{route}: 목표 KPI {route_kpi:,.0f}, 기본 보정계수 적용 시 예상 총 매출 {route_revenue:,.0f}, "
+                    f"스케일링 팩터 {scaling_factor:.3f}")
+    
+    # 3단계: 최종 보정계수 = 기본 보정계수 × 스케일링 팩터
+    row_final_factors = (base_factors * np.asarray(scaling_factors, dtype=float)[route_codes]).tolist()
+    final_by_sku = _last_value_by_sku(sku_ids, route_codes, row_final_factors)
+    
+    if diagnostics_enabled():
+        for product, base_factor, route_code, final_factor in zip(df['제품명'], base_factors, route_codes, row_final_factors):
+            debug_print(f"  {product}: 기본={base_factor:.2f} × 스케일링={scaling_factors[route_code]:.3f} = 최종={final_factor:.3f}")
+    
+    # DataFrame에 보정계수 적용 (기본 보정계수는 KPI 시나리오 계산에서 스케일링 팩터만 다시 구할 때 사용)
+    df['기본_보정계수'] = df['SKU_ID'].map(base_by_sku).fillna(1.0)
+    df['보정계수'] = df['SKU_ID'].map(final_by_sku).fillna(1.0)
+    
+    return df
+
+def _last_value_by_sku(sku_ids, route_codes, values):
+    """행별 값을 SKU_ID 조회표로 변환 (경로 → 행 순서로 마지막 행 우선)"""
+    order = np.argsort(route_codes, kind='stable')
+    return dict(zip(sku_ids[order].tolist(), np.asarray(values, dtype=float)[order].tolist()))
+
+def calculate_dynamic_popularity_weights(df, sales_history, target_month, past_sales=None):
+    """
+    과거 판매 데이터 기반으로 동적 인기도 가중치 계산
+    
+    계산 방식:
+    1. 과거 4개월 데이터에서 제품별 판매량 추이 분석 (M-4, M-3, M-2, M-1)
+    2. 최근 2개월 평균 vs 과거 2개월 평균 비교로 추세 분석
+    3. 경로별로 정규화하여 상대적 인기도 계산
+    
+    past_sales: ForecastData가 공유하는 과거 판매 데이터 (없으면 여기서 필터링)
+    df에 인기도 가중치 컬럼을 추가하므로 공유(읽기 전용) 프레임이 전달되면 복사본에 계산
+    """
+    df = writable(df)
+    
+    # 비교 대상월 대비 상대적으로 과거 4개월 계산 (M-4, M-3, M-2, M-1)
+    past_months = get_relative_past_months(target_month, 4)
+    debug_print(f"\n🔍 인기도 가중치 계산 - 과거 4개월: {past_months}")
+    
+    if past_sales is None:
+        past_sales = select_past_sales(df, sales_history, past_months)
+    
+    # 인기도 가중치 초기화
+    df['인기도_가중치'] = 1.0
+    
+    # 최근 2개월 (전체 4개월 중 마지막 2개월: M-2, M-1) / 과거 2개월 (첫 번째 2개월: M-4, M-3)
+    recent_2months = past_months[-2:] if len(past_months) >= 2 else past_months
+    past_2months = past_months[:2] if len(past_months) >= 2 else past_months
+    
+    for route in df['경로'].unique():
+        debug_print(f"\n=== {route} 경로 인기도 가중치 계산 ===")
+        route_mask = df['경로'] == route
+        
+        # 해당 경로의 과거 실제 판매 데이터 (카탈로그 인덱스에 매칭된 SKU만)
+        route_sales = past_sales[(past_sales['경로'] == route) & (past_sales['SKU_ID'] != UNKNOWN_SKU_ID)]
+        
+        debug_print(f"📊 {route} 경로 과거 데이터 건수: {len(route_sales)}건")
+        if len(route_sales) > 0 and diagnostics_enabled():
+            debug_print(f"📅 데이터 기간: {route_sales['월'].unique()}")
+        
+        if len(route_sales) == 0:
+            # 판매 데이터가 없는 경우 모든 제품에 기본 가중치 0.001 적용
+            debug_print(f"  ⚠️ 과거 데이터 없음 - 기본 가중치 0.001 적용")
+            df.loc[route_mask, '인기도_가중치'] = 0.001
+            continue
+        
+        # SKU별 판매량 (전체 4개월 / 최근 2개월 / 과거 2개월)
+        product_total_sales = route_sales.groupby('SKU_ID')['판매수량'].sum()
+        recent_2months_sales = route_sales[route_sales['월'].isin(recent_2months)].groupby('SKU_ID')['판매수량'].sum()
+        past_2months_sales = route_sales[route_sales['월'].isin(past_2months)].groupby('SKU_ID')['판매수량'].sum()
+        total_route_sales = product_total_sales.sum()
+        
+        debug_print(f"📈 최근 2개월: {recent_2months}")
+        debug_print(f"📉 과거 2개월: {past_2months}")
+        
+        # 제품별 인기도 점수 계산
+        popularity_scores = {}
+        
+        for sku_id in df.loc[route_mask, 'SKU_ID'].unique():
+            total_sales = product_total_sales.get(sku_id, 0)
+            recent_2months_total = recent_2months_sales.get(sku_id, 0)
+            past_2months_total = past_2months_sales.get(sku_id, 0)
+            
+            # 카탈로그 인덱스에 없거나 판매량이 없는 제품은 기본값
+            if sku_id == UNKNOWN_SKU_ID or total_sales == 0:
+                popularity_scores[sku_id] = 0.001
+                debug_print(f"  ⚠️ SKU {sku_id}: 판매량 없음 - 기본값 0.001")
+                continue
+            
+            # 최근 2개월 평균 판매량
+            recent_2months_avg = recent_2months_total / 2 if recent_2months_total > 0 else 0
+            
+            # 과거 2개월 평균 판매량
+            past_2months_avg = past_2months_total / 2 if past_2months_total > 0 else 0
+            
+            # 최근 2개월 평균 vs 과거 2개월 평균 비교 (추세 비율)
+            if past_2months_avg > 0:
+                trend_ratio = recent_2months_avg / past_2months_avg
+            else:
+                trend_ratio = 1.0  # 과거 데이터가 없으면 중립
+            
+            # 판매량 규모 점수 (전체 대비 비중)
+            volume_score = total_sales / total_route_sales if total_route_sales > 0 else 0
+            
+            # 인기도 점수 = 판매량 규모 × 추세 비율
+            popularity_score = volume_score * trend_ratio
+            
+            popularity_scores[sku_id] = popularity_score
+            
+            debug_print(f"  📊 SKU {sku_id}: 총판매량={total_sales:,}, 최근2개월평균={recent_2months_avg:.1f}, "
+                  f"과거2개월평균={past_2months_avg:.1f}, 추세비율={trend_ratio:.2f}, 인기도점수={popularity_score:.3f}")
+        
+        # 인기도 점수를 가중치로 변환 (1.0 기준으로 정규화)
+        if popularity_scores:
+            max_score = max(popularity_scores.values())
+            min_score = min(popularity_scores.values())
+            
+            debug_print(f"\n📋 가중치 변환:")
+            debug_print(f"  최대 점수: {max_score:.3f}")
+            debug_print(f"  최소 점수: {min_score:.3f}")
+            
+            # 가중치 범위 조정 (0.7 ~ 1.3)
+            for sku_id, score in popularity_scores.items():
+                if max_score > min_score:
+                    # 정규화 후 범위 조정
+                    normalized_score = (score - min_score) / (max_score - min_score)
+                    weight = 0.7 + (normalized_score * 0.6)  # 0.7 ~ 1.3 범위
+                else:
+                    weight = 1.0
+                    debug_print(f"  ⚠️ 모든 점수가 동일함 - 기본 가중치 1.0 적용")
+                
+                popularity_scores[sku_id] = round(weight, 2)
+                debug_print(f"    SKU {sku_id}: {score:.3f} → {weight}")
+        
+        # 가중치 적용
+        df.loc[route_mask, '인기도_가중치'] = df.loc[route_mask, 'SKU_ID'].map(popularity_scores).fillna(1.0)
+        
+        if diagnostics_enabled():
+            for _, row in df[route_mask].iterrows():
+                debug_print(f"  ✅ {row['제품명']} (SKU {row['SKU_ID']}): 가중치 {row['인기도_가중치']}")
+    
+    return df
+
+class ForecastData:
+    """
+    예측 입력 데이터 - 전략들이 같은 준비 결과와 캐시를 공유
+    frame: 카탈로그 × KPI 병합 결과 (엔진은 복사본으로 계산하므로 변경되지 않음)
+    history_month: 과거 구간(M-4 ~ M-1)의 기준 월 ('2025년 9월' 형식으로 변환, 기본값: history_month_for(예측 대상 월,
+                   실적 집계 완료 마지막 월) - '25-Sep' 같은 미래 월 표기와 연도 경계도 월 서수로 계산)
+    sales_windows: 과거 판매 구간 조회를 공유하는 SalesWindows (없으면 SQLite 백엔드 구간 조회, 그것도 없으면
+                   sales_history에서 직접 필터링)
+    """
+
+    def __init__(self, kpi_df, product_df, sales_history=None, target_month=None, kpi_store=None,
+                 history_month=None, sales_windows=None):
+        self.frame = pd.merge(product_df, kpi_df, on='경로')
+        self.sales_history = sales_history
+        self.target_month = target_month
+        if history_month is None and target_month is not None:
+            last_month = latest_complete_month(sales_history) if sales_history is not None else None
+            history_month = history_month_for(target_month, last_month)
+        self.history_month = to_korean_month(history_month)
+        self.kpi_store = kpi_store
+        if sales_windows is None:
+            sales_windows = database_sales_windows(sales_history, self.frame['경로'].unique())
+        self.sales_windows = sales_windows
+        self._past_sales = {}
+
+    def past_months(self, months_back=HISTORY_MONTHS):
+        """과거 구간 기준 월의 과거 N개월 (M-N ~ M-1)"""
+        return get_relative_past_months(self.history_month, months_back)
+
+    def past_sales(self, months_back=HISTORY_MONTHS):
+        """예측 대상 경로의 과거 N개월 판매 데이터 (개월 수별로 한 번만 필터링)"""
+        if months_back not in self._past_sales:
+            if self.sales_windows is not None:
+                self._past_sales[months_back] = self.sales_windows.select(self.past_months(months_back))
+            else:
+                self._past_sales[months_back] = select_past_sales(
+                    self.frame, self.sales_history, self.past_months(months_back)
+                )
+        return self._past_sales[months_back]
+
+# --- 배분 전략: 경로 KPI를 제품별 판매비중(매출 비중)으로 나눔 ---
+
+class AllocationStrategy:
+    """판매비중 배분 전략 - apply()는 df에 '판매비중' 컬럼을 채워 반환"""
+    name = ''
+
+    def apply(self, data, df):
+        raise NotImplementedError
+
+class HistoricalShareAllocation(AllocationStrategy):
+    """과거 4개월 실제 판매량 비중 (판매 이력이 없으면 경로 내 균등 분배)"""
+    name = '과거 판매비중'
+
+    def apply(self, data, df):
+        return calculate_sales_ratio_from_history(df, data.sales_history, data.history_month, data.past_sales())
+
+class PriceShareAllocation(AllocationStrategy):
+    """판매가 비중 (높은 가격 제품일수록 매출 기여도가 높음)"""
+    name = '판매가 비중'
+
+    def apply(self, data, df):
+        df['판매비중'] = df['판매가'] / df.groupby('경로')['판매가'].transform('sum')
+        return df
+
+class EqualShareAllocation(AllocationStrategy):
+    """경로 내 모든 제품에 동일한 매출 비중"""
+    name = '균등 분배'
+
+    def apply(self, data, df):
+        df['판매비중'] = 1.0 / df.groupby('경로')['경로'].transform('size')
+        return df
+
+# --- 보정 전략: 제품별 '보정계수' ---
+
+class AdjustmentStrategy:
+    """보정계수 전략 - apply()는 df에 '보정계수' 컬럼을 채워 반환"""
+    name = ''
+
+    def apply(self, data, df):
+        raise NotImplementedError
+
+class HistoricalAdjustment(AdjustmentStrategy):
+    """과거 KPI 대비 실제 판매 실적 기반 보정계수 (판매 이력이 없으면 1.0)"""
+    name = '과거 실적 보정'
+
+    def apply(self, data, df):
+        if data.sales_history is None:
+            df['보정계수'] = 1.0
+            return df
+        return calculate_adjustment_factors_from_history(
+            df, data.sales_history, data.history_month, data.kpi_store, data.past_sales()
+        )
+
+class TableAdjustment(AdjustmentStrategy):
+    """
+    외부 보정계수 테이블 조회 (SKU_ID가 있으면 SKU 기준, 없으면 (경로, 제품명) 기준)
+    같은 키가 여러 행이면 첫 행 사용, 테이블에 없는 제품은 1.0
+    """
+    name = '보정계수 테이블'
+
+    def __init__(self, table, column='보정계수'):
+        self.table = table
+        self.column = column
+
+    def apply(self, data, df):
+        keys = ['SKU_ID'] if 'SKU_ID' in self.table.columns else ['경로', '제품명']
+        factors = self.table.drop_duplicates(keys).set_index(keys)[self.column]
+        df['보정계수'] = factors.reindex(pd.MultiIndex.from_frame(df[keys]) if len(keys) > 1 else df[keys[0]]) \
+            .fillna(1.0).to_numpy()
+        return df
+
+class NoAdjustment(AdjustmentStrategy):
+    """보정 없음 (보정계수 1.0)"""
+    name = '보정 없음'
+
+    def apply(self, data, df):
+        df['보정계수'] = 1.0
+        return df
+
+# --- 가중치 전략: 제품별 '인기도_가중치' (최종 예측수량에 곱함) ---
+
+class WeightingStrategy:
+    """인기도 가중치 전략 - apply()는 df에 '인기도_가중치' 컬럼을 채워 반환"""
+    name = ''
+
+    def apply(self, data, df):
+        raise NotImplementedError
+
+class PopularityWeighting(WeightingStrategy):
+    """과거 4개월 판매 규모 × 추세 기반 동적 인기도 가중치 (0.7 ~ 1.3)"""
+    name = '동적 인기도'
+
+    def apply(self, data, df):
+        return calculate_dynamic_popularity_weights(df, data.sales_history, data.history_month, data.past_sales())
+
+class NoWeighting(WeightingStrategy):
+    """가중치 없음 (1.0)"""
+    name = '가중치 없음'
+
+    def apply(self, data, df):
+        df['인기도_가중치'] = 1.0
+        return df
+
+ALLOCATION_STRATEGIES = {cls.name: cls for cls in [HistoricalShareAllocation, PriceShareAllocation, EqualShareAllocation]}
+WEIGHTING_STRATEGIES = {cls.name: cls for cls in [PopularityWeighting, NoWeighting]}
+
+class ForecastEngine:
+    """
+    전략 조합으로 구성되는 KPI 기반 수요 예측 엔진
+    reconcile_kpi: True이면 경로별 예상매출/최종 예측수량 합계를 KPI에 맞추는 보정 단계 수행
+    """
+
+    def __init__(self, allocation=None, adjustment=None, weighting=None, reconcile_kpi=True):
+        self.allocation = allocation or HistoricalShareAllocation()
+        self.adjustment = adjustment or HistoricalAdjustment()
+        self.weighting = weighting or PopularityWeighting()
+        self.reconcile_kpi = reconcile_kpi
+
+    @property
+    def name(self):
+        return f"{self.allocation.name} / {self.adjustment.name} / {self.weighting.name}"
+
+    def run(self, data, columns=FORECAST_COLUMNS):
+        """
+        예측 실행:
+        1. 배분 전략으로 제품별 판매비중 계산
+        2. 제품별 판매가로 수량 산출
+        3. 보정 전략의 보정계수 적용
+        4. KPI 스케일링 후 가중치 전략의 인기도 가중치 적용
+        """
+        df = data.frame.copy()
+    
+        # Step 1: 제품별 판매비중 계산 (배분 전략, 인기도 가중치 없이)
+        df = self.allocation.apply(data, df)
+    
+        # Step 2: KPI 기반 제품별 예상 매출 계산 (인기도 가중치 없이, KPI매출은 KPI 저장소의 숫자 값)
+        # 제품별 예상 매출 계산 (KPI매출 × 판매비중)
+        df['제품별_예상매출'] = df['판매비중'] * df['KPI매출']
+    
+        # 디버깅: 데이터 타입 확인 (진단 모드에서만)
+        if diagnostics_enabled():
+            debug_print(f"판매비중 타입: {df['판매비중'].dtype}")
+            debug_print(f"KPI매출 타입: {df['KPI매출'].dtype}")
+            debug_print(f"제품별_예상매출 타입: {df['제품별_예상매출'].dtype}")
+            debug_print(f"제품별_예상매출 샘플: {df['제품별_예상매출'].head()}")
+    
+        # 제품별_예상매출이 object 타입인 경우 숫자로 강제 변환
+        if df['제품별_예상매출'].dtype == 'object':
+            debug_print("제품별_예상매출이 object 타입입니다. 숫자로 변환 중...")
+            df['제품별_예상매출'] = pd.to_numeric(df['제품별_예상매출'], errors='coerce').fillna(0)
+            debug_print(f"변환 후 타입: {df['제품별_예상매출'].dtype}")
+    
+        # KPI 정확성 보장: 각 경로별로 제품별_예상매출의 합이 KPI와 정확히 일치하도록 보정
+        for route in (df['경로'].unique() if self.reconcile_kpi else []):
+            route_df = df[df['경로'] == route]
+            route_kpi = route_df['KPI매출'].iloc[0]
+        
+            # 현재 제품별_예상매출의 합계
+            current_sum = route_df['제품별_예상매출'].sum()
+        
+            # 오차 계산
+            difference = route_kpi - current_sum
+        
+            if abs(difference) > 0.01:  # 1원 이상의 오차가 있는 경우
+                debug_print(f"{route} 경로: KPI={route_kpi:,.0f}, 현재합계={current_sum:,.0f}, 오차={difference:,.0f}")
+            
+                # 가장 큰 제품별_예상매출을 가진 제품에 오차를 보정
+                max_revenue_idx = route_df['제품별_예상매출'].idxmax()
+                df.loc[max_revenue_idx, '제품별_예상매출'] += difference
+            
+                # 보정 후 확인 (진단 모드에서만)
+                if diagnostics_enabled():
+                    corrected_sum = df[df['경로'] == route]['제품별_예상매출'].sum()
+                    debug_print(f"{route} 경로 보정 후: 합계={corrected_sum:,.0f}, KPI={route_kpi:,.0f}")
+    
+        # 정수 변환 (보정 후)
+        df['제품별_예상매출'] = df['제품별_예상매출'].round().astype(int)
+    
+        # Step 3: 순수한 예측 수량 계산 (인기도 가중치 없이)
+        df['예측수량'] = df['제품별_예상매출'] / df['판매가']
+    
+        # Step 4: 보정계수 계산 (보정 전략, 순수한 예측량 기반)
+        df = self.adjustment.apply(data, df)
+    
+        # Step 5: 보정 수량 계산 (보정계수 적용)
+        df['보정수량'] = df['예측수량'] * df['보정계수']
+    
+        # Step 6: 인기도 가중치 계산 (가중치 전략, 적용은 나중에)
+        df = self.weighting.apply(data, df)
+    
+        # Step 7: KPI 목표와 맞추기 위한 스케일링 (인기도 가중치 적용 전)
+        for route in (df['경로'].unique() if self.reconcile_kpi else []):
+            route_df = df[df['경로'] == route]
+            route_kpi = route_df['KPI매출'].iloc[0]
+        
+            # 보정수량 기반 예상 총 매출
+            route_expected_revenue = (route_df['보정수량'] * route_df['판매가']).sum()
+        
+            if route_expected_revenue > 0:
+                # KPI 목표와 맞추기 위한 스케일링 팩터
+                kpi_scaling_factor = route_kpi / route_expected_revenue
+            
+                # 보정수량에 KPI 스케일링 팩터 적용
+                df.loc[df['경로'] == route, '보정수량'] = (
+                    df.loc[df['경로'] == route, '보정수량'] * kpi_scaling_factor
+                )
+            
+                debug_print(f"{route} 경로 KPI 스케일링: KPI={route_kpi:,.0f}, 예상매출={route_expected_revenue:,.0f}, 스케일링팩터={kpi_scaling_factor:.3f}")
+    
+        # Step 8: 최종 예측량에 인기도 가중치 적용 (KPI 스케일링 후)
+        df['최종_예측수량'] = df['보정수량'] * df['인기도_가중치']
+    
+        # 예측수량과 보정수량, 최종_예측수량을 정수로 변환
+        df['예측수량'] = df['예측수량'].round().astype(int)
+        df['보정수량'] = df['보정수량'].round().astype(int)
+        df['최종_예측수량'] = df['최종_예측수량'].round().astype(int)
+    
+        # 최종 KPI 정확성 보장: 정수 변환 후 발생한 오차를 정확히 보정
+        for route in (df['경로'].unique() if self.reconcile_kpi else []):
+            route_df = df[df['경로'] == route]
+            route_kpi = route_df['KPI매출'].iloc[0]
+        
+            # 정수 변환 후 실제 예상 총 매출
+            actual_revenue = (route_df['최종_예측수량'] * route_df['판매가']).sum()
+        
+            # 오차 계산
+            final_error = route_kpi - actual_revenue
+        
+            if abs(final_error) > 0.01:  # 1원 이상의 오차가 있는 경우
+                debug_print(f"{route} 경로 최종 오차: KPI={route_kpi:,.0f}, 실제매출={actual_revenue:,.0f}, 오차={final_error:,.0f}")
+            
+                # 오차를 가장 큰 매출을 가진 제품에 보정
+                route_df_with_revenue = route_df.copy()
+                route_df_with_revenue['제품별_매출'] = route_df_with_revenue['최종_예측수량'] * route_df_with_revenue['판매가']
+                max_revenue_idx = route_df_with_revenue['제품별_매출'].idxmax()
+            
+                adjustment_quantity = final_error / route_df.loc[max_revenue_idx, '판매가']
+            
+                # 보정된 수량이 음수가 되지 않도록 확인
+                current_quantity = df.loc[max_revenue_idx, '최종_예측수량']
+                new_quantity = current_quantity + adjustment_quantity
+            
+                if new_quantity >= 0:
+                    df.loc[max_revenue_idx, '최종_예측수량'] = new_quantity
+                else:
+                    # 음수가 되는 경우, 두 번째로 큰 매출을 가진 제품에 보정
+                    sorted_revenue_indices = route_df_with_revenue['제품별_매출'].sort_values(ascending=False).index
+                    if len(sorted_revenue_indices) > 1:
+                        second_max_revenue_idx = sorted_revenue_indices[1]
+                        adjustment_quantity = final_error / route_df.loc[second_max_revenue_idx, '판매가']
+                        df.loc[second_max_revenue_idx, '최종_예측수량'] += adjustment_quantity
+            
+                # 최종 확인 - 정확히 일치하는지 검증
+                final_check = (df.loc[df['경로'] == route, '최종_예측수량'] * df.loc[df['경로'] == route, '판매가']).sum()
+                debug_print(f"{route} 경로 최종 보정 후: 예상매출={final_check:,.0f}, KPI={route_kpi:,.0f}")
+                if abs(final_check - route_kpi) <= 1:
+                    debug_print(f"✅ {route} 경로: KPI와 정확히 일치합니다!")
+                else:
+                    debug_print(f"❌ {route} 경로: 여전히 오차가 있습니다. ({final_check:,.0f} vs {route_kpi:,.0f})")
+                
+                    # 추가 보정 시도 - 여러 제품에 분산
+                    remaining_error = route_kpi - final_check
+                    if abs(remaining_error) > 0.01:
+                        debug_print(f"🔄 추가 보정 시도: 남은 오차 {remaining_error:,.0f}원")
+                    
+                        # 상위 3개 제품에 오차를 분산
+                        top_3_indices = route_df_with_revenue['제품별_매출'].nlargest(3).index
+                        for i, idx in enumerate(top_3_indices):
+                            if i < 2:  # 첫 번째와 두 번째 제품에만 보정
+                                partial_adjustment = remaining_error / (2 * route_df.loc[idx, '판매가'])
+                                df.loc[idx, '최종_예측수량'] += partial_adjustment
+                    
+                        # 최종 재확인 (진단 모드에서만)
+                        if diagnostics_enabled():
+                            final_final_check = (df.loc[df['경로'] == route, '최종_예측수량'] * df.loc[df['경로'] == route, '판매가']).sum()
+                            debug_print(f"🔄 최종 재확인: {final_final_check:,.0f}원 vs KPI {route_kpi:,.0f}원")
+                            if abs(final_final_check - route_kpi) <= 1:
+                                debug_print(f"✅ {route} 경로: 최종 보정 성공!")
+                            else:
+                                debug_print(f"❌ {route} 경로: 최종 보정 실패. 오차: {final_final_check - route_kpi:,.0f}원")
+    
+        return df[[col for col in columns if col in df.columns]]
+
+def compare_engines(data, engines):
+    """
+    같은 ForecastData로 여러 엔진을 실행하여 제품별 최종 예측수량 비교 (A/B)
+    engines: {이름: ForecastEngine} - 반환값: 경로/제품별 엔진 이름 컬럼의 최종 예측수량 표
+    """
+    comparison = None
+    for name, engine in engines.items():
+        forecast = engine.run(data, columns=['경로', 'SKU_ID', '제품명', '최종_예측수량'])
+        forecast = forecast.rename(columns={'최종_예측수량': name})
+        comparison = forecast if comparison is None else comparison.merge(
+            forecast[['SKU_ID', name]], on='SKU_ID', how='outer'
+        )
+    return comparison
+
+# 기본 엔진 (과거 판매비중 / 과거 실적 보정 / 동적 인기도)
+DEFAULT_ENGINE = ForecastEngine()
+
+class SalesWindows:
+    """
+    예측 대상 경로의 과거 판매 구간 조회 공유 - 경로 필터링과 월별 행 위치는 한 번만 계산하고,
+    구간은 월별 행 위치를 이어 붙여 구성 (같은 구간은 재사용, 행 순서는 select_past_sales와 동일)
+    - 실적 기간 안에서 시작하는 다중 월 예측: 인접 대상 월의 구간(M-4 ~ M-1)이 겹침
+    - 마지막 판매 월 다음 월 이후 대상 월: 모두 가장 최근 구간 하나를 공유 (history_month_for)
+    """
+
+    def __init__(self, sales_history, routes):
+        self.sales = sales_history[sales_history['경로'].isin(routes)]
+        self._month_rows = self.sales.groupby('월', sort=False).indices
+        self._windows = {}
+
+    def select(self, past_months):
+        """과거 월 목록의 판매 데이터 (같은 구간은 재사용)"""
+        key = tuple(past_months)
+        if key not in self._windows:
+            rows = [self._month_rows[month] for month in dict.fromkeys(past_months) if month in self._month_rows]
+            positions = np.sort(np.concatenate(rows)) if rows else np.array([], dtype=int)
+            self._windows[key] = self.sales.iloc[positions]
+        return self._windows[key]
+
+def forecast_horizon(product_df, sales_history, kpi_store, routes, n_months=HORIZON_MONTHS, start_month=None,
+                     engine=None, columns=FORECAST_COLUMNS):
+    """
+    여러 대상 월(최대 MAX_HORIZON_MONTHS개월)의 KPI 기반 예측을 한 번에 계산
+    - 대상 월: start_month부터 n_months개월 (기본값: 실적 집계 완료 마지막 월 다음 월부터, 집계 중인 월 포함)
+    - 과거 구간 기준 월은 history_month_for (대상 월과 '실적 집계 완료 마지막 월 다음 월' 중 이른 월, 단일 월 예측과 같은 구간)
+    - 과거 판매 구간은 SalesWindows로 공유하고, 과거 구간 기준 월과 경로별 KPI가 같은 대상 월은 예측을 재사용
+      (완료 월 이후 대상 월은 구간이 고정되므로 KPI가 같으면 앞 월 예측을 그대로 복사한 값)
+    반환값: 대상 월별 예측을 이어 붙인 DataFrame ('월' 컬럼은 '2025년 9월' 형식)
+            attrs['source_months']: {대상 월: 예측을 계산한 월} - 값이 대상 월과 다르면 그 월 예측의 복사본
+    """
+    engine = engine or DEFAULT_ENGINE
+    n_months = min(n_months, MAX_HORIZON_MONTHS)
+    last_month = latest_complete_month(sales_history)
+    if start_month is None:
+        months = get_following_months(last_month, n_months)
+    else:
+        start_ordinal = month_ordinal(start_month)
+        months = [format_korean_month(start_ordinal)] + get_following_months(format_korean_month(start_ordinal), n_months - 1)
+    if not months:
+        return pd.DataFrame(columns=columns)
+
+    product_df = product_df[product_df['경로'].isin(routes)]
+    windows = (database_sales_windows(sales_history, product_df['경로'].unique())
+               or SalesWindows(sales_history, product_df['경로'].unique()))
+
+    forecasts = []
+    results = {}
+    source_months = {}
+    for month in months:
+        kpi_df = kpi_store.frame(month, routes, fallback=KPI_FALLBACK_CARRY_FORWARD)
+        history_month = history_month_for(month, last_month)
+
+        key = (history_month, tuple(kpi_df['KPI매출']))
+        if key not in results:
+            data = ForecastData(kpi_df, product_df, sales_history, month, kpi_store, history_month, windows)
+            results[key] = (month, engine.run(data, columns))
+
+        source_month, result = results[key]
+        source_months[month] = source_month
+        forecast = result.copy()
+        forecast['월'] = month
+        forecasts.append(forecast)
+
+    debug_print(f"장기 예측: {months[0]} ~ {months[-1]} ({len(months)}개월), 엔진 실행 {len(results)}회")
+    horizon = pd.concat(forecasts, ignore_index=True)
+    horizon.attrs['source_months'] = source_months
+    return horizon
@@ -0,0 +1,268 @@
+"""
+forecast_uncertainty.py
+예측 구간(P10/P50/P90) - 과거 예측 오차 잔차 부트스트랩
+- 과거 월마다 '그 시점에 엔진이 냈을 예측'과 실제 판매량을 비교한 상대 오차(실제 / 예측 - 1)를 시계열(경로, SKU)별로 모음
+- 시계열별 오차가 부족하면 같은 경로 전체 오차, 경로 오차도 없으면 전체 오차에서 복원 추출
+- (추출 횟수 × 시계열) 행렬로 한 번에 복원 추출하고 분위수 계산
+  (난수는 시드 + 시계열 위치의 해시로 만들어 재현 가능, 일부 시계열만 추출해도 같은 표본)
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+from forecast_engine import ForecastData, DEFAULT_ENGINE
+from kpi_store import KPI_FALLBACK_EXACT
+from month_utils import month_ordinal, complete_data_months
+
+# 예측 구간 분위수
+INTERVAL_QUANTILES = (0.1, 0.5, 0.9)
+INTERVAL_LABELS = ('P10', 'P50', 'P90')
+
+# 부트스트랩 설정
+BOOTSTRAP_DRAWS = 2000
+BOOTSTRAP_SEED = 42
+
+# 구간 표본을 한 번에 만드는 시계열 수 (메모리: 추출 횟수 × 이 값 × 예측 월)
+INTERVAL_CHUNK_ROWS = 256
+
+# 시계열 자체 오차를 사용하는 최소 오차 개수 (미만이면 경로 전체 오차 사용)
+MIN_SERIES_RESIDUALS = 3
+
+# 상대 오차 범위 (실제가 예측의 0 ~ 4배)
+RELATIVE_ERROR_RANGE = (-1.0, 3.0)
+
+def relative_errors(predicted, actual):
+    """상대 오차 (실제 / 예측 - 1) - 예측이 0 이하인 항목은 NaN"""
+    predicted = np.asarray(predicted, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        errors = np.where(predicted > 0, actual / predicted - 1, np.nan)
+    return np.clip(errors, *RELATIVE_ERROR_RANGE)
+
+class ResidualPools:
+    """
+    시계열별 복원 추출 대상 오차 - 풀을 하나의 1차원 배열에 이어 붙여 보관
+    values: [시계열 위치순 자체 오차 | 그룹순 그룹 오차 | 전체 오차] (풀이 모두 비어 있으면 0 하나)
+    offsets / counts: 시계열별 풀의 values 시작 위치와 오차 개수 (같은 그룹 / 전체 풀은 시계열 간 공유)
+    source: 시계열별 오차 출처 ('시계열', '경로', '전체', '없음')
+    """
+
+    def __init__(self, values, offsets, counts, source):
+        self.values = values
+        self.offsets = offsets
+        self.counts = counts
+        self.source = source
+
+    @classmethod
+    def build(cls, errors, series_index, group_codes, min_residuals=MIN_SERIES_RESIDUALS):
+        """
+        errors/series_index: 오차와 오차가 속한 시계열 위치 (NaN 오차는 제외)
+        group_codes: 시계열별 그룹(경로) 코드 - 시계열 오차가 부족한 시계열의 대체 오차 풀
+        시계열 / 그룹별 풀은 안정 정렬 후 구간으로 나누므로 오차 개수에 비례하는 시간에 생성 (풀 안의 순서는 입력 순서)
+        """
+        errors = np.asarray(errors, dtype=float)
+        series_index = np.asarray(series_index, dtype=int)
+        group_index, groups = pd.factorize(np.asarray(group_codes))
+        valid = ~np.isnan(errors)
+        errors, series_index = errors[valid], series_index[valid]
+        n_series, n_groups, n_errors = len(group_index), len(groups), len(errors)
+
+        # 시계열별 / 그룹별 구간 (정렬된 오차 배열에서의 시작 위치와 개수)
+        series_counts = np.bincount(series_index, minlength=n_series)
+        series_starts = np.cumsum(series_counts) - series_counts
+        error_groups = group_index[series_index]
+        group_counts = np.bincount(error_groups, minlength=n_groups)
+        group_starts = np.cumsum(group_counts) - group_counts
+
+        values = np.concatenate([
+            errors[np.argsort(series_index, kind='stable')],
+            errors[np.argsort(error_groups, kind='stable')],
+            errors,
+            [0.0]
+        ])
+
+        # 시계열별 풀: 자체 오차 / 같은 그룹 전체 오차 / 전체 오차
+        own = series_counts >= min_residuals
+        has_group = group_counts[group_index] > 0
+        offsets = np.where(own, series_starts,
+                           np.where(has_group, n_errors + group_starts[group_index], 2 * n_errors))
+        counts = np.where(own, series_counts, np.where(has_group, group_counts[group_index], n_errors))
+        source = np.select([own, has_group], ['시계열', '경로'], default='전체' if n_errors > 0 else '없음').astype(object)
+        return cls(values, offsets, counts, source)
+
+    def std(self):
+        """시계열별 풀의 오차 표준편차 (모표준편차, 풀이 비어 있으면 0) - 공유 풀은 한 번만 계산"""
+        starts, inverse = np.unique(self.offsets, return_inverse=True)
+        lengths = self.counts[np.unique(inverse, return_index=True)[1]]
+        segment = np.repeat(np.arange(len(starts)), lengths)
+        positions = starts[segment] + np.arange(len(segment)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pool_values = self.values[positions]
+        safe_lengths = np.maximum(lengths, 1)
+        means = np.bincount(segment, weights=pool_values, minlength=len(starts)) / safe_lengths
+        variance = np.bincount(segment, weights=(pool_values - means[segment]) ** 2, minlength=len(starts)) / safe_lengths
+        return np.sqrt(variance)[inverse]
+
+    def sample(self, rows, positions):
+        """시계열 위치(rows)별 풀의 positions번째 오차 (positions는 풀 개수 미만, 빈 풀은 0)"""
+        return np.where(self.counts[rows] > 0, self.values[self.offsets[rows] + positions], 0.0)
+
+def hashed_uniforms(seed, rows, n_draws, n_months=None):
+    """
+    (추출 횟수 × 시계열 × [예측 월]) 균등 난수 [0, 1) - (시드, 시계열 위치, 추출 번호, 예측 월)의 splitmix64 해시
+    시계열 위치별로 값이 정해지므로 일부 시계열만 다시 생성해도 전체 생성과 같은 표본
+    """
+    rows = np.asarray(rows, dtype=np.uint64)
+    months = 1 if n_months is None else n_months
+    counter = ((rows[None, :, None] * np.uint64(n_draws) + np.arange(n_draws, dtype=np.uint64)[:, None, None])
+               * np.uint64(months) + np.arange(months, dtype=np.uint64)[None, None, :])
+    with np.errstate(over='ignore'):
+        z = counter + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    uniforms = (z >> np.uint64(11)).astype(float) * 2.0 ** -53
+    return uniforms if n_months is not None else uniforms[:, :, 0]
+
+def bootstrap_draws(point, pools, n_draws=BOOTSTRAP_DRAWS, seed=BOOTSTRAP_SEED, rows=None):
+    """
+    점 예측(시계열 × [예측 월]) × (1 + 복원 추출 상대 오차) 표본 - (추출 횟수 × 시계열 × [예측 월]) 배열
+    예측 월이 있으면 월마다 독립적으로 추출, 오차가 없는 시계열은 점 예측 그대로
+    rows: point 행의 풀 시계열 위치 (기본값: 0부터 순서대로) - 같은 시계열은 어떤 부분집합으로 추출해도 같은 표본
+    """
+    point = np.asarray(point, dtype=float)
+    rows = np.arange(point.shape[0]) if rows is None else np.asarray(rows, dtype=int)
+    n_months = point.shape[1] if point.ndim > 1 else None
+    uniforms = hashed_uniforms(seed, rows, n_draws, n_months)
+
+    row_axis = rows.reshape((1, -1) + (1,) * (point.ndim - 1))
+    positions = (uniforms * np.maximum(pools.counts[row_axis], 1)).astype(int)
+    return np.maximum(0, point[None] * (1 + pools.sample(row_axis, positions)))
+
+def draw_quantiles(draws, quantiles=INTERVAL_QUANTILES):
+    """표본 분위수 - (분위수 × 나머지 차원) 배열"""
+    return np.quantile(draws, quantiles, axis=0)
+
+def group_draw_totals(draws, group_codes, n_groups):
+    """시계열 축을 그룹별로 합산한 표본 (경로 합계 구간은 합계 표본의 분위수로 계산)"""
+    membership = np.zeros((len(group_codes), n_groups))
+    membership[np.arange(len(group_codes)), group_codes] = 1
+    return np.moveaxis(np.tensordot(draws, membership, axes=([1], [0])), -1, 1)
+
+def engine_forecast_errors(product_info, sales_history, kpi_store, routes, engine=None):
+    """
+    과거 월별 엔진 예측 vs 실제 판매량 (실적이 집계된 월 중 KPI가 있는 경로/월만, 실적이 없는 SKU는 판매 0)
+    각 월의 예측은 해당 월 이전 판매 데이터와 해당 월 KPI만 사용
+    반환값: DataFrame(월, 경로, SKU_ID, 최종_예측수량, 판매수량, 상대오차)
+    """
+    engine = engine or DEFAULT_ENGINE
+    columns = ['월', '경로', 'SKU_ID', '최종_예측수량', '판매수량', '상대오차']
+    sales = sales_history[sales_history['경로'].isin(routes)]
+    months = complete_data_months(sales_history)
+    products = product_info[product_info['경로'].isin(routes)]
+    actual_by_month = sales.groupby(['월', '경로', 'SKU_ID'])['판매수량'].sum()
+
+    results = []
+    for month in months:
+        kpi_df = kpi_store.frame(month, routes, fallback=KPI_FALLBACK_EXACT, drop_missing=True)
+        if kpi_df.empty:
+            continue
+        data = ForecastData(kpi_df, products[products['경로'].isin(kpi_df['경로'])], sales_history, month, kpi_store)
+        forecast = engine.run(data, columns=['경로', 'SKU_ID', '최종_예측수량'])
+        actual = actual_by_month.get(month)
+        forecast['판매수량'] = (
+            pd.MultiIndex.from_frame(forecast[['경로', 'SKU_ID']]).map(actual).to_numpy(dtype=float)
+            if actual is not None else np.nan
+        )
+        forecast['판매수량'] = forecast['판매수량'].fillna(0)
+        forecast['월'] = month
+        results.append(forecast)
+
+    if not results:
+        return pd.DataFrame(columns=columns)
+    errors = pd.concat(results, ignore_index=True)
+    errors['상대오차'] = relative_errors(errors['최종_예측수량'], errors['판매수량'])
+    debug_print(f"엔진 과거 예측 오차: {len(results)}개월, {int(errors['상대오차'].notna().sum())}건")
+    return errors[columns]
+
+def forecast_intervals(forecast, errors, quantity_column='최종_예측수량', n_draws=BOOTSTRAP_DRAWS, seed=BOOTSTRAP_SEED):
+    """
+    예측 결과(경로, SKU_ID, 수량 컬럼)의 SKU별 / 경로 합계 예측 구간
+    errors: engine_forecast_errors 결과
+    반환값: (SKU별 DataFrame(경로, SKU_ID, 제품명, 점 예측, P10, P50, P90, 오차 출처),
+             경로별 DataFrame(경로, 점 예측, P10, P50, P90))
+    """
+    started = time.perf_counter()
+    forecast = forecast.reset_index(drop=True)
+    routes = list(dict.fromkeys(forecast['경로']))
+    group_codes = forecast['경로'].map({route: r for r, route in enumerate(routes)}).to_numpy()
+
+    series_keys = pd.MultiIndex.from_frame(forecast[['경로', 'SKU_ID']])
+    valid_errors = errors[errors['상대오차'].notna()]
+    series_index = series_keys.get_indexer(pd.MultiIndex.from_frame(valid_errors[['경로', 'SKU_ID']]))
+    matched = series_index >= 0
+    pools = ResidualPools.build(valid_errors['상대오차'].to_numpy()[matched], series_index[matched], group_codes)
+
+    point = forecast[quantity_column].to_numpy(dtype=float)
+    draws = bootstrap_draws(point, pools, n_draws, seed)
+    sku_quantiles = draw_quantiles(draws)
+    route_quantiles = draw_quantiles(group_draw_totals(draws, group_codes, len(routes)))
+
+    sku_intervals = forecast[['경로', 'SKU_ID', '제품명']].copy()
+    sku_intervals['점 예측'] = point
+    route_intervals = pd.DataFrame({
+        '경로': routes,
+        '점 예측': np.bincount(group_codes, weights=point, minlength=len(routes))
+    })
+    for label, sku_values, route_values in zip(INTERVAL_LABELS, sku_quantiles, route_quantiles):
+        sku_intervals[label] = sku_values
+        route_intervals[label] = route_values
+    sku_intervals['오차 출처'] = pools.source
+
+    debug_print(f"예측 구간 부트스트랩: {n_draws}회 × SKU {len(forecast)}개, {time.perf_counter() - started:.3f}초")
+    return sku_intervals, route_intervals
+
+class SeriesIntervals:
+    """
+    시계열 × 예측 월 점 예측과 오차 풀 - 구간은 요청한 키의 표본만 만들어 계산 (전체 표본 배열은 보관하지 않음)
+    keys: 시계열 키 목록 - 여러 시계열 합계의 구간은 quantiles()에서 합계 표본의 분위수로 계산 (분위수만 캐시)
+    """
+
+    def __init__(self, keys, point, pools, n_draws=BOOTSTRAP_DRAWS, seed=BOOTSTRAP_SEED):
+        self.keys = list(keys)
+        self.point = np.asarray(point, dtype=float)
+        self.pools = pools
+        self.n_draws = n_draws
+        self.seed = seed
+        self._positions = {key: i for i, key in enumerate(self.keys)}
+        self._cache = {}
+
+    def total_draws(self, rows):
+        """시계열 위치 목록 합계의 (추출 횟수 × 예측 월) 표본 - INTERVAL_CHUNK_ROWS개 시계열씩 추출하여 합산"""
+        total = np.zeros((self.n_draws,) + self.point.shape[1:])
+        for start in range(0, len(rows), INTERVAL_CHUNK_ROWS):
+            chunk = np.asarray(rows[start:start + INTERVAL_CHUNK_ROWS])
+            total += bootstrap_draws(self.point[chunk], self.pools, self.n_draws, self.seed, chunk).sum(axis=1)
+        return total
+
+    def quantiles(self, keys):
+        """키 목록 합계의 (분위수 × 예측 월) 구간 - 없는 키는 제외, 하나도 없으면 None"""
+        rows = tuple(self._positions[key] for key in keys if key in self._positions)
+        if not rows:
+            return None
+        if rows not in self._cache:
+            self._cache[rows] = draw_quantiles(self.total_draws(rows))
+        return self._cache[rows]
+
+def build_series_intervals(keys, point, errors, series_index, group_codes, n_draws=BOOTSTRAP_DRAWS, seed=BOOTSTRAP_SEED):
+    """
+    시계열별 다월 점 예측(시계열 × 예측 월)의 부트스트랩 구간 준비 (표본은 quantiles() 요청 시 생성)
+    errors/series_index: 과거 예측 상대 오차와 오차별 시계열 위치, group_codes: 시계열별 경로 코드
+    """
+    started = time.perf_counter()
+    pools = ResidualPools.build(errors, series_index, group_codes)
+    debug_print(f"다월 예측 구간 오차 풀: 시계열 {len(pools.counts)}개 (자체 오차 {int(np.sum(pools.source == '시계열'))}개), "
+                f"{time.perf_counter() - started:.3f}초")
+    return SeriesIntervals(keys, point, pools, n_draws, seed)
@@ -3,6 +3,8 @@ future_prediction.py
 미래 예측 기능을 담당하는 모듈
 """
 
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -11,676 +13,85 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-def get_relative_past_months(target_month, months_back=4):
-    """
-    비교 대상월 대비 상대적으로 과거 N개월 계산 (M-1부터 시작)
-    예: target_month가 '2025년 8월'이고 months_back=4이면
-    ['2025년 4월', '2025년 5월', '2025년 6월', '2025년 7월'] 반환 (M-4, M-3, M-2, M-1)
+from table_view import display_paginated_table
+from chart_layer import get_data_version, make_data_version, get_cached_figure
+from diagnostics import LazyDiagnostics
+from kpi_store import KPI_FALLBACK_CARRY_FORWARD
+from month_utils import get_relative_past_months
+from forecast_engine import (
+    ForecastData, DEFAULT_ENGINE, HORIZON_MONTHS, MAX_HORIZON_MONTHS, forecast_horizon
+)
+from kpi_scenarios import SCENARIO_CHANGES, build_kpi_scenarios, scenario_label, prepare_kpi_scenarios
+from forecast_uncertainty import INTERVAL_LABELS, engine_forecast_errors, forecast_intervals
+from capacity_allocation import CONSTRAINT_COLUMNS, constrained_allocation_available, solve_constrained_allocation
+from persistent_cache import persistent_cache, frame_key, kpi_store_key
+from replenishment import (
+    SERVICE_LEVELS, DEFAULT_SERVICE_LEVEL, INVENTORY_FILE,
+    inventory_path, load_inventory_status, inventory_template, build_replenishment_plan
+)
+
+def estimate_demand_improved(kpi_df, product_df, sales_history, target_month, kpi_store=None, diagnostics=None,
+                             prepared=None):
     """
-    # 월 매핑
-    month_mapping = {
-        '2025년 1월': 1, '2025년 2월': 2, '2025년 3월': 3, '2025년 4월': 4,
-        '2025년 5월': 5, '2025년 6월': 6, '2025년 7월': 7, '2025년 8월': 8,
-        '2025년 9월': 9, '2025년 10월': 10, '2025년 11월': 11, '2025년 12월': 12
-    }
-    
-    if target_month not in month_mapping:
-        # 기본값으로 8월 기준 4개월 반환 (M-1부터 시작)
-        return ['2025년 4월', '2025년 5월', '2025년 6월', '2025년 7월']
+    개선된 수요 예측 로직 (forecast_engine의 기본 엔진):
+    1. 과거 실제 판매 데이터 기반 제품별 판매비중 계산
+    2. 제품별 판매가로 수량 산출
+    3. 과거 데이터 기반 보정계수 적용
     
-    current_month_num = month_mapping[target_month]
-    past_months = []
+    diagnostics: LazyDiagnostics - 전달되면 단계별 중간 결과를 지연 계산 항목으로 등록
+    prepared: 같은 제품/판매 데이터/대상 월로 준비한 ScenarioInputs - 전달되면 판매비중/보정계수/인기도 가중치를
+              재사용하고 KPI가 바뀐 경로의 스케일링과 정수 정합만 다시 계산
+    """
+    result = run_default_engine(kpi_df, product_df, sales_history, target_month, kpi_store, prepared)
     
-    # M-1부터 시작하여 과거 4개월 계산 (M-4, M-3, M-2, M-1)
-    for i in range(months_back):
-        month_num = current_month_num - months_back + i  # M-4, M-3, M-2, M-1
-        if month_num < 1:
-            month_num += 12
-        
-        # 숫자를 다시 월 이름으로 변환
-        for month_name, num in month_mapping.items():
-            if num == month_num:
-                past_months.append(month_name)
-                break
+    if diagnostics is not None:
+        register_forecast_diagnostics(diagnostics, result)
     
-    return past_months
+    return result
 
-def calculate_sales_ratio_from_history(df, sales_history, target_month):
+@persistent_cache(
+    'estimate_demand_improved',
+    lambda kpi_df, product_df, sales_history, target_month, kpi_store=None, prepared=None: (
+        frame_key(kpi_df), frame_key(product_df), frame_key(sales_history), target_month, kpi_store_key(kpi_store)
+    )
+)
+def run_default_engine(kpi_df, product_df, sales_history, target_month, kpi_store=None, prepared=None):
     """
-    과거 실제 판매 데이터 기반으로 제품별 판매비중 계산
-    제품코드 매칭: sales_history와 product_info(df) 사이에서 이루어짐
+    기본 엔진 예측 결과 (DEMAND_CACHE_DIR 설정 시 디스크 영속 캐시)
+    prepared 경로와 전체 실행 결과가 같으므로 캐시 키에는 prepared를 포함하지 않음
     """
-    # 비교 대상월 대비 상대적으로 과거 4개월 계산 (M-4, M-3, M-2, M-1)
-    past_months = get_relative_past_months(target_month, 4)
-    
-    # 판매비중 컬럼 초기화
-    df['판매비중'] = 0.0
-    
-    for route in df['경로'].unique():
-        # 해당 경로의 과거 실제 판매 데이터
-        route_sales = sales_history[
-            (sales_history['경로'] == route) &
-            (sales_history['월'].isin(past_months))
-        ]
-        
-        if len(route_sales) > 0:
-            # 제품코드 기반으로 총 판매량 계산 (sales_history와 product_info 매칭)
-            if '제품코드' in route_sales.columns and '제품코드' in df.columns:
-                # 제품코드가 있는 제품만 필터링 (빈 제품코드 제외)
-                valid_sales = route_sales[route_sales['제품코드'].notna() & (route_sales['제품코드'] != '')]
-                
-                if len(valid_sales) > 0:
-                    route_total_sales = valid_sales.groupby('제품코드')['판매수량'].sum()
-                    route_total = route_total_sales.sum()
-                    
-                    if route_total > 0:
-                        for product_code in df[df['경로'] == route]['제품코드'].unique():
-                            if pd.notna(product_code) and product_code != '':
-                                if product_code in route_total_sales.index:
-                                    sales_ratio = route_total_sales[product_code] / route_total
-                                else:
-                                    sales_ratio = 1.0 / len(df[df['경로'] == route])
-                                df.loc[(df['경로'] == route) & (df['제품코드'] == product_code), '판매비중'] = sales_ratio
-                            else:
-                                # 제품코드가 없는 제품은 기본값
-                                df.loc[(df['경로'] == route) & (df['제품코드'].isna() | (df['제품코드'] == '')), '판매비중'] = 1.0 / len(df[df['경로'] == route])
-                    else:
-                        # 총 판매량이 0인 경우 균등 분배
-                        product_count = len(df[df['경로'] == route])
-                        df.loc[df['경로'] == route, '판매비중'] = 1.0 / product_count
-                else:
-                    # 유효한 판매 데이터가 없는 경우 균등 분배
-                    product_count = len(df[df['경로'] == route])
-                    df.loc[df['경로'] == route, '판매비중'] = 1.0 / product_count
-            else:
-                # 제품코드가 없는 경우 기존 방식 (제품명 기반)
-                route_total_sales = route_sales.groupby('제품명')['판매수량'].sum()
-                route_total = route_total_sales.sum()
-                
-                if route_total > 0:
-                    for product in df[df['경로'] == route]['제품명'].unique():
-                        if product in route_total_sales.index:
-                            sales_ratio = route_total_sales[product] / route_total
-                        else:
-                            sales_ratio = 1.0 / len(df[df['경로'] == route])
-                        df.loc[(df['경로'] == route) & (df['제품명'] == product), '판매비중'] = sales_ratio
-                else:
-                    product_count = len(df[df['경로'] == route])
-                    df.loc[df['경로'] == route, '판매비중'] = 1.0 / product_count
-        else:
-            # 과거 데이터가 없는 경우 균등 분배
-            product_count = len(df[df['경로'] == route])
-            df.loc[df['경로'] == route, '판매비중'] = 1.0 / product_count
-    
-    return df
+    if prepared is not None:
+        return prepared.forecast_for(dict(zip(kpi_df['경로'], kpi_df['KPI매출'])))
+    data = ForecastData(kpi_df, product_df, sales_history, target_month, kpi_store)
+    return DEFAULT_ENGINE.run(data)
 
-def calculate_adjustment_factors_from_history(df, sales_history, target_month, kpi_history):
+def register_forecast_diagnostics(diagnostics, forecast):
     """
-    과거 데이터 기반 보정계수 계산 (KPI 목표 달성 보장)
-    1단계: 과거 데이터 기반 기본 보정계수 계산
-    2단계: KPI 목표 맞추기 위한 스케일링 팩터 적용
-    3단계: 개별 제품 보정계수를 1.0 근처로 유지하면서 전체 목표 달성
+    예측 단계별 중간 결과와 보정계수 디버깅 항목을 지연 계산 항목으로 등록
+    (진단 화면에서 요청하기 전에는 아무 계산도 수행하지 않음)
     """
-    # 비교 대상월 대비 상대적으로 과거 4개월 계산 (M-4, M-3, M-2, M-1)
-    past_months = get_relative_past_months(target_month, 4)
-    past_months_sales = get_relative_past_months(target_month, 4)
-    
-    base_adjustment_factors = {}  # 기본 보정계수
-    final_adjustment_factors = {}  # 최종 보정계수
-    
-    # 디버깅을 위한 정보 출력
-    print(f"=== 보정계수 계산 시작 (KPI 목표 달성 보장) ===")
-    print(f"KPI 과거 월: {past_months}")
-    print(f"판매 과거 월: {past_months_sales}")
-    print(f"총 제품 수: {len(df)}")
-    
-    # 1단계: 기본 보정계수 계산 (과거 데이터 기반)
-    for route in df['경로'].unique():
-        print(f"\n=== {route} 경로 (1단계: 기본 보정계수) ===")
-        
-        # 해당 경로의 과거 KPI 데이터
-        route_kpi_data = kpi_history[
-            (kpi_history['경로'] == route) &
-            (kpi_history['월'].isin(past_months))
-        ]
-        print(f"경로 KPI 데이터: {len(route_kpi_data)}개")
-        
-        if len(route_kpi_data) > 0:
-            # 제품코드 기반 매칭
-            if '제품코드' in df.columns:
-                for _, row in df[df['경로'] == route].iterrows():
-                    product_code = row['제품코드']
-                    product_name = row['제품명']
-                    product_price = row['판매가']
-                    sales_ratio = row['판매비중']
-                    
-                    # 각 월별 기본 보정계수 계산
-                    monthly_adjustment_factors = []
-                    
-                    for month in past_months:
-                        # 해당 월의 KPI 데이터
-                        month_kpi = route_kpi_data[route_kpi_data['월'] == month]
-                        if len(month_kpi) > 0:
-                            # KPI매출이 문자열일 경우 숫자로 변환
-                            if month_kpi['KPI매출'].dtype == 'object':
-                                month_kpi = month_kpi.copy()
-                                month_kpi['KPI매출'] = month_kpi['KPI매출'].astype(str).str.replace(',', '').astype(float)
-                            
-                            kpi_sales = month_kpi['KPI매출'].iloc[0]
-                            
-                            # 해당 월의 예측 수량 계산 (인기도 가중치 없이)
-                            month_predicted_sales = (kpi_sales * sales_ratio) / product_price
-                            
-                            # 해당 월의 실제 판매 데이터 (제품코드 기반)
-                            month_actual = sales_history[
-                                (sales_history['경로'] == route) & 
-                                (sales_history['제품코드'] == product_code) &
-                                (sales_history['월'] == month)
-                            ]
-                            
-                            if len(month_actual) > 0:
-                                actual_sales = month_actual['판매수량'].iloc[0]
-                                
-                                # 해당 월의 기본 보정계수 계산
-                                if month_predicted_sales > 0:
-                                    month_adjustment_factor = actual_sales / month_predicted_sales
-                                    # 기본 보정계수 범위 제한 (0.3 ~ 3.0)
-                                    month_adjustment_factor = max(0.3, min(3.0, month_adjustment_factor))
-                                    monthly_adjustment_factors.append(month_adjustment_factor)
-                                else:
-                                    monthly_adjustment_factors.append(1.0)
-                            else:
-                                monthly_adjustment_factors.append(1.0)
-                        else:
-                            monthly_adjustment_factors.append(1.0)
-                    
-                    # 월별 기본 보정계수의 평균 계산
-                    if monthly_adjustment_factors:
-                        base_adjustment_factor = sum(monthly_adjustment_factors) / len(monthly_adjustment_factors)
-                        base_adjustment_factor = round(base_adjustment_factor, 2)
-                    else:
-                        base_adjustment_factor = 1.0
-                    
-                    base_adjustment_factors[(route, product_code)] = base_adjustment_factor
-            else:
-                # 제품코드가 없는 경우 기본값
-                for _, row in df[df['경로'] == route].iterrows():
-                    base_adjustment_factors[(route, row['제품명'])] = 1.0
-        else:
-            # KPI 데이터가 없는 경우 기본값
-            for _, row in df[df['경로'] == route].iterrows():
-                key = (route, row['제품코드']) if '제품코드' in df.columns else (route, row['제품명'])
-                base_adjustment_factors[key] = 1.0
+    key_columns = ['경로', '제품명']
     
-    # 2단계: KPI 목표 맞추기 위한 스케일링 팩터 계산
-    print(f"\n=== 2단계: KPI 목표 맞추기 ===")
-    
-    for route in df['경로'].unique():
-        print(f"\n--- {route} 경로 스케일링 팩터 계산 ---")
-        
-        # 해당 경로의 현재 KPI
-        route_kpi = df[df['경로'] == route]['KPI매출'].iloc[0]
-        print(f"목표 KPI: {route_kpi:,.0f}")
-        
-        # 기본 보정계수 적용 시 예상 총 매출 계산
-        route_products = df[df['경로'] == route]
-        expected_total_revenue = 0
-        
-        for _, product_row in route_products.iterrows():
-            if '제품코드' in df.columns:
-                product_code = product_row['제품코드']
-                base_factor = base_adjustment_factors.get((route, product_code), 1.0)
-            else:
-                product_name = product_row['제품명']
-                base_factor = base_adjustment_factors.get((route, product_name), 1.0)
-            
-            # 기본 보정계수 적용 시 예상 수량
-            base_predicted_quantity = product_row['예측수량'] * base_factor
-            # 예상 매출
-            expected_revenue = base_predicted_quantity * product_row['판매가']
-            expected_total_revenue += expected_revenue
-        
-        print(f"기본 보정계수 적용 시 예상 총 매출: {expected_total_revenue:,.0f}")
-        
-        # 스케일링 팩터 계산 (목표 KPI / 예상 총 매출)
-        if expected_total_revenue > 0:
-            scaling_factor = route_kpi / expected_total_revenue
-            # 스케일링 팩터 범위 제한 (0.5 ~ 2.0)
-            scaling_factor = max(0.5, min(2.0, scaling_factor))
-            print(f"스케일링 팩터: {scaling_factor:.3f}")
-        else:
-            scaling_factor = 1.0
-            print(f"스케일링 팩터: 1.0 (예상 매출이 0)")
-        
-        # 3단계: 최종 보정계수 계산 (기본 보정계수 × 스케일링 팩터)
-        print(f"\n--- {route} 경로 최종 보정계수 계산 ---")
-        
-        for _, product_row in route_products.iterrows():
-            if '제품코드' in df.columns:
-                product_code = product_row['제품코드']
-                base_factor = base_adjustment_factors.get((route, product_code), 1.0)
-                key = (route, product_code)
-            else:
-                product_name = product_row['제품명']
-                base_factor = base_adjustment_factors.get((route, product_name), 1.0)
-                key = (route, product_name)
-            
-            # 최종 보정계수 = 기본 보정계수 × 스케일링 팩터
-            final_factor = base_factor * scaling_factor
-            final_adjustment_factors[key] = final_factor
-            
-            print(f"  {product_row['제품명']}: 기본={base_factor:.2f} × 스케일링={scaling_factor:.3f} = 최종={final_factor:.3f}")
-    
-    # DataFrame에 보정계수 적용
-    if '제품코드' in df.columns:
-        df['보정계수'] = df.apply(
-            lambda row: final_adjustment_factors.get(
-                (row['경로'], row['제품코드']), 1.0), 
-            axis=1
-        )
-    else:
-        df['보정계수'] = df.apply(
-            lambda row: final_adjustment_factors.get(
-                (row['경로'], row['제품명']), 1.0), 
-            axis=1
-        )
+    diagnostics.register('1단계_판매비중', lambda: forecast[key_columns + ['판매비중']])
+    diagnostics.register('2단계_제품별_예상매출', lambda: forecast[key_columns + ['KPI매출', '판매비중', '제품별_예상매출']])
+    diagnostics.register('3단계_보정수량', lambda: forecast[key_columns + ['판매가', '예측수량', '보정계수', '보정수량']])
+    diagnostics.register('4단계_최종_예측수량', lambda: forecast[key_columns + ['보정수량', '인기도_가중치', '최종_예측수량']])
     
-    return df
-
-def calculate_dynamic_popularity_weights(df, sales_history, target_month):
-    """
-    과거 판매 데이터 기반으로 동적 인기도 가중치 계산
-    
-    계산 방식:
-    1. 과거 4개월 데이터에서 제품별 판매량 추이 분석 (M-4, M-3, M-2, M-1)
-    2. 최근 2개월 평균 vs 과거 2개월 평균 비교로 추세 분석
-    3. 경로별로 정규화하여 상대적 인기도 계산
-    """
-    # 비교 대상월 대비 상대적으로 과거 4개월 계산 (M-4, M-3, M-2, M-1)
-    past_months = get_relative_past_months(target_month, 4)
-    print(f"\n🔍 인기도 가중치 계산 - 과거 4개월: {past_months}")
-    
-    # 인기도 가중치 초기화
-    df['인기도_가중치'] = 1.0
-    
-    for route in df['경로'].unique():
-        print(f"\n=== {route} 경로 인기도 가중치 계산 ===")
-        
-        # 해당 경로의 과거 실제 판매 데이터
-        route_sales = sales_history[
-            (sales_history['경로'] == route) &
-            (sales_history['월'].isin(past_months))
-        ]
-        
-        print(f"📊 {route} 경로 과거 데이터 건수: {len(route_sales)}건")
-        if len(route_sales) > 0:
-            print(f"📅 데이터 기간: {route_sales['월'].unique()}")
-            print(f"🏷️ 제품코드 컬럼 존재: {'제품코드' in route_sales.columns}")
-            print(f"🏷️ DataFrame 제품코드 컬럼 존재: {'제품코드' in df.columns}")
-        
-        if len(route_sales) > 0:
-            # 제품코드 기반으로 판매량 추이 분석
-            if '제품코드' in route_sales.columns and '제품코드' in df.columns:
-                valid_sales = route_sales[route_sales['제품코드'].notna() & (route_sales['제품코드'] != '')]
-                print(f"✅ 유효한 제품코드 데이터: {len(valid_sales)}건")
-                
-                if len(valid_sales) > 0:
-                    # 제품별 월간 판매량 계산
-                    monthly_sales = valid_sales.groupby(['제품코드', '월'])['판매수량'].sum().reset_index()
-                    
-                    # 제품별 판매량 계산 (전체 4개월 대비 최근 2개월 평균 vs 과거 2개월 평균)
-                    product_total_sales = valid_sales.groupby('제품코드')['판매수량'].sum()
-                    
-                    # 최근 2개월 판매량 (전체 4개월 중 마지막 2개월: M-2, M-1)
-                    recent_2months = past_months[-2:] if len(past_months) >= 2 else past_months
-                    recent_2months_sales = valid_sales[valid_sales['월'].isin(recent_2months)].groupby('제품코드')['판매수량'].sum()
-                    
-                    # 과거 2개월 판매량 (전체 4개월 중 첫 번째 2개월: M-4, M-3)
-                    past_2months = past_months[:2] if len(past_months) >= 2 else past_months
-                    past_2months_sales = valid_sales[valid_sales['월'].isin(past_2months)].groupby('제품코드')['판매수량'].sum()
-                    
-                    print(f"📈 최근 2개월: {recent_2months}")
-                    print(f"📉 과거 2개월: {past_2months}")
-                    
-                    # 제품별 인기도 점수 계산
-                    popularity_scores = {}
-                    
-                    for product_code in df[df['경로'] == route]['제품코드'].unique():
-                        if pd.isna(product_code) or product_code == '':
-                            popularity_scores[product_code] = 0.001
-                            print(f"  ⚠️ {product_code}: 제품코드 없음 - 기본값 0.001")
-                            continue
-                            
-                        total_sales = product_total_sales.get(product_code, 0)
-                        recent_2months_total = recent_2months_sales.get(product_code, 0)
-                        past_2months_total = past_2months_sales.get(product_code, 0)
-                        
-                        # 판매량이 없는 제품은 기본값
-                        if total_sales == 0:
-                            popularity_scores[product_code] = 0.001
-                            print(f"  ⚠️ {product_code}: 판매량 없음 - 기본값 0.001")
-                            continue
-                        
-                        # 최근 2개월 평균 판매량
-                        recent_2months_avg = recent_2months_total / 2 if recent_2months_total > 0 else 0
-                        
-                        # 과거 2개월 평균 판매량
-                        past_2months_avg = past_2months_total / 2 if past_2months_total > 0 else 0
-                        
-                        # 최근 2개월 평균 vs 과거 2개월 평균 비교 (추세 비율)
-                        if past_2months_avg > 0:
-                            trend_ratio = recent_2months_avg / past_2months_avg
-                        else:
-                            trend_ratio = 1.0  # 과거 데이터가 없으면 중립
-                        
-                        # 판매량 규모 점수 (전체 대비 비중)
-                        total_route_sales = product_total_sales.sum()
-                        volume_score = total_sales / total_route_sales if total_route_sales > 0 else 0
-                        
-                        # 인기도 점수 = 판매량 규모 × 추세 비율
-                        popularity_score = volume_score * trend_ratio
-                        
-                        popularity_scores[product_code] = popularity_score
-                        
-                        print(f"  📊 {product_code}: 총판매량={total_sales:,}, 최근2개월평균={recent_2months_avg:.1f}, "
-                              f"과거2개월평균={past_2months_avg:.1f}, 추세비율={trend_ratio:.2f}, 인기도점수={popularity_score:.3f}")
-                    
-                    # 인기도 점수를 가중치로 변환 (1.0 기준으로 정규화)
-                    if popularity_scores:
-                        max_score = max(popularity_scores.values())
-                        min_score = min(popularity_scores.values())
-                        
-                        print(f"\n📋 가중치 변환:")
-                        print(f"  최대 점수: {max_score:.3f}")
-                        print(f"  최소 점수: {min_score:.3f}")
-                        
-                        # 가중치 범위 조정 (0.7 ~ 1.3)
-                        for product_code, score in popularity_scores.items():
-                            if max_score > min_score:
-                                # 정규화 후 범위 조정
-                                normalized_score = (score - min_score) / (max_score - min_score)
-                                weight = 0.7 + (normalized_score * 0.6)  # 0.7 ~ 1.3 범위
-                            else:
-                                weight = 1.0
-                                print(f"  ⚠️ 모든 점수가 동일함 - 기본 가중치 1.0 적용")
-                            
-                            popularity_scores[product_code] = round(weight, 2)
-                            print(f"    {product_code}: {score:.3f} → {weight}")
-                    
-                    # 가중치 적용
-                    for _, row in df[df['경로'] == route].iterrows():
-                        product_code = row['제품코드']
-                        weight = popularity_scores.get(product_code, 1.0)
-                        df.loc[(df['경로'] == route) & (df['제품코드'] == product_code), '인기도_가중치'] = weight
-                        
-                        product_name = row['제품명']
-                        print(f"  ✅ {product_name} ({product_code}): 가중치 {weight}")
-                else:
-                    # 판매 데이터가 없는 경우 기본값
-                    print(f"  ⚠️ 판매 데이터 없음 - 기본 가중치 0.001 적용")
-                    # 모든 제품에 기본 가중치 0.001 적용
-                    for _, row in df[df['경로'] == route].iterrows():
-                        product_code = row['제품코드']
-                        df.loc[(df['경로'] == route) & (df['제품코드'] == product_code), '인기도_가중치'] = 0.001
-                        print(f"  ✅ {row['제품명']} ({product_code}): 기본 가중치 0.001")
-            else:
-                # 제품코드가 없는 경우 제품명 기반 계산
-                print(f"  📝 제품명 기반 계산")
-                product_total_sales = route_sales.groupby('제품명')['판매수량'].sum()
-                
-                # 최근 2개월 판매량 (전체 4개월 중 마지막 2개월: M-2, M-1)
-                recent_2months = past_months[-2:] if len(past_months) >= 2 else past_months
-                recent_2months_sales = route_sales[route_sales['월'].isin(recent_2months)].groupby('제품명')['판매수량'].sum()
-                
-                # 과거 2개월 판매량 (전체 4개월 중 첫 번째 2개월: M-4, M-3)
-                past_2months = past_months[:2] if len(past_months) >= 2 else past_months
-                past_2months_sales = route_sales[route_sales['월'].isin(past_2months)].groupby('제품명')['판매수량'].sum()
-                
-                popularity_scores = {}
-                total_route_sales = product_total_sales.sum()
-                
-                for product_name in df[df['경로'] == route]['제품명'].unique():
-                    total_sales = product_total_sales.get(product_name, 0)
-                    recent_2months_total = recent_2months_sales.get(product_name, 0)
-                    past_2months_total = past_2months_sales.get(product_name, 0)
-                    
-                    if total_sales == 0:
-                        popularity_scores[product_name] = 0.001
-                        print(f"  ⚠️ {product_name}: 판매량 없음 - 기본값 0.001")
-                        continue
-                    
-                    # 최근 2개월 평균 판매량
-                    recent_2months_avg = recent_2months_total / 2 if recent_2months_total > 0 else 0
-                    
-                    # 과거 2개월 평균 판매량
-                    past_2months_avg = past_2months_total / 2 if past_2months_total > 0 else 0
-                    
-                    # 최근 2개월 평균 vs 과거 2개월 평균 비교 (추세 비율)
-                    if past_2months_avg > 0:
-                        trend_ratio = recent_2months_avg / past_2months_avg
-                    else:
-                        trend_ratio = 1.0  # 과거 데이터가 없으면 중립
-                    
-                    volume_score = total_sales / total_route_sales if total_route_sales > 0 else 0
-                    popularity_score = volume_score * trend_ratio
-                    
-                    popularity_scores[product_name] = popularity_score
-                    print(f"  📊 {product_name}: 총판매량={total_sales:,}, 최근2개월평균={recent_2months_avg:.1f}, "
-                          f"과거2개월평균={past_2months_avg:.1f}, 추세비율={trend_ratio:.2f}, 인기도점수={popularity_score:.3f}")
-                
-                # 인기도 점수를 가중치로 변환
-                if popularity_scores:
-                    max_score = max(popularity_scores.values())
-                    min_score = min(popularity_scores.values())
-                    
-                    print(f"\n📋 가중치 변환:")
-                    print(f"  최대 점수: {max_score:.3f}")
-                    print(f"  최소 점수: {min_score:.3f}")
-                    
-                    for product_name, score in popularity_scores.items():
-                        if max_score > min_score:
-                            normalized_score = (score - min_score) / (max_score - min_score)
-                            weight = 0.7 + (normalized_score * 0.6)
-                        else:
-                            weight = 1.0
-                            print(f"  ⚠️ 모든 점수가 동일함 - 기본 가중치 1.0 적용")
-                        
-                        popularity_scores[product_name] = round(weight, 2)
-                        print(f"    {product_name}: {score:.3f} → {weight}")
-                
-                # 가중치 적용
-                for _, row in df[df['경로'] == route].iterrows():
-                    product_name = row['제품명']
-                    weight = popularity_scores.get(product_name, 1.0)
-                    df.loc[(df['경로'] == route) & (df['제품명'] == product_name), '인기도_가중치'] = weight
-                    
-                    print(f"  ✅ {product_name}: 가중치 {weight}")
-        else:
-            print(f"  ⚠️ 과거 데이터 없음 - 기본 가중치 0.001 적용")
-            # 모든 제품에 기본 가중치 0.001 적용
-            for _, row in df[df['경로'] == route].iterrows():
-                if '제품코드' in df.columns:
-                    product_code = row['제품코드']
-                    df.loc[(df['경로'] == route) & (df['제품코드'] == product_code), '인기도_가중치'] = 0.001
-                    print(f"  ✅ {row['제품명']} ({product_code}): 기본 가중치 0.001")
-                else:
-                    product_name = row['제품명']
-                    df.loc[(df['경로'] == route) & (df['제품명'] == product_name), '인기도_가중치'] = 0.001
-                    print(f"  ✅ {product_name}: 기본 가중치 0.001")
-    
-    return df
+    diagnostics.register('보정계수_통계', lambda: {
+        '총 제품 수': len(forecast),
+        '보정계수 1.0인 제품 수': int((forecast['보정계수'] == 1.0).sum()),
+        '보정계수 1.0이 아닌 제품 수': int((forecast['보정계수'] != 1.0).sum())
+    })
+    diagnostics.register('보정계수_1이_아닌_제품', lambda: forecast.loc[forecast['보정계수'] != 1.0, ['경로', '제품명', '보정계수']].head(10))
+    diagnostics.register('제품별_단가_샘플', lambda: forecast[['제품명', '판매가']].head(10).assign(
+        판매가=lambda x: x['판매가'].apply(lambda price: f"{price:,.0f}원")
+    ))
 
-def estimate_demand_improved(kpi_df, product_df, sales_history, target_month, kpi_history=None):
+def display_future_dashboard(forecast, selected_routes, data_version=None):
     """
-    개선된 수요 예측 로직:
-    1. 과거 실제 판매 데이터 기반 제품별 판매비중 계산
-    2. 제품별 판매가로 수량 산출
-    3. 과거 데이터 기반 보정계수 적용
+    원래 UI/UX를 유지한 미래 예측 결과 대시보드 표시
+    data_version: 예측 입력(데이터 버전, 대상 월, KPI)을 나타내는 차트 캐시 키 - 없으면 예측 결과 해시 사용
     """
-    df = pd.merge(product_df, kpi_df, on='경로')
-    
-    # Step 1: 과거 실제 판매 데이터 기반 제품별 판매비중 계산 (인기도 가중치 없이)
-    df = calculate_sales_ratio_from_history(df, sales_history, target_month)
-    
-    # Step 2: KPI 기반 제품별 예상 매출 계산 (인기도 가중치 없이)
-    # KPI매출이 문자열일 경우 숫자로 변환
-    if df['KPI매출'].dtype == 'object':
-        df['KPI매출'] = df['KPI매출'].astype(str).str.replace(',', '').astype(float)
-    
-    # 제품별 예상 매출 계산 (KPI매출 × 판매비중)
-    df['제품별_예상매출'] = df['판매비중'] * df['KPI매출']
-    
-    # 디버깅: 데이터 타입 확인
-    print(f"판매비중 타입: {df['판매비중'].dtype}")
-    print(f"KPI매출 타입: {df['KPI매출'].dtype}")
-    print(f"제품별_예상매출 타입: {df['제품별_예상매출'].dtype}")
-    print(f"제품별_예상매출 샘플: {df['제품별_예상매출'].head()}")
-    
-    # 제품별_예상매출이 object 타입인 경우 숫자로 강제 변환
-    if df['제품별_예상매출'].dtype == 'object':
-        print("제품별_예상매출이 object 타입입니다. 숫자로 변환 중...")
-        df['제품별_예상매출'] = pd.to_numeric(df['제품별_예상매출'], errors='coerce').fillna(0)
-        print(f"변환 후 타입: {df['제품별_예상매출'].dtype}")
-    
-    # KPI 정확성 보장: 각 경로별로 제품별_예상매출의 합이 KPI와 정확히 일치하도록 보정
-    for route in df['경로'].unique():
-        route_df = df[df['경로'] == route]
-        route_kpi = route_df['KPI매출'].iloc[0]
-        
-        # 현재 제품별_예상매출의 합계
-        current_sum = route_df['제품별_예상매출'].sum()
-        
-        # 오차 계산
-        difference = route_kpi - current_sum
-        
-        if abs(difference) > 0.01:  # 1원 이상의 오차가 있는 경우
-            print(f"{route} 경로: KPI={route_kpi:,.0f}, 현재합계={current_sum:,.0f}, 오차={difference:,.0f}")
-            
-            # 가장 큰 제품별_예상매출을 가진 제품에 오차를 보정
-            max_revenue_idx = route_df['제품별_예상매출'].idxmax()
-            df.loc[max_revenue_idx, '제품별_예상매출'] += difference
-            
-            # 보정 후 확인
-            corrected_sum = df[df['경로'] == route]['제품별_예상매출'].sum()
-            print(f"{route} 경로 보정 후: 합계={corrected_sum:,.0f}, KPI={route_kpi:,.0f}")
-    
-    # 정수 변환 (보정 후)
-    df['제품별_예상매출'] = df['제품별_예상매출'].round().astype(int)
-    
-    # Step 3: 순수한 예측 수량 계산 (인기도 가중치 없이)
-    df['예측수량'] = df['제품별_예상매출'] / df['판매가']
-    
-    # Step 4: 보정계수 계산 (순수한 예측량 기반)
-    if sales_history is not None:
-        # 과거 데이터 기반 보정계수 계산 (순수한 예측량 기반)
-        df = calculate_adjustment_factors_from_history(df, sales_history, target_month, kpi_history)
-    else:
-        # 기존 방식 (고정 보정계수)
-        df['보정계수'] = 1.0
-    
-    # Step 5: 보정 수량 계산 (보정계수 적용)
-    df['보정수량'] = df['예측수량'] * df['보정계수']
-    
-    # Step 6: 동적 인기도 가중치 계산 (적용은 나중에)
-    df = calculate_dynamic_popularity_weights(df, sales_history, target_month)
-    
-    # Step 7: KPI 목표와 맞추기 위한 스케일링 (인기도 가중치 적용 전)
-    for route in df['경로'].unique():
-        route_df = df[df['경로'] == route]
-        route_kpi = route_df['KPI매출'].iloc[0]
-        
-        # 보정수량 기반 예상 총 매출
-        route_expected_revenue = (route_df['보정수량'] * route_df['판매가']).sum()
-        
-        if route_expected_revenue > 0:
-            # KPI 목표와 맞추기 위한 스케일링 팩터
-            kpi_scaling_factor = route_kpi / route_expected_revenue
-            
-            # 보정수량에 KPI 스케일링 팩터 적용
-            df.loc[df['경로'] == route, '보정수량'] = (
-                df.loc[df['경로'] == route, '보정수량'] * kpi_scaling_factor
-            )
-            
-            print(f"{route} 경로 KPI 스케일링: KPI={route_kpi:,.0f}, 예상매출={route_expected_revenue:,.0f}, 스케일링팩터={kpi_scaling_factor:.3f}")
-    
-    # Step 8: 최종 예측량에 인기도 가중치 적용 (KPI 스케일링 후)
-    df['최종_예측수량'] = df['보정수량'] * df['인기도_가중치']
-    
-    # 예측수량과 보정수량, 최종_예측수량을 정수로 변환
-    df['예측수량'] = df['예측수량'].round().astype(int)
-    df['보정수량'] = df['보정수량'].round().astype(int)
-    df['최종_예측수량'] = df['최종_예측수량'].round().astype(int)
-    
-    # 최종 KPI 정확성 보장: 정수 변환 후 발생한 오차를 정확히 보정
-    for route in df['경로'].unique():
-        route_df = df[df['경로'] == route]
-        route_kpi = route_df['KPI매출'].iloc[0]
-        
-        # 정수 변환 후 실제 예상 총 매출
-        actual_revenue = (route_df['최종_예측수량'] * route_df['판매가']).sum()
-        
-        # 오차 계산
-        final_error = route_kpi - actual_revenue
-        
-        if abs(final_error) > 0.01:  # 1원 이상의 오차가 있는 경우
-            print(f"{route} 경로 최종 오차: KPI={route_kpi:,.0f}, 실제매출={actual_revenue:,.0f}, 오차={final_error:,.0f}")
-            
-            # 오차를 가장 큰 매출을 가진 제품에 보정
-            route_df_with_revenue = route_df.copy()
-            route_df_with_revenue['제품별_매출'] = route_df_with_revenue['최종_예측수량'] * route_df_with_revenue['판매가']
-            max_revenue_idx = route_df_with_revenue['제품별_매출'].idxmax()
-            
-            adjustment_quantity = final_error / route_df.loc[max_revenue_idx, '판매가']
-            
-            # 보정된 수량이 음수가 되지 않도록 확인
-            current_quantity = df.loc[max_revenue_idx, '최종_예측수량']
-            new_quantity = current_quantity + adjustment_quantity
-            
-            if new_quantity >= 0:
-                df.loc[max_revenue_idx, '최종_예측수량'] = new_quantity
-            else:
-                # 음수가 되는 경우, 두 번째로 큰 매출을 가진 제품에 보정
-                sorted_revenue_indices = route_df_with_revenue['제품별_매출'].sort_values(ascending=False).index
-                if len(sorted_revenue_indices) > 1:
-                    second_max_revenue_idx = sorted_revenue_indices[1]
-                    adjustment_quantity = final_error / route_df.loc[second_max_revenue_idx, '판매가']
-                    df.loc[second_max_revenue_idx, '최종_예측수량'] += adjustment_quantity
-            
-            # 보정 후 확인
-            corrected_revenue = (df.loc[df['경로'] == route, '최종_예측수량'] * df.loc[df['경로'] == route, '판매가']).sum()
-            print(f"{route} 경로 최종 보정 후: 예상매출={corrected_revenue:,.0f}, KPI={route_kpi:,.0f}")
-            
-            # 최종 확인 - 정확히 일치하는지 검증
-            final_check = (df.loc[df['경로'] == route, '최종_예측수량'] * df.loc[df['경로'] == route, '판매가']).sum()
-            if abs(final_check - route_kpi) <= 1:
-                print(f"✅ {route} 경로: KPI와 정확히 일치합니다!")
-            else:
-                print(f"❌ {route} 경로: 여전히 오차가 있습니다. ({final_check:,.0f} vs {route_kpi:,.0f})")
-                
-                # 추가 보정 시도 - 여러 제품에 분산
-                remaining_error = route_kpi - final_check
-                if abs(remaining_error) > 0.01:
-                    print(f"🔄 추가 보정 시도: 남은 오차 {remaining_error:,.0f}원")
-                    
-                    # 상위 3개 제품에 오차를 분산
-                    top_3_indices = route_df_with_revenue['제품별_매출'].nlargest(3).index
-                    for i, idx in enumerate(top_3_indices):
-                        if i < 2:  # 첫 번째와 두 번째 제품에만 보정
-                            partial_adjustment = remaining_error / (2 * route_df.loc[idx, '판매가'])
-                            df.loc[idx, '최종_예측수량'] += partial_adjustment
-                    
-                    # 최종 재확인
-                    final_final_check = (df.loc[df['경로'] == route, '최종_예측수량'] * df.loc[df['경로'] == route, '판매가']).sum()
-                    print(f"🔄 최종 재확인: {final_final_check:,.0f}원 vs KPI {route_kpi:,.0f}원")
-                    if abs(final_final_check - route_kpi) <= 1:
-                        print(f"✅ {route} 경로: 최종 보정 성공!")
-                    else:
-                        print(f"❌ {route} 경로: 최종 보정 실패. 오차: {final_final_check - route_kpi:,.0f}원")
-    
-    return df[['월', '경로', '제품명', '판매가', 'KPI매출', '제품별_예상매출', '예측수량', '보정계수', '보정수량', '인기도_가중치', '최종_예측수량', '판매비중']]
-
-def display_future_dashboard(forecast, selected_routes):
-    """원래 UI/UX를 유지한 미래 예측 결과 대시보드 표시"""
     
     # 대시보드 레이아웃
     col1, col2, col3 = st.columns(3)
@@ -707,30 +118,41 @@ def display_future_dashboard(forecast, selected_routes):
     
     st.markdown("---")
     
-    # 차트 섹션
-    col1, col2 = st.columns(2)
+    # 차트 섹션 (데이터 버전 + 선택 경로 기준으로 Figure 캐시)
+    if data_version is None:
+        data_version = get_data_version(forecast)
     
-    with col1:
-        st.subheader("📊 경로별 예측 수량")
+    def build_route_totals_figure():
         route_totals = forecast.groupby('경로')['최종_예측수량'].sum()
-        fig1 = px.bar(
+        return px.bar(
             x=route_totals.index,
             y=route_totals.values,
             title="경로별 총 예측 수량",
             labels={'x': '경로', 'y': '예측 수량'}
         )
-        st.plotly_chart(fig1, use_container_width=True)
     
-    with col2:
-        st.subheader("📈 제품별 예측 수량 (상위 10개)")
+    def build_product_totals_figure():
         product_totals = forecast.groupby('제품명')['최종_예측수량'].sum().sort_values(ascending=False).head(10)
-        fig2 = px.bar(
+        return px.bar(
             x=product_totals.values,
             y=product_totals.index,
             orientation='h',
             title="제품별 예측 수량",
             labels={'x': '예측 수량', 'y': '제품명'}
         )
+    
+    selection = tuple(selected_routes)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📊 경로별 예측 수량")
+        fig1 = get_cached_figure('future_route_totals', data_version, selection, build_route_totals_figure)
+        st.plotly_chart(fig1, use_container_width=True)
+    
+    with col2:
+        st.subheader("📈 제품별 예측 수량 (상위 10개)")
+        fig2 = get_cached_figure('future_product_totals', data_version, selection, build_product_totals_figure)
         st.plotly_chart(fig2, use_container_width=True)
     
     # 상세 데이터 테이블
@@ -771,131 +193,65 @@ def display_future_dashboard(forecast, selected_routes):
         - 🎯 **KPI 정확도**: 보정계수를 통해 최종 예측이 KPI 목표에 정확히 부합
         """)
     
-    # 상세 예측 결과 테이블 포맷팅
-    forecast_display = forecast[['경로', '제품명', '판매가', '제품별_예상매출', '예측수량', '보정계수', '보정수량', '인기도_가중치', '최종_예측수량']].copy()
+    # 상세 예측 결과 테이블 (서버측 검색/정렬/페이지네이션 - 현재 페이지만 포맷팅)
+    detail_columns = ['경로', '제품명', '판매가', '제품별_예상매출', '예측수량', '보정계수', '보정수량', '인기도_가중치', '최종_예측수량']
+    if '제품코드' in forecast.columns:
+        detail_columns.insert(1, '제품코드')
+    forecast_display = forecast[detail_columns].copy()
     
-    # 제품별_예상매출을 정수로 변환 후 포맷팅
+    # 제품별_예상매출을 정수로 변환
     forecast_display['제품별_예상매출'] = forecast_display['제품별_예상매출'].round().astype(int)
     
     # 숫자 컬럼에 콤마 적용 (금액은 정수로 표시, 수량은 정수로 표시)
-    forecast_display['판매가'] = forecast_display['판매가'].apply(lambda x: f"{int(x):,}")
-    forecast_display['제품별_예상매출'] = forecast_display['제품별_예상매출'].apply(lambda x: f"{int(x):,}")
-    forecast_display['예측수량'] = forecast_display['예측수량'].apply(lambda x: f"{int(x):,}")
-    forecast_display['보정계수'] = forecast_display['보정계수'].apply(lambda x: f"{x:.2f}")
-    forecast_display['보정수량'] = forecast_display['보정수량'].apply(lambda x: f"{int(x):,}")
-    forecast_display['인기도_가중치'] = forecast_display['인기도_가중치'].apply(lambda x: f"{x:.2f}")
-    forecast_display['최종_예측수량'] = forecast_display['최종_예측수량'].apply(lambda x: f"{int(x):,}")
+    forecast_formatters = {
+        '판매가': lambda x: f"{int(x):,}",
+        '제품별_예상매출': lambda x: f"{int(x):,}",
+        '예측수량': lambda x: f"{int(x):,}",
+        '보정계수': lambda x: f"{x:.2f}",
+        '보정수량': lambda x: f"{int(x):,}",
+        '인기도_가중치': lambda x: f"{x:.2f}",
+        '최종_예측수량': lambda x: f"{int(x):,}"
+    }
     
-    st.dataframe(forecast_display, use_container_width=True)
+    display_paginated_table(forecast_display, key="future_detail", formatters=forecast_formatters)
     
     # 경로별 분석
     st.subheader("🔍 경로별 상세 분석")
     for route in selected_routes:
-        route_data = forecast[forecast['경로'] == route]
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric(f"{route} 총 수량", f"{route_data['최종_예측수량'].sum():,}개")
-        with col2:
-            # 최종 예측수량 기반으로 실제 예상 매출 계산
-            route_expected_revenue = (route_data['최종_예측수량'] * route_data['판매가']).sum()
-            st.metric(f"{route} 예상 매출", f"{int(route_expected_revenue):,}원")
-        
-        # 제품별 수량 분포 표
-        st.write(f"**{route} 제품별 수량 분포**")
-        route_summary = route_data[['제품명', '최종_예측수량', '판매가']].copy()
-        # 최종 예측수량 기반으로 실제 예상 매출 계산
-        route_summary['제품별_예상매출'] = route_summary['최종_예측수량'] * route_summary['판매가']
-        route_summary = route_summary.sort_values('최종_예측수량', ascending=False)
-        route_summary['최종_예측수량'] = route_summary['최종_예측수량'].apply(lambda x: f"{int(x):,}")
-        route_summary['제품별_예상매출'] = route_summary['제품별_예상매출'].apply(lambda x: f"{int(x):,}")
-        st.dataframe(route_summary, use_container_width=True)
+        display_route_detail_section(forecast[forecast['경로'] == route], route)
 
-def show_future_prediction(product_info, sales_history, kpi_history, selected_month, selected_routes):
-    """미래 예측 모드 메인 함수"""
-    
-    # 선택된 경로만 필터링
-    filtered_product_info = product_info[product_info['경로'].isin(selected_routes)]
-    
-    # kpi_history.csv에서 실제 KPI 데이터 가져오기
-    # 선택된 월에 해당하는 KPI 데이터 필터링
-    month_mapping = {
-        '25-Aug': '2025년 8월',
-        '25-Sep': '2025년 9월', 
-        '25-Oct': '2025년 10월'
-    }
-    
-    target_month_korean = month_mapping.get(selected_month, '2025년 8월')
-    
-    # 해당 월의 KPI 데이터 가져오기
-    month_kpi_data = kpi_history[kpi_history['월'] == target_month_korean]
-    
-    # 선택된 경로에 대한 KPI 데이터 준비
-    kpi_current = pd.DataFrame({
-        '월': [selected_month] * len(selected_routes),
-        '경로': selected_routes,
-        'KPI매출': [0] * len(selected_routes)  # 초기값 설정
-    })
-    
-    # 실제 KPI 데이터로 채우기
-    for i, route in enumerate(selected_routes):
-        route_kpi = month_kpi_data[month_kpi_data['경로'] == route]
-        if len(route_kpi) > 0:
-            kpi_value = route_kpi.iloc[0]['KPI매출']
-            # 문자열인 경우 숫자로 변환
-            if isinstance(kpi_value, str):
-                kpi_value = float(kpi_value.replace(',', ''))
-            kpi_current.loc[i, 'KPI매출'] = kpi_value
-        else:
-            # 해당 경로의 KPI 데이터가 없는 경우 기본값 설정
-            default_kpi_values = {
-                'Amazon(USA)': 910171022,
-                'B2B(GLOBAL)': 3000000000,
-                'Shopee(PH)': 60000000,
-                'Shopee(MY)': 55000000,
-                'Shopee(SG)': 130000000,
-                'Shopee(VN)': 15000000,
-                'Shopee(TW)': 15000000,
-                'TikTokShop(USA)': 36000000,
-                'Shopee(TH)': 10000000
-            }
-            kpi_current.loc[i, 'KPI매출'] = default_kpi_values.get(route, 100000000)
-    
-    # KPI 데이터 확인
-    with st.expander("📊 KPI 데이터 확인", expanded=False):
-        st.dataframe(kpi_current, use_container_width=True)
-    
-    # 예측 실행 (과거 데이터 기반 보정계수 적용)
-    forecast = estimate_demand_improved(kpi_current, filtered_product_info, sales_history, selected_month, kpi_history)
-    
-    # 보정계수 분석
-    st.subheader("🔧 보정계수 분석")
-    col1, col2, col3 = st.columns(3)
-    
+@st.fragment
+def display_route_detail_section(route_data, route):
+    """경로별 상세 분석 섹션 (fragment - 이 섹션의 위젯 변경 시 해당 경로 섹션만 다시 실행)"""
+    col1, col2 = st.columns(2)
     with col1:
-        avg_adjustment = forecast['보정계수'].mean()
-        st.metric(
-            label="평균 보정계수",
-            value=f"{avg_adjustment:.2f}"
-        )
-    
+        st.metric(f"{route} 총 수량", f"{route_data['최종_예측수량'].sum():,}개")
     with col2:
-        max_adjustment = forecast['보정계수'].max()
-        st.metric(
-            label="최대 보정계수",
-            value=f"{max_adjustment:.2f}"
-        )
-    
-    with col3:
-        min_adjustment = forecast['보정계수'].min()
-        st.metric(
-            label="최소 보정계수",
-            value=f"{min_adjustment:.2f}"
-        )
-    
+        # 최종 예측수량 기반으로 실제 예상 매출 계산
+        route_expected_revenue = (route_data['최종_예측수량'] * route_data['판매가']).sum()
+        st.metric(f"{route} 예상 매출", f"{int(route_expected_revenue):,}원")
+    
+    # 제품별 수량 분포 표
+    st.write(f"**{route} 제품별 수량 분포**")
+    route_summary = route_data[['제품명', '최종_예측수량', '판매가']].copy()
+    # 최종 예측수량 기반으로 실제 예상 매출 계산
+    route_summary['제품별_예상매출'] = route_summary['최종_예측수량'] * route_summary['판매가']
+    display_paginated_table(
+        route_summary,
+        key=f"future_route_{route}",
+        formatters={
+            '최종_예측수량': lambda x: f"{int(x):,}",
+            '제품별_예상매출': lambda x: f"{int(x):,}"
+        },
+        default_sort='최종_예측수량'
+    )
 
-    
-    # 보정계수 디버깅 정보
+@st.fragment
+def display_adjustment_debug_info(diagnostics):
+    """
+    보정계수 디버깅 정보 (fragment - 전체 예측을 다시 실행하지 않고 독립적으로 갱신)
+    디버깅 테이블은 '상세 진단 데이터 표시'를 켠 경우에만 계산
+    """
     with st.expander("🔍 보정계수 디버깅 정보"):
         st.write("**개선된 보정계수 계산 방식 (KPI 목표 달성 보장):**")
         st.write("""
@@ -914,16 +270,20 @@ def show_future_prediction(product_info, sales_history, kpi_history, selected_mo
            - 개별 제품은 1.0 근처 유지
            - 전체적으로는 KPI 목표 달성 보장
         """)
+        
+        if not st.toggle("상세 진단 데이터 표시", key="future_debug_details"):
+            st.caption("상세 진단 데이터는 요청 시에만 계산됩니다.")
+            return
+        
         st.write("**보정계수 계산 과정:**")
-        st.write(f"- 총 제품 수: {len(forecast)}")
-        st.write(f"- 보정계수 1.0인 제품 수: {(forecast['보정계수'] == 1.0).sum()}")
-        st.write(f"- 보정계수 1.0이 아닌 제품 수: {(forecast['보정계수'] != 1.0).sum()}")
+        for label, value in diagnostics.get('보정계수_통계', {}).items():
+            st.write(f"- {label}: {value}")
         
         # 보정계수가 1.0이 아닌 제품들 표시
-        non_one_adjustments = forecast[forecast['보정계수'] != 1.0]
-        if len(non_one_adjustments) > 0:
+        non_one_adjustments = diagnostics.get('보정계수_1이_아닌_제품')
+        if non_one_adjustments is not None and len(non_one_adjustments) > 0:
             st.write("**보정계수가 1.0이 아닌 제품들:**")
-            st.dataframe(non_one_adjustments[['경로', '제품명', '보정계수']].head(10))
+            st.dataframe(non_one_adjustments)
         else:
             st.write("**모든 제품의 보정계수가 1.0입니다.**")
             st.write("가능한 원인:")
@@ -942,9 +302,469 @@ def show_future_prediction(product_info, sales_history, kpi_history, selected_mo
         
         # 제품별 단가 샘플 표시
         st.write("**제품별 단가 샘플 (상위 10개)**")
-        price_sample = forecast[['제품명', '판매가']].head(10).copy()
-        price_sample['판매가'] = price_sample['판매가'].apply(lambda x: f"{x:,.0f}원")
-        st.dataframe(price_sample, use_container_width=True)
+        st.dataframe(diagnostics.get('제품별_단가_샘플'), use_container_width=True)
+        
+        # 예측 단계별 중간 결과
+        stage_names = [name for name in diagnostics.names() if name[0].isdigit()]
+        if stage_names:
+            st.write("**예측 단계별 중간 결과**")
+            selected_stage = st.selectbox("단계 선택", stage_names, key="future_debug_stage")
+            display_paginated_table(diagnostics.get(selected_stage), key="future_debug_stage_table")
+
+@st.cache_resource(max_entries=16, show_spinner="장기 예측 계산 중...")
+def get_horizon_forecast(data_version, kpi_version, selected_routes, n_months, _product_info, _sales_history, _kpi_store):
+    """장기 예측을 (데이터 버전, KPI 버전, 경로, 예측 기간) 단위로 캐시"""
+    return forecast_horizon(_product_info, _sales_history, _kpi_store, list(selected_routes), n_months)
+
+def copied_horizon_months(horizon):
+    """장기 예측에서 앞 월 예측을 그대로 복사한 월 {계산한 월: [복사한 대상 월, ...]} (forecast_horizon의 attrs 기준)"""
+    copied = {}
+    for month, source_month in horizon.attrs.get('source_months', {}).items():
+        if month != source_month:
+            copied.setdefault(source_month, []).append(month)
+    return copied
+
+@st.fragment
+def display_horizon_forecast(product_info, sales_history, kpi_store, selected_routes, errors):
+    """
+    장기(12~18개월) 예측 섹션 (fragment - 예측 기간 변경 시 이 섹션만 다시 실행)
+    대상 월은 실적 집계가 끝난 마지막 월 다음 월부터 생성, 장기 예측 아래에 보충 계획 표시
+    """
+    st.subheader("🗓️ 장기 예측 (S&OP)")
+    
+    n_months = st.select_slider(
+        "예측 기간 (개월)",
+        options=list(range(HORIZON_MONTHS, MAX_HORIZON_MONTHS + 1)),
+        value=HORIZON_MONTHS,
+        key="horizon_months"
+    )
+    
+    horizon = get_horizon_forecast(
+        get_data_version(sales_history), kpi_store.version, tuple(selected_routes), n_months,
+        product_info, sales_history, kpi_store
+    )
+    if horizon.empty:
+        st.warning("장기 예측에 사용할 판매 데이터가 없습니다.")
+        return
+    
+    months = list(dict.fromkeys(horizon['월']))
+    st.caption(f"📅 예측 기간: {months[0]} ~ {months[-1]} ({len(months)}개월) | 과거 구간은 실적 집계가 끝난 마지막 월까지의 실적 사용, KPI가 없는 월은 가장 최근 KPI 적용")
+    
+    # 과거 구간이 고정되고 KPI도 이월된 월은 앞 월 예측의 복사본 - 평탄한 구간임을 명시
+    for source_month, copied_months in copied_horizon_months(horizon).items():
+        st.info(
+            f"ℹ️ {copied_months[0]} ~ {copied_months[-1]} ({len(copied_months)}개월) 예측은 {source_month} 예측을 그대로 복사한 값입니다. "
+            f"실적이 집계된 마지막 월 이후에는 과거 판매 구간이 더 이상 이동하지 않고 KPI도 같은 값이므로 월별 수량이 모두 같으며, "
+            f"아래 보충 계획도 이 평탄한 월별 수요를 기준으로 계산됩니다."
+        )
+    
+    # 경로 × 월 최종 예측수량
+    route_month = horizon.pivot_table(index='경로', columns='월', values='최종_예측수량', aggfunc='sum')[months]
+    
+    fig = go.Figure()
+    for route in route_month.index:
+        fig.add_trace(go.Scatter(x=months, y=route_month.loc[route].tolist(), mode='lines+markers', name=route))
+    fig.update_layout(title="경로별 월별 예측 수량", xaxis_title="월", yaxis_title="예측 수량")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.dataframe(route_month.round().astype(int).map(lambda x: f"{x:,}"), use_container_width=True)
+    
+    csv = horizon[['월', '경로', 'SKU_ID', '제품명', '판매가', 'KPI매출', '최종_예측수량']].to_csv(index=False, encoding='utf-8-sig')
+    st.download_button(
+        label="📥 장기 예측 CSV 다운로드",
+        data=csv,
+        file_name=f"장기_예측_{months[0]}_{months[-1]}.csv",
+        mime="text/csv",
+        key="horizon_download"
+    )
+    
+    # 보충 계획 (예측 기간 / 장기 예측이 바뀌면 함께 다시 계산)
+    st.markdown("---")
+    display_replenishment_plan(horizon, errors, product_info, sales_history)
+
+@st.cache_data(show_spinner=False)
+def get_inventory_status(path, modified_time):
+    """재고 현황 CSV를 (경로, 수정 시각) 단위로 캐시 - 파일을 고치면 다시 로드"""
+    return load_inventory_status(path)
+
+def display_replenishment_plan(horizon, errors, product_info, sales_history):
+    """
+    보충 계획 섹션 - 장기 예측 최종_예측수량 기준 SKU별 안전재고 / 재주문점 / 권장 주문량
+    재고 현황은 로컬 CSV(inventory_status.csv), 파일이 없거나 없는 SKU는 기본값(현재고 0, 리드타임 30일, MOQ 1)
+    """
+    st.subheader("📦 보충 계획 (안전재고 / 재주문점 / 권장 주문량)")
+    
+    path = inventory_path(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        inventory = get_inventory_status(path, os.path.getmtime(path) if os.path.exists(path) else None)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    
+    if inventory is None:
+        st.warning(f"재고 현황 파일({INVENTORY_FILE})이 없어 모든 SKU에 기본값(현재고 0, 리드타임 30일, MOQ 1)을 사용합니다.")
+        st.download_button(
+            label="📥 재고 현황 CSV 양식 다운로드",
+            data=inventory_template(product_info).to_csv(index=False, encoding='utf-8-sig'),
+            file_name=INVENTORY_FILE,
+            mime="text/csv",
+            key="inventory_template_download"
+        )
+    
+    service_level = st.select_slider(
+        "서비스 수준",
+        options=list(SERVICE_LEVELS),
+        value=DEFAULT_SERVICE_LEVEL,
+        format_func=lambda x: f"{x:.0%}",
+        key="replenishment_service_level"
+    )
+    
+    plan, summary = build_replenishment_plan(horizon, errors, inventory, product_info, sales_history, service_level)
+    months = list(dict.fromkeys(plan['월']))
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("주문 필요 SKU", f"{int((summary['총 권장주문량'] > 0).sum()):,}개")
+    with col2:
+        st.metric("총 권장 주문량", f"{summary['총 권장주문량'].sum():,.0f}")
+    with col3:
+        st.metric("결품 예상 SKU", f"{int((summary['결품 예상 월'] != '-').sum()):,}개")
+    
+    missing_inventory = int((summary['재고정보'] == '기본값').sum())
+    if inventory is not None and missing_inventory:
+        st.caption(f"⚠️ 재고 현황에 없는 SKU {missing_inventory}개는 기본값 사용")
+    
+    # 경로 × 월 권장 주문량
+    route_orders = plan.pivot_table(index='경로', columns='월', values='권장주문량', aggfunc='sum')[months]
+    fig = go.Figure()
+    for route in route_orders.index:
+        fig.add_trace(go.Bar(x=months, y=route_orders.loc[route].tolist(), name=route))
+    fig.update_layout(title="경로별 월별 권장 주문량", xaxis_title="월", yaxis_title="주문 수량", barmode='stack')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    quantity_format = lambda x: f"{x:,.0f}"
+    display_paginated_table(
+        summary.drop(columns=['SKU_ID']),
+        key="replenishment_summary_table",
+        formatters={
+            **{col: quantity_format for col in ['현재고', 'MOQ', '총 예측수요', '총 권장주문량']},
+            '오차 표준편차': lambda x: f"{x:.2f}"
+        },
+        default_sort='총 권장주문량'
+    )
+    
+    csv = plan.to_csv(index=False, encoding='utf-8-sig')
+    st.download_button(
+        label="📥 보충 계획 CSV 다운로드",
+        data=csv,
+        file_name=f"보충_계획_{months[0]}_{months[-1]}.csv",
+        mime="text/csv",
+        key="replenishment_download"
+    )
+
+@st.cache_resource(max_entries=16, show_spinner="과거 예측 오차 계산 중...")
+def get_engine_forecast_errors(data_version, kpi_version, selected_routes, _product_info, _sales_history, _kpi_store):
+    """과거 월별 엔진 예측 오차를 (데이터 버전, KPI 버전, 경로) 단위로 캐시"""
+    return engine_forecast_errors(_product_info, _sales_history, _kpi_store, list(selected_routes))
+
+def display_prediction_intervals(forecast, errors):
+    """
+    예측 구간(P10/P50/P90) 표시 - 과거 예측 오차 부트스트랩 (경로 합계 구간은 합계 표본의 분위수)
+    """
+    st.subheader(f"📏 예측 구간 ({' / '.join(INTERVAL_LABELS)})")
+    
+    error_months = list(dict.fromkeys(errors['월']))
+    if not error_months:
+        st.info("예측 구간 계산에 사용할 과거 예측 오차가 없습니다. (KPI와 실적이 모두 있는 월 필요)")
+        return
+    
+    sku_intervals, route_intervals = forecast_intervals(forecast, errors)
+    st.caption(f"📅 오차 기준 월: {', '.join(error_months)} | SKU별 오차가 부족하면 같은 경로 전체 오차 사용")
+    
+    lower, median, upper = INTERVAL_LABELS
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=route_intervals['경로'], y=route_intervals['점 예측'], name='최종 예측수량',
+        error_y=dict(
+            type='data', symmetric=False,
+            array=(route_intervals[upper] - route_intervals['점 예측']).clip(lower=0),
+            arrayminus=(route_intervals['점 예측'] - route_intervals[lower]).clip(lower=0)
+        )
+    ))
+    fig.add_trace(go.Scatter(
+        x=route_intervals['경로'], y=route_intervals[median], mode='markers', name=median,
+        marker=dict(symbol='diamond', size=10)
+    ))
+    fig.update_layout(title=f"경로별 최종 예측수량과 {lower}~{upper} 구간", xaxis_title="경로", yaxis_title="예측 수량")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    route_display = route_intervals.copy()
+    for col in ['점 예측'] + list(INTERVAL_LABELS):
+        route_display[col] = route_display[col].apply(lambda x: f"{x:,.0f}")
+    st.dataframe(route_display, use_container_width=True, hide_index=True)
+    
+    quantity_format = lambda x: f"{x:,.0f}"
+    display_paginated_table(
+        sku_intervals.drop(columns=['SKU_ID']),
+        key="future_interval_table",
+        formatters={col: quantity_format for col in ['점 예측'] + list(INTERVAL_LABELS)},
+        default_sort='점 예측'
+    )
+
+@st.fragment
+def display_capacity_allocation(forecast, selected_month, selected_routes):
+    """
+    용량 제약 배분 섹션 (fragment - 최소/최대 수량 편집 시 이 섹션만 다시 실행)
+    SKU별 최소/최대 수량 안에서 모든 경로의 KPI 매출을 하나의 선형계획으로 다시 맞춤 (빈 칸은 제한 없음)
+    """
+    st.subheader("🏭 용량 제약 배분")
+    
+    if not constrained_allocation_available():
+        st.info("용량 제약 배분은 scipy가 필요합니다. (pip install scipy)")
+        return
+    if not st.toggle("SKU별 최소/최대 수량 제약 적용", key="capacity_enabled"):
+        return
+    
+    bounds = forecast[['경로', '제품명', '최종_예측수량']].copy()
+    for col in CONSTRAINT_COLUMNS:
+        bounds[col] = np.nan
+    edited = st.data_editor(
+        bounds,
+        disabled=['경로', '제품명', '최종_예측수량'],
+        column_config={
+            '최종_예측수량': st.column_config.NumberColumn('최종_예측수량', format="%.0f"),
+            **{col: st.column_config.NumberColumn(col, min_value=0, step=1, format="%d") for col in CONSTRAINT_COLUMNS}
+        },
+        hide_index=True,
+        use_container_width=True,
+        key=f"capacity_editor_{make_data_version(selected_month, tuple(selected_routes))}"
+    )
+    
+    constrained = edited[CONSTRAINT_COLUMNS].notna().any(axis=1)
+    if not constrained.any():
+        st.caption("최소/최대 수량을 입력한 제품이 없습니다. (빈 칸은 제한 없음)")
+        return
+    
+    try:
+        products, route_summary = solve_constrained_allocation(
+            forecast, edited['최소수량'].to_numpy(dtype=float), edited['최대수량'].to_numpy(dtype=float)
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    
+    short_routes = route_summary.loc[route_summary['KPI_달성'] != '가능', '경로'].tolist()
+    if short_routes:
+        st.warning(f"최소/최대 수량 범위로는 KPI를 맞출 수 없는 경로: {', '.join(short_routes)} (KPI에 가장 가깝게 배분)")
+    st.caption(f"제약 제품 {int(constrained.sum())}개 | 변경된 제품 {int((products['변경수량'].abs() >= 0.5).sum())}개")
+    
+    summary_display = route_summary.copy()
+    for col in ['KPI매출', '기존_예상매출', '제약_예상매출', 'KPI_차이']:
+        summary_display[col] = summary_display[col].apply(lambda x: f"{x:,.0f}")
+    st.dataframe(summary_display, use_container_width=True, hide_index=True)
+    
+    changed = products[products['변경수량'].abs() >= 0.5].drop(columns=['SKU_ID'])
+    quantity_format = lambda x: f"{x:,.0f}"
+    display_paginated_table(
+        changed,
+        key="capacity_table",
+        formatters={col: quantity_format for col in ['판매가', '최종_예측수량', '최소수량', '최대수량', '제약_예측수량', '변경수량']},
+        default_sort='변경수량'
+    )
+    
+    csv = products.drop(columns=['SKU_ID']).to_csv(index=False, encoding='utf-8-sig')
+    st.download_button(
+        label="📥 용량 제약 배분 CSV 다운로드",
+        data=csv,
+        file_name=f"용량_제약_배분_{selected_month}.csv",
+        mime="text/csv",
+        key="capacity_download"
+    )
+
+@st.cache_resource(max_entries=64, show_spinner="KPI 시나리오 준비 중...")
+def get_scenario_inputs(forecast_version, selected_month, _kpi_df, _product_df, _sales_history, _kpi_store):
+    """KPI와 무관한 시나리오 중간 결과를 예측 입력 버전(데이터 버전, 대상 월, 경로별 KPI) 단위로 캐시"""
+    return prepare_kpi_scenarios(_kpi_df, _product_df, _sales_history, selected_month, _kpi_store)
+
+def display_kpi_editor(kpi_base, selected_month, selected_routes):
+    """
+    경로별 KPI매출 편집 표 - 편집 결과 KPI DataFrame 반환 (편집 내용은 대상 월/경로 조합별로 유지)
+    """
+    edited = st.data_editor(
+        kpi_base,
+        disabled=['월', '경로'],
+        column_config={
+            'KPI매출': st.column_config.NumberColumn('KPI매출', min_value=0, step=1000000, format="%d")
+        },
+        hide_index=True,
+        use_container_width=True,
+        key=f"kpi_editor_{make_data_version(selected_month, tuple(selected_routes))}"
+    )
+    edited['KPI매출'] = edited['KPI매출'].fillna(kpi_base['KPI매출']).astype(float)
+    
+    changed = edited.loc[edited['KPI매출'] != kpi_base['KPI매출'], '경로'].tolist()
+    if changed:
+        st.caption(f"✏️ KPI 편집 경로: {', '.join(changed)} (편집한 경로만 다시 계산, 저장소 KPI는 변경되지 않음)")
+    return edited
+
+@st.fragment
+def display_kpi_scenarios(scenario_inputs, base_kpis):
+    """
+    KPI 시나리오 비교 섹션 (fragment - 변화율/경로 선택 시 이 섹션만 다시 실행)
+    선택한 변화율을 모든 경로 KPI(base_kpis, scenario_inputs.routes 순서)에 적용한 시나리오를 한 번에 계산
+    (경로별 예측은 해당 경로 KPI에만 의존)
+    """
+    st.subheader("🎯 KPI 시나리오 비교 (What-if)")
+    
+    changes = st.multiselect(
+        "KPI 변화율",
+        options=[change for change in SCENARIO_CHANGES if change != 0],
+        default=[change for change in SCENARIO_CHANGES if change != 0],
+        format_func=scenario_label,
+        key="scenario_changes"
+    )
+    changes = sorted(set(changes) | {0.0})
+    labels, kpi_matrix = build_kpi_scenarios(base_kpis, changes)
+    result = scenario_inputs.evaluate(kpi_matrix, labels)
+    
+    st.caption(f"시나리오 {len(labels)}개 × 제품 {len(scenario_inputs.frame)}개 계산: {result.elapsed * 1000:.1f}ms")
+    
+    # 경로 × 시나리오 최종 예측수량
+    route_totals = result.route_totals()
+    fig = go.Figure()
+    for label in labels:
+        fig.add_trace(go.Bar(x=route_totals.index.tolist(), y=route_totals[label].tolist(), name=label))
+    fig.update_layout(title="경로별 시나리오 최종 예측수량", xaxis_title="경로", yaxis_title="예측 수량", barmode='group')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    totals_display = route_totals.copy()
+    totals_display.loc['합계'] = route_totals.sum()
+    st.dataframe(totals_display.round().astype(int).map(lambda x: f"{x:,}"), use_container_width=True)
+    
+    # 경로별 제품 × 시나리오
+    route = st.selectbox("제품별 비교 경로", scenario_inputs.routes, key="scenario_route")
+    product_table = result.product_table(route)
+    st.dataframe(
+        product_table.style.format({label: "{:,.0f}" for label in labels}),
+        use_container_width=True
+    )
+    
+    csv = result.long_frame().to_csv(index=False, encoding='utf-8-sig')
+    st.download_button(
+        label="📥 KPI 시나리오 CSV 다운로드",
+        data=csv,
+        file_name="KPI_시나리오_비교.csv",
+        mime="text/csv",
+        key="scenario_download"
+    )
+
+def prepare_future_inputs(product_info, sales_history, kpi_store, selected_month, selected_routes):
+    """
+    미래 예측 입력 준비 - (선택 경로 제품 정보, 저장소 KPI, 시나리오 중간 결과)
+    화면과 예열 작업이 같은 캐시 키를 쓰도록 한 곳에서 생성
+    """
+    # 선택된 경로만 필터링
+    filtered_product_info = product_info[product_info['경로'].isin(selected_routes)]
+    
+    # KPI 저장소에서 선택된 월/경로의 KPI 조회
+    # 해당 월 KPI가 없으면 가장 최근 월 KPI, 경로 KPI가 아예 없으면 기본값 사용
+    kpi_base = kpi_store.frame(selected_month, selected_routes, fallback=KPI_FALLBACK_CARRY_FORWARD)
+    
+    # KPI와 무관한 중간 결과(판매비중/보정계수/인기도 가중치)는 저장소 KPI 기준으로 한 번만 준비
+    scenario_inputs = get_scenario_inputs(
+        make_data_version(get_data_version(sales_history), selected_month, tuple(kpi_base['경로']), tuple(kpi_base['KPI매출'])),
+        selected_month, kpi_base, filtered_product_info, sales_history, kpi_store
+    )
+    return filtered_product_info, kpi_base, scenario_inputs
+
+def warm_future_prediction(product_info, sales_history, kpi_store, selected_month, selected_routes):
+    """
+    미래 예측 모드 예열 - 화면 입력 없이 기본 설정(저장소 KPI, 기본 예측 기간)의 예측 결과를 캐시에 적재
+    (시나리오 중간 결과 / 예측 오차 / 장기 예측은 st.cache_resource, 예측 결과는 영속 캐시)
+    """
+    filtered_product_info, kpi_base, scenario_inputs = prepare_future_inputs(
+        product_info, sales_history, kpi_store, selected_month, selected_routes
+    )
+    estimate_demand_improved(kpi_base, filtered_product_info, sales_history, selected_month, kpi_store, None, scenario_inputs)
+    get_engine_forecast_errors(
+        get_data_version(sales_history), kpi_store.version, tuple(selected_routes), product_info, sales_history, kpi_store
+    )
+    get_horizon_forecast(
+        get_data_version(sales_history), kpi_store.version, tuple(selected_routes), HORIZON_MONTHS,
+        product_info, sales_history, kpi_store
+    )
+
+def show_future_prediction(product_info, sales_history, kpi_store, selected_month, selected_routes):
+    """미래 예측 모드 메인 함수"""
+    
+    filtered_product_info, kpi_base, scenario_inputs = prepare_future_inputs(
+        product_info, sales_history, kpi_store, selected_month, selected_routes
+    )
+    
+    # KPI 데이터 확인 / 편집 (편집한 경로만 다시 계산)
+    with st.expander("📊 KPI 데이터 확인 / 편집", expanded=False):
+        kpi_current = display_kpi_editor(kpi_base, selected_month, selected_routes)
+    
+    # 예측 실행 (과거 데이터 기반 보정계수 적용)
+    # 진단 항목은 등록만 하고, 디버깅 정보 화면에서 요청할 때만 계산
+    diagnostics = LazyDiagnostics()
+    forecast = estimate_demand_improved(
+        kpi_current, filtered_product_info, sales_history, selected_month, kpi_store, diagnostics, scenario_inputs
+    )
+    
+    # 보정계수 분석
+    st.subheader("🔧 보정계수 분석")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        avg_adjustment = forecast['보정계수'].mean()
+        st.metric(
+            label="평균 보정계수",
+            value=f"{avg_adjustment:.2f}"
+        )
     
-    # 기존 대시보드 표시
-    display_future_dashboard(forecast, selected_routes)
+    with col2:
+        max_adjustment = forecast['보정계수'].max()
+        st.metric(
+            label="최대 보정계수",
+            value=f"{max_adjustment:.2f}"
+        )
+    
+    with col3:
+        min_adjustment = forecast['보정계수'].min()
+        st.metric(
+            label="최소 보정계수",
+            value=f"{min_adjustment:.2f}"
+        )
+    
+
+    
+    # 보정계수 디버깅 정보
+    display_adjustment_debug_info(diagnostics)
+    
+    # 기존 대시보드 표시 (예측 입력 기준 데이터 버전으로 차트 캐시)
+    forecast_version = make_data_version(
+        get_data_version(sales_history),
+        selected_month,
+        tuple(kpi_current['KPI매출'].tolist())
+    )
+    display_future_dashboard(forecast, selected_routes, forecast_version)
+    
+    # 용량 제약 배분 (선택 - SKU별 최소/최대 수량 안에서 KPI 재정합)
+    st.markdown("---")
+    display_capacity_allocation(forecast, selected_month, selected_routes)
+    
+    # 예측 구간 (과거 예측 오차 부트스트랩)
+    st.markdown("---")
+    errors = get_engine_forecast_errors(
+        get_data_version(sales_history), kpi_store.version, tuple(selected_routes), product_info, sales_history, kpi_store
+    )
+    display_prediction_intervals(forecast, errors)
+    
+    # KPI 시나리오 비교 (편집한 KPI 기준)
+    st.markdown("---")
+    display_kpi_scenarios(scenario_inputs, scenario_inputs.kpi_vector(dict(zip(kpi_current['경로'], kpi_current['KPI매출']))))
+    
+    # 장기 예측 (대상 월 여러 개를 한 번에 계산)
+    st.markdown("---")
+    display_horizon_forecast(product_info, sales_history, kpi_store, selected_routes, errors)
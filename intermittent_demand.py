@@ -0,0 +1,194 @@
+"""
+intermittent_demand.py
+간헐 수요 예측 - Croston / SBA / TSB를 전체 시계열에 한 번에 계산 (NumPy 벡터화)
+- 시계열별 평균 판매 간격(ADI)과 판매량 변동계수 제곱(CV²)으로 수요 패턴 자동 분류 (Syntetos-Boylan 기준)
+- (평활 상수 그리드 × 시계열) 상태 배열로 재귀식을 시간축으로만 반복하고, 1단계 예측 제곱 오차가 최소인 조합 선택
+- 판매가 없는 월이 많거나 판매량이 작은 제품에서 변화율 외삽이 크게 흔들리는 문제를 줄이기 위한 모델
+"""
+
+import time
+
+import numpy as np
+
+from diagnostics import debug_print
+from ets_models import build_series_matrix
+
+# 수요 패턴 분류 기준 (Syntetos-Boylan)
+ADI_CUTOFF = 1.32
+CV2_CUTOFF = 0.49
+
+# 최근 무판매 구간이 평균 판매 간격의 이 배수를 넘으면 단종 의심으로 보고 TSB 사용
+OBSOLESCENCE_INTERVAL_MULTIPLE = 2.0
+
+# 평활 상수 탐색 그리드 (판매량/판매 간격 alpha, 판매 확률 beta - TSB)
+INTERMITTENT_ALPHAS = (0.05, 0.1, 0.2, 0.3)
+INTERMITTENT_BETAS = (0.05, 0.1, 0.2, 0.3)
+
+# 수요 패턴
+DEMAND_PATTERN_SMOOTH = '안정(Smooth)'
+DEMAND_PATTERN_ERRATIC = '변동(Erratic)'
+DEMAND_PATTERN_INTERMITTENT = '간헐(Intermittent)'
+DEMAND_PATTERN_LUMPY = '불규칙 간헐(Lumpy)'
+DEMAND_PATTERN_NONE = '판매 없음'
+DEMAND_PATTERNS = [DEMAND_PATTERN_SMOOTH, DEMAND_PATTERN_ERRATIC, DEMAND_PATTERN_INTERMITTENT, DEMAND_PATTERN_LUMPY, DEMAND_PATTERN_NONE]
+
+# 예측 방식
+INTERMITTENT_METHOD_CROSTON = 'Croston'
+INTERMITTENT_METHOD_SBA = 'SBA(Syntetos-Boylan)'
+INTERMITTENT_METHOD_TSB = 'TSB(Teunter-Syntetos-Babai)'
+INTERMITTENT_METHOD_NONE = '예측 없음(판매 없음)'
+
+# 수요 패턴별 예측 방식 (단종 의심 시계열은 패턴과 관계없이 TSB)
+PATTERN_METHODS = {
+    DEMAND_PATTERN_SMOOTH: INTERMITTENT_METHOD_CROSTON,
+    DEMAND_PATTERN_ERRATIC: INTERMITTENT_METHOD_SBA,
+    DEMAND_PATTERN_INTERMITTENT: INTERMITTENT_METHOD_SBA,
+    DEMAND_PATTERN_LUMPY: INTERMITTENT_METHOD_TSB,
+    DEMAND_PATTERN_NONE: INTERMITTENT_METHOD_NONE
+}
+
+class IntermittentForecastResult:
+    """시계열별 간헐 수요 예측 결과 (행 순서는 입력 시계열 순서와 동일)"""
+
+    def __init__(self, monthly_forecasts, methods, patterns, adi, cv2, parameters, months, elapsed):
+        self.monthly_forecasts = monthly_forecasts  # (N, H) 월별 예측 (간헐 수요 모델은 모든 월 동일)
+        self.methods = methods                      # (N,) 예측 방식
+        self.patterns = patterns                    # (N,) 수요 패턴
+        self.adi = adi                              # (N,) 평균 판매 간격 (판매가 없으면 NaN)
+        self.cv2 = cv2                              # (N,) 판매량 변동계수 제곱 (판매가 없으면 NaN)
+        self.parameters = parameters                # {'alpha', 'beta'}: (N,) 선택된 평활 상수 (해당 없으면 NaN)
+        self.months = months                        # 학습에 사용한 월 목록
+        self.elapsed = elapsed                      # 계산 시간(초)
+
+    def pattern_counts(self):
+        """수요 패턴별 시계열 수"""
+        return {pattern: int(np.sum(self.patterns == pattern)) for pattern in DEMAND_PATTERNS}
+
+def classify_demand_patterns(series):
+    """
+    시계열별 수요 패턴 분류 (첫 판매 이전의 0은 출시 전 기간으로 제외)
+    반환값: (패턴 배열, 평균 판매 간격, CV², 첫 판매 위치, 판매 월 평균 판매량, 최근 무판매 월 수)
+    """
+    n_series, n_time = series.shape
+    demand = series > 0
+    has_sales = demand.any(axis=1)
+    start = np.where(has_sales, np.argmax(demand, axis=1), n_time)
+
+    n_demands = demand.sum(axis=1)
+    n_observed = n_time - start
+    safe_demands = np.maximum(n_demands, 1)
+    adi = np.where(has_sales, n_observed / safe_demands, np.nan)
+
+    sizes = np.where(demand, series, 0)
+    mean_size = sizes.sum(axis=1) / safe_demands
+    size_variance = np.where(demand, (series - mean_size[:, None]) ** 2, 0).sum(axis=1) / safe_demands
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cv2 = np.where(has_sales, size_variance / mean_size ** 2, np.nan)
+
+    # 마지막 판매 이후 무판매 월 수
+    last_demand = n_time - 1 - np.argmax(demand[:, ::-1], axis=1)
+    trailing_zeros = np.where(has_sales, n_time - 1 - last_demand, 0)
+
+    frequent = adi < ADI_CUTOFF
+    stable_size = cv2 < CV2_CUTOFF
+    patterns = np.select(
+        [~has_sales, frequent & stable_size, frequent, stable_size],
+        [DEMAND_PATTERN_NONE, DEMAND_PATTERN_SMOOTH, DEMAND_PATTERN_ERRATIC, DEMAND_PATTERN_INTERMITTENT],
+        default=DEMAND_PATTERN_LUMPY
+    ).astype(object)
+
+    return patterns, adi, cv2, start, mean_size, trailing_zeros
+
+def _smooth_intermittent(y, start, adi, mean_size):
+    """
+    (시계열 N × 시간 T) 행렬의 Croston/TSB 재귀식을 평활 상수 그리드 전체에 대해 동시 계산
+    초기 상태: 판매량 = 판매 월 평균 판매량, 판매 간격 = 평균 판매 간격, 판매 확률 = 1 / 평균 판매 간격
+    반환값: {방식: (G × N 1단계 예측 제곱 오차 합, G × N 최종 예측, 조합 배열 튜플)}
+    """
+    n_series, n_time = y.shape
+    alpha = np.array(INTERMITTENT_ALPHAS)[:, None]
+    tsb_grid = np.array([(a, b) for a in INTERMITTENT_ALPHAS for b in INTERMITTENT_BETAS])
+    tsb_alpha, tsb_beta = tsb_grid[:, :1], tsb_grid[:, 1:]
+
+    # Croston/SBA 상태 (G × N): 판매량 size, 판매 간격 interval, 마지막 판매 이후 경과 월 since_demand
+    size = np.broadcast_to(mean_size, (len(alpha), n_series)).copy()
+    interval = np.broadcast_to(adi, (len(alpha), n_series)).copy()
+    since_demand = np.ones((len(alpha), n_series))
+    croston_sse = np.zeros((len(alpha), n_series))
+    sba_sse = np.zeros((len(alpha), n_series))
+    sba_factor = 1 - alpha / 2
+
+    # TSB 상태 (G' × N): 판매량 tsb_size, 판매 확률 probability
+    tsb_size = np.broadcast_to(mean_size, (len(tsb_grid), n_series)).copy()
+    probability = np.broadcast_to(1 / adi, (len(tsb_grid), n_series)).copy()
+    tsb_sse = np.zeros((len(tsb_grid), n_series))
+
+    for t in range(n_time):
+        values = y[:, t]
+        active = t > start     # 첫 판매 월 다음부터 오차 누적 및 상태 갱신
+        demand = active & (values > 0)
+
+        croston_error = values - size / interval
+        sba_error = values - sba_factor * size / interval
+        tsb_error = values - probability * tsb_size
+        croston_sse += np.where(active, croston_error ** 2, 0)
+        sba_sse += np.where(active, sba_error ** 2, 0)
+        tsb_sse += np.where(active, tsb_error ** 2, 0)
+
+        size = np.where(demand, size + alpha * (values - size), size)
+        interval = np.where(demand, interval + alpha * (since_demand - interval), interval)
+        since_demand = np.where(demand, 1, since_demand + active)
+
+        tsb_size = np.where(demand, tsb_size + tsb_alpha * (values - tsb_size), tsb_size)
+        probability = np.where(active, probability + tsb_beta * (demand - probability), probability)
+
+    return {
+        INTERMITTENT_METHOD_CROSTON: (croston_sse, size / interval, (alpha[:, 0], np.full(len(alpha), np.nan))),
+        INTERMITTENT_METHOD_SBA: (sba_sse, sba_factor * size / interval, (alpha[:, 0], np.full(len(alpha), np.nan))),
+        INTERMITTENT_METHOD_TSB: (tsb_sse, probability * tsb_size, (tsb_alpha[:, 0], tsb_beta[:, 0]))
+    }
+
+def fit_intermittent_forecasts(series, months_ahead=6, months=None):
+    """
+    여러 시계열의 간헐 수요 예측을 한 번의 벡터 연산으로 계산
+    - 수요 패턴 분류 후 패턴별 방식(PATTERN_METHODS) 적용, 단종 의심 시계열은 TSB
+    - 방식별로 평활 상수 그리드 중 1단계 예측 제곱 오차가 최소인 조합 선택
+    """
+    started = time.perf_counter()
+    series = np.maximum(0, np.nan_to_num(np.asarray(series, dtype=float)))
+    n_series, n_time = series.shape
+
+    patterns, adi, cv2, start, mean_size, trailing_zeros = classify_demand_patterns(series)
+    methods = np.array([PATTERN_METHODS[pattern] for pattern in patterns], dtype=object)
+    obsolete = (patterns != DEMAND_PATTERN_NONE) & (trailing_zeros > OBSOLESCENCE_INTERVAL_MULTIPLE * np.nan_to_num(adi))
+    methods[obsolete] = INTERMITTENT_METHOD_TSB
+
+    forecasts = np.zeros(n_series)
+    parameters = {'alpha': np.full(n_series, np.nan), 'beta': np.full(n_series, np.nan)}
+
+    rows = np.flatnonzero(patterns != DEMAND_PATTERN_NONE)
+    if len(rows) > 0:
+        results = _smooth_intermittent(series[rows], start[rows], adi[rows], mean_size[rows])
+        for method, (sse, method_forecasts, (alphas, betas)) in results.items():
+            selected = np.flatnonzero(methods[rows] == method)
+            if len(selected) == 0:
+                continue
+            best = np.argmin(sse[:, selected], axis=0)
+            forecasts[rows[selected]] = method_forecasts[best, selected]
+            parameters['alpha'][rows[selected]] = alphas[best]
+            parameters['beta'][rows[selected]] = betas[best]
+
+    monthly_forecasts = np.repeat(np.maximum(0, forecasts)[:, None], months_ahead, axis=1)
+    elapsed = time.perf_counter() - started
+    debug_print(f"간헐 수요 예측 - 시계열 {n_series}개, 단종 의심 {int(obsolete.sum())}개, {elapsed:.3f}초")
+    return IntermittentForecastResult(monthly_forecasts, methods, patterns, adi, cv2, parameters, months, elapsed)
+
+def fit_intermittent_from_monthly_matrix(monthly_matrix, last_month, months_ahead=6):
+    """
+    (경로, 제품명) × 월 판매량 행렬에서 last_month까지의 시계열로 간헐 수요 예측 계산
+    모든 시계열의 판매가 0인 마지막 월들은 데이터가 아직 없는 월로 보고 제외 (무판매 구간/단종 의심 판단 왜곡 방지)
+    """
+    series, months = build_series_matrix(monthly_matrix, last_month)
+    observed = np.flatnonzero(series.any(axis=0))
+    n_months = observed[-1] + 1 if len(observed) > 0 else 0
+    return fit_intermittent_forecasts(series[:, :n_months], months_ahead, months[:n_months])
@@ -16,28 +16,24 @@ from future_prediction import (
     estimate_demand_improved,
     get_relative_past_months
 )
+from diagnostics import debug_print, diagnostics_enabled
+from kpi_store import KPI_FALLBACK_EXACT
+from month_utils import to_korean_month
+from chart_layer import get_data_version
+from persistent_cache import persistent_cache, frame_key, kpi_store_key
 
 def calculate_m1_sales_based_forecast(target_month, routes, product_info, sales_history):
     """
     M-1 시점에서 판매데이터 기반 다음 달 수요 예측 함수
     현재 월 데이터를 제외하고 과거 판매 데이터만으로 예측
     """
-    # 월 형식 매핑
-    korean_months = {
-        '25-Aug': '2025년 8월',
-        '25-Sep': '2025년 9월',
-        '25-Oct': '2025년 10월',
-        '2025년 5월': '2025년 5월',
-        '2025년 6월': '2025년 6월',
-        '2025년 7월': '2025년 7월'
-    }
-    
-    target_month_korean = korean_months.get(target_month, target_month)
-    print(f"calculate_m1_sales_based_forecast: 예측 목표 월 = {target_month_korean}")
+    # 월 형식 변환 ('25-Aug' → '2025년 8월')
+    target_month_korean = to_korean_month(target_month)
+    debug_print(f"calculate_m1_sales_based_forecast: 예측 목표 월 = {target_month_korean}")
     
     # 비교 대상월 대비 상대적으로 과거 3개월 계산
     past_months = get_relative_past_months(target_month_korean, 3)
-    print(f"calculate_m1_sales_based_forecast: 사용할 과거 월들 = {past_months}")
+    debug_print(f"calculate_m1_sales_based_forecast: 사용할 과거 월들 = {past_months}")
     
     # 과거 판매 데이터 필터링 (목표월 제외)
     past_sales = sales_history[
@@ -46,110 +42,85 @@ def calculate_m1_sales_based_forecast(target_month, routes, product_info, sales_
         (sales_history['경로'].isin(routes))
     ]
     
-    print(f"calculate_m1_sales_based_forecast: 과거 판매 데이터 행수 = {len(past_sales)}")
-    print(f"calculate_m1_sales_based_forecast: 사용 가능한 월들 = {past_sales['월'].unique()}")
+    debug_print(f"calculate_m1_sales_based_forecast: 과거 판매 데이터 행수 = {len(past_sales)}")
+    if diagnostics_enabled():
+        debug_print(f"calculate_m1_sales_based_forecast: 사용 가능한 월들 = {past_sales['월'].unique()}")
     
-    # 과거 3개월 평균 판매량 계산
-    result_data = []
+    # SKU별 과거 3개월 평균 판매량 (판매 행 기준 평균)
+    sku_avg_quantity = past_sales.groupby('SKU_ID')['판매수량'].mean()
     
-    for route in routes:
-        route_sales = past_sales[past_sales['경로'] == route]
-        route_products = product_info[product_info['경로'] == route]
-        
-        print(f"calculate_m1_sales_based_forecast: 경로 {route} - 과거 판매 데이터 {len(route_sales)}개, 제품 {len(route_products)}개")
-        
-        for _, product in route_products.iterrows():
-            product_code = product['제품코드']
-            product_name = product['제품명']
-            
-            # 제품코드 기반 매칭 (먼저 시도)
-            if '제품코드' in route_sales.columns and pd.notna(product_code):
-                product_sales = route_sales[route_sales['제품코드'] == product_code]
-            else:
-                # 제품명 기반 매칭 (대안)
-                product_sales = route_sales[route_sales['제품명'] == product_name]
-            
-            if len(product_sales) > 0:
-                # 과거 3개월 평균 판매량 계산
-                avg_quantity = product_sales['판매수량'].mean()
-                # 최소 0으로 제한
-                predicted_quantity = max(0, avg_quantity)
-            else:
-                # 판매 이력이 없는 제품은 0으로 예측
-                predicted_quantity = 0
-            
-            result_data.append({
-                '월': target_month,
-                '경로': route,
-                '제품코드': product_code,
-                '제품명': product_name,
-                'M1_예측수량': int(predicted_quantity)
-            })
-    
-    result_df = pd.DataFrame(result_data)
-    print(f"calculate_m1_sales_based_forecast: 결과 데이터 프레임 크기 = {len(result_df)}, 총 예측수량 = {result_df['M1_예측수량'].sum() if len(result_df) > 0 else 0}")
+    # 경로 선택 순서대로 해당 경로의 제품 목록 구성
+    route_products = pd.concat(
+        [product_info[product_info['경로'] == route] for route in routes] or [product_info.iloc[:0]]
+    )
+    if diagnostics_enabled():
+        for route in routes:
+            debug_print(f"calculate_m1_sales_based_forecast: 경로 {route} - 과거 판매 데이터 {(past_sales['경로'] == route).sum()}개, "
+                        f"제품 {(route_products['경로'] == route).sum()}개")
+    
+    # 판매 이력이 없는 제품은 0으로 예측, 최소 0으로 제한
+    predicted_quantity = route_products['SKU_ID'].map(sku_avg_quantity).fillna(0).clip(lower=0)
+    
+    result_df = pd.DataFrame({
+        '월': target_month,
+        '경로': route_products['경로'].to_numpy(),
+        'SKU_ID': route_products['SKU_ID'].to_numpy(),
+        '제품코드': route_products['제품코드'].to_numpy(),
+        '제품명': route_products['제품명'].to_numpy(),
+        'M1_예측수량': predicted_quantity.astype(int).to_numpy()
+    })
+    if diagnostics_enabled():
+        debug_print(f"calculate_m1_sales_based_forecast: 결과 데이터 프레임 크기 = {len(result_df)}, 총 예측수량 = {result_df['M1_예측수량'].sum() if len(result_df) > 0 else 0}")
     return result_df
 
-def compare_past_prediction(month, routes, product_info, sales_history, kpi_history):
-    """과거 예측 vs 실제값 비교 함수"""
-    # 월 형식 변환 (영어 ↔ 한국어)
-    month_mapping = {
-        '25-Aug': '2025년 8월',
-        '25-Sep': '2025년 9월', 
-        '25-Oct': '2025년 10월',
-        '2025년 5월': '2025년 5월',
-        '2025년 6월': '2025년 6월',
-        '2025년 7월': '2025년 7월'
-    }
-    month_korean = month_mapping.get(month, month)
-    
-    # 해당 월의 KPI 데이터
-    kpi_data = kpi_history[kpi_history['월'] == month]
-    kpi_data = kpi_data[kpi_data['경로'].isin(routes)]
+def calculate_prediction_accuracy(predicted, actual):
+    """
+    제품별 예측 정확도 (0~100%)
+    실제 판매가 있으면 100 - 오차율, 없으면 예측도 0일 때만 100
+    """
+    predicted = np.asarray(predicted, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    error_rate = np.abs(predicted - actual) / np.maximum(actual, 1) * 100
+    accuracy = np.where(actual > 0, 100 - error_rate, np.where(predicted == 0, 100, 0))
+    return np.clip(accuracy, 0, 100)
+
+@persistent_cache(
+    'compare_past_prediction',
+    lambda month, routes, product_info, sales_history, kpi_store: (
+        month, tuple(routes), frame_key(product_info), frame_key(sales_history), kpi_store_key(kpi_store)
+    )
+)
+def compare_past_prediction(month, routes, product_info, sales_history, kpi_store):
+    """과거 예측 vs 실제값 비교 함수 (DEMAND_CACHE_DIR 설정 시 디스크 영속 캐시)"""
+    # 월 형식 변환 (영어 → 한국어)
+    month_korean = to_korean_month(month)
+    
+    # 해당 월의 KPI 데이터 (KPI 저장소 조회 - 해당 월 KPI가 없는 경로는 제외)
+    kpi_data = kpi_store.frame(month, routes, fallback=KPI_FALLBACK_EXACT, drop_missing=True)
     
     # 한국어 형식으로 실제 판매 데이터 조회
     actual_sales = sales_history[sales_history['월'] == month_korean]
     actual_sales = actual_sales[actual_sales['경로'].isin(routes)]
     
     # 예측 실행 (개선된 로직 사용) - 비교 대상월과 목표 월을 동일하게 설정
-    forecast_data = estimate_demand_improved(kpi_data, product_info, sales_history, month_korean, kpi_history)
+    forecast_data = estimate_demand_improved(kpi_data, product_info, sales_history, month_korean, kpi_store)
     
     # M-1 시점에서의 판매데이터 기반 예측 계산
-    print(f"compare_past_prediction: 입력된 month={month}, 변환된 month_korean={month_korean}")
-    print(f"compare_past_prediction: selected_routes={routes}")
+    debug_print(f"compare_past_prediction: 입력된 month={month}, 변환된 month_korean={month_korean}")
+    debug_print(f"compare_past_prediction: selected_routes={routes}")
     m1_forecast_data = calculate_m1_sales_based_forecast(month, routes, product_info, sales_history)
     
-    # 실제 판매 데이터와 병합 (제품코드 기반 - sales_history와 product_info 매칭)
-    if '제품코드' in forecast_data.columns and '제품코드' in actual_sales.columns:
-        comparison_df = pd.merge(
-            forecast_data,
-            actual_sales[['경로', '제품코드', '판매수량']],
-            on=['경로', '제품코드'],
-            how='left'
-        )
-    else:
-        comparison_df = pd.merge(
-            forecast_data,
-            actual_sales[['경로', '제품명', '판매수량']],
-            on=['경로', '제품명'],
-            how='left'
-        )
+    # 실제 판매 데이터와 병합 (SKU 기반 - 제품명 별칭 행은 SKU별로 합산)
+    actual_by_sku = actual_sales.groupby('SKU_ID', as_index=False)['판매수량'].sum()
+    comparison_df = pd.merge(forecast_data, actual_by_sku, on='SKU_ID', how='left')
     
     # M-1 예측 데이터 병합
-    if '제품코드' in forecast_data.columns and '제품코드' in m1_forecast_data.columns:
-        comparison_df = pd.merge(
-            comparison_df,
-            m1_forecast_data[['경로', '제품코드', 'M1_예측수량']],
-            on=['경로', '제품코드'],
-            how='left'
-        )
-    else:
-        comparison_df = pd.merge(
-            comparison_df,
-            m1_forecast_data[['경로', '제품명', 'M1_예측수량']],
-            on=['경로', '제품명'],
-            how='left'
-        )
+    comparison_df = pd.merge(
+        comparison_df,
+        m1_forecast_data[['SKU_ID', 'M1_예측수량']],
+        on='SKU_ID',
+        how='left'
+    )
     
     # M1_예측수량이 null인 경우 0으로 채우기
     comparison_df['M1_예측수량'] = comparison_df['M1_예측수량'].fillna(0)
@@ -163,16 +134,8 @@ def compare_past_prediction(month, routes, product_info, sales_history, kpi_hist
     # 정확도 계산
     comparison_df['예측_오차'] = abs(comparison_df['보정수량'] - comparison_df['판매수량'])
     
-    # 예측 정확도 계산 (개선된 공식)
-    comparison_df['예측_정확도'] = comparison_df.apply(
-        lambda row: 100 - (abs(row['보정수량'] - row['판매수량']) / max(row['판매수량'], 1)) * 100 
-        if row['판매수량'] > 0 
-        else (100 if row['보정수량'] == 0 else 0), 
-        axis=1
-    )
-    
-    # 정확도를 0~100% 범위로 제한
-    comparison_df['예측_정확도'] = comparison_df['예측_정확도'].clip(lower=0, upper=100)
+    # 예측 정확도 계산 (개선된 공식, 0~100% 범위로 제한)
+    comparison_df['예측_정확도'] = calculate_prediction_accuracy(comparison_df['보정수량'], comparison_df['판매수량'])
     
     # 가중 정확도 계산 (수량 가중치 기반)
     total_actual = comparison_df['판매수량'].sum()
@@ -187,7 +150,19 @@ def compare_past_prediction(month, routes, product_info, sales_history, kpi_hist
     
     return comparison_df
 
-def show_past_comparison(product_info, sales_history, kpi_history, selected_month, selected_routes, accuracy_threshold=70):
+@st.cache_resource(max_entries=128, show_spinner="과거 예측 비교 계산 중...")
+def get_past_comparison(data_version, kpi_version, month, routes, _product_info, _sales_history, _kpi_store):
+    """과거 예측 비교 결과를 (데이터 버전, KPI 버전, 비교 대상월, 경로) 단위로 캐시 (화면에서는 수정하지 않음)"""
+    return compare_past_prediction(month, list(routes), _product_info, _sales_history, _kpi_store)
+
+def warm_past_comparison(product_info, sales_history, kpi_store, selected_month, selected_routes):
+    """과거 예측 비교 예열 - KPI 기반 / 글로벌 ML 비교 화면이 함께 쓰는 비교 결과(글로벌 ML 모델 제외)를 캐시에 적재"""
+    get_past_comparison(
+        get_data_version(sales_history), kpi_store.version, selected_month, tuple(selected_routes),
+        product_info, sales_history, kpi_store
+    )
+
+def show_past_comparison(product_info, sales_history, kpi_store, selected_month, selected_routes, accuracy_threshold=70):
     """KPI 기반 과거 예측 vs 실제값 비교 모드 메인 함수"""
     
     st.subheader(f"📊 {selected_month} 예측 vs 실제값 비교")
@@ -196,24 +171,20 @@ def show_past_comparison(product_info, sales_history, kpi_history, selected_mont
     st.info(f"🔍 비교 분석: {selected_month} 데이터 비교")
     
     # 과거 예측과 실제값 비교 (개선된 로직 사용)
-    comparison_df = compare_past_prediction(selected_month, selected_routes, product_info, sales_history, kpi_history)
+    comparison_df = get_past_comparison(
+        get_data_version(sales_history), kpi_store.version, selected_month, tuple(selected_routes),
+        product_info, sales_history, kpi_store
+    )
     
     # 선택된 과거 월의 KPI와 실제 수량 정보 표시
     st.subheader("📊 과거 월 KPI vs 실제 수량")
     
     # 월 형식 변환 (25-Jul -> 2025년 7월)
-    month_mapping = {
-        '25-May': '2025년 5월',
-        '25-Jun': '2025년 6월', 
-        '25-Jul': '2025년 7월'
-    }
-    past_month_formatted = month_mapping.get(selected_month, selected_month)
-    
-    # KPI 정보 가져오기
-    kpi_data = kpi_history[
-        (kpi_history['월'] == selected_month) & 
-        (kpi_history['경로'].isin(selected_routes))
-    ]
+    past_month_formatted = to_korean_month(selected_month)
+    
+    # KPI 정보 가져오기 (KPI 저장소 조회 - 해당 월 KPI가 없는 경로는 NaN)
+    route_kpis = dict(zip(selected_routes, kpi_store.values(selected_routes, selected_month, fallback=KPI_FALLBACK_EXACT)))
+    has_kpi_data = any(not np.isnan(kpi_value) for kpi_value in route_kpis.values())
     
     # 실제 수량 정보 가져오기
     actual_sales_data = sales_history[
@@ -226,35 +197,26 @@ def show_past_comparison(product_info, sales_history, kpi_history, selected_mont
     
     comparison_table_data = []
     
-    if len(kpi_data) > 0 and len(actual_sales_data) > 0:
+    if has_kpi_data and len(actual_sales_data) > 0:
         for route in selected_routes:
-            route_kpi = kpi_data[kpi_data['경로'] == route]
+            kpi_value = route_kpis[route]
             route_actual = actual_sales_data[actual_sales_data['경로'] == route]
             
             kpi_quantity = 0
             actual_quantity = 0
             
             # KPI 수량 계산
-            if len(route_kpi) > 0:
-                kpi_value = pd.to_numeric(route_kpi['KPI매출'].iloc[0], errors='coerce')
-                if pd.notna(kpi_value) and len(route_actual) > 0:
-                    # 제품 정보와 결합하여 평균 판매가 계산
-                    if '제품코드' in product_info.columns and '제품코드' in route_actual.columns:
-                        route_with_price = route_actual.merge(
-                            product_info[['경로', '제품코드', '판매가']], 
-                            on=['경로', '제품코드'], 
-                            how='left'
-                        )
-                    else:
-                        route_with_price = route_actual.merge(
-                            product_info[['경로', '제품명', '판매가']], 
-                            on=['경로', '제품명'], 
-                            how='left'
-                        )
-                    
-                    avg_price = pd.to_numeric(route_with_price['판매가'].astype(str).str.replace(',', ''), errors='coerce').mean()
-                    if avg_price > 0:
-                        kpi_quantity = kpi_value / avg_price
+            if not np.isnan(kpi_value) and len(route_actual) > 0:
+                # 제품 정보와 결합하여 평균 판매가 계산 (SKU 기반)
+                route_with_price = route_actual.merge(
+                    product_info[['SKU_ID', '판매가']],
+                    on='SKU_ID',
+                    how='left'
+                )
+                
+                avg_price = pd.to_numeric(route_with_price['판매가'].astype(str).str.replace(',', ''), errors='coerce').mean()
+                if avg_price > 0:
+                    kpi_quantity = kpi_value / avg_price
             
             # 실제 수량 계산
             if len(route_actual) > 0:
@@ -292,39 +254,31 @@ def show_past_comparison(product_info, sales_history, kpi_history, selected_mont
             st.metric("전체 달성률", f"{overall_achievement:.1f}%")
     
     else:
-        if len(kpi_data) == 0:
+        if not has_kpi_data:
             st.warning(f"⚠️ {selected_month} KPI 데이터가 없습니다.")
         if len(actual_sales_data) == 0:
             st.warning(f"⚠️ {past_month_formatted} 실제 판매 데이터가 없습니다.")
     
     # KPI 달성률 계산 및 표시
-    if len(kpi_data) > 0 and len(actual_sales_data) > 0:
+    if has_kpi_data and len(actual_sales_data) > 0:
         st.subheader("📈 KPI 달성률 분석 (수량 기준)")
         
         # KPI와 실제 수량 비교
         kpi_vs_actual = []
         for route in selected_routes:
-            route_kpi = kpi_data[kpi_data['경로'] == route]
+            kpi_value = route_kpis[route]
             route_actual = actual_sales_data[actual_sales_data['경로'] == route]
             
-            if len(route_kpi) > 0 and len(route_actual) > 0:
-                kpi_value = pd.to_numeric(route_kpi['KPI매출'].iloc[0], errors='coerce')
+            if not np.isnan(kpi_value) and len(route_actual) > 0:
                 actual_quantity = pd.to_numeric(route_actual['판매수량'], errors='coerce').sum()
                 
-                if pd.notna(kpi_value) and kpi_value > 0:
-                    # 제품 정보와 결합하여 평균 판매가 계산
-                    if '제품코드' in product_info.columns and '제품코드' in route_actual.columns:
-                        route_with_price = route_actual.merge(
-                            product_info[['경로', '제품코드', '판매가']], 
-                            on=['경로', '제품코드'], 
-                            how='left'
-                        )
-                    else:
-                        route_with_price = route_actual.merge(
-                            product_info[['경로', '제품명', '판매가']], 
-                            on=['경로', '제품명'], 
-                            how='left'
-                        )
+                if kpi_value > 0:
+                    # 제품 정보와 결합하여 평균 판매가 계산 (SKU 기반)
+                    route_with_price = route_actual.merge(
+                        product_info[['SKU_ID', '판매가']],
+                        on='SKU_ID',
+                        how='left'
+                    )
                     
                     avg_price = pd.to_numeric(route_with_price['판매가'].astype(str).str.replace(',', ''), errors='coerce').mean()
                     if avg_price > 0:
@@ -0,0 +1,261 @@
+"""
+kpi_scenarios.py
+KPI 시나리오(What-if) 예측 - 여러 KPI 벡터의 최종 예측수량을 한 번의 브로드캐스트 연산으로 계산
+- KPI와 무관한 중간 결과(판매비중, 기본 보정계수, 인기도 가중치)는 예측 엔진을 한 번 실행하여 준비
+- KPI에 따라 달라지는 단계(예상매출 배분/정합, 스케일링 팩터, KPI 스케일링, 정수 변환, 최종 정합)는
+  (시나리오 × 제품) 배열로 ForecastEngine.run과 같은 순서/규칙으로 계산
+- 경로별 예측은 해당 경로 KPI에만 의존하므로 경로 단위로 나누어 계산 (시나리오 축은 벡터화)
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+from forecast_engine import ForecastData, DEFAULT_ENGINE, FORECAST_COLUMNS
+from sku_index import UNKNOWN_SKU_ID
+
+# 기본 시나리오 KPI 변화율 (기준 시나리오 0% 포함)
+SCENARIO_CHANGES = (-0.3, -0.2, -0.1, 0.0, 0.1, 0.2, 0.3)
+
+# 시나리오 결과 배열 이름 (ForecastEngine.run 결과 컬럼과 같은 이름)
+SCENARIO_COLUMNS = ['제품별_예상매출', '예측수량', '보정계수', '보정수량', '최종_예측수량']
+
+def scenario_label(change):
+    """KPI 변화율 시나리오 이름 ('기준', 'KPI +10%', 'KPI -20%' 등)"""
+    return '기준' if change == 0 else f"KPI {change * 100:+.0f}%"
+
+def build_kpi_scenarios(base_kpis, changes=SCENARIO_CHANGES):
+    """
+    경로별 기준 KPI에 변화율을 적용한 시나리오 KPI 행렬
+    반환값: (시나리오 이름 목록, 시나리오 × 경로 KPI 행렬)
+    """
+    changes = np.asarray(changes, dtype=float)
+    kpi_matrix = np.asarray(base_kpis, dtype=float)[None, :] * (1 + changes[:, None])
+    return [scenario_label(change) for change in changes], kpi_matrix
+
+class ScenarioInputs:
+    """
+    KPI와 무관한 예측 중간 결과 (forecast: 예측 엔진 실행 결과, 행 순서 유지)
+    - 보정계수는 '기본_보정계수' 컬럼이 있으면 시나리오 KPI로 스케일링 팩터를 다시 구하고, 없으면 고정값 사용
+    - routes: 경로 순서 (KPI 행렬의 열 순서), base_kpis: 경로별 기준 KPI
+    """
+
+    def __init__(self, forecast, reconcile_kpi=True):
+        forecast = forecast.reset_index(drop=True)
+        self.forecast = forecast[[col for col in FORECAST_COLUMNS if col in forecast.columns]]
+        self.frame = forecast[['경로', 'SKU_ID', '제품명', '판매가']]
+        self.routes = list(dict.fromkeys(forecast['경로']))
+        self.reconcile_kpi = reconcile_kpi
+
+        route_codes = forecast['경로'].map({route: r for r, route in enumerate(self.routes)}).to_numpy()
+        self.route_rows = [np.flatnonzero(route_codes == r) for r in range(len(self.routes))]
+        self.base_kpis = np.array([forecast['KPI매출'].iloc[rows[0]] for rows in self.route_rows], dtype=float)
+
+        self.shares = forecast['판매비중'].to_numpy(dtype=float)
+        self.prices = forecast['판매가'].to_numpy(dtype=float)
+        self.weights = forecast['인기도_가중치'].to_numpy(dtype=float)
+        self.scales_factors = '기본_보정계수' in forecast.columns
+        factor_column = '기본_보정계수' if self.scales_factors else '보정계수'
+        self.factors = forecast[factor_column].to_numpy(dtype=float)
+
+    def route_index(self, route):
+        return self.routes.index(route)
+
+    def kpi_vector(self, route_kpis):
+        """경로별 KPI({경로: KPI매출})를 routes 순서의 배열로 변환 (없는 경로는 기준 KPI)"""
+        return np.array([route_kpis.get(route, base) for route, base in zip(self.routes, self.base_kpis)], dtype=float)
+
+    def evaluate_route(self, r, route_kpis):
+        """
+        경로 하나의 시나리오별 예측 (route_kpis: 시나리오별 경로 KPI, 길이 K)
+        반환값: {결과 이름: K × 경로 제품 수 배열}
+        """
+        rows = self.route_rows[r]
+        kpi = np.asarray(route_kpis, dtype=float)
+        n_scenarios, n_products = len(kpi), len(rows)
+        scenarios = np.arange(n_scenarios)
+        prices = self.prices[rows]
+        factors = self.factors[rows]
+
+        # 예상매출 배분 후 경로 합계를 KPI에 맞춤 (오차는 예상매출이 가장 큰 제품에 반영)
+        revenue = self.shares[rows][None, :] * kpi[:, None]
+        if self.reconcile_kpi:
+            difference = kpi - revenue.sum(axis=1)
+            largest = np.argmax(revenue, axis=1)
+            revenue[scenarios, largest] += np.where(np.abs(difference) > 0.01, difference, 0)
+        revenue = np.round(revenue).astype(int)
+        quantity = revenue / prices
+
+        # 보정계수: 기본 보정계수 × 스케일링 팩터 (목표 KPI / 기본 보정계수 적용 시 예상 매출, 0.5 ~ 2.0)
+        if self.scales_factors:
+            expected = np.cumsum(quantity * factors * prices, axis=1)[:, -1] if n_products > 0 else np.zeros(n_scenarios)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scaling = np.where(expected > 0, np.clip(kpi / expected, 0.5, 2.0), 1.0)
+            adjustment = factors[None, :] * scaling[:, None]
+        else:
+            adjustment = np.broadcast_to(factors, (n_scenarios, n_products))
+        adjusted = quantity * adjustment
+
+        # 보정수량 매출 합계를 KPI에 맞추는 스케일링
+        if self.reconcile_kpi:
+            expected = (adjusted * prices).sum(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                kpi_scaling = np.where(expected > 0, kpi / expected, 1.0)
+            adjusted = np.where((expected > 0)[:, None], adjusted * kpi_scaling[:, None], adjusted)
+
+        final = np.round(adjusted * self.weights[rows]).astype(float)
+        if self.reconcile_kpi and n_products > 0:
+            final = self._reconcile_final(final, prices, kpi, scenarios)
+
+        return {
+            '제품별_예상매출': revenue,
+            '예측수량': np.round(quantity).astype(int),
+            '보정계수': adjustment,
+            '보정수량': np.round(adjusted).astype(int),
+            '최종_예측수량': final
+        }
+
+    @staticmethod
+    def _reconcile_final(final, prices, kpi, scenarios):
+        """정수 변환 후 남은 KPI 오차 보정 (ForecastEngine.run 최종 정합과 같은 규칙)"""
+        product_revenue = final * prices
+        error = kpi - product_revenue.sum(axis=1)
+        needs_fix = np.abs(error) > 0.01
+        ranked = np.argsort(-product_revenue, axis=1, kind='stable')
+
+        # 오차를 매출이 가장 큰 제품에 반영 (음수 수량이 되면 두 번째로 큰 제품에 반영)
+        largest = ranked[:, 0]
+        new_quantity = final[scenarios, largest] + error / prices[largest]
+        use_largest = needs_fix & (new_quantity >= 0)
+        final[scenarios[use_largest], largest[use_largest]] = new_quantity[use_largest]
+        if final.shape[1] > 1:
+            second = ranked[:, 1]
+            use_second = needs_fix & ~use_largest
+            final[scenarios[use_second], second[use_second]] += error[use_second] / prices[second[use_second]]
+
+        # 그래도 1원 넘게 차이 나면 매출 상위 두 제품에 절반씩 분산
+        remaining = kpi - (final * prices).sum(axis=1)
+        spread = needs_fix & (np.abs(remaining) > 1)
+        for i in range(min(2, final.shape[1])):
+            top = ranked[:, i]
+            final[scenarios[spread], top[spread]] += remaining[spread] / (2 * prices[top[spread]])
+        return final
+
+    def forecast_for(self, route_kpis):
+        """
+        경로별 KPI({경로: KPI매출})의 예측 결과 - 기준 KPI와 다른 경로만 다시 계산하고 나머지는 기준 예측 재사용
+        (KPI 편집 시 편집한 경로의 스케일링/정수 정합만 수행)
+        """
+        forecast = self.forecast.copy()
+        changed = [
+            (self.route_index(route), float(kpi)) for route, kpi in route_kpis.items()
+            if route in self.routes and float(kpi) != self.base_kpis[self.route_index(route)]
+        ]
+        if not changed:
+            return forecast
+
+        columns = {name: forecast[name].to_numpy(copy=True) for name in SCENARIO_COLUMNS + ['KPI매출']}
+        for r, kpi in changed:
+            rows = self.route_rows[r]
+            route_result = self.evaluate_route(r, [kpi])
+            route_result['KPI매출'] = np.array([np.full(len(rows), kpi)])
+            for name, values in route_result.items():
+                column = columns[name]
+                if not np.can_cast(values.dtype, column.dtype):
+                    column = column.astype(np.result_type(column.dtype, values.dtype))
+                column[rows] = values[0]
+                columns[name] = column
+        for name, column in columns.items():
+            forecast[name] = column
+
+        debug_print(f"KPI 변경 경로 {len(changed)}개만 다시 계산")
+        return forecast
+
+    def evaluate(self, kpi_matrix, labels=None):
+        """
+        시나리오 × 경로 KPI 행렬(열 순서는 routes)의 예측을 한 번에 계산
+        반환값: ScenarioResult
+        """
+        started = time.perf_counter()
+        kpi_matrix = np.asarray(kpi_matrix, dtype=float).reshape(-1, len(self.routes))
+        n_scenarios = len(kpi_matrix)
+        arrays = {name: np.zeros((n_scenarios, len(self.frame))) for name in SCENARIO_COLUMNS}
+
+        for r, rows in enumerate(self.route_rows):
+            route_result = self.evaluate_route(r, kpi_matrix[:, r])
+            for name in SCENARIO_COLUMNS:
+                arrays[name][:, rows] = route_result[name]
+
+        labels = list(labels) if labels is not None else [f"시나리오 {k + 1}" for k in range(n_scenarios)]
+        elapsed = time.perf_counter() - started
+        debug_print(f"KPI 시나리오 {n_scenarios}개 × 제품 {len(self.frame)}개 계산: {elapsed * 1000:.1f}ms")
+        return ScenarioResult(self, labels, kpi_matrix, arrays, elapsed)
+
+class ScenarioResult:
+    """시나리오별 예측 결과 - arrays: {결과 이름: 시나리오 × 제품(ScenarioInputs.frame 행 순서) 배열}"""
+
+    def __init__(self, inputs, labels, kpi_matrix, arrays, elapsed):
+        self.inputs = inputs
+        self.labels = labels
+        self.kpi_matrix = kpi_matrix
+        self.arrays = arrays
+        self.elapsed = elapsed
+
+    @property
+    def routes(self):
+        return self.inputs.routes
+
+    def cube(self, name='최종_예측수량'):
+        """
+        (시나리오 × 경로 × SKU) 배열과 경로별 SKU_ID 배열
+        경로마다 제품 수가 다르므로 SKU 축은 가장 많은 경로 기준, 빈 자리는 NaN / UNKNOWN_SKU_ID
+        """
+        route_rows = self.inputs.route_rows
+        width = max((len(rows) for rows in route_rows), default=0)
+        values = np.full((len(self.labels), len(route_rows), width), np.nan)
+        sku_ids = np.full((len(route_rows), width), UNKNOWN_SKU_ID)
+        product_sku_ids = self.inputs.frame['SKU_ID'].to_numpy()
+        for r, rows in enumerate(route_rows):
+            values[:, r, :len(rows)] = self.arrays[name][:, rows]
+            sku_ids[r, :len(rows)] = product_sku_ids[rows]
+        return values, sku_ids
+
+    def frame(self, k):
+        """시나리오 하나의 예측 결과 DataFrame (ForecastEngine.run 결과와 같은 컬럼 구성)"""
+        df = self.inputs.frame.copy()
+        df['KPI매출'] = self.kpi_matrix[k][df['경로'].map({route: r for r, route in enumerate(self.routes)})]
+        for name in SCENARIO_COLUMNS:
+            df[name] = self.arrays[name][k]
+        return df
+
+    def route_totals(self):
+        """경로 × 시나리오 최종 예측수량 합계"""
+        quantities = pd.DataFrame(self.arrays['최종_예측수량'].T, columns=self.labels)
+        return quantities.groupby(self.inputs.frame['경로'].to_numpy(), sort=False).sum()
+
+    def product_table(self, route):
+        """경로 하나의 제품 × 시나리오 최종 예측수량"""
+        rows = self.inputs.route_rows[self.inputs.route_index(route)]
+        table = pd.DataFrame(self.arrays['최종_예측수량'][:, rows].T, columns=self.labels)
+        table.insert(0, '제품명', self.inputs.frame['제품명'].to_numpy()[rows])
+        return table
+
+    def long_frame(self):
+        """시나리오, 경로, SKU별 KPI매출/최종 예측수량 (CSV 내보내기용)"""
+        return pd.concat(
+            [self.frame(k)[['경로', 'SKU_ID', '제품명', '판매가', 'KPI매출', '최종_예측수량']].assign(시나리오=label)
+             for k, label in enumerate(self.labels)],
+            ignore_index=True
+        )[['시나리오', '경로', 'SKU_ID', '제품명', '판매가', 'KPI매출', '최종_예측수량']]
+
+def prepare_kpi_scenarios(kpi_df, product_df, sales_history, target_month, kpi_store=None, engine=None):
+    """
+    KPI 시나리오 계산 준비 - 기준 KPI로 예측 엔진을 한 번 실행하여 KPI와 무관한 중간 결과 확보
+    반환값: ScenarioInputs (evaluate()로 여러 KPI 행렬을 반복 계산)
+    """
+    engine = engine or DEFAULT_ENGINE
+    data = ForecastData(kpi_df, product_df, sales_history, target_month, kpi_store)
+    forecast = engine.run(data, columns=FORECAST_COLUMNS + ['기본_보정계수'])
+    return ScenarioInputs(forecast, engine.reconcile_kpi)
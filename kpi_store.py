@@ -0,0 +1,229 @@
+"""
+kpi_store.py
+KPI 저장소 - 경로 × 월 숫자 행렬 (리비전 이력, 명시적 대체 정책, 상수 시간 조회)
+- KPI 문자열('3,000,000,000')은 데이터 로드 시 한 번만 숫자로 변환
+- 리비전마다 읽기 전용 행렬을 보관하여 이전 KPI 버전 조회 가능
+- 월은 month_utils의 월 서수로 관리하므로 '2025년 8월'/'25-Aug' 어느 표기로도 조회 가능
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from month_utils import month_ordinal, format_korean_month
+
+# KPI 대체 정책
+KPI_FALLBACK_EXACT = 'exact'                  # 해당 월 KPI만 사용 (없으면 NaN)
+KPI_FALLBACK_CARRY_FORWARD = 'carry_forward'  # 해당 월 이전의 가장 최근 KPI 사용, 그래도 없으면 기본값
+KPI_FALLBACK_DEFAULT = 'default'              # 해당 월 KPI가 없으면 기본값
+KPI_FALLBACK_POLICIES = (KPI_FALLBACK_EXACT, KPI_FALLBACK_CARRY_FORWARD, KPI_FALLBACK_DEFAULT)
+
+# 어떤 월에도 KPI가 없는 경로의 기본 KPI매출
+DEFAULT_KPI_VALUE = 100000000
+
+def parse_kpi_values(values):
+    """콤마 포함 KPI 문자열 컬럼을 숫자로 변환 (데이터 로드 시 한 번만 호출)"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    return values.astype(str).str.replace(',', '').astype(float)
+
+def _read_only(matrix):
+    # 이미 읽기 전용인 float 배열(공유 메모리 맵 등)은 복사하지 않고 그대로 사용
+    if isinstance(matrix, np.ndarray) and matrix.dtype == float and not matrix.flags.writeable:
+        return matrix
+    matrix = np.array(matrix, dtype=float)
+    matrix.setflags(write=False)
+    return matrix
+
+def _carry_forward(matrix):
+    """월 방향으로 직전 KPI를 채운 행렬 (리비전별 한 번만 계산)"""
+    filled = pd.DataFrame(matrix).ffill(axis=1).to_numpy()
+    filled.setflags(write=False)
+    return filled
+
+class KpiStore:
+    """
+    경로 × 월 KPI 행렬 저장소
+    - get()/values()/frame(): 딕셔너리 인덱스로 경로/월 위치를 찾아 행렬에서 바로 조회
+    - revise(): 변경분을 반영한 새 리비전 추가 (이전 리비전 행렬은 그대로 유지)
+    """
+
+    def __init__(self, routes, month_ordinals, values, data_version=None, note='초기 로드'):
+        self.routes = list(routes)
+        self.month_ordinals = np.asarray(month_ordinals, dtype=int)
+        self.data_version = data_version
+        self._route_index = {route: i for i, route in enumerate(self.routes)}
+        self._month_index = {ordinal: j for j, ordinal in enumerate(self.month_ordinals)}
+        self._revisions = [{
+            'revision': 0,
+            'note': note,
+            'created_at': datetime.now(),
+            'values': _read_only(values)
+        }]
+        self._carry_forward_cache = {}
+
+    @classmethod
+    def from_history(cls, kpi_history, data_version=None):
+        """kpi_history(월, 경로, KPI매출) 데이터로 저장소 생성 - 같은 경로/월이 여러 행이면 첫 행 사용"""
+        history = kpi_history[['월', '경로', 'KPI매출']].copy()
+        history['월_서수'] = history['월'].map(month_ordinal)
+        history = history[history['월_서수'].notna()].drop_duplicates(['경로', '월_서수'])
+        history['KPI매출'] = parse_kpi_values(history['KPI매출'])
+
+        routes = list(dict.fromkeys(history['경로']))
+        month_ordinals = sorted(history['월_서수'].astype(int).unique())
+
+        matrix = history.pivot(index='경로', columns='월_서수', values='KPI매출')
+        matrix = matrix.reindex(index=routes, columns=month_ordinals)
+
+        if data_version is None and hasattr(kpi_history, 'attrs'):
+            data_version = kpi_history.attrs.get('data_version')
+        return cls(routes, month_ordinals, matrix.to_numpy(), data_version)
+
+    # --- 리비전 ---
+
+    @property
+    def revision(self):
+        """현재(최신) 리비전 번호"""
+        return len(self._revisions) - 1
+
+    @property
+    def version(self):
+        """캐시 키용 버전 (데이터 버전 + 리비전)"""
+        return (self.data_version, self.revision)
+
+    def revisions(self):
+        """리비전 이력 (리비전 번호, 메모, 생성 시각)"""
+        return pd.DataFrame([
+            {'리비전': item['revision'], '메모': item['note'], '생성 시각': item['created_at']}
+            for item in self._revisions
+        ])
+
+    def _extend_axes(self, routes, ordinals):
+        """새 경로/월이 추가되면 모든 리비전 행렬을 NaN으로 확장"""
+        new_routes = [route for route in dict.fromkeys(routes) if route not in self._route_index]
+        new_ordinals = sorted(set(ordinals) - set(self._month_index))
+        if not new_routes and not new_ordinals:
+            return
+
+        all_ordinals = np.array(sorted(set(self.month_ordinals) | set(new_ordinals)), dtype=int)
+        column_positions = np.searchsorted(all_ordinals, self.month_ordinals)
+        all_routes = self.routes + new_routes
+
+        for item in self._revisions:
+            extended = np.full((len(all_routes), len(all_ordinals)), np.nan)
+            extended[:len(self.routes), column_positions] = item['values']
+            item['values'] = _read_only(extended)
+
+        self.routes = all_routes
+        self.month_ordinals = all_ordinals
+        self._route_index = {route: i for i, route in enumerate(self.routes)}
+        self._month_index = {ordinal: j for j, ordinal in enumerate(self.month_ordinals)}
+        self._carry_forward_cache.clear()
+
+    def revise(self, updates, note=''):
+        """
+        KPI 변경분을 새 리비전으로 추가
+        updates: {(경로, 월): KPI매출} - 월은 '2025년 8월'/'25-Aug' 표기 모두 가능
+        반환값: 새 리비전 번호
+        """
+        parsed = []
+        for (route, month), value in updates.items():
+            ordinal = month_ordinal(month)
+            if ordinal is None:
+                raise ValueError(f"해석할 수 없는 월 표기입니다: {month}")
+            parsed.append((route, ordinal, float(value)))
+
+        self._extend_axes([route for route, _, _ in parsed], [ordinal for _, ordinal, _ in parsed])
+
+        values = self._revisions[-1]['values'].copy()
+        for route, ordinal, value in parsed:
+            values[self._route_index[route], self._month_index[ordinal]] = value
+
+        self._revisions.append({
+            'revision': len(self._revisions),
+            'note': note,
+            'created_at': datetime.now(),
+            'values': _read_only(values)
+        })
+        return self.revision
+
+    # --- 조회 ---
+
+    def _matrix(self, revision=None):
+        revision = self.revision if revision is None else revision
+        return self._revisions[revision]['values']
+
+    def matrix(self, revision=None):
+        """경로 × 월 KPI 행렬 (읽기 전용, 행/열 순서는 routes/month_ordinals)"""
+        return self._matrix(revision)
+
+    def _carry_forward_matrix(self, revision=None):
+        revision = self.revision if revision is None else revision
+        if revision not in self._carry_forward_cache:
+            self._carry_forward_cache[revision] = _carry_forward(self._matrix(revision))
+        return self._carry_forward_cache[revision]
+
+    def _month_position(self, ordinal, carry_forward):
+        """월 서수의 열 위치 (carry_forward이면 해당 월 이전의 가장 가까운 열, 없으면 -1)"""
+        position = self._month_index.get(ordinal)
+        if position is not None or not carry_forward or ordinal is None or len(self.month_ordinals) == 0:
+            return -1 if position is None else position
+        if ordinal > self.month_ordinals[-1]:
+            return len(self.month_ordinals) - 1
+        return int(np.searchsorted(self.month_ordinals, ordinal, side='right')) - 1
+
+    def values(self, routes, month, fallback=KPI_FALLBACK_CARRY_FORWARD, default=DEFAULT_KPI_VALUE, revision=None):
+        """여러 경로의 해당 월 KPI 배열 (대체 정책 적용)"""
+        if fallback not in KPI_FALLBACK_POLICIES:
+            raise ValueError(f"지원하지 않는 KPI 대체 정책입니다: {fallback}")
+
+        carry_forward = fallback == KPI_FALLBACK_CARRY_FORWARD
+        matrix = self._carry_forward_matrix(revision) if carry_forward else self._matrix(revision)
+        column = self._month_position(month_ordinal(month), carry_forward)
+
+        result = np.full(len(routes), np.nan)
+        if column >= 0:
+            for i, route in enumerate(routes):
+                row = self._route_index.get(route)
+                if row is not None:
+                    result[i] = matrix[row, column]
+
+        if fallback != KPI_FALLBACK_EXACT:
+            result = np.where(np.isnan(result), default, result)
+        return result
+
+    def get(self, route, month, fallback=KPI_FALLBACK_CARRY_FORWARD, default=DEFAULT_KPI_VALUE, revision=None):
+        """경로/월 KPI 조회 (대체 정책 적용, exact 정책에서 KPI가 없으면 NaN)"""
+        return float(self.values([route], month, fallback, default, revision)[0])
+
+    def frame(self, month, routes, fallback=KPI_FALLBACK_CARRY_FORWARD, default=DEFAULT_KPI_VALUE,
+              revision=None, drop_missing=False):
+        """
+        예측 입력용 KPI 데이터 (월, 경로, KPI매출)
+        월 컬럼에는 전달된 월 표기를 그대로 사용, drop_missing이면 KPI가 없는 경로 제외
+        """
+        kpi_values = self.values(routes, month, fallback, default, revision)
+        kpi_frame = pd.DataFrame({
+            '월': [month] * len(routes),
+            '경로': list(routes),
+            'KPI매출': kpi_values
+        })
+        if drop_missing:
+            kpi_frame = kpi_frame[kpi_frame['KPI매출'].notna()].reset_index(drop=True)
+        return kpi_frame
+
+    def to_frame(self, revision=None):
+        """리비전의 KPI 전체를 (월, 경로, KPI매출) 형식으로 반환 (KPI가 있는 칸만)"""
+        matrix = self._matrix(revision)
+        rows, columns = np.nonzero(~np.isnan(matrix))
+        return pd.DataFrame({
+            '월': [format_korean_month(self.month_ordinals[j]) for j in columns],
+            '경로': [self.routes[i] for i in rows],
+            'KPI매출': matrix[rows, columns]
+        })
+
+def build_kpi_store(kpi_history):
+    """kpi_history 데이터로 KPI 저장소 생성 (데이터 버전은 attrs['data_version'] 사용)"""
+    return KpiStore.from_history(kpi_history)
@@ -0,0 +1,172 @@
+"""
+ml_comparison.py
+글로벌 ML 수요 모델(HistGradientBoosting) 과거 예측 vs 실제 비교 기능을 담당하는 모듈
+compare_past_prediction 결과에 글로벌 ML 예측을 병합하여 KPI 기반 / M-1 판매데이터 / 글로벌 ML 예측의 정확도를 함께 비교
+(글로벌 ML 모델은 이 모드에서만 학습)
+"""
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+
+from table_view import display_paginated_table
+from kpi_comparison import get_past_comparison, calculate_prediction_accuracy
+from chart_layer import get_data_version
+from demand_model import MODEL_LAGS, MODEL_ROLLING_WINDOWS, train_global_demand_model
+from feature_store import SalesFeatureStore, verify_incremental_features
+from diagnostics import diagnostics_enabled
+from month_utils import to_korean_month
+from shared_cube import shared_sales_cube
+
+# 비교 대상 예측 컬럼 (표시 이름: compare_past_prediction 결과 컬럼)
+PREDICTION_COLUMNS = {
+    'KPI 기반 예측': '보정수량',
+    'M-1 판매데이터 예측': 'M1_예측수량',
+    '글로벌 ML 예측': 'ML_예측수량'
+}
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_sales_feature_store(data_version, _sales_history, _product_info):
+    """
+    판매 특성 저장소를 데이터 버전 단위로 한 번만 생성 (대상 월별 모델이 공유)
+    공유 디렉토리가 설정되어 있으면 발행된 판매 큐브(메모리 맵)에서 생성
+    진단 모드에서는 증분 갱신(append_month) 특성이 전체 재생성과 같은지 함께 검증 (결과는 콘솔 출력)
+    """
+    cube = shared_sales_cube(_sales_history, _product_info)
+    if diagnostics_enabled():
+        verify_incremental_features(cube)
+    return SalesFeatureStore.from_cube(cube)
+
+@st.cache_resource(max_entries=16, show_spinner="글로벌 수요 모델 학습 중...")
+def get_global_demand_model(data_version, kpi_version, target_month, _sales_history, _product_info, _kpi_store):
+    """대상 월 직전까지의 데이터로 학습한 글로벌 수요 모델을 (데이터 버전, KPI 버전, 대상 월) 단위로 캐시"""
+    feature_store = get_sales_feature_store(data_version, _sales_history, _product_info)
+    return train_global_demand_model(_sales_history, _product_info, _kpi_store, target_month, feature_store)
+
+def add_ml_forecast(comparison_df, demand_model, month):
+    """
+    비교 결과에 글로벌 ML 예측 병합 (새 DataFrame 반환 - 캐시된 비교 결과는 수정하지 않음)
+    ML_예측수량: 대상 월 전체 카탈로그 일괄 예측, ML_예측_정확도: 실제 판매수량 대비 정확도
+    """
+    ml_forecast = demand_model.predict(month)
+    merged = pd.merge(comparison_df, ml_forecast[['SKU_ID', 'ML_예측수량']], on='SKU_ID', how='left')
+    merged['ML_예측수량'] = merged['ML_예측수량'].fillna(0).astype(float)
+    merged['ML_예측_정확도'] = calculate_prediction_accuracy(merged['ML_예측수량'], merged['판매수량'])
+    return merged
+
+def summarize_prediction_accuracy(comparison_df):
+    """예측 방식별 총 예측 수량, WAPE 기준 정확도, 판매 수량 가중 정확도"""
+    actual = comparison_df['판매수량'].to_numpy(dtype=float)
+    total_actual = actual.sum()
+    rows = []
+
+    for label, column in PREDICTION_COLUMNS.items():
+        predicted = comparison_df[column].to_numpy(dtype=float)
+        accuracy = calculate_prediction_accuracy(predicted, actual)
+        wape = np.abs(predicted - actual).sum() / total_actual * 100 if total_actual > 0 else np.nan
+        rows.append({
+            '예측 방식': label,
+            '총 예측 수량': predicted.sum(),
+            '총 실제 수량': total_actual,
+            'WAPE 정확도(%)': max(0.0, 100 - wape) if not np.isnan(wape) else np.nan,
+            '가중 정확도(%)': (accuracy * actual).sum() / total_actual if total_actual > 0 else np.nan
+        })
+
+    return pd.DataFrame(rows)
+
+def show_ml_comparison(product_info, sales_history, kpi_store, selected_month, selected_routes):
+    """글로벌 ML 모델 기반 과거 예측 vs 실제 비교 모드 메인 함수"""
+    st.header("🤖 글로벌 ML 모델 예측 vs 실제 비교")
+    st.markdown("---")
+
+    with st.expander("ℹ️ 글로벌 ML 모델 설명"):
+        st.markdown(f"""
+        **학습 방식**: 전체 경로 × SKU × 월 판매 데이터로 HistGradientBoosting(포아송 손실) 모델 하나를 학습
+
+        **특성**:
+        - 시차 판매량: {', '.join(f'M-{lag}' for lag in MODEL_LAGS)}
+        - 이동 평균: 최근 {', '.join(f'{window}개월' for window in MODEL_ROLLING_WINDOWS)}, 최근 3개월 표준편차, 추세 비율(3개월/6개월)
+        - 경로, 판매가, 출시 후 경과 월, 월(계절성)
+        - 해당 월 경로 KPI, KPI 수량 환산값, 경로 내 최근 3개월 판매 비중 × KPI 수량
+
+        **평가**: 비교 대상월 직전 월까지의 데이터로만 학습하여 비교 대상월 실적과 비교
+        """)
+
+    comparison_df = get_past_comparison(
+        get_data_version(sales_history), kpi_store.version, selected_month, tuple(selected_routes),
+        product_info, sales_history, kpi_store
+    )
+
+    if comparison_df.empty:
+        st.warning(f"⚠️ {selected_month} 비교할 예측 데이터가 없습니다. (해당 월 KPI가 없는 경로는 제외됩니다)")
+        return
+
+    # 글로벌 수요 모델 (비교 대상월 직전까지의 데이터로 학습, 전체 카탈로그 일괄 예측)
+    month_korean = to_korean_month(selected_month)
+    demand_model = get_global_demand_model(
+        get_data_version(sales_history), kpi_store.version, month_korean, sales_history, product_info, kpi_store
+    )
+    if demand_model.estimator is None:
+        st.warning(
+            f"⚠️ {selected_month} 이전 판매 이력이 부족하여 글로벌 ML 모델을 학습할 수 없습니다. "
+            f"(학습 행 {demand_model.n_training_rows}개)"
+        )
+        return
+    comparison_df = add_ml_forecast(comparison_df, demand_model, month_korean)
+
+    # 예측 방식별 정확도 요약
+    st.subheader("📊 예측 방식별 정확도")
+    accuracy_summary = summarize_prediction_accuracy(comparison_df)
+
+    columns = st.columns(len(accuracy_summary))
+    for column, (_, row) in zip(columns, accuracy_summary.iterrows()):
+        with column:
+            st.metric(
+                label=row['예측 방식'],
+                value=f"{row['WAPE 정확도(%)']:.1f}%" if not np.isnan(row['WAPE 정확도(%)']) else "N/A",
+                help="WAPE 정확도 = 100 - Σ|예측 - 실제| ÷ Σ실제 × 100"
+            )
+
+    accuracy_display = accuracy_summary.copy()
+    for col in ['총 예측 수량', '총 실제 수량']:
+        accuracy_display[col] = accuracy_display[col].apply(lambda x: f"{x:,.0f}개")
+    for col in ['WAPE 정확도(%)', '가중 정확도(%)']:
+        accuracy_display[col] = accuracy_display[col].apply(lambda x: f"{x:.1f}%" if not np.isnan(x) else "N/A")
+    st.dataframe(accuracy_display, use_container_width=True)
+
+    # 비교 차트
+    st.subheader("📈 글로벌 ML 예측 vs 실제 수량 비교")
+    fig = px.bar(
+        comparison_df,
+        x='제품명',
+        y=['ML_예측수량', '보정수량', '판매수량'],
+        title="글로벌 ML 예측 / KPI 기반 예측 / 실제값",
+        barmode='group'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # 상세 비교 테이블
+    st.subheader("📋 상세 비교 결과")
+    detail = comparison_df[['경로', '제품명', 'ML_예측수량', '보정수량', 'M1_예측수량', '판매수량', 'ML_예측_정확도', '예측_정확도']].rename(columns={
+        'ML_예측수량': '글로벌_ML_예측',
+        '보정수량': 'KPI_기반_예측',
+        'M1_예측수량': 'M-1_판매데이터_예측',
+        '판매수량': '실제_판매수량',
+        'ML_예측_정확도': 'ML_정확도',
+        '예측_정확도': 'KPI_기반_정확도'
+    })
+    quantity_format = lambda x: f"{x:,.0f}"
+    accuracy_format = lambda x: f"{x:.1f}%"
+    display_paginated_table(
+        detail,
+        key="ml_comparison_table",
+        formatters={
+            '글로벌_ML_예측': quantity_format,
+            'KPI_기반_예측': quantity_format,
+            'M-1_판매데이터_예측': quantity_format,
+            '실제_판매수량': quantity_format,
+            'ML_정확도': accuracy_format,
+            'KPI_기반_정확도': accuracy_format
+        }
+    )
@@ -0,0 +1,98 @@
+"""
+month_utils.py
+월 표기 변환 공통 모듈
+- 데이터 표기: '2025년 8월' (한국어), 사이드바 미래 월 표기: '25-Aug' (영어 약어)
+- 두 표기를 월 서수(연도 × 12 + 월 - 1)로 통일하여 비교/정렬/이동 계산
+"""
+
+import calendar
+import re
+
+import numpy as np
+
+_KOREAN_MONTH_PATTERN = re.compile(r'^\s*(\d{4})년\s*(\d{1,2})월\s*$')
+_ABBR_MONTH_PATTERN = re.compile(r'^\s*(\d{2})-([A-Za-z]{3})\s*$')
+_MONTH_ABBR_TO_NUMBER = {abbr.lower(): number for number, abbr in enumerate(calendar.month_abbr) if abbr}
+
+# 마지막 월의 판매 기록 수가 직전 3개월 중앙값의 이 비율보다 적으면 집계 중인 월로 보고 제외
+PARTIAL_MONTH_RATIO = 0.5
+
+def month_ordinal(month):
+    """
+    월 문자열을 월 서수로 변환 ('2025년 8월', '25-Aug' 모두 지원)
+    해석할 수 없는 값이면 None 반환
+    """
+    if not isinstance(month, str):
+        return None
+
+    match = _KOREAN_MONTH_PATTERN.match(month)
+    if match:
+        year, month_number = int(match.group(1)), int(match.group(2))
+    else:
+        match = _ABBR_MONTH_PATTERN.match(month)
+        if not match:
+            return None
+        year = 2000 + int(match.group(1))
+        month_number = _MONTH_ABBR_TO_NUMBER.get(match.group(2).lower())
+        if month_number is None:
+            return None
+
+    if not 1 <= month_number <= 12:
+        return None
+    return year * 12 + month_number - 1
+
+def format_korean_month(ordinal):
+    """월 서수를 '2025년 8월' 형식으로 변환"""
+    year, month_index = divmod(int(ordinal), 12)
+    return f"{year}년 {month_index + 1}월"
+
+def to_korean_month(month):
+    """월 문자열을 데이터 표기('2025년 8월')로 변환 (해석할 수 없으면 그대로 반환)"""
+    ordinal = month_ordinal(month)
+    return format_korean_month(ordinal) if ordinal is not None else month
+
+def get_following_months(month, count):
+    """
+    month 다음 월부터 count개월 목록 ('2025년 8월' 형식)
+    예: get_following_months('2025년 7월', 3) → ['2025년 8월', '2025년 9월', '2025년 10월']
+    """
+    ordinal = month_ordinal(month)
+    if ordinal is None:
+        return []
+    return [format_korean_month(ordinal + offset) for offset in range(1, count + 1)]
+
+def latest_data_month(df, column='월'):
+    """데이터에 있는 가장 최근 월 ('2025년 8월' 형식, 해석할 수 있는 월이 없으면 None)"""
+    ordinals = df[column].drop_duplicates().map(month_ordinal).dropna()
+    return format_korean_month(ordinals.max()) if len(ordinals) > 0 else None
+
+def complete_data_months(sales_history):
+    """
+    실적이 모두 집계된 월 목록 (월 순서)
+    마지막 월은 판매 기록 수가 직전 3개월 중앙값 × PARTIAL_MONTH_RATIO 미만이면 집계 중인 월로 보고 제외
+    """
+    record_counts = sales_history.groupby('월').size()
+    ordinals = record_counts.index.map(month_ordinal)
+    record_counts = record_counts[ordinals.notna()]
+    record_counts = record_counts.iloc[np.argsort(record_counts.index.map(month_ordinal).to_numpy())]
+    months = list(record_counts.index)
+    if len(months) > 1 and record_counts.iloc[-1] < PARTIAL_MONTH_RATIO * record_counts.iloc[-4:-1].median():
+        months = months[:-1]
+    return months
+
+def latest_complete_month(sales_history):
+    """실적이 모두 집계된 가장 최근 월 ('2025년 7월' 형식, 집계 중인 마지막 월은 제외, 없으면 None)"""
+    months = complete_data_months(sales_history)
+    return to_korean_month(months[-1]) if months else None
+
+def get_relative_past_months(target_month, months_back=4):
+    """
+    비교 대상월 대비 상대적으로 과거 N개월 계산 (M-1부터 시작, 연도 경계 포함)
+    예: target_month가 '2025년 8월'이고 months_back=4이면
+    ['2025년 4월', '2025년 5월', '2025년 6월', '2025년 7월'] 반환 (M-4, M-3, M-2, M-1)
+    '25-Aug' 형식도 지원하며, 해석할 수 없는 월이면 빈 목록 반환
+    """
+    ordinal = month_ordinal(target_month)
+    if ordinal is None:
+        return []
+    return [format_korean_month(ordinal - offset) for offset in range(months_back, 0, -1)]
@@ -0,0 +1,195 @@
+"""
+persistent_cache.py
+디스크 영속 계산 캐시 (선택 기능) - 예측 결과를 입력 내용 해시 + 파라미터 키로 로컬 디스크에 보관
+- 환경 변수 DEMAND_CACHE_DIR=<디렉토리>일 때만 사용 (미설정 시 매번 계산)
+- 재시작/재배포 후에도 같은 입력이면 첫 요청부터 디스크에서 조회, 같은 디렉토리를 쓰는 레플리카끼리 공유
+- 키: 함수 이름 + 코드 지문(모듈 소스 해시) + 입력 데이터 해시 + 파라미터 → sha256 (내용 주소 방식)
+- 기록: 같은 디렉토리의 임시 파일에 기록 후 os.replace (읽는 쪽은 완성된 파일만 봄)
+- 용량: DEMAND_CACHE_MAX_MB(기본 256MB)를 넘으면 최근 사용 시각(mtime, 조회 시 갱신)이 오래된 항목부터 삭제
+"""
+
+import functools
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+from reference_data import is_shared_frame
+
+# 캐시 디렉토리 / 용량 환경 변수 (디렉토리 미설정 시 영속 캐시 미사용)
+CACHE_DIR_ENV = 'DEMAND_CACHE_DIR'
+CACHE_MAX_MB_ENV = 'DEMAND_CACHE_MAX_MB'
+DEFAULT_CACHE_MAX_MB = 256
+
+# 캐시 파일 형식 버전 (저장 구조가 바뀌면 올려서 기존 항목 무시)
+CACHE_FORMAT = 1
+CACHE_SUFFIX = '.pkl'
+
+# 프로세스 내 용량 정리 직렬화 (프로세스 간에는 삭제 실패를 무시)
+_evict_lock = threading.Lock()
+
+def cache_directory():
+    """영속 캐시 디렉토리 (환경 변수 미설정 시 None)"""
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+def cache_max_bytes():
+    """캐시 디렉토리 최대 용량 (바이트)"""
+    try:
+        max_mb = float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_CACHE_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_CACHE_MAX_MB
+    return int(max_mb * 1024 * 1024)
+
+@functools.lru_cache(maxsize=None)
+def code_fingerprint():
+    """
+    예측 코드 지문 - 이 디렉토리의 모듈 소스 해시 (코드가 바뀐 배포에서는 이전 캐시 항목을 쓰지 않음)
+    """
+    code_hash = hashlib.sha256(str(CACHE_FORMAT).encode('utf-8'))
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(path, 'rb') as f:
+            code_hash.update(os.path.basename(path).encode('utf-8'))
+            code_hash.update(f.read())
+    return code_hash.hexdigest()
+
+def frame_key(df):
+    """
+    DataFrame 내용 키
+    - load_data의 공유(읽기 전용) 프레임은 수정될 수 없으므로 데이터 버전 + 크기
+    - 그 외(필터링/복사본)는 인덱스 포함 내용 해시
+    """
+    if df is None:
+        return None
+    data_version = df.attrs.get('data_version')
+    if data_version is not None and is_shared_frame(df):
+        return ('shared', data_version, df.shape, tuple(df.columns))
+    content_hash = int(pd.util.hash_pandas_object(df, index=True).sum())
+    return ('frame', content_hash, df.shape, tuple(df.columns))
+
+def kpi_store_key(kpi_store):
+    """KPI 저장소 내용 키 (현재 리비전 행렬 해시)"""
+    if kpi_store is None:
+        return None
+    matrix = np.ascontiguousarray(kpi_store.matrix(), dtype=float)
+    content_hash = hashlib.sha256(matrix.tobytes())
+    content_hash.update(repr((list(kpi_store.routes), kpi_store.month_ordinals.tolist())).encode('utf-8'))
+    return ('kpi', content_hash.hexdigest())
+
+def cache_key(name, parts):
+    """함수 이름 + 코드 지문 + 입력 키 → sha256 파일 이름"""
+    return hashlib.sha256(repr((name, code_fingerprint(), parts)).encode('utf-8')).hexdigest()
+
+def _entry_path(directory, key):
+    return os.path.join(directory, key + CACHE_SUFFIX)
+
+def read_entry(directory, key):
+    """
+    캐시 항목 조회 (없으면 (False, None))
+    조회한 항목은 mtime을 갱신하여 LRU 정리에서 최근 사용으로 취급, 읽을 수 없는 항목은 삭제
+    """
+    path = _entry_path(directory, key)
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+    except FileNotFoundError:
+        return False, None
+    except Exception as e:
+        debug_print(f"영속 캐시 항목 손상 - 삭제: {path} ({e})")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return False, None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return True, value
+
+def write_entry(directory, key, value):
+    """캐시 항목 원자적 기록 (임시 파일 → os.replace) 후 용량 초과 시 정리"""
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, _entry_path(directory, key))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    evict_entries(directory, cache_max_bytes())
+
+def evict_entries(directory, max_bytes):
+    """
+    디렉토리 용량이 max_bytes를 넘으면 mtime이 오래된 항목부터 삭제 (LRU)
+    다른 프로세스가 먼저 삭제한 항목은 무시
+    """
+    with _evict_lock:
+        entries = []
+        for entry in os.scandir(directory):
+            if not entry.name.endswith(CACHE_SUFFIX) or entry.name.startswith('.'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= max_bytes:
+            return
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        debug_print(f"영속 캐시 정리: {removed}개 항목 삭제 ({directory}, 남은 용량 {total / 1024 / 1024:.1f}MB)")
+
+def persistent_cache(name, key_func):
+    """
+    디스크 영속 캐시 데코레이터
+    key_func(*args, **kwargs): 입력 키(repr 가능한 튜플) 반환 - None이면 이번 호출은 캐시하지 않음
+    (환경 변수 미설정 시 원래 함수를 그대로 호출)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            directory = cache_directory()
+            if directory is None:
+                return func(*args, **kwargs)
+            parts = key_func(*args, **kwargs)
+            if parts is None:
+                return func(*args, **kwargs)
+
+            key = cache_key(name, parts)
+            hit, value = read_entry(directory, key)
+            if hit:
+                debug_print(f"영속 캐시 적중: {name} ({key[:12]})")
+                return value
+
+            started = time.perf_counter()
+            value = func(*args, **kwargs)
+            try:
+                write_entry(directory, key, value)
+            except OSError as e:
+                debug_print(f"영속 캐시 기록 실패: {name} ({e})")
+            debug_print(f"영속 캐시 저장: {name} ({key[:12]}, 계산 {time.perf_counter() - started:.3f}초)")
+            return value
+        return wrapper
+    return decorator
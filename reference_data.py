@@ -0,0 +1,121 @@
+"""
+reference_data.py
+공유 참조 데이터 - 프로세스당 한 번만 로드한 카탈로그 / 판매 이력을 모든 세션이 같은 객체로 읽기 전용 공유
+- freeze_frame(): 모든 컬럼 배열을 읽기 전용으로 만든 SharedFrame
+  (값 대입, 컬럼 추가/삭제, inplace=True 변경은 모두 ValueError)
+- SharedFrame에서 파생된 프레임(필터링/병합/copy())은 일반 DataFrame이므로 자유롭게 수정 가능
+- writable(): 공유 프레임이면 복사본 반환 - 입력 df에 컬럼을 추가/수정하는 함수 진입점의 가드
+"""
+
+import pandas as pd
+
+# inplace=True를 받는 DataFrame 메서드 (공유 프레임에서는 inplace 호출만 금지)
+_INPLACE_METHODS = (
+    'drop', 'rename', 'rename_axis', 'fillna', 'replace', 'set_index', 'reset_index', 'sort_values', 'sort_index',
+    'dropna', 'drop_duplicates', 'query', 'eval', 'where', 'mask', 'clip', 'interpolate', 'ffill', 'bfill'
+)
+
+# 프레임 구조를 바꾸는 속성 대입 (df.columns = ..., df.index = ...)
+_STRUCTURE_ATTRIBUTES = ('columns', 'index')
+
+def _read_only_error():
+    return ValueError("공유 참조 데이터(SharedFrame)는 읽기 전용입니다. 수정하려면 copy() 또는 writable()로 복사본을 사용하세요.")
+
+class _ReadOnlyIndexer:
+    """loc / iloc / at / iat 조회는 그대로, 대입은 금지"""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        raise _read_only_error()
+
+    def __call__(self, *args, **kwargs):
+        return _ReadOnlyIndexer(self._indexer(*args, **kwargs))
+
+class SharedFrame(pd.DataFrame):
+    """
+    읽기 전용 공유 프레임 - 컬럼 배열이 쓰기 금지이고 구조 변경 메서드도 오류
+    파생 결과는 일반 DataFrame (_constructor), 컬럼 조회는 일반 Series (배열은 쓰기 금지 유지)
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+    def __setitem__(self, key, value):
+        raise _read_only_error()
+
+    def __delitem__(self, key):
+        raise _read_only_error()
+
+    def __setattr__(self, name, value):
+        # pandas 내부 속성(_mgr 등)은 생성 시 object.__setattr__로 설정되므로 여기서는 컬럼/구조 대입만 확인
+        if name in _STRUCTURE_ATTRIBUTES or (not name.startswith('_') and name in self.columns):
+            raise _read_only_error()
+        super().__setattr__(name, value)
+
+    def insert(self, *args, **kwargs):
+        raise _read_only_error()
+
+    def pop(self, *args, **kwargs):
+        raise _read_only_error()
+
+    def update(self, *args, **kwargs):
+        raise _read_only_error()
+
+def _guard_inplace(name):
+    method = getattr(pd.DataFrame, name)
+
+    def guarded(self, *args, **kwargs):
+        if kwargs.get('inplace'):
+            raise _read_only_error()
+        return method(self, *args, **kwargs)
+
+    guarded.__name__ = name
+    guarded.__doc__ = method.__doc__
+    return guarded
+
+for _name in _INPLACE_METHODS:
+    setattr(SharedFrame, _name, _guard_inplace(_name))
+
+def freeze_frame(df):
+    """
+    읽기 전용 공유 프레임 생성 - 컬럼별 배열을 복사해 쓰기 금지로 설정한 SharedFrame
+    (attrs는 그대로 유지)
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy(copy=True)
+        values.setflags(write=False)
+        columns[col] = values
+    frozen = SharedFrame(columns, index=df.index, copy=False)
+    frozen.attrs.update(df.attrs)
+    return frozen
+
+def is_shared_frame(df):
+    """freeze_frame()으로 만든 공유 프레임 여부"""
+    return isinstance(df, SharedFrame)
+
+def writable(df):
+    """공유 프레임이면 복사본, 아니면 그대로 반환 (입력 df를 수정하는 함수에서 사용)"""
+    return df.copy() if is_shared_frame(df) else df
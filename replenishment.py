@@ -0,0 +1,228 @@
+"""
+replenishment.py
+보충 계획 - 장기 예측(최종_예측수량) 이후 단계
+- 로컬 CSV(inventory_status.csv)의 SKU별 현재고 / 리드타임 / MOQ를 SKU 인덱스로 매칭
+- 안전재고: 과거 엔진 예측 상대 오차의 표준편차 × 서비스 수준 z값 × 보호 기간 수요 (시계열 오차가 부족하면 경로 / 전체 오차)
+- 재주문점 / 권장 주문량을 (SKU × 예측 월) 행렬로 한 번에 계산
+  (재고 흐름은 월 순서대로 이어지므로 월 축만 반복, 각 월은 전체 SKU를 한 번에 계산)
+"""
+
+import os
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+from forecast_uncertainty import ResidualPools
+from sku_index import SKU_ID_COLUMN, UNKNOWN_SKU_ID, build_sku_index
+
+# 재고 현황 CSV (스크립트 디렉토리 기준)
+INVENTORY_FILE = 'inventory_status.csv'
+INVENTORY_COLUMNS = ['경로', '제품코드', '제품명', '현재고', '리드타임(일)', 'MOQ']
+INVENTORY_NUMERIC_COLUMNS = ['현재고', '리드타임(일)', 'MOQ']
+
+# 재고 현황이 없는 SKU 기본값
+DEFAULT_ON_HAND = 0
+DEFAULT_LEAD_TIME_DAYS = 30
+DEFAULT_MOQ = 1
+
+# 리드타임 월 환산 기준 일수
+DAYS_PER_MONTH = 30
+
+# 서비스 수준 (결품 없이 보호 기간 수요를 충족할 확률)
+SERVICE_LEVELS = (0.90, 0.95, 0.98, 0.99)
+DEFAULT_SERVICE_LEVEL = 0.95
+
+PLAN_COLUMNS = ['월', '경로', 'SKU_ID', '제품명', '예측수요', '안전재고', '재주문점', '기초재고',
+                '입고예정', '재고포지션', '권장주문량', '기말재고']
+
+def inventory_path(script_dir):
+    """재고 현황 CSV 경로"""
+    return os.path.join(script_dir, INVENTORY_FILE)
+
+def load_inventory_status(path):
+    """
+    재고 현황 CSV 로드 (경로 + 제품코드 또는 제품명으로 SKU 매칭)
+    숫자 컬럼은 천 단위 구분 기호를 제거하여 변환, 파일이 없으면 None
+    """
+    if not os.path.exists(path):
+        return None
+    inventory = pd.read_csv(path, encoding='utf-8')
+    missing = [col for col in ['경로', '현재고'] if col not in inventory.columns]
+    if missing or not {'제품코드', '제품명'} & set(inventory.columns):
+        raise ValueError(f"재고 현황 CSV에 필요한 컬럼이 없습니다: 경로, 제품코드 또는 제품명, 현재고 (파일: {path})")
+
+    for col in INVENTORY_NUMERIC_COLUMNS:
+        if col in inventory.columns:
+            inventory[col] = pd.to_numeric(inventory[col].astype(str).str.replace(',', ''), errors='coerce')
+    debug_print(f"재고 현황 로드: {len(inventory)}행 ({path})")
+    return inventory
+
+def inventory_template(product_info):
+    """재고 현황 CSV 양식 (카탈로그 제품별 빈 값)"""
+    template = product_info.reindex(columns=['경로', '제품코드', '제품명']).copy()
+    template['현재고'] = DEFAULT_ON_HAND
+    template['리드타임(일)'] = DEFAULT_LEAD_TIME_DAYS
+    template['MOQ'] = DEFAULT_MOQ
+    return template[INVENTORY_COLUMNS]
+
+def service_level_z(service_level):
+    """서비스 수준의 표준정규 분위수 (z값)"""
+    return NormalDist().inv_cdf(service_level)
+
+def error_dispersion(keys, errors):
+    """
+    시계열(경로, SKU_ID)별 과거 예측 상대 오차 표준편차
+    errors: engine_forecast_errors 결과 - 시계열 오차가 부족하면 경로 / 전체 오차 사용 (ResidualPools와 같은 기준)
+    반환값: (표준편차 배열, 오차 출처 배열)
+    """
+    group_codes = pd.factorize(keys.get_level_values(0))[0]
+    valid_errors = errors[errors['상대오차'].notna()]
+    series_index = keys.get_indexer(pd.MultiIndex.from_frame(valid_errors[['경로', 'SKU_ID']]))
+    matched = series_index >= 0
+    pools = ResidualPools.build(valid_errors['상대오차'].to_numpy()[matched], series_index[matched], group_codes)
+    return pools.std(), pools.source
+
+def match_inventory(keys, inventory, product_info, sales_history):
+    """
+    시계열(경로, SKU_ID)별 (현재고, 리드타임(일), MOQ, 재고정보 여부) 배열
+    같은 SKU가 여러 행이면 현재고는 합계, 리드타임 / MOQ는 최댓값
+    """
+    n_series = len(keys)
+    on_hand = np.full(n_series, DEFAULT_ON_HAND, dtype=float)
+    lead_days = np.full(n_series, DEFAULT_LEAD_TIME_DAYS, dtype=float)
+    moq = np.full(n_series, DEFAULT_MOQ, dtype=float)
+    found = np.zeros(n_series, dtype=bool)
+    if inventory is None or inventory.empty:
+        return on_hand, lead_days, moq, found
+
+    inventory = inventory.reindex(columns=INVENTORY_COLUMNS).copy()
+    inventory[SKU_ID_COLUMN] = build_sku_index(product_info, sales_history).lookup(inventory)
+    unmatched = int((inventory[SKU_ID_COLUMN] == UNKNOWN_SKU_ID).sum())
+    if unmatched:
+        debug_print(f"재고 현황 SKU 매칭 실패: {unmatched}행")
+
+    per_sku = inventory[inventory[SKU_ID_COLUMN] != UNKNOWN_SKU_ID].groupby(SKU_ID_COLUMN).agg(
+        현재고=('현재고', 'sum'), 리드타임=('리드타임(일)', 'max'), MOQ=('MOQ', 'max')
+    )
+    positions = per_sku.index.get_indexer(keys.get_level_values(1))
+    found = positions >= 0
+    rows = positions[found]
+    on_hand[found] = per_sku['현재고'].to_numpy(dtype=float)[rows]
+    lead_days[found] = per_sku['리드타임'].to_numpy(dtype=float)[rows]
+    moq[found] = per_sku['MOQ'].to_numpy(dtype=float)[rows]
+
+    # 값이 비어 있으면 기본값
+    on_hand = np.nan_to_num(on_hand, nan=DEFAULT_ON_HAND)
+    lead_days = np.nan_to_num(lead_days, nan=DEFAULT_LEAD_TIME_DAYS)
+    moq = np.nan_to_num(moq, nan=DEFAULT_MOQ)
+    return on_hand, np.maximum(lead_days, 0), np.maximum(moq, 1), found
+
+def window_sums(values, length, n_months):
+    """
+    (행 × 시작 월) 구간 합계 - values[i, t : t + length[i] + 1] (누적합 차이, 시작 월 포함)
+    values는 최대 구간 길이만큼 n_months 뒤로 패딩되어 있어야 함
+    """
+    cumulative = np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+    starts = np.broadcast_to(np.arange(n_months)[None, :], (values.shape[0], n_months))
+    ends = starts + np.asarray(length)[:, None] + 1
+    return np.take_along_axis(cumulative, ends, axis=1) - np.take_along_axis(cumulative, starts, axis=1)
+
+def plan_replenishment(demand, sigma, on_hand, lead_months, moq, z):
+    """
+    (SKU × 예측 월) 보충 계획 - 월 초 검토, 주문은 lead_months개월 뒤 월 초 입고
+    - 보호 기간: 주문 월부터 입고 월까지 (리드타임 + 검토 주기 1개월 - 다음 주문이 입고되기 전까지의 수요)
+    - 안전재고 = z × 상대 오차 표준편차 × √(보호 기간 월별 수요² 합)  (월별 오차 독립 가정)
+    - 재주문점 = 보호 기간 수요 + 안전재고
+    - 재고포지션(현재고 + 발주 잔량)이 재주문점 미만이면 재주문점까지 주문 (주문량은 MOQ 이상)
+    - 예측 기간 이후 수요는 마지막 월 수요가 이어진다고 가정
+    반환값: 컬럼명 → (SKU × 예측 월) 배열 딕셔너리
+    """
+    demand = np.asarray(demand, dtype=float)
+    n_series, n_months = demand.shape
+    lead_months = np.asarray(lead_months, dtype=int)
+    max_lead = int(lead_months.max(initial=0))
+
+    padded = np.concatenate([demand, np.repeat(demand[:, -1:], max_lead + 1, axis=1)], axis=1)
+
+    # 안전재고 / 재주문점은 (SKU × 예측 월) 행렬로 한 번에 계산
+    protection = window_sums(padded, lead_months, n_months)
+    safety_stock = z * np.asarray(sigma)[:, None] * np.sqrt(window_sums(padded ** 2, lead_months, n_months))
+
+    plan = {name: np.zeros((n_series, n_months)) for name in ['기초재고', '입고예정', '재고포지션', '권장주문량', '기말재고']}
+    plan['안전재고'] = safety_stock
+    plan['재주문점'] = protection + safety_stock
+
+    # 재고 흐름 - 월 순서대로 (각 월은 전체 SKU 벡터 연산)
+    arrivals = np.zeros((n_series, n_months + max_lead + 1))
+    rows = np.arange(n_series)
+    stock = np.asarray(on_hand, dtype=float).copy()
+    for t in range(n_months):
+        position = stock + arrivals[:, t:].sum(axis=1)
+        shortfall = np.where(position < plan['재주문점'][:, t], np.ceil(plan['재주문점'][:, t] - position), 0)
+        order = np.where(shortfall > 0, np.maximum(shortfall, moq), 0)
+        np.add.at(arrivals, (rows, t + lead_months), order)
+
+        plan['기초재고'][:, t] = stock
+        plan['입고예정'][:, t] = arrivals[:, t]
+        plan['재고포지션'][:, t] = position
+        plan['권장주문량'][:, t] = order
+        stock = stock + arrivals[:, t] - demand[:, t]
+        plan['기말재고'][:, t] = stock
+
+    return plan
+
+def build_replenishment_plan(horizon, errors, inventory, product_info, sales_history,
+                             service_level=DEFAULT_SERVICE_LEVEL, quantity_column='최종_예측수량'):
+    """
+    장기 예측(forecast_horizon 결과)의 SKU별 월별 보충 계획
+    errors: engine_forecast_errors 결과, inventory: load_inventory_status 결과 (None이면 모든 SKU 기본값)
+    반환값: (월별 계획 DataFrame(PLAN_COLUMNS), SKU별 요약 DataFrame)
+    """
+    started = time.perf_counter()
+    months = list(dict.fromkeys(horizon['월']))
+    demand_frame = horizon.pivot_table(index=['경로', 'SKU_ID'], columns='월', values=quantity_column,
+                                       aggfunc='sum', sort=False).reindex(columns=months).fillna(0)
+    keys = demand_frame.index
+    names = horizon.drop_duplicates(['경로', 'SKU_ID']).set_index(['경로', 'SKU_ID'])['제품명'].reindex(keys).to_numpy()
+
+    sigma, source = error_dispersion(keys, errors)
+    on_hand, lead_days, moq, found = match_inventory(keys, inventory, product_info, sales_history)
+    lead_months = np.ceil(lead_days / DAYS_PER_MONTH).astype(int)
+    plan = plan_replenishment(demand_frame.to_numpy(), sigma, on_hand, lead_months, moq, service_level_z(service_level))
+
+    n_series, n_months = len(keys), len(months)
+    plan_df = pd.DataFrame({
+        '월': np.tile(months, n_series),
+        '경로': np.repeat(keys.get_level_values(0).to_numpy(), n_months),
+        'SKU_ID': np.repeat(keys.get_level_values(1).to_numpy(), n_months),
+        '제품명': np.repeat(names, n_months),
+        '예측수요': demand_frame.to_numpy().ravel()
+    })
+    for name, values in plan.items():
+        plan_df[name] = values.ravel()
+
+    orders = plan['권장주문량']
+    ordered = orders > 0
+    short = plan['기말재고'] < 0
+    summary = pd.DataFrame({
+        '경로': keys.get_level_values(0),
+        'SKU_ID': keys.get_level_values(1),
+        '제품명': names,
+        '현재고': on_hand,
+        '리드타임(월)': lead_months,
+        'MOQ': moq,
+        '오차 표준편차': sigma,
+        '오차 출처': source,
+        '총 예측수요': demand_frame.to_numpy().sum(axis=1),
+        '총 권장주문량': orders.sum(axis=1),
+        '첫 주문 월': np.where(ordered.any(axis=1), np.array(months, dtype=object)[ordered.argmax(axis=1)], '-'),
+        '결품 예상 월': np.where(short.any(axis=1), np.array(months, dtype=object)[short.argmax(axis=1)], '-'),
+        '재고정보': np.where(found, '있음', '기본값')
+    })
+
+    debug_print(f"보충 계획: SKU {n_series}개 × {n_months}개월, 서비스 수준 {service_level:.0%}, "
+                f"{time.perf_counter() - started:.3f}초")
+    return plan_df[PLAN_COLUMNS], summary
@@ -11,61 +11,63 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from table_view import display_paginated_table
+from chart_layer import (
+    get_data_version,
+    get_cached_figure,
+    scatter_trace
+)
+from diagnostics import debug_print, LazyDiagnostics
+from ets_models import EtsParameterCache, fit_ets_from_monthly_matrix
+from vectorized_ets import fit_vectorized_ets_from_monthly_matrix
+from intermittent_demand import fit_intermittent_from_monthly_matrix
+from month_utils import get_following_months, month_ordinal, format_korean_month
+from persistent_cache import persistent_cache, frame_key
+from forecast_uncertainty import INTERVAL_LABELS, complete_data_months, relative_errors, build_series_intervals
+
+# 판매데이터 기반 분석 설정 옵션 (selectbox 순서 그대로)
+ANALYSIS_PERIODS = ["6개월", "3개월", "12개월"]
+WEIGHTING_METHODS = ["최근 가중", "균등 가중", "계절성 가중"]
+CORRECTION_STRENGTHS = ["보통", "강함", "약함"]
+
+# 분석 기간별 개월 수 (기준 월 포함)
+ANALYSIS_PERIOD_MONTHS = {"3개월": 3, "6개월": 6, "12개월": 12}
+
+# 예측 모델 (가중 변화율: 설정 조합 텐서, 지수평활: statsmodels ETS 일괄 적합 / NumPy 벡터화 그리드 탐색,
+# 간헐 수요: 수요 패턴 분류 후 Croston/SBA/TSB 벡터화 계산)
+FORECAST_MODEL_CHANGE_RATE = "가중 변화율"
+FORECAST_MODEL_ETS = "지수평활(ETS)"
+FORECAST_MODEL_VECTORIZED_ETS = "지수평활(NumPy 벡터화)"
+FORECAST_MODEL_INTERMITTENT = "간헐 수요(Croston/SBA/TSB)"
+FORECAST_MODELS = [FORECAST_MODEL_CHANGE_RATE, FORECAST_MODEL_ETS, FORECAST_MODEL_VECTORIZED_ETS, FORECAST_MODEL_INTERMITTENT]
+
+# 보정 강도별 변화율 보정 계수
+CHANGE_RATE_CORRECTION_FACTORS = {
+    "약함": {"high": 0.8, "medium": 0.9, "low": 1.0},
+    "보통": {"high": 0.5, "medium": 0.7, "low": 0.9},
+    "강함": {"high": 0.3, "medium": 0.5, "low": 0.7}
+}
+
+# 변화율 보정 시 작은 스케일 기준 (평균 판매량)
+SMALL_SCALE_THRESHOLD = 1500
+
+# 판매데이터 기반 예측 개월 수 (분석 대상 마지막 월 다음 월부터)
+SALES_FORECAST_MONTHS = 6
+
+# 예측 구간 백테스트 기준 월 수 (최근 기준 월마다 가중 변화율 예측을 다시 계산하여 실제와 비교)
+BACKTEST_ORIGINS = 6
+
 def get_dynamic_past_months(analysis_period, current_month):
     """
     분석 기간에 따라 동적으로 과거 월을 설정합니다.
+    기준 월('2025년 7월' 또는 '25-Jul')을 포함한 최근 N개월 (3개월 / 6개월 / 12개월, 연도 경계 포함)
     """
-    # 월 매핑 (미래 예측용)
-    future_month_mapping = {
-        '25-Aug': '2025년 8월',
-        '25-Sep': '2025년 9월', 
-        '25-Oct': '2025년 10월'
-    }
-    
-    # 월 매핑 (과거 분석용)
-    past_month_mapping = {
-        '2025년 7월': '2025년 7월',
-        '2025년 6월': '2025년 6월',
-        '2025년 5월': '2025년 5월'
-    }
-    
-    # 현재 월을 한국어로 변환
-    if current_month in future_month_mapping:
-        current_month_korean = future_month_mapping[current_month]
-    elif current_month in past_month_mapping:
-        current_month_korean = past_month_mapping[current_month]
-    else:
-        current_month_korean = current_month  # 이미 한국어인 경우
-    
-    # 모든 가능한 월 목록 (과거 데이터)
-    all_months = ['2025년 2월', '2025년 3월', '2025년 4월', '2025년 5월', '2025년 6월', '2025년 7월']
-    
-    # 현재 월의 인덱스 찾기
-    try:
-        current_index = all_months.index(current_month_korean)
-    except ValueError:
-        # 현재 월이 과거 데이터에 없는 경우 (미래 예측)
-        if current_month_korean in ['2025년 8월', '2025년 9월', '2025년 10월']:
-            # 미래 예측의 경우 가장 최근 월(7월)을 기준으로 설정
-            current_index = len(all_months) - 1
-        else:
-            current_index = len(all_months) - 1  # 기본값
-    
-    # 분석 기간에 따라 과거 월 설정
-    if analysis_period == "3개월":
-        start_index = max(0, current_index - 2)  # 현재 월 포함 3개월
-    elif analysis_period == "6개월":
-        start_index = max(0, current_index - 5)  # 현재 월 포함 6개월
-    else:  # 12개월
-        start_index = 0
+    current_ordinal = month_ordinal(current_month)
+    if current_ordinal is None:
+        raise ValueError(f"해석할 수 없는 기준 월입니다: {current_month}")
     
-    past_months = all_months[start_index:current_index + 1]  # 현재 월 포함
-    
-    # 최소 3개월은 보장
-    if len(past_months) < 3:
-        past_months = all_months[-3:]
-    
-    return past_months
+    n_months = ANALYSIS_PERIOD_MONTHS.get(analysis_period, ANALYSIS_PERIOD_MONTHS["12개월"])
+    return [format_korean_month(current_ordinal - offset) for offset in range(n_months - 1, -1, -1)]
 
 def calculate_monthly_weights(past_months, weighting_method):
     """
@@ -90,238 +92,401 @@ def calculate_monthly_weights(past_months, weighting_method):
     weight_dict = dict(zip(past_months, weights))
     
     # 디버깅: 가중치 계산 결과 출력
-    print(f"가중치 계산 - 방식: {weighting_method}, 월 수: {n_months}")
+    debug_print(f"가중치 계산 - 방식: {weighting_method}, 월 수: {n_months}")
     for month, weight in weight_dict.items():
-        print(f"  {month}: {weight:.3f}")
+        debug_print(f"  {month}: {weight:.3f}")
     
     return weight_dict
 
-def apply_dynamic_change_rate_correction(change_rate, recent_sales, previous_sales, correction_strength):
+def split_recent_previous_months(past_months):
     """
-    보정 강도에 따른 동적 변화율 보정을 적용합니다.
+    분석 대상 월을 최근 구간과 이전 구간으로 분할합니다.
     """
-    # 보정 강도별 계수
-    correction_factors = {
-        "약함": {"high": 0.8, "medium": 0.9, "low": 1.0},
-        "보통": {"high": 0.5, "medium": 0.7, "low": 0.9},
-        "강함": {"high": 0.3, "medium": 0.5, "low": 0.7}
-    }
-    
-    factors = correction_factors.get(correction_strength, correction_factors["보통"])
-    
-    # 원본 변화율의 부호 보존
-    original_sign = 1 if change_rate >= 0 else -1
-    abs_change_rate = abs(change_rate)
-    
-    # 평균 판매량 계산
-    avg_sales = (recent_sales + previous_sales) / 2
-    
-    # 작은 스케일 기준
-    small_scale_threshold = 1500
-    
-    # 보정 계수 계산
-    if abs_change_rate > 50:  # 50% 이상의 큰 변화율
-        if avg_sales <= small_scale_threshold:
-            correction_factor = factors["high"]
-        else:
-            correction_factor = factors["medium"]
-    elif abs_change_rate > 20:  # 20-50% 변화율
-        if avg_sales <= small_scale_threshold:
-            correction_factor = factors["medium"]
-        else:
-            correction_factor = factors["low"]
+    if len(past_months) >= 6:
+        # 6개월 이상인 경우: 최근 3개월 vs 이전 3개월
+        return past_months[-3:], past_months[-6:-3]
+    elif len(past_months) >= 4:
+        # 4-5개월인 경우: 최근 2개월 vs 이전 2개월
+        return past_months[-2:], past_months[-4:-2]
     else:
-        correction_factor = 1.0  # 보정 없음
+        # 3개월인 경우: 최근 1개월 vs 이전 2개월
+        return past_months[-1:], past_months[:-1]
+
+def group_monthly_sales_by_sku(route_sales):
+    """
+    SKU × 월 판매량 집계 (긴 제품명 대신 정수 SKU_ID로 groupby)
+    반환값: ((경로, 제품명) × 월 판매량 행렬, 행별 SKU_ID 배열)
+    - 제품명은 SKU별 최근 판매 이력의 이름 (제품명이 바뀐 SKU도 한 행으로 집계)
+    - 행 순서는 경로 → 제품명순
+    """
+    monthly_sales = route_sales.groupby(['경로', 'SKU_ID', '월'])['판매수량'].sum().unstack('월', fill_value=0)
+    sku_names = route_sales.groupby(['경로', 'SKU_ID'])['제품명'].last().reindex(monthly_sales.index)
     
-    corrected_abs_rate = abs_change_rate * correction_factor
-    corrected_change_rate = original_sign * corrected_abs_rate
+    sku_ids = monthly_sales.index.get_level_values('SKU_ID').to_numpy()
+    monthly_sales.index = pd.MultiIndex.from_arrays(
+        [monthly_sales.index.get_level_values('경로'), sku_names.to_numpy()], names=['경로', '제품명']
+    )
     
-    return corrected_change_rate
+    order = np.lexsort((monthly_sales.index.get_level_values('제품명'), monthly_sales.index.get_level_values('경로')))
+    return monthly_sales.iloc[order], sku_ids[order]
 
-def analyze_sales_trend_dynamic(pivot_data, past_months, monthly_weights, correction_strength):
+class SalesParameterTensor:
     """
-    동적 파라미터를 적용한 판매 데이터의 추세를 분석합니다.
+    분석 기간 × 가중치 방식 × 보정 강도 전체 조합의 판매데이터 기반 예측 결과
+    (경로, 제품명) 행 기준의 numpy 배열로 보관하며, 설정 변경 시 lookup()으로 재계산 없이 조회
+    
+    배열 차원: P(분석 기간) × W(가중치 방식) × C(보정 강도) × N(경로-제품) × H(예측 개월)
     """
-    trend_analysis = {}
     
-    for product in pivot_data.index:
-        sales_data = pivot_data.loc[product]
+    def __init__(self, routes, products, sku_ids, past_months_by_period, weights_by_setting,
+                 recent_sales, previous_sales, current_sales, original_change_rate,
+                 change_rate, monthly_forecasts, monthly_matrix):
+        self.routes = routes                                # (N,) 행별 경로
+        self.products = products                            # (N,) 행별 제품명
+        self.sku_ids = sku_ids                              # (N,) 행별 SKU_ID
+        self.past_months_by_period = past_months_by_period  # {분석 기간: 분석 대상 월 목록}
+        self.weights_by_setting = weights_by_setting        # {(분석 기간, 가중치 방식): 월별 가중치}
+        self.recent_sales = recent_sales                    # (P, W, N)
+        self.previous_sales = previous_sales                # (P, W, N)
+        self.current_sales = current_sales                  # (P, W, N)
+        self.original_change_rate = original_change_rate    # (P, W, N)
+        self.change_rate = change_rate                      # (P, W, C, N)
+        self.monthly_forecasts = monthly_forecasts          # (P, W, C, N, H)
+        self.monthly_matrix = monthly_matrix                # 공유 (경로, 제품명) × 월 판매량 행렬
+        self._summary_cache = {}
+    
+    def past_months(self, analysis_period):
+        """분석 기간의 분석 대상 월 목록"""
+        return self.past_months_by_period[analysis_period]
+    
+    def monthly_weights(self, analysis_period, weighting_method):
+        """분석 기간/가중치 방식의 월별 가중치"""
+        return self.weights_by_setting[(analysis_period, weighting_method)]
+    
+    def lookup(self, analysis_period, weighting_method, correction_strength):
+        """
+        설정 조합의 예측 요약 조회 (경로 → 제품명 → current_sales / total_forecast / trend / change_rate / monthly_forecasts / sku_id)
+        이미 계산된 배열에서 꺼내기만 하며, 같은 조합의 요약은 재사용
+        """
+        key = (analysis_period, weighting_method, correction_strength)
+        if key in self._summary_cache:
+            return self._summary_cache[key]
         
-        # 가중 평균 계산
-        weighted_recent_sales = 0
-        weighted_previous_sales = 0
-        recent_weight_sum = 0
-        previous_weight_sum = 0
+        p = ANALYSIS_PERIODS.index(analysis_period)
+        w = WEIGHTING_METHODS.index(weighting_method)
+        c = CORRECTION_STRENGTHS.index(correction_strength)
         
-        # 선택된 월을 기준으로 최근과 이전으로 분할
-        if len(past_months) >= 6:
-            # 6개월 이상인 경우: 최근 3개월 vs 이전 3개월
-            recent_months = past_months[-3:]  # 최근 3개월
-            previous_months = past_months[-6:-3]  # 이전 3개월
-        elif len(past_months) >= 4:
-            # 4-5개월인 경우: 최근 2개월 vs 이전 2개월
-            recent_months = past_months[-2:]  # 최근 2개월
-            previous_months = past_months[-4:-2]  # 이전 2개월
-        else:
-            # 3개월인 경우: 최근 1개월 vs 이전 2개월
-            recent_months = past_months[-1:]  # 최근 1개월
-            previous_months = past_months[:-1]  # 이전 2개월
+        summary = self._build_summary(self.current_sales[p, w], self.change_rate[p, w, c], self.monthly_forecasts[p, w, c])
+        self._summary_cache[key] = summary
+        return summary
+    
+    def _build_summary(self, current_sales, change_rate, monthly_forecasts, demand_patterns=None):
+        """행별 배열을 경로 → 제품명 요약 딕셔너리로 변환 (demand_patterns: 행별 수요 패턴, 간헐 수요 모델)"""
+        total_forecasts = monthly_forecasts.sum(axis=1) / monthly_forecasts.shape[1]
+        trends = np.where(change_rate > 5, '상승', np.where(change_rate < -5, '하락', '안정'))
         
-        # 가중 평균 계산
-        for month in recent_months:
-            weight = monthly_weights.get(month, 1.0)
-            weighted_recent_sales += sales_data.get(month, 0) * weight
-            recent_weight_sum += weight
+        summary = {}
+        for i, (route, product, sku_id) in enumerate(zip(self.routes, self.products, self.sku_ids)):
+            summary.setdefault(route, {})[product] = {
+                'current_sales': current_sales[i],  # 가중 평균 판매량
+                'total_forecast': total_forecasts[i],  # 6개월 예측의 월 평균 수량
+                'trend': str(trends[i]),
+                'change_rate': change_rate[i],
+                # 기존 요약 구조와 동일하게 보정된 변화율을 그대로 사용
+                'original_change_rate': change_rate[i],
+                'monthly_forecasts': monthly_forecasts[i].tolist(),
+                'weighted_analysis': True,
+                'sku_id': sku_id
+            }
+            if demand_patterns is not None:
+                summary[route][product]['demand_pattern'] = demand_patterns[i]
+        return summary
+    
+    def model_summary(self, model_name, model_forecasts, analysis_period, weighting_method, demand_patterns=None):
+        """
+        모델 예측(행별 월별 예측 배열)의 요약 조회 (필터링/정렬 적용, 모델/조합별 재사용)
+        월 평균 판매량은 선택된 분석 기간/가중치 방식의 가중 평균, 변화율은 예측 월평균 대비 변화율
+        """
+        key = ('model', model_name, analysis_period, weighting_method)
+        if key not in self._summary_cache:
+            p = ANALYSIS_PERIODS.index(analysis_period)
+            w = WEIGHTING_METHODS.index(weighting_method)
+            current_sales = self.current_sales[p, w]
+            
+            forecast_average = model_forecasts.mean(axis=1)
+            safe_current = np.where(current_sales > 0, current_sales, 1)
+            change_rate = np.where(current_sales > 0, (forecast_average - current_sales) / safe_current * 100, 0)
+            
+            self._summary_cache[key] = filter_and_sort_forecast_results(
+                self._build_summary(current_sales, change_rate, model_forecasts, demand_patterns)
+            )
+        return self._summary_cache[key]
+    
+    def lookup_filtered(self, analysis_period, weighting_method, correction_strength):
+        """0개 판매/예측 제품 제외 및 추세별 정렬까지 적용한 요약 조회 (조합별 재사용)"""
+        key = ('filtered', analysis_period, weighting_method, correction_strength)
+        if key not in self._summary_cache:
+            self._summary_cache[key] = filter_and_sort_forecast_results(
+                self.lookup(analysis_period, weighting_method, correction_strength)
+            )
+        return self._summary_cache[key]
+    
+    def backtest_errors(self, analysis_period, weighting_method, correction_strength, complete_months,
+                        n_origins=BACKTEST_ORIGINS):
+        """
+        최근 n_origins개 기준 월마다 같은 설정(분석 기간 길이, 가중치 방식, 보정 강도)의 가중 변화율 예측을
+        그 시점까지의 판매량으로 다시 계산하여 이후 월 실제 판매량과 비교한 상대 오차
+        complete_months: 실적이 집계된 월 목록 (월 순서) - 경로별 데이터 존재 월은 경로 판매 합계 > 0인 월
+        기준 월(분석 기간 마지막 월) 이후 실적은 사용하지 않음 (과거 기준 월의 구간은 그 시점까지의 오차로만 계산)
+        반환값: (상대 오차 배열, 오차별 행 위치 배열)
+        """
+        analysis_ordinal = month_ordinal(self.past_months(analysis_period)[-1])
+        months = [
+            month for month in complete_months
+            if month in self.monthly_matrix.columns and month_ordinal(month) <= analysis_ordinal
+        ]
+        history = self.monthly_matrix[months]
+        matrix = history.to_numpy()
+        month_index = {month: j for j, month in enumerate(months)}
+        present = history.groupby(level=0).sum().reindex(self.routes).to_numpy() > 0
+        window = len(self.past_months(analysis_period))
+        months_ahead = self.monthly_forecasts.shape[-1]
         
-        for month in previous_months:
-            weight = monthly_weights.get(month, 1.0)
-            weighted_previous_sales += sales_data.get(month, 0) * weight
-            previous_weight_sum += weight
+        errors, rows = [], []
+        for t in range(max(window - 1, len(months) - 1 - n_origins), len(months) - 1):
+            past_months = months[t - window + 1:t + 1]
+            monthly_weights = calculate_monthly_weights(past_months, weighting_method)
+            recent, previous, rate = weighted_change_rates(matrix, month_index, past_months, monthly_weights)
+            change_rate = correct_change_rates(rate, recent, previous, correction_strength)
+            current = weighted_average_columns(matrix, month_index, past_months, monthly_weights, present)
+            
+            actual = matrix[:, t + 1:t + 1 + months_ahead]
+            forecasts = project_monthly_forecasts(current, change_rate, actual.shape[1])
+            errors.append(relative_errors(forecasts, actual).ravel())
+            rows.append(np.repeat(np.arange(len(matrix)), actual.shape[1]))
         
-        # 정규화
-        if recent_weight_sum > 0:
-            weighted_recent_sales /= recent_weight_sum
-        if previous_weight_sum > 0:
-            weighted_previous_sales /= previous_weight_sum
+        if not errors:
+            return np.array([]), np.array([], dtype=int)
+        return np.concatenate(errors), np.concatenate(rows)
+    
+    def register_diagnostics(self, diagnostics, analysis_period, weighting_method, correction_strength):
+        """선택된 조합의 경로별 월별 판매량/추세 분석 표를 지연 계산 항목으로 등록"""
+        p = ANALYSIS_PERIODS.index(analysis_period)
+        w = WEIGHTING_METHODS.index(weighting_method)
+        c = CORRECTION_STRENGTHS.index(correction_strength)
         
-        # 변화율 계산
-        if weighted_previous_sales > 0:
-            change_rate = ((weighted_recent_sales - weighted_previous_sales) / weighted_previous_sales) * 100
-        else:
-            change_rate = 0
-        
-        # 보정 강도에 따른 변화율 보정
-        corrected_change_rate = apply_dynamic_change_rate_correction(
-            change_rate, weighted_recent_sales, weighted_previous_sales, correction_strength
-        )
+        for route in dict.fromkeys(self.routes):
+            rows = np.flatnonzero(self.routes == route)
+            
+            diagnostics.register(f'{route} 월별 판매량', lambda route=route: self.monthly_matrix.loc[route])
+            diagnostics.register(f'{route} 추세 분석', lambda rows=rows: pd.DataFrame({
+                '제품명': self.products[rows],
+                '추세': np.where(self.change_rate[p, w, c, rows] > 5, '상승',
+                               np.where(self.change_rate[p, w, c, rows] < -5, '하락', '안정')),
+                '원본_변화율': self.original_change_rate[p, w, rows],
+                '보정_변화율': self.change_rate[p, w, c, rows],
+                '최근_가중평균': self.recent_sales[p, w, rows],
+                '이전_가중평균': self.previous_sales[p, w, rows]
+            }))
+
+def weighted_average_columns(matrix, month_index, months, monthly_weights, present=None):
+    """
+    월별 가중 평균을 행 전체에 대해 한 번에 계산
+    (기존 루프와 같은 순서로 누적하여 동일한 결과 보장)
+    present가 주어지면 해당 경로에 데이터가 있는 월만 가중치 합에 포함
+    """
+    n_rows = matrix.shape[0]
+    weighted_sum = np.zeros(n_rows)
+    weight_sum = np.zeros(n_rows) if present is not None else 0
+    
+    for month in months:
+        weight = monthly_weights.get(month, 1.0)
+        j = month_index.get(month)
+        values = matrix[:, j] if j is not None else np.zeros(n_rows)
         
-        # 추세 판단 (보정된 변화율 사용)
-        if corrected_change_rate > 5:
-            trend = '상승'
-        elif corrected_change_rate < -5:
-            trend = '하락'
+        if present is not None:
+            month_present = present[:, j] if j is not None else np.zeros(n_rows, dtype=bool)
+            weighted_sum = weighted_sum + np.where(month_present, values * weight, 0)
+            weight_sum = weight_sum + np.where(month_present, weight, 0)
         else:
-            trend = '안정'
-        
-        trend_analysis[product] = {
-            'trend': trend,
-            'change_rate': corrected_change_rate,
-            'original_change_rate': change_rate,
-            'weighted_recent_sales': weighted_recent_sales,
-            'weighted_previous_sales': weighted_previous_sales,
-            'monthly_weights': monthly_weights,
-            'recent_months': recent_months,
-            'previous_months': previous_months
-        }
+            weighted_sum = weighted_sum + values * weight
+            weight_sum = weight_sum + weight
     
-    return trend_analysis
+    if present is not None:
+        safe_weight_sum = np.where(weight_sum > 0, weight_sum, 1)
+        return np.where(weight_sum > 0, weighted_sum / safe_weight_sum, 0)
+    return weighted_sum / weight_sum if weight_sum > 0 else weighted_sum
 
-
-
-def predict_future_sales_dynamic(trend_analysis, pivot_data, months_ahead, monthly_weights):
+def weighted_change_rates(matrix, month_index, past_months, monthly_weights):
     """
-    동적 파라미터를 적용한 향후 판매 예측을 수행합니다.
+    최근/이전 구간 가중 평균 판매량과 변화율(%)을 행 전체에 대해 한 번에 계산
+    반환값: (최근 구간 평균, 이전 구간 평균, 변화율 - 이전 구간 판매가 없으면 0)
     """
-    future_forecast = {}
+    recent_months, previous_months = split_recent_previous_months(past_months)
+    recent = weighted_average_columns(matrix, month_index, recent_months, monthly_weights)
+    previous = weighted_average_columns(matrix, month_index, previous_months, monthly_weights)
     
-    for product in pivot_data.index:
-        trend_info = trend_analysis[product]
-        change_rate = trend_info['change_rate']
-        
-        # 가중 평균 현재 판매량 계산
-        current_sales = 0
-        total_weight = 0
-        
-        for month in monthly_weights.keys():
-            if month in pivot_data.columns:
-                weight = monthly_weights[month]
-                current_sales += pivot_data.loc[product, month] * weight
-                total_weight += weight
-        
-        if total_weight > 0:
-            current_sales /= total_weight
-        
-        # 월별 예측 계산 (추세에 따른 누적 변화율 적용)
-        monthly_forecasts = []
-        for month_idx in range(months_ahead):
-            # 월별 누적 변화율 계산 (시간이 지날수록 변화가 누적됨)
-            if change_rate > 0:  # 성장 추세
-                # 성장 추세: 시간이 지날수록 더 성장 (가속화)
-                cumulative_growth_rate = change_rate * (1 + month_idx * 0.1)  # 매월 10%씩 가속화
-            elif change_rate < 0:  # 하향 추세
-                # 하향 추세: 시간이 지날수록 더 하향 (가속화)
-                cumulative_growth_rate = change_rate * (1 + month_idx * 0.1)  # 매월 10%씩 가속화
-            else:  # 안정 추세
-                cumulative_growth_rate = change_rate
-            
-            # 변화율 적용
-            growth_factor = 1 + (cumulative_growth_rate / 100)
-            
-            # 예측 수량 계산
-            predicted_sales = current_sales * growth_factor
-            monthly_forecasts.append(max(0, predicted_sales))
-        
-        future_forecast[product] = {
-            'trend': trend_info['trend'],
-            'change_rate': change_rate,
-            'total_forecast': sum(monthly_forecasts),
-            'monthly_forecasts': monthly_forecasts
-        }
+    safe_previous = np.where(previous > 0, previous, 1)
+    rate = np.where(previous > 0, ((recent - previous) / safe_previous) * 100, 0)
+    return recent, previous, rate
+
+def correct_change_rates(change_rate, recent_sales, previous_sales, correction_strength):
+    """큰 변화율 보정 - 변화율 크기(20%, 50% 초과)와 판매 규모(SMALL_SCALE_THRESHOLD 이하)별 계수를 모든 제품에 동시 적용"""
+    factors = CHANGE_RATE_CORRECTION_FACTORS.get(correction_strength, CHANGE_RATE_CORRECTION_FACTORS["보통"])
+    
+    original_sign = np.where(change_rate >= 0, 1, -1)
+    abs_change_rate = np.abs(change_rate)
+    small_scale = (recent_sales + previous_sales) / 2 <= SMALL_SCALE_THRESHOLD
+    
+    correction_factor = np.select(
+        [abs_change_rate > 50, abs_change_rate > 20],
+        [
+            np.where(small_scale, factors["high"], factors["medium"]),
+            np.where(small_scale, factors["medium"], factors["low"])
+        ],
+        default=1.0
+    )
     
-    return future_forecast
+    return original_sign * (abs_change_rate * correction_factor)
 
-def calculate_total_forecast_summary_dynamic(filtered_sales, selected_routes, past_months, monthly_weights, correction_strength):
+def project_monthly_forecasts(current_sales, change_rate, months_ahead):
+    """월별 예측 수량 - 매월 10%씩 가속되는 누적 변화율을 현재 판매량에 적용 (음수는 0)"""
+    forecasts = np.empty(np.broadcast_shapes(current_sales.shape, change_rate.shape) + (months_ahead,))
+    for month_idx in range(months_ahead):
+        cumulative_growth_rate = change_rate * (1 + month_idx * 0.1)
+        growth_factor = 1 + (cumulative_growth_rate / 100)
+        forecasts[..., month_idx] = np.maximum(0, current_sales * growth_factor)
+    return forecasts
+
+@persistent_cache(
+    'build_sales_parameter_tensor',
+    lambda filtered_sales, selected_routes, analysis_month, months_ahead=SALES_FORECAST_MONTHS: (
+        frame_key(filtered_sales), tuple(selected_routes), analysis_month, months_ahead
+    )
+)
+def build_sales_parameter_tensor(filtered_sales, selected_routes, analysis_month, months_ahead=SALES_FORECAST_MONTHS):
     """
-    동적 파라미터를 적용한 전체 예측 요약을 계산합니다.
+    전체 설정 조합(분석 기간 3 × 가중치 방식 3 × 보정 강도 3 = 27개)의 예측을
+    공유 (경로, 제품명) × 월 판매량 행렬 한 번의 벡터 연산으로 계산
+    (DEMAND_CACHE_DIR 설정 시 디스크 영속 캐시 - 재시작 후에도 같은 판매 데이터 / 경로 / 기준 월이면 디스크에서 조회)
     """
-    summary = {}
+    route_sales = filtered_sales[filtered_sales['경로'].isin(selected_routes)]
     
-    for route in selected_routes:
-        route_sales = filtered_sales[filtered_sales['경로'] == route]
-        
-        if len(route_sales) == 0:
-            continue
-        
-        # 제품별 월별 판매량 계산
-        product_monthly_sales = route_sales.groupby(['제품명', '월'])['판매수량'].sum().reset_index()
-        pivot_data = product_monthly_sales.pivot(index='제품명', columns='월', values='판매수량').fillna(0)
-        
-        # 동적 추세 분석 및 예측
-        trend_analysis = analyze_sales_trend_dynamic(pivot_data, past_months, monthly_weights, correction_strength)
-        future_forecast = predict_future_sales_dynamic(trend_analysis, pivot_data, 6, monthly_weights)
-        
-        # 월 평균 판매량 계산 (가중 평균 적용)
-        products_info = {}
+    # 공유 행렬: (경로, 제품명) × 월 - SKU_ID로 집계, 경로는 선택 순서, 제품은 이름순 (기존 요약과 동일한 순서)
+    monthly_matrix, sku_ids = group_monthly_sales_by_sku(route_sales)
+    route_values = monthly_matrix.index.get_level_values(0)
+    row_order = np.concatenate(
+        [np.flatnonzero(route_values == route) for route in selected_routes] + [np.array([], dtype=int)]
+    )
+    monthly_matrix = monthly_matrix.iloc[row_order].astype(float)
+    sku_ids = sku_ids[row_order]
+    
+    routes = monthly_matrix.index.get_level_values(0).to_numpy()
+    products = monthly_matrix.index.get_level_values(1).to_numpy()
+    matrix = monthly_matrix.to_numpy()
+    month_index = {month: j for j, month in enumerate(monthly_matrix.columns)}
+    
+    # 경로별 데이터 존재 월 (기존 경로별 피벗 컬럼과 동일)
+    route_month_present = route_sales.groupby(['경로', '월']).size().unstack('월', fill_value=0) > 0
+    present = route_month_present.reindex(index=routes, columns=monthly_matrix.columns, fill_value=False).to_numpy()
+    
+    n_rows = len(routes)
+    shape_pw = (len(ANALYSIS_PERIODS), len(WEIGHTING_METHODS), n_rows)
+    recent_sales = np.zeros(shape_pw)
+    previous_sales = np.zeros(shape_pw)
+    current_sales = np.zeros(shape_pw)
+    original_change_rate = np.zeros(shape_pw)
+    change_rate = np.zeros(shape_pw[:2] + (len(CORRECTION_STRENGTHS), n_rows))
+    
+    past_months_by_period = {}
+    weights_by_setting = {}
+    
+    for p, analysis_period in enumerate(ANALYSIS_PERIODS):
+        past_months = get_dynamic_past_months(analysis_period, analysis_month)
+        past_months_by_period[analysis_period] = past_months
         
-        for product in pivot_data.index:
-            # 가중 평균 판매량 계산
-            weighted_sales_sum = 0
-            total_weight = 0
-            
-            for month in past_months:
-                if month in pivot_data.columns:
-                    weight = monthly_weights.get(month, 1.0)
-                    weighted_sales_sum += pivot_data.loc[product, month] * weight
-                    total_weight += weight
+        for w, weighting_method in enumerate(WEIGHTING_METHODS):
+            monthly_weights = calculate_monthly_weights(past_months, weighting_method)
+            weights_by_setting[(analysis_period, weighting_method)] = monthly_weights
             
-            monthly_avg_sales = weighted_sales_sum / total_weight if total_weight > 0 else 0
+            recent, previous, rate = weighted_change_rates(matrix, month_index, past_months, monthly_weights)
             
-            # 6개월 예측의 월 평균 수량 계산
-            monthly_avg_forecast = future_forecast[product]['total_forecast'] / 6
+            recent_sales[p, w] = recent
+            previous_sales[p, w] = previous
+            original_change_rate[p, w] = rate
+            current_sales[p, w] = weighted_average_columns(matrix, month_index, past_months, monthly_weights, present)
             
-            products_info[product] = {
-                'current_sales': monthly_avg_sales,  # 가중 평균 판매량
-                'total_forecast': monthly_avg_forecast,  # 6개월 예측의 월 평균 수량
-                'trend': future_forecast[product]['trend'],
-                'change_rate': future_forecast[product]['change_rate'],
-                'original_change_rate': future_forecast[product].get('original_change_rate', future_forecast[product]['change_rate']),
-                'monthly_forecasts': future_forecast[product]['monthly_forecasts'],
-                'weighted_analysis': True
-            }
-        
-        summary[route] = products_info
+            for c, correction_strength in enumerate(CORRECTION_STRENGTHS):
+                change_rate[p, w, c] = correct_change_rates(rate, recent, previous, correction_strength)
     
-    return summary
+    # 월별 예측: (P, W, C, N, H)
+    monthly_forecasts = project_monthly_forecasts(current_sales[:, :, np.newaxis, :], change_rate, months_ahead)
+    
+    return SalesParameterTensor(
+        routes, products, sku_ids, past_months_by_period, weights_by_setting,
+        recent_sales, previous_sales, current_sales, original_change_rate,
+        change_rate, monthly_forecasts, monthly_matrix
+    )
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def get_sales_parameter_tensor(data_version, selected_routes, analysis_month, _filtered_sales):
+    """
+    설정 조합 텐서를 (데이터 버전, 경로, 기준 월) 단위로 캐시
+    분석 기간/가중치 방식/보정 강도 selectbox 변경은 이 캐시를 다시 계산하지 않음
+    """
+    return build_sales_parameter_tensor(_filtered_sales, list(selected_routes), analysis_month)
+
+@st.cache_resource(show_spinner=False)
+def get_ets_parameter_cache():
+    """프로세스 전체에서 공유하는 지수평활 파라미터 캐시 (세션/데이터 버전이 바뀌어도 웜스타트에 사용)"""
+    return EtsParameterCache()
+
+@st.cache_resource(max_entries=32, show_spinner="지수평활(ETS) 모델 적합 중...")
+def get_ets_forecast(data_version, selected_routes, last_month, _parameter_tensor):
+    """
+    설정 조합 텐서의 (경로, 제품명) 행별 지수평활 예측을 (데이터 버전, 경로, 마지막 학습 월) 단위로 캐시
+    적합은 프로세스 풀에서 병렬로 수행하고, 파라미터 캐시로 재사용/웜스타트
+    """
+    return fit_ets_from_monthly_matrix(
+        _parameter_tensor.monthly_matrix, _parameter_tensor.sku_ids, last_month,
+        months_ahead=_parameter_tensor.monthly_forecasts.shape[-1],
+        cache=get_ets_parameter_cache()
+    )
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_vectorized_ets_forecast(data_version, selected_routes, last_month, _parameter_tensor):
+    """설정 조합 텐서의 (경로, 제품명) 행별 벡터화 지수평활 예측을 (데이터 버전, 경로, 마지막 학습 월) 단위로 캐시"""
+    return fit_vectorized_ets_from_monthly_matrix(
+        _parameter_tensor.monthly_matrix, last_month,
+        months_ahead=_parameter_tensor.monthly_forecasts.shape[-1]
+    )
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_intermittent_forecast(data_version, selected_routes, last_month, _parameter_tensor):
+    """설정 조합 텐서의 (경로, 제품명) 행별 간헐 수요 예측을 (데이터 버전, 경로, 마지막 학습 월) 단위로 캐시"""
+    return fit_intermittent_from_monthly_matrix(
+        _parameter_tensor.monthly_matrix, last_month,
+        months_ahead=_parameter_tensor.monthly_forecasts.shape[-1]
+    )
+
+@st.cache_resource(max_entries=128, show_spinner="예측 구간 계산 중...")
+def get_sales_forecast_intervals(data_version, selected_routes, analysis_month, analysis_period, weighting_method,
+                                 correction_strength, _parameter_tensor, _sales_history):
+    """
+    가중 변화율 예측의 P10/P50/P90 부트스트랩 표본을 (데이터 버전, 경로, 기준 월, 설정 조합) 단위로 캐시
+    오차는 같은 설정으로 과거 기준 월에서 다시 계산한 예측과 이후 실적의 상대 오차
+    """
+    tensor = _parameter_tensor
+    errors, rows = tensor.backtest_errors(
+        analysis_period, weighting_method, correction_strength, complete_data_months(_sales_history)
+    )
+    p = ANALYSIS_PERIODS.index(analysis_period)
+    w = WEIGHTING_METHODS.index(weighting_method)
+    c = CORRECTION_STRENGTHS.index(correction_strength)
+    return build_series_intervals(
+        list(zip(tensor.routes, tensor.products)), tensor.monthly_forecasts[p, w, c], errors, rows,
+        pd.factorize(tensor.routes)[0]
+    )
 
 def filter_and_sort_forecast_results(total_forecast_summary):
     """0개 판매/예측 제품 제외 및 추세별 정렬"""
@@ -381,16 +546,21 @@ def display_product_trend_table(filtered_summary, analysis_month=None):
             is_weighted = info.get('weighted_analysis', False)
             analysis_type = "동적" if is_weighted else "기본"
             
-            table_data.append({
+            # 수량은 숫자로 유지 (서버측 정렬용) - 포맷팅은 표시되는 페이지에만 적용
+            row = {
                 '경로': route,
                 '제품명': product,
                 '분석방식': analysis_type,
                 '기준월': analysis_month if analysis_month else "N/A",
-                '월 평균 판매량': f"{int(info['current_sales']):,}개",
+                '월 평균 판매량': info['current_sales'],
                 '추세': f"{trend_icon} {info['trend']}",
                 '변화율': change_rate_display,
-                '6개월 예측(월평균)': f"{int(info['total_forecast']):,}개"
-            })
+                '6개월 예측(월평균)': info['total_forecast'],
+                '_변화율_값': corrected_change_rate
+            }
+            if 'demand_pattern' in info:
+                row['수요 패턴'] = info['demand_pattern']
+            table_data.append(row)
     
     # 200% 이상 변화율 제품이 있으면 경고 메시지 표시
     if high_change_rate_products:
@@ -400,7 +570,15 @@ def display_product_trend_table(filtered_summary, analysis_month=None):
         st.markdown("---")
     
     df = pd.DataFrame(table_data)
-    st.dataframe(df, use_container_width=True)
+    display_paginated_table(
+        df,
+        key="sales_trend_table",
+        formatters={
+            '월 평균 판매량': lambda x: f"{int(x):,}개",
+            '6개월 예측(월평균)': lambda x: f"{int(x):,}개"
+        },
+        sort_keys={'변화율': '_변화율_값'}
+    )
     
     # 동적 분석 통계
     dynamic_count = sum(1 for item in table_data if item['분석방식'] == '동적')
@@ -412,12 +590,22 @@ def display_product_trend_table(filtered_summary, analysis_month=None):
     with col2:
         st.metric("기본 분석 제품", f"{basic_count}개")
 
-def display_monthly_forecast_chart(filtered_summary, filtered_sales, past_months):
-    """판매 추이 및 월별 예측 수량 추이 그래프 표시 (경로/제품 선택 가능)"""
+@st.fragment
+def display_monthly_forecast_chart(filtered_summary, filtered_sales, past_months, data_version=None, intervals=None):
+    """
+    판매 추이 및 월별 예측 수량 추이 그래프 표시 (경로/제품 선택 가능)
+    fragment로 실행되므로 보기 방식/제품 선택 변경 시 이 섹션만 다시 실행되고,
+    전달받은 예측 결과(filtered_summary)를 그대로 재사용하여 예측 계산은 반복되지 않음
+    intervals: (경로, 제품명) 키의 SeriesIntervals - 주어지면 P10~P90 예측 구간 표시
+    """
     if not filtered_summary:
         st.warning("표시할 데이터가 없습니다.")
         return
     
+    # 차트 캐시 키용 데이터 버전 (load_data에서 기록한 버전 사용)
+    if data_version is None:
+        data_version = get_data_version(filtered_sales)
+    
     # 보기 방식 선택
     view_type = st.radio(
         "보기 방식 선택:",
@@ -440,7 +628,7 @@ def display_monthly_forecast_chart(filtered_summary, filtered_sales, past_months
         else:
             selected_routes = [selected_route]
             
-        display_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_routes)
+        display_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_routes, data_version, intervals)
         
     elif view_type == "제품별 개별":
         # 제품별 개별 보기
@@ -456,7 +644,7 @@ def display_monthly_forecast_chart(filtered_summary, filtered_sales, past_months
         )
         
         selected_route, selected_product_name = selected_product.split(" - ", 1)
-        display_individual_product_chart(filtered_summary, filtered_sales, past_months, selected_route, selected_product_name)
+        display_individual_product_chart(filtered_summary, filtered_sales, past_months, selected_route, selected_product_name, data_version, intervals)
         
     else:  # 제품별 경로 합계
         # 제품별 경로 합계 보기
@@ -471,63 +659,120 @@ def display_monthly_forecast_chart(filtered_summary, filtered_sales, past_months
             index=0
         )
         
-        display_product_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_product)
+        display_product_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_product, data_version, intervals)
 
-def display_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_routes):
-    """경로별 전체 제품 합계 차트 표시"""
-    months = ['2025년 8월', '2025년 9월', '2025년 10월', '2025년 11월', '2025년 12월', '2026년 1월']
+def sum_monthly_forecasts(forecast_lists, n_months):
+    """제품별 월별 예측 수량(정수 변환)을 월 단위로 합산"""
+    totals = np.zeros(n_months, dtype=np.int64)
+    for monthly_forecasts in forecast_lists:
+        values = np.asarray(monthly_forecasts[:n_months], dtype=float).astype(np.int64)
+        totals[:len(values)] += values
+    return totals.tolist()
+
+def add_history_forecast_traces(fig, n_traces, past_months, past_values, forecast_months, forecast_values,
+                                past_name, forecast_name, line=None):
+    """과거(실선) + 예측(점선) 트레이스 한 쌍 추가 - 트레이스가 많으면 WebGL 사용"""
+    line = line or {}
     
-    fig = go.Figure()
+    # 과거 데이터 (실선)
+    fig.add_trace(scatter_trace(
+        n_traces,
+        x=list(past_months),
+        y=list(past_values),
+        mode='lines+markers',
+        name=past_name,
+        line=dict(width=3, **line),
+        marker=dict(size=8)
+    ))
     
-    for route in selected_routes:
-        if route not in filtered_summary:
-            continue
-            
-        # 과거 판매 데이터 수집
-        route_sales = filtered_sales[filtered_sales['경로'] == route]
-        past_monthly_data = {}
-        
-        # 과거 6개월 판매 데이터
-        for month in past_months:
-            month_sales = route_sales[route_sales['월'] == month]['판매수량'].sum()
-            past_monthly_data[month] = month_sales
+    # 예측 데이터 (점선)
+    fig.add_trace(scatter_trace(
+        n_traces,
+        x=list(forecast_months),
+        y=list(forecast_values),
+        mode='lines+markers',
+        name=forecast_name,
+        line=dict(width=3, dash='dash', **line),
+        marker=dict(size=8, symbol='diamond')
+    ))
+
+def add_interval_band_traces(fig, forecast_months, band, name):
+    """예측 구간(P10 ~ P90) 음영 트레이스 추가 - band: (분위수 × 예측 월) 배열"""
+    months = list(forecast_months)
+    lower, upper = band[0][:len(months)], band[-1][:len(months)]
+    fig.add_trace(go.Scatter(
+        x=months, y=lower.tolist(), mode='lines', line=dict(width=0),
+        showlegend=False, hoverinfo='skip', legendgroup=name
+    ))
+    fig.add_trace(go.Scatter(
+        x=months, y=upper.tolist(), mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor='rgba(31, 119, 180, 0.15)',
+        name=f'{name} ({INTERVAL_LABELS[0]}~{INTERVAL_LABELS[-1]})',
+        customdata=lower.tolist(), legendgroup=name,
+        hovertemplate=f'{INTERVAL_LABELS[0]} %{{customdata:,.0f}} ~ {INTERVAL_LABELS[-1]} %{{y:,.0f}}<extra></extra>'
+    ))
+
+def interval_band_key(band):
+    """차트 캐시 키용 예측 구간 값"""
+    return None if band is None else tuple(np.round(band[[0, -1]], 1).ravel())
+
+def display_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_routes, data_version=None,
+                                intervals=None):
+    """경로별 전체 제품 합계 차트 표시 (intervals가 있으면 경로 합계 P10~P90 구간 표시)"""
+    months = get_following_months(past_months[-1], SALES_FORECAST_MONTHS)
+    
+    selected_routes = [route for route in selected_routes if route in filtered_summary]
+    
+    # 경로별 월별 예측 수량 합계 (차트와 요약 테이블에서 공통 사용)
+    route_forecasts = {
+        route: sum_monthly_forecasts(
+            [info['monthly_forecasts'] for info in filtered_summary[route].values()], len(months)
+        )
+        for route in selected_routes
+    }
+    route_bands = {
+        route: intervals.quantiles([(route, product) for product in filtered_summary[route]]) if intervals else None
+        for route in selected_routes
+    }
+    
+    def build_figure():
+        # 과거 판매 데이터 (경로 × 월 합계를 한 번에 집계)
+        route_sales = filtered_sales[
+            filtered_sales['경로'].isin(selected_routes) &
+            filtered_sales['월'].isin(past_months)
+        ]
+        past_totals = route_sales.groupby(['경로', '월'])['판매수량'].sum()
         
-        # 예측 데이터 수집
-        route_monthly_data = {}
-        for product, info in filtered_summary[route].items():
-            monthly_forecasts = info['monthly_forecasts']
-            for i, month in enumerate(months):
-                if month not in route_monthly_data:
-                    route_monthly_data[month] = 0
-                route_monthly_data[month] += int(monthly_forecasts[i]) if i < len(monthly_forecasts) else 0
+        fig = go.Figure()
+        n_traces = len(selected_routes) * 2
         
-        # 과거 데이터 (실선)
-        fig.add_trace(go.Scatter(
-            x=list(past_monthly_data.keys()),
-            y=list(past_monthly_data.values()),
-            mode='lines+markers',
-            name=f'{route} (과거)',
-            line=dict(width=3),
-            marker=dict(size=8)
-        ))
+        for route in selected_routes:
+            past_values = [past_totals.get((route, month), 0) for month in past_months]
+            add_history_forecast_traces(
+                fig, n_traces, past_months, past_values, months, route_forecasts[route],
+                f'{route} (과거)', f'{route} (예측)'
+            )
+            if route_bands[route] is not None:
+                add_interval_band_traces(fig, months, route_bands[route], route)
         
-        # 예측 데이터 (점선)
-        fig.add_trace(go.Scatter(
-            x=list(route_monthly_data.keys()),
-            y=list(route_monthly_data.values()),
-            mode='lines+markers',
-            name=f'{route} (예측)',
-            line=dict(width=3, dash='dash'),
-            marker=dict(size=8, symbol='diamond')
-        ))
-    
-    fig.update_layout(
-        title=f'경로별 판매 추이 및 향후 6개월 예측',
-        xaxis_title='월',
-        yaxis_title='판매/예측 수량 (개)',
-        hovermode='x unified',
-        showlegend=True
+        fig.update_layout(
+            title=f'경로별 판매 추이 및 향후 6개월 예측',
+            xaxis_title='월',
+            yaxis_title='판매/예측 수량 (개)',
+            hovermode='x unified',
+            showlegend=True
+        )
+        return fig
+    
+    if data_version is None:
+        data_version = get_data_version(filtered_sales)
+    selection = (
+        tuple(selected_routes),
+        tuple(past_months),
+        tuple(tuple(route_forecasts[route]) for route in selected_routes),
+        tuple(interval_band_key(route_bands[route]) for route in selected_routes)
     )
+    fig = get_cached_figure('route_summary', data_version, selection, build_figure)
     
     st.plotly_chart(fig, use_container_width=True)
     
@@ -535,29 +780,25 @@ def display_route_summary_chart(filtered_summary, filtered_sales, past_months, s
     st.markdown("**경로별 월별 예측 수량 요약:**")
     summary_data = []
     for route in selected_routes:
-        if route not in filtered_summary:
-            continue
-        route_monthly_data = {}
-        for product, info in filtered_summary[route].items():
-            monthly_forecasts = info['monthly_forecasts']
-            for i, month in enumerate(months):
-                if month not in route_monthly_data:
-                    route_monthly_data[month] = 0
-                route_monthly_data[month] += int(monthly_forecasts[i]) if i < len(monthly_forecasts) else 0
-        
-        for month, quantity in route_monthly_data.items():
-            summary_data.append({
+        band = route_bands[route]
+        for i, (month, quantity) in enumerate(zip(months, route_forecasts[route])):
+            row = {
                 '경로': route,
                 '월': month,
                 '예측 수량': f"{int(quantity):,}개"
-            })
+            }
+            if band is not None:
+                for label, values in zip(INTERVAL_LABELS, band):
+                    row[label] = f"{values[i]:,.0f}개"
+            summary_data.append(row)
     
     summary_df = pd.DataFrame(summary_data)
     st.dataframe(summary_df, use_container_width=True)
 
-def display_individual_product_chart(filtered_summary, filtered_sales, past_months, selected_route, selected_product):
-    """개별 제품 차트 표시"""
-    months = ['2025년 8월', '2025년 9월', '2025년 10월', '2025년 11월', '2025년 12월', '2026년 1월']
+def display_individual_product_chart(filtered_summary, filtered_sales, past_months, selected_route, selected_product, data_version=None,
+                                     intervals=None):
+    """개별 제품 차트 표시 (intervals가 있으면 P10~P90 구간 표시)"""
+    months = get_following_months(past_months[-1], SALES_FORECAST_MONTHS)
     
     if selected_route not in filtered_summary or selected_product not in filtered_summary[selected_route]:
         st.warning("선택된 제품에 대한 데이터가 없습니다.")
@@ -566,25 +807,22 @@ def display_individual_product_chart(filtered_summary, filtered_sales, past_mont
     info = filtered_summary[selected_route][selected_product]
     monthly_forecasts = info['monthly_forecasts']
     
-    # 과거 판매 데이터 수집
+    # 과거 판매 데이터 수집 (SKU 기준 - 제품명이 바뀐 이력 포함)
     product_sales = filtered_sales[
         (filtered_sales['경로'] == selected_route) & 
-        (filtered_sales['제품명'] == selected_product)
+        (filtered_sales['SKU_ID'] == info['sku_id'])
     ]
-    past_monthly_data = {}
     
-    # 과거 6개월 판매 데이터
-    for month in past_months:
-        month_sales = product_sales[product_sales['월'] == month]['판매수량'].sum()
-        past_monthly_data[month] = month_sales
+    # 과거 6개월 판매 데이터 (월별 합계를 한 번에 집계)
+    product_monthly_sales = product_sales.groupby('월')['판매수량'].sum()
+    past_monthly_data = {month: product_monthly_sales.get(month, 0) for month in past_months}
     
     # 예측 데이터
     forecast_monthly_data = {}
     for i, month in enumerate(months):
         forecast_monthly_data[month] = int(monthly_forecasts[i]) if i < len(monthly_forecasts) else 0
     
-    # 그래프 생성
-    fig = go.Figure()
+    band = intervals.quantiles([(selected_route, selected_product)]) if intervals else None
     
     # 추세에 따른 색상 설정
     trend = info.get('trend', '안정')
@@ -595,33 +833,36 @@ def display_individual_product_chart(filtered_summary, filtered_sales, past_mont
     else:
         line_color = '#1f77b4'  # 파란색
     
-    # 과거 데이터 (실선)
-    fig.add_trace(go.Scatter(
-        x=list(past_monthly_data.keys()),
-        y=list(past_monthly_data.values()),
-        mode='lines+markers',
-        name=f'{selected_product} (과거)',
-        line=dict(color=line_color, width=3),
-        marker=dict(size=8)
-    ))
-    
-    # 예측 데이터 (점선)
-    fig.add_trace(go.Scatter(
-        x=list(forecast_monthly_data.keys()),
-        y=list(forecast_monthly_data.values()),
-        mode='lines+markers',
-        name=f'{selected_product} (예측)',
-        line=dict(color=line_color, width=3, dash='dash'),
-        marker=dict(size=8, symbol='diamond')
-    ))
-    
-    fig.update_layout(
-        title=f'제품별 판매 추이 및 향후 6개월 예측 ({selected_route} - {selected_product})',
-        xaxis_title='월',
-        yaxis_title='판매/예측 수량 (개)',
-        hovermode='x unified',
-        showlegend=True
+    def build_figure():
+        fig = go.Figure()
+        add_history_forecast_traces(
+            fig, 2, past_months, list(past_monthly_data.values()),
+            months, list(forecast_monthly_data.values()),
+            f'{selected_product} (과거)', f'{selected_product} (예측)',
+            line=dict(color=line_color)
+        )
+        if band is not None:
+            add_interval_band_traces(fig, months, band, selected_product)
+        fig.update_layout(
+            title=f'제품별 판매 추이 및 향후 6개월 예측 ({selected_route} - {selected_product})',
+            xaxis_title='월',
+            yaxis_title='판매/예측 수량 (개)',
+            hovermode='x unified',
+            showlegend=True
+        )
+        return fig
+    
+    if data_version is None:
+        data_version = get_data_version(filtered_sales)
+    selection = (
+        selected_route,
+        selected_product,
+        tuple(past_months),
+        tuple(forecast_monthly_data.values()),
+        trend,
+        interval_band_key(band)
     )
+    fig = get_cached_figure('individual_product', data_version, selection, build_figure)
     
     st.plotly_chart(fig, use_container_width=True)
     
@@ -650,12 +891,16 @@ def display_individual_product_chart(filtered_summary, filtered_sales, past_mont
         {'월': month, '예측 수량': f"{int(quantity):,}개"}
         for month, quantity in forecast_monthly_data.items()
     ])
+    if band is not None:
+        for label, values in zip(INTERVAL_LABELS, band):
+            forecast_summary_df[label] = [f"{value:,.0f}개" for value in values[:len(forecast_summary_df)]]
     st.markdown("**향후 예측 수량:**")
     st.dataframe(forecast_summary_df, use_container_width=True)
 
-def display_product_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_product):
-    """제품별 모든 경로 합계 차트 표시"""
-    months = ['2025년 8월', '2025년 9월', '2025년 10월', '2025년 11월', '2025년 12월', '2026년 1월']
+def display_product_route_summary_chart(filtered_summary, filtered_sales, past_months, selected_product, data_version=None,
+                                        intervals=None):
+    """제품별 모든 경로 합계 차트 표시 (intervals가 있으면 모든 경로 합계 P10~P90 구간 표시)"""
+    months = get_following_months(past_months[-1], SALES_FORECAST_MONTHS)
     
     # 선택된 제품이 있는 모든 경로 찾기
     product_routes = []
@@ -667,58 +912,51 @@ def display_product_route_summary_chart(filtered_summary, filtered_sales, past_m
         st.warning(f"'{selected_product}' 제품에 대한 데이터가 없습니다.")
         return
     
-    # 과거 판매 데이터 수집 (모든 경로 합계)
-    past_monthly_data = {}
-    for month in past_months:
-        month_sales = 0
-        for route in product_routes:
-            route_sales = filtered_sales[
-                (filtered_sales['경로'] == route) & 
-                (filtered_sales['제품명'] == selected_product)
-            ]
-            month_sales += route_sales[route_sales['월'] == month]['판매수량'].sum()
-        past_monthly_data[month] = month_sales
+    # 과거 판매 데이터 수집 (모든 경로 합계를 한 번에 집계, 경로별 SKU 기준)
+    product_sku_ids = [filtered_summary[route][selected_product]['sku_id'] for route in product_routes]
+    product_sales = filtered_sales[
+        filtered_sales['경로'].isin(product_routes) & 
+        filtered_sales['SKU_ID'].isin(product_sku_ids)
+    ]
+    product_monthly_sales = product_sales.groupby('월')['판매수량'].sum()
+    past_monthly_data = {month: product_monthly_sales.get(month, 0) for month in past_months}
     
     # 예측 데이터 수집 (모든 경로 합계)
-    forecast_monthly_data = {}
-    for i, month in enumerate(months):
-        month_forecast = 0
-        for route in product_routes:
-            if route in filtered_summary and selected_product in filtered_summary[route]:
-                monthly_forecasts = filtered_summary[route][selected_product]['monthly_forecasts']
-                month_forecast += int(monthly_forecasts[i]) if i < len(monthly_forecasts) else 0
-        forecast_monthly_data[month] = month_forecast
-    
-    # 그래프 생성
-    fig = go.Figure()
-    
-    # 과거 데이터 (실선)
-    fig.add_trace(go.Scatter(
-        x=list(past_monthly_data.keys()),
-        y=list(past_monthly_data.values()),
-        mode='lines+markers',
-        name=f'{selected_product} (과거 - 모든 경로 합계)',
-        line=dict(color='#1f77b4', width=3),
-        marker=dict(size=8)
-    ))
-    
-    # 예측 데이터 (점선)
-    fig.add_trace(go.Scatter(
-        x=list(forecast_monthly_data.keys()),
-        y=list(forecast_monthly_data.values()),
-        mode='lines+markers',
-        name=f'{selected_product} (예측 - 모든 경로 합계)',
-        line=dict(color='#1f77b4', width=3, dash='dash'),
-        marker=dict(size=8, symbol='diamond')
-    ))
-    
-    fig.update_layout(
-        title=f'제품별 모든 경로 합계 판매 추이 및 향후 6개월 예측 ({selected_product})',
-        xaxis_title='월',
-        yaxis_title='판매/예측 수량 (개)',
-        hovermode='x unified',
-        showlegend=True
+    route_totals = sum_monthly_forecasts(
+        [filtered_summary[route][selected_product]['monthly_forecasts'] for route in product_routes], len(months)
+    )
+    forecast_monthly_data = dict(zip(months, route_totals))
+    band = intervals.quantiles([(route, selected_product) for route in product_routes]) if intervals else None
+    
+    def build_figure():
+        fig = go.Figure()
+        add_history_forecast_traces(
+            fig, 2, past_months, list(past_monthly_data.values()),
+            months, list(forecast_monthly_data.values()),
+            f'{selected_product} (과거 - 모든 경로 합계)', f'{selected_product} (예측 - 모든 경로 합계)',
+            line=dict(color='#1f77b4')
+        )
+        if band is not None:
+            add_interval_band_traces(fig, months, band, selected_product)
+        fig.update_layout(
+            title=f'제품별 모든 경로 합계 판매 추이 및 향후 6개월 예측 ({selected_product})',
+            xaxis_title='월',
+            yaxis_title='판매/예측 수량 (개)',
+            hovermode='x unified',
+            showlegend=True
+        )
+        return fig
+    
+    if data_version is None:
+        data_version = get_data_version(filtered_sales)
+    selection = (
+        selected_product,
+        tuple(product_routes),
+        tuple(past_months),
+        tuple(forecast_monthly_data.values()),
+        interval_band_key(band)
     )
+    fig = get_cached_figure('product_route_summary', data_version, selection, build_figure)
     
     st.plotly_chart(fig, use_container_width=True)
     
@@ -755,6 +993,9 @@ def display_product_route_summary_chart(filtered_summary, filtered_sales, past_m
         {'월': month, '예측 수량': f"{int(quantity):,}개"}
         for month, quantity in forecast_monthly_data.items()
     ])
+    if band is not None:
+        for label, values in zip(INTERVAL_LABELS, band):
+            forecast_summary_df[label] = [f"{value:,.0f}개" for value in values[:len(forecast_summary_df)]]
     st.markdown("**향후 예측 수량:**")
     st.dataframe(forecast_summary_df, use_container_width=True)
     
@@ -774,10 +1015,10 @@ def display_product_route_summary_chart(filtered_summary, filtered_sales, past_m
     detailed_df = pd.DataFrame(detailed_data)
     st.dataframe(detailed_df, use_container_width=True)
 
-def create_filtered_forecast_dataframe(filtered_summary):
-    """필터링된 예측 결과를 데이터프레임으로 변환"""
+def create_filtered_forecast_dataframe(filtered_summary, past_months):
+    """필터링된 예측 결과를 데이터프레임으로 변환 (예측 월 컬럼은 분석 대상 마지막 월 다음 월부터)"""
     data = []
-    months = ['2025년 8월', '2025년 9월', '2025년 10월', '2025년 11월', '2025년 12월', '2026년 1월']
+    months = get_following_months(past_months[-1], SALES_FORECAST_MONTHS)
     
     for route, products in filtered_summary.items():
         for product, info in products.items():
@@ -787,25 +1028,69 @@ def create_filtered_forecast_dataframe(filtered_summary):
             original_change_rate = info.get('original_change_rate', info['change_rate'])
             corrected_change_rate = info['change_rate']
             
-            data.append({
+            row = {
                 '경로': route,
                 '제품명': product,
                 '월평균_판매량': int(info['current_sales']),
                 '예측_월평균_판매량': int(info['total_forecast']),
                 '추세': info['trend'],
                 '원본_변화율': round(original_change_rate, 1),
-                '보정_변화율': round(corrected_change_rate, 1),
-                '8월_예측': int(monthly_forecasts[0]) if len(monthly_forecasts) > 0 else 0,
-                '9월_예측': int(monthly_forecasts[1]) if len(monthly_forecasts) > 1 else 0,
-                '10월_예측': int(monthly_forecasts[2]) if len(monthly_forecasts) > 2 else 0,
-                '11월_예측': int(monthly_forecasts[3]) if len(monthly_forecasts) > 3 else 0,
-                '12월_예측': int(monthly_forecasts[4]) if len(monthly_forecasts) > 4 else 0,
-                '1월_예측': int(monthly_forecasts[5]) if len(monthly_forecasts) > 5 else 0
-            })
+                '보정_변화율': round(corrected_change_rate, 1)
+            }
+            for i, month in enumerate(months):
+                row[f"{month.split()[-1]}_예측"] = int(monthly_forecasts[i]) if len(monthly_forecasts) > i else 0
+            data.append(row)
     
     return pd.DataFrame(data)
 
-def show_sales_based_prediction(product_info, sales_history, kpi_history, selected_month, selected_routes):
+@st.fragment
+def display_analysis_month_details(diagnostics, analysis_month, analysis_period, past_months, weighting_method, correction_strength):
+    """
+    분석 기준 월 상세 정보 (fragment - 전체 예측을 다시 실행하지 않고 독립적으로 갱신)
+    데이터 가용성 확인과 단계별 중간 결과는 '상세 진단 데이터 표시'를 켠 경우에만 계산
+    """
+    with st.expander("🔍 분석 기준 월 상세 정보"):
+        st.write(f"**선택된 기준 월**: {analysis_month}")
+        st.write(f"**분석 기간**: {analysis_period}")
+        st.write(f"**분석 대상 월 수**: {len(past_months)}개월")
+        st.write(f"**가중치 방식**: {weighting_method}")
+        st.write(f"**보정 강도**: {correction_strength}")
+        
+        if not st.toggle("상세 진단 데이터 표시", key="sales_debug_details"):
+            st.caption("상세 진단 데이터는 요청 시에만 계산됩니다.")
+            return
+        
+        # 월별 데이터 가용성 확인
+        available_data = diagnostics.get('사용 가능한 데이터 월', [])
+        st.write(f"**사용 가능한 데이터 월**: {', '.join(available_data)}")
+        
+        # 분석 대상 월과 사용 가능한 데이터 비교
+        missing_months = [month for month in past_months if month not in available_data]
+        if missing_months:
+            st.warning(f"⚠️ **데이터 부족 월**: {', '.join(missing_months)}")
+        else:
+            st.success("✅ **모든 분석 대상 월에 데이터 존재**")
+        
+        # 경로별 중간 결과 (월별 판매량 피벗, 추세 분석)
+        stage_names = [name for name in diagnostics.names() if name != '사용 가능한 데이터 월']
+        if stage_names:
+            selected_stage = st.selectbox("중간 결과 선택", stage_names, key="sales_debug_stage")
+            st.dataframe(diagnostics.get(selected_stage), use_container_width=True)
+
+def warm_sales_based_prediction(sales_history, selected_month, selected_routes):
+    """
+    판매데이터 기반 모드 예열 - 기본 모델(가중 변화율)의 전체 설정 조합 텐서와 기본 설정 예측 구간을 캐시에 적재
+    """
+    filtered_sales = sales_history[sales_history['경로'].isin(selected_routes)]
+    parameter_tensor = get_sales_parameter_tensor(
+        get_data_version(sales_history), tuple(selected_routes), selected_month, filtered_sales
+    )
+    get_sales_forecast_intervals(
+        get_data_version(sales_history), tuple(selected_routes), selected_month,
+        ANALYSIS_PERIODS[0], WEIGHTING_METHODS[0], CORRECTION_STRENGTHS[0], parameter_tensor, sales_history
+    )
+
+def show_sales_based_prediction(product_info, sales_history, kpi_store, selected_month, selected_routes):
     """
     과거 판매 데이터 기반 추세 분석 및 향후 6개월 예측
     """
@@ -815,13 +1100,13 @@ def show_sales_based_prediction(product_info, sales_history, kpi_history, select
     # 동적 분석 기준 월 설정
     st.subheader("⚙️ 분석 기준 설정")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         # 분석 기간 선택 (3개월, 6개월, 12개월)
         analysis_period = st.selectbox(
             "분석 기간",
-            ["6개월", "3개월", "12개월"],
+            ANALYSIS_PERIODS,
             index=0,
             help="과거 데이터 분석 기간을 선택하세요"
         )
@@ -830,7 +1115,7 @@ def show_sales_based_prediction(product_info, sales_history, kpi_history, select
         # 가중치 적용 방식 선택
         weighting_method = st.selectbox(
             "가중치 적용 방식",
-            ["최근 가중", "균등 가중", "계절성 가중"],
+            WEIGHTING_METHODS,
             index=0,
             help="과거 데이터에 적용할 가중치 방식을 선택하세요"
         )
@@ -839,11 +1124,22 @@ def show_sales_based_prediction(product_info, sales_history, kpi_history, select
         # 보정 강도 선택
         correction_strength = st.selectbox(
             "보정 강도",
-            ["보통", "강함", "약함"],
+            CORRECTION_STRENGTHS,
             index=0,
             help="변화율 보정의 강도를 선택하세요"
         )
     
+    with col4:
+        # 예측 모델 선택
+        forecast_model = st.selectbox(
+            "예측 모델",
+            FORECAST_MODELS,
+            index=0,
+            help="가중 변화율: 최근/이전 구간 변화율 외삽, 지수평활(ETS): 경로-제품별 Holt/Holt-Winters 모델 적합, "
+                 "지수평활(NumPy 벡터화): 전체 시계열 동시 계산 + 평활 상수 그리드 탐색, "
+                 "간헐 수요: 판매 간격/변동성으로 수요 패턴 분류 후 Croston/SBA/TSB 적용"
+        )
+    
     # 변화율 보정 설명 추가
     with st.expander("ℹ️ 동적 분석 로직 설명"):
         st.markdown(f"""
@@ -872,6 +1168,18 @@ def show_sales_based_prediction(product_info, sales_history, kpi_history, select
          - **성장 추세**: 시간이 지날수록 더 성장 (매월 10%씩 가속화)
          - **하향 추세**: 시간이 지날수록 더 하향 (매월 10%씩 가속화)
          - **안정 추세**: 일정한 변화율 유지
+         
+         **지수평활(ETS) 모델**:
+         - 경로-제품별 전체 판매 이력(분석 기간 마지막 월까지)에 감쇠 추세 Holt 모델 적합 (24개월 이상이면 계절성 포함)
+         - 판매 월이 4개월 미만인 제품은 평균 판매량으로 예측
+         - 변화율은 월 평균 판매량 대비 6개월 예측 월평균의 변화율 (보정 강도 미적용)
+         - **NumPy 벡터화**: 같은 모델을 전체 시계열에 한 번에 계산하며, 평활 상수는 고정 그리드에서 1단계 예측 오차가 가장 작은 조합 선택
+         
+         **간헐 수요(Croston/SBA/TSB) 모델**:
+         - 첫 판매 이후 평균 판매 간격(ADI)과 판매량 변동계수 제곱(CV²)으로 수요 패턴 분류 (기준: ADI 1.32, CV² 0.49)
+         - 안정(Smooth): Croston, 변동(Erratic)/간헐(Intermittent): SBA, 불규칙 간헐(Lumpy): TSB
+         - 마지막 판매 이후 무판매 기간이 평균 판매 간격의 2배를 넘으면 단종 의심으로 TSB 적용 (판매 확률이 줄어드는 만큼 예측 감소)
+         - 판매량이 작거나 무판매 월이 있는 제품에서도 월별 변동에 크게 흔들리지 않는 평탄한 예측 (보정 강도 미적용)
         """)
     
     # 선택된 경로만 필터링
@@ -883,46 +1191,88 @@ def show_sales_based_prediction(product_info, sales_history, kpi_history, select
     # 전체 판매 데이터에서 선택된 경로만 필터링
     filtered_sales = sales_history[sales_history['경로'].isin(selected_routes)]
     
+    # 전체 설정 조합(분석 기간 × 가중치 방식 × 보정 강도) 예측 텐서 - 데이터/경로/기준 월이 바뀔 때만 계산
+    parameter_tensor = get_sales_parameter_tensor(
+        get_data_version(sales_history), tuple(selected_routes), analysis_month, filtered_sales
+    )
+    
     # 동적 과거 월 설정
-    past_months = get_dynamic_past_months(analysis_period, analysis_month)
+    past_months = parameter_tensor.past_months(analysis_period)
     
     # 디버깅: 선택된 월과 분석 기간 정보 표시
     st.info(f"🔍 **분석 기준**: {analysis_month} (기준월) | {analysis_period} (분석기간) | {weighting_method} (가중치) | {correction_strength} (보정강도)")
     st.info(f"📅 **분석 대상 월**: {', '.join(past_months)}")
     
-    # 선택된 월에 따른 분석 결과 미리보기
-    with st.expander("🔍 분석 기준 월 상세 정보"):
-        st.write(f"**선택된 기준 월**: {analysis_month}")
-        st.write(f"**분석 기간**: {analysis_period}")
-        st.write(f"**분석 대상 월 수**: {len(past_months)}개월")
-        st.write(f"**가중치 방식**: {weighting_method}")
-        st.write(f"**보정 강도**: {correction_strength}")
-        
-        # 월별 데이터 가용성 확인
-        available_data = filtered_sales['월'].unique()
-        st.write(f"**사용 가능한 데이터 월**: {', '.join(sorted(available_data))}")
-        
-        # 분석 대상 월과 사용 가능한 데이터 비교
-        missing_months = [month for month in past_months if month not in available_data]
-        if missing_months:
-            st.warning(f"⚠️ **데이터 부족 월**: {', '.join(missing_months)}")
-        else:
-            st.success("✅ **모든 분석 대상 월에 데이터 존재**")
+    # 분석 기준 월 상세 정보 자리 (예측 계산 후 진단 항목과 함께 채움)
+    details_container = st.container()
     
-    # 동적 가중치 계산
-    monthly_weights = calculate_monthly_weights(past_months, weighting_method)
+    # 동적 가중치 (텐서 계산 시 함께 계산된 값 조회)
+    monthly_weights = parameter_tensor.monthly_weights(analysis_period, weighting_method)
     
     # 가중치 정보 표시
     weight_info = ", ".join([f"{month}: {weight:.2f}" for month, weight in monthly_weights.items()])
     st.info(f"⚖️ **월별 가중치**: {weight_info}")
     
-    # 전체 예측 결과 요약 계산 (동적 파라미터 적용)
-    total_forecast_summary = calculate_total_forecast_summary_dynamic(
-        filtered_sales, selected_routes, past_months, monthly_weights, correction_strength
-    )
+    # 진단 항목은 등록만 하고, 상세 정보 화면에서 요청할 때만 계산
+    diagnostics = LazyDiagnostics()
+    diagnostics.register('사용 가능한 데이터 월', lambda: sorted(filtered_sales['월'].unique()))
+    
+    parameter_tensor.register_diagnostics(diagnostics, analysis_period, weighting_method, correction_strength)
+    
+    # 선택된 월에 따른 분석 결과 미리보기
+    with details_container:
+        display_analysis_month_details(diagnostics, analysis_month, analysis_period, past_months, weighting_method, correction_strength)
     
-    # 0개 판매/예측 제품 제외 및 추세별 정렬
-    filtered_summary = filter_and_sort_forecast_results(total_forecast_summary)
+    # 전체 예측 결과 요약 조회 후 0개 판매/예측 제품 제외 및 추세별 정렬 (재계산 없이 텐서에서 조회)
+    if forecast_model == FORECAST_MODEL_ETS:
+        ets_forecast = get_ets_forecast(
+            get_data_version(sales_history), tuple(selected_routes), past_months[-1], parameter_tensor
+        )
+        filtered_summary = parameter_tensor.model_summary(
+            forecast_model, ets_forecast.monthly_forecasts, analysis_period, weighting_method
+        )
+        fit_counts = ets_forecast.fit_counts
+        st.caption(
+            f"🧮 ETS 적합 ({ets_forecast.months[0]} ~ {ets_forecast.months[-1]}): "
+            f"신규 {fit_counts['신규 적합']}개, 웜스타트 {fit_counts['웜스타트']}개, 재사용 {fit_counts['재사용']}개"
+            if ets_forecast.months else "🧮 ETS 적합: 학습할 판매 데이터가 없습니다."
+        )
+    elif forecast_model == FORECAST_MODEL_VECTORIZED_ETS:
+        vectorized_forecast = get_vectorized_ets_forecast(
+            get_data_version(sales_history), tuple(selected_routes), past_months[-1], parameter_tensor
+        )
+        filtered_summary = parameter_tensor.model_summary(
+            forecast_model, vectorized_forecast.monthly_forecasts, analysis_period, weighting_method
+        )
+        st.caption(
+            f"🧮 벡터화 지수평활: 시계열 {len(vectorized_forecast.methods)}개 × 평활 상수 {vectorized_forecast.n_grid}개 조합 "
+            f"({vectorized_forecast.elapsed:.3f}초)"
+        )
+    elif forecast_model == FORECAST_MODEL_INTERMITTENT:
+        intermittent_forecast = get_intermittent_forecast(
+            get_data_version(sales_history), tuple(selected_routes), past_months[-1], parameter_tensor
+        )
+        filtered_summary = parameter_tensor.model_summary(
+            forecast_model, intermittent_forecast.monthly_forecasts, analysis_period, weighting_method,
+            intermittent_forecast.patterns
+        )
+        pattern_counts = ", ".join(
+            f"{pattern} {count}개" for pattern, count in intermittent_forecast.pattern_counts().items() if count > 0
+        )
+        st.caption(
+            f"🧮 간헐 수요 예측: 시계열 {len(intermittent_forecast.methods)}개 ({pattern_counts}) "
+            f"({intermittent_forecast.elapsed:.3f}초)"
+        )
+    else:
+        filtered_summary = parameter_tensor.lookup_filtered(analysis_period, weighting_method, correction_strength)
+    
+    # 예측 구간 (가중 변화율 예측만 - 같은 설정의 과거 예측 오차 부트스트랩)
+    intervals = None
+    if forecast_model == FORECAST_MODEL_CHANGE_RATE:
+        intervals = get_sales_forecast_intervals(
+            get_data_version(sales_history), tuple(selected_routes), analysis_month,
+            analysis_period, weighting_method, correction_strength, parameter_tensor, sales_history
+        )
     
     # 동적 분석 결과 요약
     st.subheader("📊 동적 분석 결과 요약")
@@ -968,12 +1318,16 @@ def show_sales_based_prediction(product_info, sales_history, kpi_history, select
     
     # 월별 예측 수량 추이 그래프
     st.subheader("📈 판매 추이 및 향후 6개월 예측")
-    display_monthly_forecast_chart(filtered_summary, filtered_sales, past_months)
+    display_monthly_forecast_chart(filtered_summary, filtered_sales, past_months, intervals=intervals)
+    if intervals is not None:
+        st.caption(f"음영: {INTERVAL_LABELS[0]}~{INTERVAL_LABELS[-1]} 예측 구간 (같은 설정으로 최근 {BACKTEST_ORIGINS}개 기준 월에서 다시 계산한 예측의 오차 부트스트랩)")
+    else:
+        st.caption("예측 구간은 가중 변화율 모델에서만 표시됩니다.")
     
     # 예측 데이터 다운로드
     st.subheader("💾 예측 데이터 다운로드")
     
-    forecast_df = create_filtered_forecast_dataframe(filtered_summary)
+    forecast_df = create_filtered_forecast_dataframe(filtered_summary, past_months)
     
     csv = forecast_df.to_csv(index=False, encoding='utf-8-sig')
     st.download_button(
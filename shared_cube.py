@@ -0,0 +1,201 @@
+"""
+shared_cube.py
+공유 판매 큐브 / KPI 행렬 (선택 기능) - 데이터 버전별로 한 번만 .npy 파일로 발행하고 모든 프로세스가 읽기 전용 메모리 맵으로 사용
+- 환경 변수 DEMAND_SHARED_DIR=<디렉토리>일 때만 사용 (미설정 시 프로세스마다 메모리에서 생성)
+- 발행: 임시 디렉토리에 기록 → 버전 디렉토리로 rename → CURRENT 포인터 파일을 os.replace로 교체 (원자적 전환)
+  읽는 쪽은 CURRENT가 가리키는 완성된 버전만 열기 때문에 기록 중인 파일을 보지 않음
+- 같은 디렉토리를 쓰는 Streamlit 프로세스 / 배치 작업 / 레플리카는 OS 페이지 캐시를 공유 (프로세스별 사본 없음)
+- 판매 누적 합계도 함께 발행하여 특성 저장소가 메모리 맵을 그대로 감싸 사용 (프로세스별 판매량/누적 합계 사본 없음)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from diagnostics import debug_print
+from feature_store import SalesCube, build_sales_cube
+
+# 공유 디렉토리 환경 변수 (미설정 시 공유 큐브 미사용)
+SHARED_DIR_ENV = 'DEMAND_SHARED_DIR'
+
+# 판매 이력 DataFrame attrs에 기록하는 공유 큐브 정보 키
+SHARED_CUBE_ATTR = 'shared_cube'
+
+# 현재 버전 포인터 파일
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+# 이 기능 이전에 발행된 버전에는 없을 수 있는 배열 (없으면 None - 특성 저장소가 프로세스 메모리에서 계산)
+OPTIONAL_ARRAYS = ('sales_cumsum',)
+
+# 정리 시 남겨 둘 이전 버전 수 (이전 버전을 열어 둔 프로세스가 있어도 POSIX에서는 삭제 후에도 매핑 유지)
+KEEP_VERSIONS = 2
+
+ARRAY_FILES = {
+    'sku_ids': 'sku_ids.npy',
+    'prices': 'prices.npy',
+    'month_ordinals': 'month_ordinals.npy',
+    'sales_values': 'sales_values.npy',
+    'sales_cumsum': 'sales_cumsum.npy',
+    'kpi_month_ordinals': 'kpi_month_ordinals.npy',
+    'kpi_values': 'kpi_values.npy',
+}
+
+def shared_directory():
+    """공유 디렉토리 경로 (환경 변수 미설정 시 None)"""
+    return os.environ.get(SHARED_DIR_ENV) or None
+
+class SharedData:
+    """
+    공유 디렉토리의 한 데이터 버전 - 배열은 읽기 전용 메모리 맵
+    cube: SalesCube (values / cumsum은 메모리 맵), kpi_routes / kpi_month_ordinals / kpi_values: KPI 저장소 초기 행렬
+    """
+
+    def __init__(self, version, arrays, manifest):
+        self.version = version
+        self.cube = SalesCube(
+            arrays['sku_ids'], np.array(manifest['routes'], dtype=object), arrays['prices'],
+            arrays['month_ordinals'], arrays['sales_values'], arrays['sales_cumsum']
+        )
+        self.kpi_routes = manifest['kpi_routes']
+        self.kpi_month_ordinals = arrays['kpi_month_ordinals']
+        self.kpi_values = arrays['kpi_values']
+
+def current_version(directory):
+    """CURRENT 포인터가 가리키는 데이터 버전 (발행된 버전이 없으면 None)"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def open_shared_data(directory, data_version=None):
+    """
+    발행된 데이터 버전을 읽기 전용 메모리 맵으로 열기
+    data_version: 열 버전 (기본값: CURRENT) - 해당 버전이 없으면 None
+    """
+    version = data_version or current_version(directory)
+    if version is None:
+        return None
+    version_dir = os.path.join(directory, version)
+    try:
+        with open(os.path.join(version_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+        arrays = {}
+        for name, file_name in ARRAY_FILES.items():
+            path = os.path.join(version_dir, file_name)
+            if name in OPTIONAL_ARRAYS and not os.path.exists(path):
+                arrays[name] = None
+                continue
+            arrays[name] = np.load(path, mmap_mode='r', allow_pickle=False)
+    except FileNotFoundError:
+        return None
+    return SharedData(version, arrays, manifest)
+
+def _write_atomic_text(path, text):
+    """같은 디렉토리의 임시 파일에 기록 후 os.replace로 교체"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _cleanup_versions(directory, keep_version):
+    """CURRENT 버전을 포함해 최근 KEEP_VERSIONS개 버전만 남기고 삭제"""
+    versions = [
+        entry for entry in os.scandir(directory)
+        if entry.is_dir() and not entry.name.startswith('.') and os.path.exists(os.path.join(entry.path, MANIFEST_FILE))
+    ]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    kept = {keep_version}
+    for entry in versions:
+        if entry.name in kept:
+            continue
+        if len(kept) < KEEP_VERSIONS:
+            kept.add(entry.name)
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+def publish_shared_data(directory, data_version, cube, kpi_store):
+    """
+    판매 큐브와 KPI 초기 행렬을 data_version 디렉토리로 발행하고 CURRENT를 원자적으로 교체
+    같은 버전이 이미 있으면(다른 프로세스가 먼저 발행) 기록 없이 CURRENT만 맞춤
+    """
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    version_dir = os.path.join(directory, data_version)
+
+    if not os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+        temp_dir = tempfile.mkdtemp(dir=directory, prefix=f'.{data_version}-')
+        try:
+            sales_values = np.nan_to_num(np.asarray(cube.values, dtype=float))
+            sales_cumsum = np.zeros((sales_values.shape[0], sales_values.shape[1] + 1))
+            sales_cumsum[:, 1:] = np.cumsum(sales_values, axis=1)
+            arrays = {
+                'sku_ids': np.asarray(cube.sku_ids),
+                'prices': np.asarray(cube.prices, dtype=float),
+                'month_ordinals': np.asarray(cube.month_ordinals, dtype=np.int64),
+                'sales_values': sales_values,
+                'sales_cumsum': sales_cumsum,
+                'kpi_month_ordinals': np.asarray(kpi_store.month_ordinals, dtype=np.int64),
+                'kpi_values': np.asarray(kpi_store.matrix(revision=0), dtype=float),
+            }
+            for name, file_name in ARRAY_FILES.items():
+                np.save(os.path.join(temp_dir, file_name), arrays[name], allow_pickle=False)
+            manifest = {
+                'data_version': data_version,
+                'routes': [str(route) for route in cube.routes],
+                'kpi_routes': list(kpi_store.routes),
+                'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            # manifest는 마지막에 기록 - manifest가 있는 디렉토리만 완성된 버전
+            with open(os.path.join(temp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.rename(temp_dir, version_dir)
+        except OSError:
+            # 다른 프로세스가 같은 버전을 먼저 발행한 경우
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if not os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+                raise
+
+    if current_version(directory) != data_version:
+        _write_atomic_text(os.path.join(directory, CURRENT_FILE), data_version)
+        _cleanup_versions(directory, data_version)
+
+    debug_print(f"공유 큐브 발행: {data_version} ({directory}, {time.perf_counter() - started:.3f}초)")
+    return open_shared_data(directory, data_version)
+
+def shared_sales_cube(sales_history, product_info):
+    """
+    판매 이력에 연결된 공유 판매 큐브 (load_data가 발행한 버전이 그대로 있으면 메모리 맵, 아니면 새로 생성)
+    필터링된 판매 이력은 attrs가 남아 있어도 행 수가 달라 새로 생성
+    """
+    info = sales_history.attrs.get(SHARED_CUBE_ATTR)
+    if info and info.get('rows') == len(sales_history) and info.get('data_version') == sales_history.attrs.get('data_version'):
+        shared = open_shared_data(info['directory'], info['data_version'])
+        if shared is not None:
+            return shared.cube
+    return build_sales_cube(sales_history, product_info)
+
+def ensure_shared_data(directory, sales_history, product_info, kpi_store, data_version):
+    """
+    data_version의 공유 데이터 열기 - 발행된 버전이 없으면 판매 큐브를 만들어 발행
+    sales_history.attrs에 공유 큐브 정보를 기록하여 특성 저장소가 메모리 맵 큐브를 사용하도록 함
+    """
+    shared = open_shared_data(directory, data_version)
+    if shared is None:
+        shared = publish_shared_data(directory, data_version, build_sales_cube(sales_history, product_info), kpi_store)
+    elif current_version(directory) != data_version:
+        _write_atomic_text(os.path.join(directory, CURRENT_FILE), data_version)
+    sales_history.attrs[SHARED_CUBE_ATTR] = {'directory': directory, 'data_version': data_version, 'rows': len(sales_history)}
+    return shared
@@ -0,0 +1,116 @@
+"""
+sku_index.py
+SKU 카탈로그 인덱스 - (경로, 제품코드) 및 제품명 별칭을 정수 SKU ID(int32)로 매핑
+데이터 로드 시 한 번 생성하여 product_info/sales_history에 SKU_ID 컬럼으로 부여하고,
+이후 모든 병합/groupby/딕셔너리 조회는 긴 문자열 대신 SKU_ID로 수행
+"""
+
+import numpy as np
+import pandas as pd
+
+SKU_ID_COLUMN = 'SKU_ID'
+
+# 카탈로그/판매 이력 어디에도 없는 제품
+UNKNOWN_SKU_ID = -1
+
+def is_valid_code(code):
+    """제품코드가 비어 있지 않은지 여부"""
+    return pd.notna(code) and code != ''
+
+class SkuIndex:
+    """
+    (경로, 제품코드) → SKU ID, (경로, 제품명) → SKU ID 매핑
+    - 같은 경로에서 제품코드가 같으면 제품명이 달라도(제품명 변경) 같은 SKU
+    - 제품코드가 없거나 알 수 없는 행은 (경로, 제품명) 별칭으로 매칭
+    """
+
+    def __init__(self, routes, names, code_keys, code_ids, name_keys, name_ids):
+        self.routes = routes        # (N,) SKU별 경로
+        self.names = names          # (N,) SKU별 대표 제품명 (카탈로그 우선, 없으면 최근 판매 이력)
+        self._code_keys = code_keys # (경로, 제품코드) MultiIndex
+        self._code_ids = code_ids
+        self._name_keys = name_keys # (경로, 제품명) MultiIndex
+        self._name_ids = name_ids
+
+    def __len__(self):
+        return len(self.routes)
+
+    @staticmethod
+    def _lookup_keys(keys, ids, routes, values):
+        if len(ids) == 0:
+            return np.full(len(values), UNKNOWN_SKU_ID, dtype=np.int32)
+        positions = keys.get_indexer(pd.MultiIndex.from_arrays([routes, values]))
+        return np.where(positions >= 0, ids[positions], UNKNOWN_SKU_ID).astype(np.int32)
+
+    def lookup(self, df):
+        """DataFrame 행별 SKU ID 배열 (제품코드 우선, 실패 시 제품명 별칭)"""
+        sku_ids = np.full(len(df), UNKNOWN_SKU_ID, dtype=np.int32)
+
+        if '제품코드' in df.columns:
+            sku_ids = self._lookup_keys(self._code_keys, self._code_ids, df['경로'], df['제품코드'])
+
+        missing = sku_ids == UNKNOWN_SKU_ID
+        if missing.any() and '제품명' in df.columns:
+            sku_ids[missing] = self._lookup_keys(
+                self._name_keys, self._name_ids,
+                df['경로'].to_numpy()[missing], df['제품명'].to_numpy()[missing]
+            )
+
+        return sku_ids
+
+    def attach(self, df):
+        """DataFrame에 SKU_ID 컬럼 부여 (제자리 수정)"""
+        df[SKU_ID_COLUMN] = self.lookup(df)
+        return df
+
+def build_sku_index(product_info, sales_history):
+    """
+    카탈로그와 판매 이력의 (경로, 제품코드, 제품명) 조합으로 SKU 인덱스 생성
+    카탈로그 행을 먼저 등록하고, 판매 이력은 최근 행부터 등록하여 대표 제품명이 최신 이름이 되도록 함
+    """
+    columns = ['경로', '제품코드', '제품명']
+    triples = pd.concat([
+        product_info.reindex(columns=columns),
+        sales_history.reindex(columns=columns).iloc[::-1]
+    ]).drop_duplicates()
+
+    routes = []
+    names = []
+    code_map = {}
+    name_map = {}
+
+    # 고유 조합 수(SKU 수 수준)만큼만 반복
+    for route, code, name in triples.itertuples(index=False):
+        has_code = is_valid_code(code)
+
+        sku_id = code_map.get((route, code)) if has_code else None
+        if sku_id is None:
+            sku_id = name_map.get((route, name))
+        if sku_id is None:
+            sku_id = len(routes)
+            routes.append(route)
+            names.append(name)
+
+        if has_code:
+            code_map.setdefault((route, code), sku_id)
+        name_map.setdefault((route, name), sku_id)
+
+    def to_keys(mapping):
+        keys = list(mapping.keys())
+        key_index = pd.MultiIndex.from_arrays(
+            [[route for route, _ in keys], [value for _, value in keys]], names=['경로', 'key']
+        )
+        return key_index, np.fromiter(mapping.values(), dtype=np.int32, count=len(mapping))
+
+    code_keys, code_ids = to_keys(code_map)
+    name_keys, name_ids = to_keys(name_map)
+
+    return SkuIndex(np.array(routes, dtype=object), np.array(names, dtype=object),
+                    code_keys, code_ids, name_keys, name_ids)
+
+def attach_sku_ids(product_info, sales_history):
+    """카탈로그 인덱스를 생성하여 product_info/sales_history에 SKU_ID 컬럼 부여"""
+    sku_index = build_sku_index(product_info, sales_history)
+    sku_index.attach(product_info)
+    sku_index.attach(sales_history)
+    return sku_index
@@ -0,0 +1,255 @@
+"""
+sqlite_store.py
+SQLite 저장소 (선택 백엔드) - 카탈로그 / 판매 이력 / KPI 테이블을 로컬 SQLite 파일에 인덱스와 함께 보관
+- 환경 변수 DEMAND_SQLITE_DB=<파일 경로>일 때만 사용 (미설정 시 기존 CSV 메모리 조회)
+- CSV 데이터 버전(내용 해시)이 바뀌었을 때만 하나의 트랜잭션에서 executemany로 일괄 적재
+- 판매 이력은 (경로, 제품코드, 월 서수) / (경로, 월 서수) 인덱스로 필요한 경로·월만 조회
+- 예측 엔진의 과거 판매 구간 조회(SalesWindows와 같은 select() 인터페이스)를 SQLite 조회로 대체
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import debug_print
+from month_utils import month_ordinal
+
+# SQLite 파일 경로 환경 변수 (미설정 시 SQLite 백엔드 미사용)
+SQLITE_DB_ENV = 'DEMAND_SQLITE_DB'
+
+# 판매 이력 DataFrame attrs에 기록하는 SQLite 연결 정보 키
+SALES_DATABASE_ATTR = 'sales_database'
+
+SCHEMA = """
+CREATE TABLE products (
+    row_id INTEGER PRIMARY KEY,
+    경로 TEXT NOT NULL,
+    제품코드 TEXT,
+    제품명 TEXT,
+    판매가 REAL,
+    sku_id INTEGER
+);
+CREATE INDEX idx_products_route_code ON products (경로, 제품코드);
+
+CREATE TABLE sales (
+    row_id INTEGER PRIMARY KEY,
+    월 TEXT NOT NULL,
+    월_서수 INTEGER,
+    경로 TEXT NOT NULL,
+    제품코드 TEXT,
+    제품명 TEXT,
+    판매수량 REAL,
+    sku_id INTEGER
+);
+CREATE INDEX idx_sales_route_code_month ON sales (경로, 제품코드, 월_서수);
+CREATE INDEX idx_sales_route_month ON sales (경로, 월_서수);
+
+CREATE TABLE kpi (
+    row_id INTEGER PRIMARY KEY,
+    월 TEXT NOT NULL,
+    월_서수 INTEGER,
+    경로 TEXT NOT NULL,
+    KPI매출 TEXT
+);
+CREATE INDEX idx_kpi_route_month ON kpi (경로, 월_서수);
+
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+TABLES = ('products', 'sales', 'kpi', 'meta')
+
+def sqlite_database_path():
+    """SQLite 파일 경로 (환경 변수 미설정 시 None)"""
+    return os.environ.get(SQLITE_DB_ENV) or None
+
+def _sql_value(value):
+    """pandas 값 → SQLite 값 (NaN → NULL, NumPy 스칼라 → 파이썬 스칼라)"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _rows(df, columns):
+    """executemany용 행 제너레이터 (row_id는 원본 행 위치)"""
+    values = [df[col].astype(object).to_numpy() if col in df.columns else np.full(len(df), None, dtype=object)
+              for col in columns]
+    for row_id, row in enumerate(zip(*values)):
+        yield (row_id,) + tuple(_sql_value(value) for value in row)
+
+class SalesDatabase:
+    """
+    SQLite 판매/KPI/카탈로그 저장소
+    - load(): 세 데이터를 하나의 트랜잭션으로 다시 적재 (executemany)
+    - sales()/products()/kpi_history(): 경로/월 조건에 맞는 행만 인덱스로 조회 (원본 행 순서 유지)
+    조회마다 연결을 새로 열어 Streamlit 스크립트 스레드 간에 연결을 공유하지 않음
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, check_same_thread=False))
+
+    def meta(self, key):
+        """meta 테이블 값 (테이블/키가 없으면 None)"""
+        if not os.path.exists(self.path):
+            return None
+        with self._connect() as conn:
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return row[0] if row else None
+
+    @property
+    def data_version(self):
+        return self.meta('data_version')
+
+    def load(self, product_info, sales_history, kpi_history, data_version):
+        """
+        카탈로그 / 판매 이력 / KPI 일괄 적재 - 기존 테이블을 지우고 하나의 트랜잭션에서 executemany
+        (판매가 / SKU_ID는 load_data 전처리 이후 값, KPI매출은 원본 문자열 그대로 보관)
+        """
+        started = time.perf_counter()
+        sales = sales_history.assign(월_서수=[month_ordinal(month) for month in sales_history['월']])
+        kpi = kpi_history.assign(월_서수=[month_ordinal(month) for month in kpi_history['월']])
+
+        with closing(sqlite3.connect(self.path, isolation_level=None)) as conn:
+            # DROP/CREATE까지 하나의 트랜잭션 - 적재 중 실패하면 이전 테이블 유지
+            conn.execute("BEGIN")
+            try:
+                for table in TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                for statement in SCHEMA.split(';'):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.executemany(
+                    "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)",
+                    _rows(product_info, ['경로', '제품코드', '제품명', '판매가', 'SKU_ID'])
+                )
+                conn.executemany(
+                    "INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    _rows(sales, ['월', '월_서수', '경로', '제품코드', '제품명', '판매수량', 'SKU_ID'])
+                )
+                conn.executemany(
+                    "INSERT INTO kpi VALUES (?, ?, ?, ?, ?)",
+                    _rows(kpi, ['월', '월_서수', '경로', 'KPI매출'])
+                )
+                conn.executemany(
+                    "INSERT INTO meta VALUES (?, ?)",
+                    [('data_version', data_version), ('sales_rows', str(len(sales_history)))]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("ANALYZE")
+
+        debug_print(f"SQLite 적재: 카탈로그 {len(product_info)}행, 판매 {len(sales_history)}행, KPI {len(kpi_history)}행 "
+                    f"({self.path}, {time.perf_counter() - started:.3f}초)")
+
+    def _query(self, sql, params, columns):
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        frame = pd.DataFrame.from_records(rows, columns=['row_id'] + columns)
+        return frame.set_index('row_id').rename_axis(None)
+
+    @staticmethod
+    def _conditions(routes=None, month_ordinals=None):
+        clauses, params = [], []
+        if routes is not None:
+            routes = list(routes)
+            clauses.append(f"경로 IN ({', '.join('?' * len(routes))})")
+            params.extend(routes)
+        if month_ordinals is not None:
+            month_ordinals = [int(ordinal) for ordinal in month_ordinals]
+            clauses.append(f"월_서수 IN ({', '.join('?' * len(month_ordinals))})")
+            params.extend(month_ordinals)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def sales(self, routes=None, months=None):
+        """
+        판매 이력 조회 (경로 / 월 조건, 원본 행 순서와 행 번호 인덱스 유지)
+        months: 월 목록 (어느 표기든 월 서수로 변환하여 조회)
+        """
+        month_ordinals = None
+        if months is not None:
+            month_ordinals = [ordinal for ordinal in map(month_ordinal, months) if ordinal is not None]
+        where, params = self._conditions(routes, month_ordinals)
+        frame = self._query(
+            f"SELECT row_id, 월, 경로, 제품코드, 제품명, 판매수량, sku_id FROM sales{where} ORDER BY row_id",
+            params, ['월', '경로', '제품코드', '제품명', '판매수량', 'SKU_ID']
+        )
+        frame['판매수량'] = frame['판매수량'].astype('int64' if (frame['판매수량'] % 1 == 0).all() else float)
+        frame['SKU_ID'] = frame['SKU_ID'].astype(np.int32)
+        return frame
+
+    def products(self, routes=None):
+        """카탈로그 조회 (경로 조건)"""
+        where, params = self._conditions(routes)
+        frame = self._query(
+            f"SELECT row_id, 경로, 제품코드, 제품명, 판매가, sku_id FROM products{where} ORDER BY row_id",
+            params, ['경로', '제품코드', '제품명', '판매가', 'SKU_ID']
+        )
+        frame['판매가'] = frame['판매가'].astype(float)
+        frame['SKU_ID'] = frame['SKU_ID'].astype(np.int32)
+        return frame
+
+    def kpi_history(self, routes=None):
+        """KPI 이력 조회 (원본 문자열 그대로 - KpiStore.from_history에서 숫자로 변환)"""
+        where, params = self._conditions(routes)
+        return self._query(
+            f"SELECT row_id, 월, 경로, KPI매출 FROM kpi{where} ORDER BY row_id",
+            params, ['월', '경로', 'KPI매출']
+        )
+
+class DatabaseSalesWindows:
+    """
+    SQLite 과거 판매 구간 조회 - SalesWindows와 같은 select() 인터페이스
+    구간(경로 목록 × 과거 월)마다 인덱스 조회 한 번, 같은 구간은 재사용 (행 순서는 select_past_sales와 동일)
+    """
+
+    def __init__(self, database, routes):
+        self.database = database
+        self.routes = list(routes)
+        self._windows = {}
+
+    def select(self, past_months):
+        """과거 월 목록의 판매 데이터 (같은 구간은 재사용)"""
+        key = tuple(past_months)
+        if key not in self._windows:
+            self._windows[key] = self.database.sales(self.routes, list(dict.fromkeys(past_months)))
+        return self._windows[key]
+
+def sync_sales_database(path, product_info, sales_history, kpi_history, data_version):
+    """
+    SQLite 파일을 현재 데이터 버전과 맞춤 (버전이 다를 때만 다시 적재)
+    sales_history.attrs에 연결 정보를 기록하여 예측 엔진이 구간 조회에 사용하도록 함
+    """
+    database = SalesDatabase(path)
+    if database.data_version != data_version:
+        database.load(product_info, sales_history, kpi_history, data_version)
+    sales_history.attrs[SALES_DATABASE_ATTR] = {'path': path, 'data_version': data_version, 'rows': len(sales_history)}
+    return database
+
+def database_sales_windows(sales_history, routes):
+    """
+    판매 이력이 SQLite에 적재된 전체 이력이면 DatabaseSalesWindows, 아니면 None
+    (필터링된 판매 이력은 attrs가 남아 있어도 행 수가 달라 메모리 조회 사용)
+    """
+    if sales_history is None:
+        return None
+    info = sales_history.attrs.get(SALES_DATABASE_ATTR)
+    if not info or info.get('rows') != len(sales_history):
+        return None
+    if info.get('data_version') != sales_history.attrs.get('data_version'):
+        return None
+    return DatabaseSalesWindows(SalesDatabase(info['path']), routes)
@@ -11,6 +11,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+import hashlib
 import warnings
 import logging
 
@@ -18,6 +19,15 @@ import logging
 from future_prediction import show_future_prediction
 from kpi_comparison import show_past_comparison
 from sales_comparison import show_sales_based_prediction
+from ml_comparison import show_ml_comparison
+from diagnostics import debug_print
+from sku_index import attach_sku_ids
+from kpi_store import KpiStore, build_kpi_store
+from sqlite_store import sqlite_database_path, sync_sales_database
+from shared_cube import shared_directory, ensure_shared_data
+from reference_data import freeze_frame
+from chart_layer import get_data_version
+from warmup import warmup_enabled, start_warmup, display_warmup_progress
 
 # 로깅 레벨 설정으로 경고 메시지 줄이기
 logging.getLogger('streamlit').setLevel(logging.ERROR)
@@ -51,7 +61,7 @@ st.sidebar.header("⚙️ 설정")
 # 예측 모드 선택
 prediction_mode = st.sidebar.radio(
     "예측 모드",
-    ["미래 예측", "과거 예측 vs 실제값 비교(KPI 기반)", "과거 예측 vs 실제 비교(판매데이터 기반)"],
+    ["미래 예측", "과거 예측 vs 실제값 비교(KPI 기반)", "과거 예측 vs 실제 비교(판매데이터 기반)", "과거 예측 vs 실제 비교(글로벌 ML 모델)"],
     index=0
 )
 
@@ -93,7 +103,7 @@ if prediction_mode == "미래 예측":
         future_months,
         index=0
     )
-elif prediction_mode == "과거 예측 vs 실제값 비교(KPI 기반)":
+elif prediction_mode in ("과거 예측 vs 실제값 비교(KPI 기반)", "과거 예측 vs 실제 비교(글로벌 ML 모델)"):
     selected_month = st.sidebar.selectbox(
         "비교 대상 월",
         past_months,
@@ -112,10 +122,13 @@ default_routes = [
     "Shopee(SG)", "Shopee(VN)", "Shopee(TW)", "TikTokShop(USA)", "Shopee(TH)"
 ]
 
+# 기본 선택 경로 (예열 작업도 이 조합을 먼저 계산)
+default_selected_routes = ["Amazon(USA)", "B2B(GLOBAL)"]
+
 selected_routes = st.sidebar.multiselect(
     "예측 경로 선택",
     default_routes,
-    default=["Amazon(USA)", "B2B(GLOBAL)"]
+    default=default_selected_routes
 )
 
 # 과거 비교를 위한 추가 설정
@@ -134,7 +147,8 @@ else:
     accuracy_threshold = 70
 
 # 데이터 로드 함수
-@st.cache_data
+# 참조 데이터는 프로세스당 한 번만 로드하여 모든 세션/재실행이 같은 읽기 전용 객체를 공유 (재실행마다 역직렬화하지 않음)
+@st.cache_resource(show_spinner="데이터 로드 중...")
 def load_data():
     # 현재 스크립트 파일의 디렉토리 경로
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -149,85 +163,65 @@ def load_data():
     kpi_history = pd.read_csv(kpi_history_path, encoding='utf-8')
     
     # 디버깅: 데이터 로딩 확인
-    print(f"product_info 컬럼: {list(product_info.columns)}")
-    print(f"sales_history 컬럼: {list(sales_history.columns)}")
-    print(f"kpi_history 컬럼: {list(kpi_history.columns)}")
+    debug_print(f"product_info 컬럼: {list(product_info.columns)}")
+    debug_print(f"sales_history 컬럼: {list(sales_history.columns)}")
+    debug_print(f"kpi_history 컬럼: {list(kpi_history.columns)}")
     
     # 데이터 전처리
     product_info['판매가'] = product_info['판매가'].astype(str).str.replace(',', '').astype(float)
-    kpi_history['KPI매출'] = kpi_history['KPI매출'].astype(str).str.replace(',', '').astype(float)
-    
-    return product_info, sales_history, kpi_history
-
-# 기존 예측 함수 (호환성 유지)
-def estimate_demand(kpi_df, product_df, adjustment_df):
-    """기존 예측 함수 - 호환성 유지용"""
-    # 각 경로별로 예측 수행
-    results = []
-    
-    for _, kpi_row in kpi_df.iterrows():
-        route = kpi_row['경로']
-        target_revenue = kpi_row['KPI매출']
-        
-        # 해당 경로의 제품들
-        route_products = product_df[product_df['경로'] == route]
-        
-        # 총 제품 수
-        total_products = len(route_products)
-        
-        if total_products == 0:
-            continue
-        
-        # 각 제품별 동일한 비중으로 매출 분배
-        equal_revenue_per_product = target_revenue / total_products
-        
-        for _, product in route_products.iterrows():
-            # 예측 수량 계산
-            if product['판매가'] > 0:
-                predicted_quantity = equal_revenue_per_product / product['판매가']
-            else:
-                predicted_quantity = 0
-            
-            # 조정 계수 적용 (adjustment_df에서 해당 제품의 조정계수 찾기)
-            adjustment_factor = 1.0  # 기본값
-            matching_adjustment = adjustment_df[
-                (adjustment_df['경로'] == route) & 
-                (adjustment_df['제품명'] == product['제품명'])
-            ]
-            
-            if not matching_adjustment.empty:
-                adjustment_factor = matching_adjustment.iloc[0]['조정계수']
-            
-            # 최종 예측 수량 (조정계수 적용)
-            final_predicted_quantity = predicted_quantity * adjustment_factor
-            
-            # 결과 저장
-            results.append({
-                '월': kpi_row['월'],
-                '경로': route,
-                '제품코드': product['제품코드'],
-                '제품명': product['제품명'],
-                '판매가': product['판매가'],
-                '예측수량': max(0, int(final_predicted_quantity)),
-                '조정계수': adjustment_factor,
-                '제품별_예상매출': equal_revenue_per_product,
-                '보정수량': max(0, int(final_predicted_quantity)),
-                '최종_예측수량': max(0, int(final_predicted_quantity))
-            })
-    
-    return pd.DataFrame(results)
+    
+    # SKU 카탈로그 인덱스 - (경로, 제품코드)/제품명 별칭을 정수 SKU_ID로 매핑 (병합/groupby 키로 사용)
+    attach_sku_ids(product_info, sales_history)
+    
+    # 데이터 버전 기록 (CSV 내용 해시 - 차트/계산 캐시 키로 사용)
+    data_hash = hashlib.md5()
+    for path in [product_info_path, sales_history_path, kpi_history_path]:
+        with open(path, 'rb') as f:
+            data_hash.update(f.read())
+    data_version = data_hash.hexdigest()
+    for df in [product_info, sales_history, kpi_history]:
+        df.attrs['data_version'] = data_version
+    
+    # SQLite 백엔드 (선택 - DEMAND_SQLITE_DB 설정 시 데이터 버전이 바뀔 때만 적재, 과거 판매 구간은 인덱스 조회)
+    sqlite_path = sqlite_database_path()
+    if sqlite_path:
+        sync_sales_database(sqlite_path, product_info, sales_history, kpi_history, data_version)
+    
+    # KPI 저장소 - 경로 × 월 숫자 행렬 (KPI 문자열은 여기서 한 번만 숫자로 변환)
+    kpi_store = build_kpi_store(kpi_history)
+    
+    # 공유 판매 큐브 / KPI 행렬 (선택 - DEMAND_SHARED_DIR 설정 시 데이터 버전별로 한 번만 발행, 읽기 전용 메모리 맵 사용)
+    shared_dir = shared_directory()
+    if shared_dir:
+        shared = ensure_shared_data(shared_dir, sales_history, product_info, kpi_store, data_version)
+        kpi_store = KpiStore(shared.kpi_routes, shared.kpi_month_ordinals, shared.kpi_values, data_version)
+    
+    # 세션 간 공유 객체이므로 읽기 전용 SharedFrame으로 고정 (값 대입, 컬럼 추가/삭제, inplace 변경은 오류 -
+    # 입력 df를 수정하는 함수는 복사본에 계산)
+    return freeze_frame(product_info), freeze_frame(sales_history), kpi_store
 
 # 메인 앱
 def main():
     # 데이터 로드
-    product_info, sales_history, kpi_history = load_data()
+    product_info, sales_history, kpi_store = load_data()
+    
+    # 시작 시 예열 (선택 - DEMAND_WARMUP=1일 때만, 백그라운드 스레드에서 사이드바 월 옵션 × 경로 선택 조합을 미리 계산, 화면은 기다리지 않음)
+    if warmup_enabled():
+        warmup_job = start_warmup(
+            get_data_version(sales_history), tuple(future_months), tuple(past_months),
+            tuple(default_routes), tuple(default_selected_routes), product_info, sales_history, kpi_store
+        )
+        with st.sidebar:
+            display_warmup_progress(warmup_job)
     
     if prediction_mode == "미래 예측":
-        show_future_prediction(product_info, sales_history, kpi_history, selected_month, selected_routes)
+        show_future_prediction(product_info, sales_history, kpi_store, selected_month, selected_routes)
     elif prediction_mode == "과거 예측 vs 실제값 비교(KPI 기반)":
-        show_past_comparison(product_info, sales_history, kpi_history, selected_month, selected_routes, accuracy_threshold)
+        show_past_comparison(product_info, sales_history, kpi_store, selected_month, selected_routes, accuracy_threshold)
+    elif prediction_mode == "과거 예측 vs 실제 비교(글로벌 ML 모델)":
+        show_ml_comparison(product_info, sales_history, kpi_store, selected_month, selected_routes)
     else:  # 과거 예측 vs 실제 비교(판매데이터 기반)
-        show_sales_based_prediction(product_info, sales_history, kpi_history, selected_month, selected_routes)
+        show_sales_based_prediction(product_info, sales_history, kpi_store, selected_month, selected_routes)
 
 if __name__ == "__main__":
     main() 
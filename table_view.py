@@ -0,0 +1,149 @@
+"""
+table_view.py
+대용량 상세 테이블 표시 모듈 - 서버측 검색/정렬/페이지네이션
+현재 페이지에 해당하는 행만 포맷팅하여 브라우저로 전송
+"""
+
+import math
+
+import streamlit as st
+import pandas as pd
+
+# 페이지 크기 옵션
+PAGE_SIZE_OPTIONS = [25, 50, 100, 200]
+DEFAULT_PAGE_SIZE = 50
+
+# 검색 대상 컬럼 (존재하는 컬럼만 사용)
+SEARCH_COLUMNS = ['제품명', '제품코드']
+
+def filter_table(df, search_text, search_columns=SEARCH_COLUMNS):
+    """
+    제품명/제품코드 부분 일치 검색 (대소문자 무시)
+    검색어가 비어 있으면 원본을 그대로 반환
+    """
+    search_text = (search_text or '').strip()
+    if not search_text:
+        return df
+
+    columns = [col for col in search_columns if col in df.columns]
+    if not columns:
+        return df
+
+    mask = pd.Series(False, index=df.index)
+    for col in columns:
+        mask |= df[col].astype(str).str.contains(search_text, case=False, regex=False, na=False)
+
+    return df[mask]
+
+def sort_table(df, sort_column, ascending=True):
+    """정렬 컬럼이 지정된 경우 원본 값(포맷팅 전) 기준으로 정렬"""
+    if sort_column is None or sort_column not in df.columns:
+        return df
+    return df.sort_values(sort_column, ascending=ascending, kind='mergesort')
+
+def paginate_table(df, page, page_size):
+    """
+    1부터 시작하는 페이지 번호로 현재 페이지 행만 잘라서 반환
+    반환값: (페이지 데이터, 보정된 페이지 번호, 전체 페이지 수)
+    """
+    total_pages = max(1, math.ceil(len(df) / page_size))
+    page = min(max(1, int(page)), total_pages)
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size], page, total_pages
+
+def format_page(page_df, formatters=None):
+    """현재 페이지 행에만 표시용 포맷 적용 (전체 테이블 포맷팅 비용 제거)"""
+    if not formatters:
+        return page_df
+
+    page_df = page_df.copy()
+    for col, formatter in formatters.items():
+        if col in page_df.columns:
+            page_df[col] = page_df[col].map(formatter)
+    return page_df
+
+@st.fragment
+def display_paginated_table(df, key, formatters=None, default_sort=None, default_ascending=False,
+                            search_columns=SEARCH_COLUMNS, page_size=DEFAULT_PAGE_SIZE, sort_keys=None):
+    """
+    검색/정렬/페이지 선택 위젯과 함께 현재 페이지만 st.dataframe으로 표시
+    (fragment - 검색/정렬/페이지 변경 시 이 테이블만 다시 실행되고 예측 계산은 재실행되지 않음)
+
+    - df: 포맷팅 전 원본 데이터 (숫자 컬럼은 숫자 그대로 유지해야 정렬이 정확함)
+    - key: 위젯 상태 구분용 고유 키
+    - formatters: {컬럼명: 포맷 함수} - 현재 페이지에만 적용
+    - sort_keys: {표시 컬럼명: 정렬용 원본 컬럼명} - 원본 컬럼은 화면에 표시하지 않음
+    """
+    sort_keys = sort_keys or {}
+    hidden_columns = [col for col in sort_keys.values() if col in df.columns]
+    display_columns = [col for col in df.columns if col not in hidden_columns]
+
+    has_search = any(col in df.columns for col in search_columns)
+    sort_options = ["(기본 순서)"] + display_columns
+    default_sort_index = sort_options.index(default_sort) if default_sort in sort_options else 0
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+
+    with col1:
+        if has_search:
+            search_text = st.text_input(
+                "🔎 제품명/제품코드 검색",
+                key=f"{key}_search",
+                placeholder="검색어 입력"
+            )
+        else:
+            search_text = ''
+
+    with col2:
+        sort_column = st.selectbox(
+            "정렬 기준",
+            sort_options,
+            index=default_sort_index,
+            key=f"{key}_sort"
+        )
+
+    with col3:
+        sort_order = st.selectbox(
+            "정렬 순서",
+            ["내림차순", "오름차순"],
+            index=1 if default_ascending else 0,
+            key=f"{key}_order"
+        )
+
+    with col4:
+        selected_page_size = st.selectbox(
+            "페이지 크기",
+            PAGE_SIZE_OPTIONS,
+            index=PAGE_SIZE_OPTIONS.index(page_size) if page_size in PAGE_SIZE_OPTIONS else 0,
+            key=f"{key}_page_size"
+        )
+
+    filtered_df = filter_table(df, search_text, search_columns)
+    sort_column = None if sort_column == "(기본 순서)" else sort_keys.get(sort_column, sort_column)
+    sorted_df = sort_table(filtered_df, sort_column, ascending=(sort_order == "오름차순"))
+
+    total_pages = max(1, math.ceil(len(sorted_df) / selected_page_size))
+
+    # 검색 결과가 줄어든 경우 저장된 페이지 번호가 범위를 벗어나지 않도록 보정
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+
+    if total_pages > 1:
+        page = st.number_input(
+            "페이지",
+            min_value=1,
+            max_value=total_pages,
+            step=1,
+            key=page_key
+        )
+    else:
+        page = 1
+
+    page_df, page, total_pages = paginate_table(sorted_df, page, selected_page_size)
+
+    st.dataframe(format_page(page_df[display_columns], formatters), use_container_width=True)
+    st.caption(
+        f"전체 {len(df):,}행 중 {len(sorted_df):,}행 검색됨 | "
+        f"{page}/{total_pages} 페이지 ({len(page_df):,}행 표시)"
+    )
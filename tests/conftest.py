@@ -0,0 +1,42 @@
+"""
+conftest.py
+테스트 공통 설정 - 저장소 루트의 평면 모듈을 import할 수 있도록 경로 추가, 번들 CSV 로드 픽스처
+"""
+
+import collections
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from sku_index import attach_sku_ids  # noqa: E402
+from kpi_store import build_kpi_store  # noqa: E402
+
+# 테스트용 데이터 버전 (attrs['data_version'])
+BUNDLED_DATA_VERSION = 'bundled'
+
+BundledData = collections.namedtuple('BundledData', ['product_info', 'sales_history', 'kpi_history', 'kpi_store'])
+
+def _read_csv(name):
+    return pd.read_csv(os.path.join(REPO_ROOT, name), encoding='utf-8')
+
+def load_bundled_data():
+    """저장소에 포함된 CSV를 대시보드 load_data와 같은 방식으로 준비 (판매가 숫자 변환, SKU_ID 부여, KPI 저장소)"""
+    product_info = _read_csv('product_info.csv')
+    sales_history = _read_csv('sales_history.csv')
+    kpi_history = _read_csv('kpi_history.csv')
+    product_info['판매가'] = product_info['판매가'].astype(str).str.replace(',', '').astype(float)
+    attach_sku_ids(product_info, sales_history)
+    for df in [product_info, sales_history, kpi_history]:
+        df.attrs['data_version'] = BUNDLED_DATA_VERSION
+    return BundledData(product_info, sales_history, kpi_history, build_kpi_store(kpi_history))
+
+@pytest.fixture(scope='session')
+def bundled_data():
+    """번들 데이터 (세션 공유 - 수정이 필요한 테스트는 복사본 사용)"""
+    return load_bundled_data()
@@ -0,0 +1,65 @@
+"""
+test_kpi_scenarios.py
+KPI 시나리오 일괄 계산(ScenarioInputs.evaluate / forecast_for) vs ForecastEngine.run 일치 확인
+- 기준 KPI 시나리오는 엔진 결과와 같아야 하고, 변화율 시나리오는 KPI를 바꿔 엔진을 다시 실행한 결과와 같아야 함
+"""
+
+import numpy as np
+import pytest
+
+import kpi_scenarios as ks
+from forecast_engine import ForecastData, DEFAULT_ENGINE
+from kpi_store import KPI_FALLBACK_CARRY_FORWARD
+
+TARGET_MONTHS = ['2025년 7월', '2025년 8월', '2026년 1월']
+SCENARIO_CHANGES = list(ks.SCENARIO_CHANGES) + [-0.45, 1.5]
+
+@pytest.fixture(scope='module', params=TARGET_MONTHS)
+def scenario_setup(request, bundled_data):
+    month = request.param
+    routes = sorted(bundled_data.product_info['경로'].unique())
+    kpi_df = bundled_data.kpi_store.frame(month, routes, KPI_FALLBACK_CARRY_FORWARD)
+    product_df = bundled_data.product_info[bundled_data.product_info['경로'].isin(routes)]
+    inputs = ks.prepare_kpi_scenarios(kpi_df, product_df, bundled_data.sales_history, month, bundled_data.kpi_store)
+    return month, kpi_df, product_df, inputs
+
+def engine_forecast(bundled_data, month, kpi_df, product_df):
+    data = ForecastData(kpi_df, product_df, bundled_data.sales_history, month, bundled_data.kpi_store)
+    return DEFAULT_ENGINE.run(data).reset_index(drop=True)
+
+def assert_same_forecast(actual, expected):
+    for column in ks.SCENARIO_COLUMNS + ['KPI매출']:
+        np.testing.assert_allclose(
+            actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float), rtol=0, atol=1e-9,
+            err_msg=column
+        )
+    assert actual['SKU_ID'].tolist() == expected['SKU_ID'].tolist()
+
+def test_base_scenario_matches_engine(bundled_data, scenario_setup):
+    month, kpi_df, product_df, inputs = scenario_setup
+    labels, kpi_matrix = ks.build_kpi_scenarios(inputs.base_kpis, [0.0])
+    result = inputs.evaluate(kpi_matrix, labels)
+
+    assert labels == ['기준']
+    assert_same_forecast(result.frame(0), engine_forecast(bundled_data, month, kpi_df, product_df))
+
+def test_changed_scenarios_match_engine_rerun(bundled_data, scenario_setup):
+    month, kpi_df, product_df, inputs = scenario_setup
+    labels, kpi_matrix = ks.build_kpi_scenarios(inputs.base_kpis, SCENARIO_CHANGES)
+    result = inputs.evaluate(kpi_matrix, labels)
+
+    for k, change in enumerate(SCENARIO_CHANGES):
+        scenario_kpi_df = kpi_df.copy()
+        scenario_kpi_df['KPI매출'] = scenario_kpi_df['KPI매출'] * (1 + change)
+        assert_same_forecast(result.frame(k), engine_forecast(bundled_data, month, scenario_kpi_df, product_df))
+
+def test_edited_route_kpi_matches_engine_rerun(bundled_data, scenario_setup):
+    month, kpi_df, product_df, inputs = scenario_setup
+    route = inputs.routes[0]
+    edited_kpi = inputs.base_kpis[0] * 1.25
+
+    edited_kpi_df = kpi_df.copy()
+    edited_kpi_df.loc[edited_kpi_df['경로'] == route, 'KPI매출'] = edited_kpi
+    expected = engine_forecast(bundled_data, month, edited_kpi_df, product_df)
+
+    assert_same_forecast(inputs.forecast_for({route: edited_kpi}).reset_index(drop=True), expected)
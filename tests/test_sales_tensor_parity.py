@@ -0,0 +1,157 @@
+"""
+test_sales_tensor_parity.py
+설정 조합 텐서(build_sales_parameter_tensor) vs 기존 제품별 루프 계산 일치 확인
+- 아래 legacy_* 함수는 텐서 도입 전 sales_comparison의 제품별 루프 구현 (비교 기준으로만 보관)
+- 27개 설정 조합(분석 기간 × 가중치 방식 × 보정 강도) 모두 같은 요약을 내야 함
+"""
+
+import numpy as np
+import pytest
+
+import sales_comparison as sc
+
+ANALYSIS_MONTH = '2025년 7월'
+COMPARED_FIELDS = ['current_sales', 'total_forecast', 'change_rate', 'monthly_forecasts', 'sku_id']
+
+def legacy_correct_change_rate(change_rate, recent_sales, previous_sales, correction_strength):
+    """보정 강도에 따른 변화율 보정 (제품 1개)"""
+    factors = sc.CHANGE_RATE_CORRECTION_FACTORS.get(correction_strength, sc.CHANGE_RATE_CORRECTION_FACTORS["보통"])
+    original_sign = 1 if change_rate >= 0 else -1
+    abs_change_rate = abs(change_rate)
+    avg_sales = (recent_sales + previous_sales) / 2
+
+    if abs_change_rate > 50:
+        correction_factor = factors["high"] if avg_sales <= sc.SMALL_SCALE_THRESHOLD else factors["medium"]
+    elif abs_change_rate > 20:
+        correction_factor = factors["medium"] if avg_sales <= sc.SMALL_SCALE_THRESHOLD else factors["low"]
+    else:
+        correction_factor = 1.0
+
+    return original_sign * (abs_change_rate * correction_factor)
+
+def legacy_analyze_trend(pivot_data, past_months, monthly_weights, correction_strength):
+    """제품별 최근/이전 구간 가중 평균과 보정 변화율"""
+    recent_months, previous_months = sc.split_recent_previous_months(past_months)
+    trend_analysis = {}
+
+    for product in pivot_data.index:
+        sales_data = pivot_data.loc[product]
+        weighted_recent_sales = weighted_previous_sales = 0
+        recent_weight_sum = previous_weight_sum = 0
+
+        for month in recent_months:
+            weight = monthly_weights.get(month, 1.0)
+            weighted_recent_sales += sales_data.get(month, 0) * weight
+            recent_weight_sum += weight
+        for month in previous_months:
+            weight = monthly_weights.get(month, 1.0)
+            weighted_previous_sales += sales_data.get(month, 0) * weight
+            previous_weight_sum += weight
+
+        if recent_weight_sum > 0:
+            weighted_recent_sales /= recent_weight_sum
+        if previous_weight_sum > 0:
+            weighted_previous_sales /= previous_weight_sum
+
+        if weighted_previous_sales > 0:
+            change_rate = ((weighted_recent_sales - weighted_previous_sales) / weighted_previous_sales) * 100
+        else:
+            change_rate = 0
+
+        trend_analysis[product] = legacy_correct_change_rate(
+            change_rate, weighted_recent_sales, weighted_previous_sales, correction_strength
+        )
+
+    return trend_analysis
+
+def legacy_predict(change_rates, pivot_data, months_ahead, monthly_weights):
+    """제품별 가중 평균 현재 판매량에 매월 10%씩 가속되는 누적 변화율 적용"""
+    future_forecast = {}
+
+    for product in pivot_data.index:
+        change_rate = change_rates[product]
+        current_sales = 0
+        total_weight = 0
+        for month, weight in monthly_weights.items():
+            if month in pivot_data.columns:
+                current_sales += pivot_data.loc[product, month] * weight
+                total_weight += weight
+        if total_weight > 0:
+            current_sales /= total_weight
+
+        future_forecast[product] = [
+            max(0, current_sales * (1 + (change_rate * (1 + month_idx * 0.1)) / 100))
+            for month_idx in range(months_ahead)
+        ]
+
+    return future_forecast
+
+def legacy_summary(filtered_sales, selected_routes, past_months, monthly_weights, correction_strength):
+    """경로별 피벗 → 추세 분석 → 예측 순서의 기존 요약 계산"""
+    summary = {}
+
+    for route in selected_routes:
+        route_sales = filtered_sales[filtered_sales['경로'] == route]
+        if len(route_sales) == 0:
+            continue
+
+        route_monthly_sales, route_sku_ids = sc.group_monthly_sales_by_sku(route_sales)
+        pivot_data = route_monthly_sales.droplevel('경로')
+        sku_ids = dict(zip(pivot_data.index, route_sku_ids))
+
+        change_rates = legacy_analyze_trend(pivot_data, past_months, monthly_weights, correction_strength)
+        forecasts = legacy_predict(change_rates, pivot_data, sc.SALES_FORECAST_MONTHS, monthly_weights)
+
+        products_info = {}
+        for product in pivot_data.index:
+            weighted_sales_sum = 0
+            total_weight = 0
+            for month in past_months:
+                if month in pivot_data.columns:
+                    weight = monthly_weights.get(month, 1.0)
+                    weighted_sales_sum += pivot_data.loc[product, month] * weight
+                    total_weight += weight
+
+            products_info[product] = {
+                'current_sales': weighted_sales_sum / total_weight if total_weight > 0 else 0,
+                'total_forecast': sum(forecasts[product]) / sc.SALES_FORECAST_MONTHS,
+                'change_rate': change_rates[product],
+                'monthly_forecasts': forecasts[product],
+                'sku_id': sku_ids[product]
+            }
+
+        summary[route] = products_info
+
+    return summary
+
+@pytest.fixture(scope='module')
+def sales_setup(bundled_data):
+    product_info, sales_history = bundled_data.product_info, bundled_data.sales_history
+    routes = sorted(product_info['경로'].unique())
+    filtered_sales = sales_history[sales_history['경로'].isin(routes)]
+    tensor = sc.build_sales_parameter_tensor.__wrapped__(filtered_sales, routes, ANALYSIS_MONTH)
+    return filtered_sales, routes, tensor
+
+@pytest.mark.parametrize('analysis_period', sc.ANALYSIS_PERIODS)
+@pytest.mark.parametrize('weighting_method', sc.WEIGHTING_METHODS)
+@pytest.mark.parametrize('correction_strength', sc.CORRECTION_STRENGTHS)
+def test_tensor_matches_legacy_loop(sales_setup, analysis_period, weighting_method, correction_strength):
+    filtered_sales, routes, tensor = sales_setup
+    past_months = sc.get_dynamic_past_months(analysis_period, ANALYSIS_MONTH)
+    monthly_weights = sc.calculate_monthly_weights(past_months, weighting_method)
+
+    expected = legacy_summary(filtered_sales, routes, past_months, monthly_weights, correction_strength)
+    actual = tensor.lookup(analysis_period, weighting_method, correction_strength)
+
+    assert list(actual) == list(expected)
+    for route, products in expected.items():
+        assert list(actual[route]) == list(products)
+        for product, info in products.items():
+            for field in COMPARED_FIELDS:
+                np.testing.assert_allclose(
+                    np.asarray(actual[route][product][field], float), np.asarray(info[field], float),
+                    err_msg=f'{route} / {product} / {field}'
+                )
+            change_rate = info['change_rate']
+            expected_trend = '상승' if change_rate > 5 else ('하락' if change_rate < -5 else '안정')
+            assert actual[route][product]['trend'] == expected_trend
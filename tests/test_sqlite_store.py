@@ -0,0 +1,64 @@
+"""
+test_sqlite_store.py
+SQLite 과거 판매 구간 조회(DatabaseSalesWindows) vs 메모리 조회(select_past_sales / SalesWindows) 일치 확인
+"""
+
+import pytest
+
+import sqlite_store
+from forecast_engine import ForecastData, SalesWindows, forecast_horizon, select_past_sales
+from future_prediction import estimate_demand_improved
+from kpi_store import KPI_FALLBACK_CARRY_FORWARD
+
+TARGET_MONTHS = ['2025년 7월', '2026년 1월']
+PAST_MONTHS = ['2025년 4월', '2025년 5월', '2025년 6월', '2025년 7월']
+
+@pytest.fixture(scope='module')
+def database_setup(bundled_data, tmp_path_factory):
+    """SQLite에 적재한 판매 이력(attrs로 연결)과 연결 정보가 없는 같은 내용의 판매 이력"""
+    product_info = bundled_data.product_info
+    sales_history = bundled_data.sales_history.copy()
+    path = str(tmp_path_factory.mktemp('sqlite') / 'demand.db')
+    database = sqlite_store.sync_sales_database(
+        path, product_info, sales_history, bundled_data.kpi_history, sales_history.attrs['data_version']
+    )
+    plain_sales = sales_history.copy()
+    plain_sales.attrs = {}
+    return database, sales_history, plain_sales
+
+def test_database_window_matches_memory_selection(bundled_data, database_setup):
+    database, sales_history, plain_sales = database_setup
+    routes = sorted(bundled_data.product_info['경로'].unique())
+
+    windows = sqlite_store.database_sales_windows(sales_history, routes)
+    assert isinstance(windows, sqlite_store.DatabaseSalesWindows)
+
+    expected = SalesWindows(plain_sales, routes).select(PAST_MONTHS)
+    actual = windows.select(PAST_MONTHS)
+    assert actual.equals(expected[actual.columns])
+    assert (actual.dtypes == expected[actual.columns].dtypes).all()
+    assert actual.equals(select_past_sales(bundled_data.product_info, plain_sales, PAST_MONTHS)[actual.columns])
+
+def test_filtered_history_uses_memory_path(bundled_data, database_setup):
+    _, sales_history, _ = database_setup
+    route = bundled_data.product_info['경로'].iloc[0]
+    assert sqlite_store.database_sales_windows(sales_history[sales_history['경로'] == route], [route]) is None
+
+@pytest.mark.parametrize('month', TARGET_MONTHS)
+def test_forecast_matches_in_memory_path(bundled_data, database_setup, month):
+    _, sales_history, plain_sales = database_setup
+    product_info, kpi_store = bundled_data.product_info, bundled_data.kpi_store
+    routes = sorted(product_info['경로'].unique())
+    kpi_df = kpi_store.frame(month, routes, KPI_FALLBACK_CARRY_FORWARD)
+
+    assert ForecastData(kpi_df, product_info, sales_history, month, kpi_store).sales_windows is not None
+    expected = estimate_demand_improved(kpi_df, product_info, plain_sales, month, kpi_store)
+    assert estimate_demand_improved(kpi_df, product_info, sales_history, month, kpi_store).equals(expected)
+
+def test_horizon_matches_in_memory_path(bundled_data, database_setup):
+    _, sales_history, plain_sales = database_setup
+    product_info, kpi_store = bundled_data.product_info, bundled_data.kpi_store
+    routes = sorted(product_info['경로'].unique())
+
+    expected = forecast_horizon(product_info, plain_sales, kpi_store, routes, 6)
+    assert forecast_horizon(product_info, sales_history, kpi_store, routes, 6).equals(expected)
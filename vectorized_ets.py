@@ -0,0 +1,185 @@
+"""
+vectorized_ets.py
+순수 NumPy 벡터화 지수평활(Holt/Holt-Winters) - 전체 시계열을 한 번에 계산
+- (그리드 조합 × 시계열) 상태 배열로 평활 재귀식을 시간축으로만 반복
+- 평활 상수 그리드 탐색은 브로드캐스트 차원으로 처리하고, 시계열별 1단계 예측 제곱 오차가 최소인 조합 선택
+"""
+
+import itertools
+import time
+
+import numpy as np
+
+from diagnostics import debug_print
+from ets_models import (
+    ETS_MIN_OBSERVATIONS,
+    ETS_SEASONAL_PERIODS,
+    ETS_METHOD_HOLT,
+    ETS_METHOD_HOLT_WINTERS,
+    ETS_METHOD_MEAN,
+    build_series_matrix
+)
+
+# 평활 상수 탐색 그리드 (수준 alpha, 추세 beta, 감쇠 phi, 계절 gamma)
+# 계절성 모델은 상태 배열이 주기만큼 커지므로 더 작은 그리드 사용
+HOLT_GRID = {
+    'alpha': (0.1, 0.2, 0.35, 0.5, 0.7, 0.9),
+    'beta': (0.01, 0.05, 0.1, 0.2),
+    'phi': (0.8, 0.9, 0.98),
+    'gamma': (0.0,)
+}
+HOLT_WINTERS_GRID = {
+    'alpha': (0.1, 0.3, 0.5, 0.8),
+    'beta': (0.01, 0.1),
+    'phi': (0.9, 0.98),
+    'gamma': (0.05, 0.2)
+}
+
+PARAMETER_NAMES = ('alpha', 'beta', 'phi', 'gamma')
+
+# 상태 배열 자료형 (그리드 × 시계열 배열의 메모리/연산량 절감)
+VECTORIZED_DTYPE = np.float32
+
+class VectorizedEtsResult:
+    """시계열별 벡터화 지수평활 예측 결과 (행 순서는 입력 시계열 순서와 동일)"""
+
+    def __init__(self, monthly_forecasts, methods, parameters, months, n_grid, elapsed):
+        self.monthly_forecasts = monthly_forecasts  # (N, H)
+        self.methods = methods                      # (N,) 적합 방식
+        self.parameters = parameters                # {'alpha', 'beta', 'phi', 'gamma'}: (N,) 선택된 평활 상수 (평균 예측 행은 NaN)
+        self.months = months                        # 학습에 사용한 월 목록
+        self.n_grid = n_grid                        # 탐색한 평활 상수 조합 수
+        self.elapsed = elapsed                      # 계산 시간(초)
+
+def _parameter_grid(seasonal):
+    """평활 상수 조합을 (G, 1) 배열로 반환 (시계열 차원으로 브로드캐스트)"""
+    settings = HOLT_WINTERS_GRID if seasonal else HOLT_GRID
+    grid = np.array(list(itertools.product(*(settings[name] for name in PARAMETER_NAMES))), dtype=VECTORIZED_DTYPE)
+    return tuple(grid[:, k:k + 1] for k in range(len(PARAMETER_NAMES)))
+
+def _smooth_grid(y, start, months_ahead, seasonal):
+    """
+    (시계열 N × 시간 T) 행렬에 대해 모든 평활 상수 조합의 감쇠 추세 지수평활을 동시에 계산
+    start: 시계열별 첫 판매 시점 (이전 구간은 출시 전이므로 계산에서 제외)
+    반환값: (G × N 1단계 예측 제곱 오차 합, G × N × H 예측, 조합 배열 튜플)
+    
+    오차 수정(error correction) 형태의 재귀식 사용:
+      오차 e = y - (수준 + phi × 추세 + 계절)
+      수준 ← 수준 + phi × 추세 + alpha × e, 추세 ← phi × 추세 + alpha × beta × e, 계절 ← 계절 + gamma × e
+    초기화 시점 전까지 상태는 0, 오차는 0으로 두어 시계열마다 시작 시점이 달라도 같은 연산으로 처리
+    """
+    alpha, beta, phi, gamma = _parameter_grid(seasonal)
+    y = y.astype(VECTORIZED_DTYPE)
+    n_series, n_time = y.shape
+    period = ETS_SEASONAL_PERIODS if seasonal else 1
+
+    # 초기 상태: 계절성이면 첫 두 주기 평균으로 수준/추세/계절 지수, 아니면 첫 관측값 수준 + 추세 0
+    if seasonal:
+        window = np.take_along_axis(y, np.minimum(start[:, None] + np.arange(2 * period), n_time - 1), axis=1)
+        first_cycle = window[:, :period].mean(axis=1)
+        second_cycle = window[:, period:].mean(axis=1)
+        level0 = first_cycle + (period - 1) / 2 * (second_cycle - first_cycle) / period
+        trend0 = (second_cycle - first_cycle) / period
+        season0 = window[:, :period] - first_cycle[:, None]
+        init_time = start + period - 1
+    else:
+        level0 = y[np.arange(n_series), start]
+        trend0 = np.zeros(n_series)
+        season0 = np.zeros((n_series, 1))
+        init_time = start
+
+    n_grid = alpha.shape[0]
+    level = np.zeros((n_grid, n_series), dtype=VECTORIZED_DTYPE)
+    trend = np.zeros((n_grid, n_series), dtype=VECTORIZED_DTYPE)
+    season = np.zeros((period, n_grid, n_series), dtype=VECTORIZED_DTYPE)  # 달력 위치(t % 주기)별 계절 지수
+    sse = np.zeros((n_grid, n_series), dtype=VECTORIZED_DTYPE)
+    alpha_beta = alpha * beta
+
+    # 계절 지수는 시계열별 시작 시점과 무관하게 달력 위치 기준으로 저장
+    season_position = (start[:, None] + np.arange(period)) % period
+    for j in range(period):
+        season[season_position[:, j], :, np.arange(n_series)] = season0[:, j:j + 1]
+
+    last_init = init_time.max() if n_series > 0 else -1
+    for t in range(n_time):
+        if t > init_time.min():
+            season_t = season[t % period]
+            damped_trend = phi * trend
+            base = level + damped_trend
+            error = y[:, t] - base - season_t
+            if t <= last_init:
+                error *= t > init_time  # 초기화 이전 시계열은 오차 0 (상태 유지)
+            sse += error * error
+            level = base + alpha * error
+            trend = damped_trend + alpha_beta * error
+            if seasonal:
+                season_t += gamma * error
+
+        # 초기화 시점이 된 시계열에 초기 수준/추세 설정
+        initialized = np.flatnonzero(init_time == t)
+        if len(initialized) > 0:
+            level[:, initialized] = level0[initialized]
+            trend[:, initialized] = trend0[initialized]
+
+    # h단계 예측: 수준 + (phi + ... + phi^h) × 추세 + 계절 지수
+    horizons = np.arange(1, months_ahead + 1)
+    damping_sums = np.cumsum(phi ** horizons, axis=1)                      # (G, H)
+    future_season = season[(n_time - 1 + horizons) % period]               # (H, G, N)
+    forecasts = level[..., None] + damping_sums[:, None, :] * trend[..., None] + np.moveaxis(future_season, 0, -1)
+
+    return sse, forecasts, (alpha[:, 0], beta[:, 0], phi[:, 0], gamma[:, 0])
+
+def fit_vectorized_ets(series, months_ahead=6, months=None):
+    """
+    여러 시계열의 지수평활 예측을 한 번의 벡터 연산으로 계산
+    - 판매 월이 2주기 이상인 시계열: Holt-Winters(가법 계절성) 그리드
+    - 판매 월이 ETS_MIN_OBSERVATIONS 이상인 시계열: 감쇠 추세 Holt 그리드
+    - 그 외: 평균 판매량
+    """
+    started = time.perf_counter()
+    series = np.asarray(series, dtype=float)
+    n_series, n_time = series.shape
+
+    has_sales = series.any(axis=1) if n_time > 0 else np.zeros(n_series, dtype=bool)
+    start = np.where(has_sales, np.argmax(series != 0, axis=1), n_time)
+    n_observed = n_time - start
+
+    monthly_forecasts = np.zeros((n_series, months_ahead))
+    methods = np.full(n_series, ETS_METHOD_MEAN, dtype=object)
+    parameters = {name: np.full(n_series, np.nan) for name in PARAMETER_NAMES}
+
+    # 데이터 부족 시계열: 관측 구간 평균
+    observed_mask = np.arange(n_time) >= start[:, None]
+    observed_sum = np.where(observed_mask, series, 0).sum(axis=1)
+    mean_sales = np.divide(observed_sum, n_observed, out=np.zeros(n_series), where=n_observed > 0)
+    monthly_forecasts[:] = mean_sales[:, None]
+
+    seasonal_rows = n_observed >= 2 * ETS_SEASONAL_PERIODS
+    holt_rows = (n_observed >= ETS_MIN_OBSERVATIONS) & ~seasonal_rows
+    n_grid = 0
+
+    for rows_mask, seasonal, method in [(holt_rows, False, ETS_METHOD_HOLT), (seasonal_rows, True, ETS_METHOD_HOLT_WINTERS)]:
+        rows = np.flatnonzero(rows_mask)
+        if len(rows) == 0:
+            continue
+
+        sse, forecasts, grid = _smooth_grid(series[rows], start[rows], months_ahead, seasonal)
+        best = np.argmin(sse, axis=0)
+        best_forecasts = forecasts[best, np.arange(len(rows))]
+
+        # 발산한 조합은 평균 예측 유지
+        finite = np.all(np.isfinite(best_forecasts), axis=1)
+        monthly_forecasts[rows[finite]] = np.maximum(0, best_forecasts[finite])
+        methods[rows[finite]] = method
+        for name, values in zip(PARAMETER_NAMES, grid):
+            parameters[name][rows[finite]] = values[best[finite]]
+        n_grid = max(n_grid, len(grid[0]))
+
+    elapsed = time.perf_counter() - started
+    debug_print(f"벡터화 지수평활 - 시계열 {n_series}개, 그리드 {n_grid}개 조합, {elapsed:.3f}초")
+    return VectorizedEtsResult(monthly_forecasts, methods, parameters, months, n_grid, elapsed)
+
+def fit_vectorized_ets_from_monthly_matrix(monthly_matrix, last_month, months_ahead=6):
+    """(경로, 제품명) × 월 판매량 행렬에서 last_month까지의 시계열로 벡터화 지수평활 예측 계산"""
+    series, months = build_series_matrix(monthly_matrix, last_month)
+    return fit_vectorized_ets(series, months_ahead, months)
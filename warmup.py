@@ -0,0 +1,175 @@
+"""
+warmup.py
+시작 시 예열 작업 - 데이터 로드 직후 백그라운드 스레드에서 사이드바 선택 조합의 예측을 미리 계산
+- 대상: 사이드바 월 옵션(미래 / 과거) × (경로 하나씩 + 기본 경로 조합)
+- 각 모드 화면과 같은 캐시 함수를 같은 키로 호출하므로 첫 요청이 바로 캐시에서 조회됨
+  (st.cache_resource는 프로세스 전역, DEMAND_CACHE_DIR 설정 시 예측 결과는 영속 캐시에도 기록)
+- 선택 기능: 환경 변수 DEMAND_WARMUP=1일 때만 사용 (조합 수만큼 예측을 계산하므로 기본값은 미사용)
+- 글로벌 ML 모델은 예열하지 않음 (ML 비교 화면에서 요청 시 학습)
+- 참조 데이터는 읽기 전용 공유 프레임이므로 화면 스레드와 동시에 읽어도 안전
+- 예열 스레드는 세션이 없으므로 캐시 함수 호출마다 나오는 'missing ScriptRunContext' 경고는 로그 필터로 제외
+  (스레드에 세션 컨텍스트를 붙이면 캐시 함수의 스피너가 이미 끝난 세션으로 전송되므로 붙이지 않음)
+"""
+
+import logging
+import os
+import threading
+import time
+
+import streamlit as st
+
+from diagnostics import debug_print
+from future_prediction import warm_future_prediction
+from kpi_comparison import warm_past_comparison
+from sales_comparison import warm_sales_based_prediction
+
+# 예열 사용 여부 환경 변수 (기본값: 미사용)
+WARMUP_ENV = 'DEMAND_WARMUP'
+
+# 예열 작업 모드 표시 이름
+WARMUP_MODE_LABELS = {'future': '미래 예측', 'past': '과거 비교'}
+
+# 진행 표시 갱신 주기 (초)
+WARMUP_REFRESH_SECONDS = 1.0
+
+# 작업 사이 대기 시간 (초) - 화면 스레드가 GIL을 얻을 기회를 줌
+WARMUP_YIELD_SECONDS = 0.01
+
+# 예열 스레드 이름 (로그 필터 기준)
+WARMUP_THREAD_NAME = 'demand-warmup'
+
+# 세션 컨텍스트가 없는 스레드의 Streamlit 호출을 경고하는 로거
+SCRIPT_RUN_CONTEXT_LOGGER = 'streamlit.runtime.scriptrunner_utils.script_run_context'
+
+class _WarmupThreadLogFilter(logging.Filter):
+    """예열 스레드에서 남긴 로그 레코드 제외 (다른 스레드의 경고는 그대로 출력)"""
+
+    def filter(self, record):
+        return record.threadName != WARMUP_THREAD_NAME
+
+_warmup_log_filter = _WarmupThreadLogFilter()
+
+def _suppress_warmup_context_warnings():
+    """'missing ScriptRunContext' 경고 로거에 예열 스레드 필터 등록 (한 번만)"""
+    logger = logging.getLogger(SCRIPT_RUN_CONTEXT_LOGGER)
+    if _warmup_log_filter not in logger.filters:
+        logger.addFilter(_warmup_log_filter)
+
+def warmup_enabled():
+    """예열 사용 여부 (DEMAND_WARMUP=1일 때만 사용)"""
+    return os.environ.get(WARMUP_ENV, '0') == '1'
+
+def build_warmup_tasks(future_months, past_months, routes, default_routes):
+    """
+    예열 작업 목록 - [(모드, 월, 경로 튜플)]
+    기본 경로 조합을 먼저(첫 화면), 이어서 경로 하나씩 / 각 경로 선택마다 미래 월 → 과거 월 순서
+    """
+    selections = [tuple(default_routes)] + [(route,) for route in routes if (route,) != tuple(default_routes)]
+    tasks = []
+    for selection in selections:
+        tasks.extend(('future', month, selection) for month in future_months)
+        tasks.extend(('past', month, selection) for month in past_months)
+    return tasks
+
+class WarmupJob:
+    """
+    백그라운드 예열 작업 (데몬 스레드 하나에서 작업 목록을 순서대로 실행)
+    progress(): (완료 수, 전체 수, 현재 작업), finished / failures / elapsed로 상태 조회
+    failures: 실패한 작업과 사유 [((모드, 월, 경로 튜플), 오류 메시지)]
+    """
+
+    def __init__(self, tasks, product_info, sales_history, kpi_store):
+        self.tasks = list(tasks)
+        self.product_info = product_info
+        self.sales_history = sales_history
+        self.kpi_store = kpi_store
+        self.completed = 0
+        self.failures = []
+        self.current = None
+        self.finished = False
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=WARMUP_THREAD_NAME, daemon=True)
+
+    def start(self):
+        _suppress_warmup_context_warnings()
+        self._thread.start()
+        return self
+
+    def progress(self):
+        with self._lock:
+            return self.completed, len(self.tasks), self.current
+
+    def failure_list(self):
+        with self._lock:
+            return list(self.failures)
+
+    def _run_task(self, mode, month, routes):
+        if mode == 'future':
+            warm_future_prediction(self.product_info, self.sales_history, self.kpi_store, month, list(routes))
+        else:
+            # KPI 기반 / 글로벌 ML 비교 화면은 같은 비교 결과, 판매데이터 기반 화면은 설정 조합 텐서 사용
+            warm_past_comparison(self.product_info, self.sales_history, self.kpi_store, month, list(routes))
+            warm_sales_based_prediction(self.sales_history, month, list(routes))
+
+    def _run(self):
+        started = time.perf_counter()
+        for mode, month, routes in self.tasks:
+            with self._lock:
+                self.current = (mode, month, routes)
+            try:
+                self._run_task(mode, month, routes)
+            except Exception as e:
+                # 예열 실패는 화면에 영향 없음 (해당 조합은 요청 시 계산) - 사유는 사이드바에 표시
+                reason = f"{type(e).__name__}: {e}"
+                debug_print(f"예열 실패: {mode} {month} {', '.join(routes)} ({reason})")
+                with self._lock:
+                    self.failures.append(((mode, month, routes), reason))
+            with self._lock:
+                self.completed += 1
+            time.sleep(WARMUP_YIELD_SECONDS)
+        with self._lock:
+            self.current = None
+            self.elapsed = time.perf_counter() - started
+            self.finished = True
+        debug_print(f"예열 완료: {len(self.tasks)}개 조합 (실패 {len(self.failures)}개, {self.elapsed:.1f}초)")
+
+@st.cache_resource(show_spinner=False)
+def start_warmup(data_version, future_months, past_months, routes, default_routes,
+                 _product_info, _sales_history, _kpi_store):
+    """
+    데이터 버전 / 월 옵션마다 예열 작업을 프로세스당 한 번만 시작 (모든 세션이 같은 작업 공유)
+    """
+    tasks = build_warmup_tasks(future_months, past_months, routes, default_routes)
+    debug_print(f"예열 시작: {len(tasks)}개 조합")
+    return WarmupJob(tasks, _product_info, _sales_history, _kpi_store).start()
+
+def _display_warmup_status(job, refreshing):
+    completed, total, current = job.progress()
+    if job.finished:
+        if refreshing:
+            # 자동 갱신을 멈추기 위해 전체 앱을 한 번 다시 실행 (다음 실행에서는 갱신 주기 없이 등록)
+            st.rerun()
+        failures = job.failure_list()
+        message = f"✅ 예측 예열 완료: {total}개 조합 ({job.elapsed:.1f}초)"
+        if failures:
+            message += f" | 실패 {len(failures)}개 (요청 시 계산)"
+        st.caption(message)
+        if failures:
+            with st.expander(f"⚠️ 예열 실패 {len(failures)}개"):
+                for (mode, month, routes), reason in failures:
+                    st.caption(f"{month} {', '.join(routes)} ({WARMUP_MODE_LABELS[mode]}): {reason}")
+        return
+
+    label = f"⏳ 예측 예열 중 {completed}/{total}"
+    if current is not None:
+        mode, month, routes = current
+        label += f" - {month} {', '.join(routes)}"
+    st.progress(completed / total if total else 1.0, text=label)
+
+def display_warmup_progress(job):
+    """
+    예열 진행 표시 (fragment - 진행 중에는 WARMUP_REFRESH_SECONDS마다 이 표시만 다시 실행, 화면 스레드는 대기하지 않음)
+    """
+    refreshing = not job.finished
+    st.fragment(_display_warmup_status, run_every=WARMUP_REFRESH_SECONDS if refreshing else None)(job, refreshing)